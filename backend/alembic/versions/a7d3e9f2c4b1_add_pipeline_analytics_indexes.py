@@ -0,0 +1,43 @@
+"""Add pipeline analytics indexes
+
+Revision ID: a7d3e9f2c4b1
+Revises: f4b2c8d1e6a3
+Create Date: 2025-09-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9f2c4b1'
+down_revision = 'f4b2c8d1e6a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Composite indexes behind the pipeline GROUP BY and window queries."""
+    # Stage counts and date-ranged deal history (index-only scans)
+    op.create_index(
+        'idx_deals_created_status',
+        'deals',
+        ['created_at', 'status', 'updated_at'],
+        postgresql_using='btree'
+    )
+
+    # LEAD() OVER (PARTITION BY deal_id ORDER BY changed_at) and the funnel's per-deal MAX
+    op.create_index(
+        'idx_deal_status_history_deal_changed',
+        'deal_status_history',
+        ['deal_id', 'changed_at', 'new_status'],
+        postgresql_using='btree'
+    )
+
+    # Sector allocation GROUP BY
+    op.create_index('idx_companies_sector', 'companies', ['sector'], postgresql_using='btree')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_companies_sector', table_name='companies')
+    op.drop_index('idx_deal_status_history_deal_changed', table_name='deal_status_history')
+    op.drop_index('idx_deals_created_status', table_name='deals')
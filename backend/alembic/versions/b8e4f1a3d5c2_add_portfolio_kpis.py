@@ -0,0 +1,40 @@
+"""Add portfolio KPI time series
+
+Revision ID: b8e4f1a3d5c2
+Revises: a7d3e9f2c4b1
+Create Date: 2025-09-27 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4f1a3d5c2'
+down_revision = 'a7d3e9f2c4b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Narrow (company, metric, period, value) KPI rows reported by portfolio companies."""
+    op.create_table(
+        'portfolio_kpis',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('company_id', sa.String(length=255), nullable=False),
+        sa.Column('metric', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.Date(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        # Upsert target; also serves per-company series lookups
+        sa.UniqueConstraint('company_id', 'metric', 'period', name='uq_portfolio_kpis_company_metric_period')
+    )
+    # Period-ranged reads across all companies
+    op.create_index('idx_portfolio_kpis_period_metric', 'portfolio_kpis', ['period', 'metric'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_portfolio_kpis_period_metric', table_name='portfolio_kpis')
+    op.drop_table('portfolio_kpis')
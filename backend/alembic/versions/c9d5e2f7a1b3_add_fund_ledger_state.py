@@ -0,0 +1,32 @@
+"""Add shared fund ledger state
+
+Revision ID: c9d5e2f7a1b3
+Revises: b8e4f1a3d5c2
+Create Date: 2025-10-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c9d5e2f7a1b3'
+down_revision = 'b8e4f1a3d5c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Stale flag for the daily totals, visible to every worker."""
+    op.create_table(
+        'fund_ledger_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('stale', sa.Boolean(), nullable=False),
+        sa.Column('rebuilt_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Totals written by the read-modify-write version may have drifted: rebuild on first read
+    op.execute("INSERT INTO fund_ledger_state (id, stale) VALUES (1, true)")
+
+
+def downgrade() -> None:
+    op.drop_table('fund_ledger_state')
@@ -0,0 +1,64 @@
+"""Add creation_records metadata index
+
+Revision ID: e3f1a7c2b9d4
+Revises: 7b263c7c538f
+Create Date: 2025-09-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e3f1a7c2b9d4'
+down_revision = '7b263c7c538f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Mirror creation metadata into an indexed table (payloads stay in Chroma)."""
+    op.create_table(
+        'creation_records',
+        sa.Column('creation_id', sa.String(length=255), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('creation_type', sa.String(length=50), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('openbb_module', sa.String(length=255), nullable=False),
+        sa.Column('openbb_tool', sa.String(length=255), nullable=False),
+        sa.Column('parameters', sa.JSON(), nullable=True),
+        sa.Column('symbols', postgresql.ARRAY(sa.String()), server_default=sa.text("'{}'"), nullable=False),
+        sa.Column('sectors', postgresql.ARRAY(sa.String()), server_default=sa.text("'{}'"), nullable=False),
+        sa.Column('tags', postgresql.ARRAY(sa.String()), server_default=sa.text("'{}'"), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=True),
+        sa.Column('chart_url', sa.String(), nullable=True),
+        sa.Column('web_url', sa.String(), nullable=True),
+        sa.Column('data_period', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.String(), nullable=True),
+        sa.Column('investment_thesis', sa.String(), nullable=True),
+        sa.Column('priority', sa.String(length=20), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint('creation_id')
+    )
+
+    # Newest-first listing per user, optionally narrowed by type/category
+    op.create_index('idx_creation_records_user_created', 'creation_records', ['user_id', 'created_at'])
+    op.create_index(
+        'idx_creation_records_user_type_category',
+        'creation_records',
+        ['user_id', 'creation_type', 'category', 'created_at']
+    )
+
+    # Array containment/overlap (symbols && ARRAY[...]) for symbol and tag filters
+    op.create_index('idx_creation_records_symbols', 'creation_records', ['symbols'], postgresql_using='gin')
+    op.create_index('idx_creation_records_tags', 'creation_records', ['tags'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_creation_records_tags', table_name='creation_records')
+    op.drop_index('idx_creation_records_symbols', table_name='creation_records')
+    op.drop_index('idx_creation_records_user_type_category', table_name='creation_records')
+    op.drop_index('idx_creation_records_user_created', table_name='creation_records')
+    op.drop_table('creation_records')
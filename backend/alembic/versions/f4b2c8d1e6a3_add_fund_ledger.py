@@ -0,0 +1,50 @@
+"""Add fund ledger and daily totals
+
+Revision ID: f4b2c8d1e6a3
+Revises: e3f1a7c2b9d4
+Create Date: 2025-09-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f4b2c8d1e6a3'
+down_revision = 'e3f1a7c2b9d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Fund cashflows/valuations projected from deals, with per-day running totals."""
+    op.create_table(
+        'fund_ledger_entries',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('deal_id', sa.String(length=255), nullable=False),
+        sa.Column('company', sa.String(length=255), nullable=True),
+        sa.Column('entry_date', sa.Date(), nullable=False),
+        sa.Column('entry_type', sa.String(length=20), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('nav_change', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_fund_ledger_entries_deal_id', 'fund_ledger_entries', ['deal_id'])
+    op.create_index('idx_fund_ledger_entries_date', 'fund_ledger_entries', ['entry_date'])
+
+    op.create_table(
+        'fund_daily_totals',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('paid_in', sa.Float(), nullable=False),
+        sa.Column('distributions', sa.Float(), nullable=False),
+        sa.Column('nav_change', sa.Float(), nullable=False),
+        sa.Column('entries', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('fund_daily_totals')
+    op.drop_index('idx_fund_ledger_entries_date', table_name='fund_ledger_entries')
+    op.drop_index('ix_fund_ledger_entries_deal_id', table_name='fund_ledger_entries')
+    op.drop_table('fund_ledger_entries')
@@ -9,7 +9,7 @@ from pydantic import BaseModel
 from datetime import datetime
 import json
 
-from ..core.claude_terminal import ClaudeTerminal, QueryResult
+from ..core.claude_terminal import ClaudeTerminal, QueryResult, get_claude_terminal
 from ..database import get_db
 from sqlmodel import Session
 
@@ -51,8 +51,8 @@ async def process_terminal_query(
     """
     
     try:
-        # Initialize Claude terminal
-        terminal = ClaudeTerminal()
+        # Shared Claude terminal (tool catalog is built once per process)
+        terminal = get_claude_terminal()
         
         # Process query with AI reasoning
         result = await terminal.process_query(
@@ -123,7 +123,7 @@ async def test_biotech_query(db: Session = Depends(get_db)):
     
     test_query = "list top bio tech companies in us (not health care or pill maker), rank by market"
     
-    terminal = ClaudeTerminal()
+    terminal = get_claude_terminal()
     result = await terminal.process_query(test_query)
     
     return {
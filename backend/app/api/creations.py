@@ -56,7 +56,9 @@ async def get_user_creations(
     creation_type: Optional[str] = Query(None, description="Filter by creation type"),
     category: Optional[str] = Query(None, description="Filter by category"),
     symbols: Optional[str] = Query(None, description="Comma-separated symbols to filter by"),
-    limit: int = Query(50, description="Maximum number of results")
+    tags: Optional[str] = Query(None, description="Comma-separated tags that must all be present"),
+    limit: int = Query(50, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip")
 ):
     """
     Get all creations for a user with optional filters
@@ -68,14 +70,17 @@ async def get_user_creations(
         creation_type_filter = CreationType(creation_type) if creation_type else None
         category_filter = CreationCategory(category) if category else None
         symbols_filter = symbols.split(",") if symbols else None
+        tags_filter = tags.split(",") if tags else None
         
-        # Retrieve creations
+        # Retrieve creations (filtered and paginated by the creation index)
         creations = await creation_recorder.get_user_creations(
             user_id=user_id,
             creation_type=creation_type_filter,
             category=category_filter,
             symbols=symbols_filter,
-            limit=limit
+            tags=tags_filter,
+            limit=limit,
+            offset=offset
         )
         
         # Convert to summary format
@@ -102,64 +107,17 @@ async def get_user_creations(
         raise HTTPException(status_code=500, detail=f"Failed to retrieve creations: {str(e)}")
 
 
-@router.get("/creations/{user_id}/{creation_id}", response_model=CreationDetail)
-async def get_creation_detail(user_id: str, creation_id: str):
-    """
-    Get detailed view of a specific creation
-    Includes full data and AI-generated insights
-    """
-    
-    try:
-        # Get all user creations and find the specific one
-        creations = await creation_recorder.get_user_creations(user_id=user_id, limit=1000)
-        
-        target_creation = None
-        for creation in creations:
-            if creation.metadata.creation_id == creation_id:
-                target_creation = creation
-                break
-        
-        if not target_creation:
-            raise HTTPException(status_code=404, detail="Creation not found")
-        
-        # Convert to detailed format
-        detail = CreationDetail(
-            creation_id=target_creation.metadata.creation_id,
-            title=target_creation.metadata.title,
-            description=target_creation.metadata.description,
-            creation_type=target_creation.metadata.creation_type.value,
-            category=target_creation.metadata.category.value,
-            symbols=target_creation.metadata.symbols,
-            sectors=target_creation.metadata.sectors,
-            created_at=target_creation.metadata.created_at,
-            openbb_tool=target_creation.metadata.openbb_tool,
-            openbb_module=target_creation.metadata.openbb_module,
-            parameters=target_creation.metadata.parameters,
-            chart_url=target_creation.metadata.chart_url,
-            web_url=target_creation.metadata.web_url,
-            priority=target_creation.metadata.priority,
-            tags=target_creation.metadata.tags,
-            summary=target_creation.summary,
-            key_insights=target_creation.key_insights,
-            data=target_creation.data
-        )
-        
-        return detail
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve creation detail: {str(e)}")
-
-
 @router.get("/creations/{user_id}/search")
 async def search_creations(
     user_id: str,
     query: str = Query(..., description="Search query"),
+    creation_type: Optional[str] = Query(None, description="Filter by creation type"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols to filter by"),
     limit: int = Query(20, description="Maximum number of results")
 ):
     """
-    Search user's creations using semantic search
+    Search user's creations with hybrid keyword + semantic ranking
     Enables finding relevant analysis, charts, and reports
     """
     
@@ -167,7 +125,10 @@ async def search_creations(
         creations = await creation_recorder.search_creations(
             user_id=user_id,
             query=query,
-            n_results=limit
+            n_results=limit,
+            creation_type=CreationType(creation_type) if creation_type else None,
+            category=CreationCategory(category) if category else None,
+            symbols=symbols.split(",") if symbols else None
         )
         
         # Convert to summary format
@@ -194,6 +155,30 @@ async def search_creations(
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
+@router.get("/creations/{user_id}/reports/search")
+async def search_research_reports(
+    user_id: str,
+    query: str = Query(..., description="Search query"),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols to filter by"),
+    limit: int = Query(20, description="Maximum number of results")
+):
+    """
+    Hybrid keyword + semantic search over all of the user's research reports,
+    including documents that are not OpenBB creations
+    """
+    
+    try:
+        return await creation_recorder.search_reports(
+            user_id=user_id,
+            query=query,
+            n_results=limit,
+            symbols=symbols.split(",") if symbols else None
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
 @router.get("/creations/{user_id}/categories")
 async def get_creation_categories(user_id: str):
     """
@@ -202,41 +187,8 @@ async def get_creation_categories(user_id: str):
     """
     
     try:
-        # Get all user creations
-        creations = await creation_recorder.get_user_creations(user_id=user_id, limit=1000)
-        
-        # Organize by category
-        categories = {}
-        for creation in creations:
-            category = creation.metadata.category.value
-            if category not in categories:
-                categories[category] = {
-                    "name": category,
-                    "count": 0,
-                    "recent_items": [],
-                    "creation_types": set()
-                }
-            
-            categories[category]["count"] += 1
-            categories[category]["creation_types"].add(creation.metadata.creation_type.value)
-            
-            # Add to recent items (keep only most recent 5)
-            if len(categories[category]["recent_items"]) < 5:
-                categories[category]["recent_items"].append({
-                    "creation_id": creation.metadata.creation_id,
-                    "title": creation.metadata.title,
-                    "created_at": creation.metadata.created_at,
-                    "symbols": creation.metadata.symbols
-                })
-        
-        # Convert sets to lists for JSON serialization
-        for category in categories.values():
-            category["creation_types"] = list(category["creation_types"])
-        
-        return {
-            "categories": list(categories.values()),
-            "total_creations": len(creations)
-        }
+        # Counts are aggregated in SQL; only the recent items per category are loaded
+        return await creation_recorder.get_category_overview(user_id)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get categories: {str(e)}")
@@ -298,6 +250,50 @@ async def get_portfolio_context_creations(user_id: str, symbols: str = Query(...
         raise HTTPException(status_code=500, detail=f"Failed to get portfolio context: {str(e)}")
 
 
+# Declared after the fixed sub-paths so /search, /categories, ... are not captured as creation ids
+@router.get("/creations/{user_id}/{creation_id}", response_model=CreationDetail)
+async def get_creation_detail(user_id: str, creation_id: str):
+    """
+    Get detailed view of a specific creation
+    Includes full data and AI-generated insights
+    """
+    
+    try:
+        target_creation = await creation_recorder.get_creation(user_id, creation_id)
+        
+        if not target_creation:
+            raise HTTPException(status_code=404, detail="Creation not found")
+        
+        # Convert to detailed format
+        detail = CreationDetail(
+            creation_id=target_creation.metadata.creation_id,
+            title=target_creation.metadata.title,
+            description=target_creation.metadata.description,
+            creation_type=target_creation.metadata.creation_type.value,
+            category=target_creation.metadata.category.value,
+            symbols=target_creation.metadata.symbols,
+            sectors=target_creation.metadata.sectors,
+            created_at=target_creation.metadata.created_at,
+            openbb_tool=target_creation.metadata.openbb_tool,
+            openbb_module=target_creation.metadata.openbb_module,
+            parameters=target_creation.metadata.parameters,
+            chart_url=target_creation.metadata.chart_url,
+            web_url=target_creation.metadata.web_url,
+            priority=target_creation.metadata.priority,
+            tags=target_creation.metadata.tags,
+            summary=target_creation.summary,
+            key_insights=target_creation.key_insights,
+            data=target_creation.data
+        )
+        
+        return detail
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve creation detail: {str(e)}")
+
+
 @router.get("/creation-types")
 async def get_available_creation_types():
     """Get all available creation types and categories"""
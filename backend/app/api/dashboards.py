@@ -9,14 +9,16 @@ from sqlmodel import Session, select
 from datetime import datetime
 
 from ..database import get_db
-from ..core.auth import get_current_active_user
-from ..models.users import User
+from ..core.auth import get_current_active_user, get_current_user
+from ..models.companies import Company
+from ..models.users import User, UserRole
 from ..models.dashboards import (
     DashboardLayout, DashboardLayoutCreate, DashboardLayoutUpdate, DashboardLayoutRead,
     WidgetConfiguration, WidgetConfigurationCreate, WidgetConfigurationUpdate, WidgetConfigurationRead,
     CompanyDataSource, CompanyDataSourceCreate, CompanyDataSourceUpdate, CompanyDataSourceRead,
     WidgetType, AssetType, WIDGET_LIBRARY
 )
+from ..services.widget_cache import widget_cache
 
 router = APIRouter()
 
@@ -339,6 +341,104 @@ async def remove_widget_from_layout(
         raise HTTPException(status_code=500, detail=f"Failed to remove widget: {str(e)}")
 
 
+# ===========================
+# WIDGET DATA CACHE ENDPOINTS
+# ===========================
+
+@router.get("/layouts/{layout_id}/widget-data")
+async def get_layout_widget_data(
+    layout_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get cached data for every visible widget in a layout in one batched read"""
+    try:
+        layout = db.get(DashboardLayout, layout_id)
+        
+        if not layout or layout.user_id != current_user.id:
+            raise HTTPException(status_code=404, detail="Dashboard layout not found")
+        
+        widgets = widget_cache.get_layout(db, layout_id)
+        
+        return {
+            "layout_id": layout_id,
+            "widgets": widgets,
+            "cached": sum(1 for widget in widgets.values() if widget["cached"]),
+            "missing": [widget_id for widget_id, widget in widgets.items() if not widget["cached"]]
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch widget data: {str(e)}")
+
+
+@router.put("/widgets/{widget_id}/data")
+async def store_widget_data(
+    widget_id: str,
+    data: Dict[str, Any],
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Cache computed data for a widget (expires per widget type)"""
+    try:
+        widget = db.get(WidgetConfiguration, widget_id)
+        
+        if not widget:
+            raise HTTPException(status_code=404, detail="Widget not found")
+        
+        layout = db.get(DashboardLayout, widget.dashboard_layout_id)
+        if not layout or layout.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to update this widget")
+        
+        cache_key = widget_cache.set(db, layout.company_id, widget.widget_type, widget.config, data)
+        db.commit()
+        
+        return {"widget_id": widget_id, "cache_key": cache_key}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to cache widget data: {str(e)}")
+
+
+@router.delete("/companies/{company_id}/widget-cache")
+async def invalidate_company_widget_cache(
+    company_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Drop all cached widget data for a company (admins, its owner, or users with a dashboard on it)"""
+    try:
+        company = db.get(Company, company_id)
+        
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+        
+        has_layout = db.exec(
+            select(DashboardLayout.id).where(
+                DashboardLayout.company_id == company_id,
+                DashboardLayout.user_id == current_user.id
+            )
+        ).first()
+        if (current_user.role != UserRole.ADMIN
+                and current_user.id not in (company.owner_user_id, company.created_by)
+                and not has_layout):
+            raise HTTPException(status_code=403, detail="Not authorized to clear this company's widget cache")
+        
+        deleted = widget_cache.invalidate_company(db, company_id)
+        db.commit()
+        
+        return {"company_id": company_id, "deleted": deleted}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to invalidate widget cache: {str(e)}")
+
+
 # ===========================
 # COMPANY DATA SOURCE ENDPOINTS
 # ===========================
@@ -11,6 +11,7 @@ from ..models.deals import (
 from ..models.companies import Company
 from ..models.users import User
 from ..core.auth import get_current_active_user
+from ..services.fund_ledger import fund_ledger
 
 router = APIRouter()
 
@@ -48,6 +49,7 @@ async def create_deal(
         notes="Deal created"
     )
     db.add(status_history)
+    fund_ledger.sync_deal(db, db_deal, company.name)
     db.commit()
     
     # Add background task for AI analysis
@@ -160,7 +162,9 @@ async def update_deal(
             notes=f"Status changed from {previous_status} to {db_deal.status}"
         )
         db.add(status_history)
-        db.commit()
+    
+    fund_ledger.sync_deal(db, db_deal)
+    db.commit()
     
     return db_deal
 
@@ -200,6 +204,7 @@ async def update_deal_status(
         notes=notes or f"Status updated to {new_status}"
     )
     db.add(status_history)
+    fund_ledger.sync_deal(db, deal)
     db.commit()
     
     # Trigger status-specific AI workflows
@@ -247,6 +252,7 @@ async def delete_deal(
         )
     
     db.delete(deal)
+    fund_ledger.remove_deal(db, deal_id)
     db.commit()
     
     return {"message": "Deal deleted successfully"}
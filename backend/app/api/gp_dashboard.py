@@ -3,13 +3,15 @@ GP Dashboard API endpoints
 Provides data for the 7-module GP dashboard system
 """
 
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional, Dict, Any, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Query, Body
 from sqlmodel import Session, select, func
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 import numpy as np
+import pandas as pd
 from dataclasses import dataclass
+from pydantic import BaseModel, Field
 
 from ..database import get_db
 from ..core.auth import get_current_active_user
@@ -17,6 +19,13 @@ from ..models.users import User
 from ..models.companies import Company
 from ..models.deals import Deal, DealStatus, InvestmentStage
 from ..services.market_data_service import market_data_service
+from ..services import xirr_engine
+from ..services.pipeline_analytics import pipeline_analytics
+from ..services.dashboard_bundle import DashboardBundle
+from ..services.kpi_store import kpi_store, derive_metrics, KPI_METRICS, COHORTS
+from ..utils.frames import records
+from ..services.fund_ledger import fund_ledger, residual_value_of, MOCK_DISTRIBUTION_DELAY, MOCK_DISTRIBUTION_MULTIPLE
+from ..services.fund_simulator import fund_simulator, positions_from_deals, SimulationAssumptions
 
 router = APIRouter()
 
@@ -29,42 +38,118 @@ class CashFlow:
 
 def xirr(cashflows: List[CashFlow]) -> float:
     """
-    Calculate XIRR (Internal Rate of Return) using Newton-Raphson method
+    Calculate XIRR (Internal Rate of Return); 0.0 when the cashflows have no IRR
     """
     if not cashflows or len(cashflows) < 2:
         return 0.0
-    
-    # Sort by date
-    cashflows_sorted = sorted(cashflows, key=lambda cf: cf.date)
-    
-    # Convert to days from first cashflow
-    start_date = cashflows_sorted[0].date
-    dates = [(cf.date - start_date).days for cf in cashflows_sorted]
-    amounts = [cf.amount for cf in cashflows_sorted]
-    
-    # Newton-Raphson method for XIRR calculation
-    guess = 0.1  # 10% initial guess
-    
-    for _ in range(100):  # Max iterations
-        npv = sum(amount / ((1 + guess) ** (day / 365)) for amount, day in zip(amounts, dates))
-        derivative = sum(-amount * day / 365 / ((1 + guess) ** (day / 365 + 1)) for amount, day in zip(amounts, dates))
-        
-        if abs(derivative) < 1e-12:
-            break
-            
-        new_guess = guess - npv / derivative
-        
-        if abs(new_guess - guess) < 1e-8:
-            return new_guess
-            
-        guess = new_guess
-    
-    return guess
+    irr = xirr_engine.xirr([cf.date for cf in cashflows], [cf.amount for cf in cashflows])
+    return irr if irr is not None else 0.0
+
+def _percent(rate: Optional[float]) -> Optional[float]:
+    return round(rate * 100, 2) if rate is not None else None
+
+def irr_breakdown(deals: List[Any], as_of: date) -> Dict[str, Any]:
+    """
+    Per-deal, per-sector, per-vintage and rolling quarterly IRR for (deal, company) rows,
+    each solved for all groups at once. Positions are marked at residual value on `as_of`.
+    """
+    deal_ids, sectors, vintages, dates, amounts = [], [], [], [], []
+    realized = []  # Calls and distributions, without the terminal residual values
+    investments = []  # (invested on, residual value) for the rolling NAV
+
+    def add(deal, company, day, amount, terminal=False):
+        deal_ids.append(deal.id)
+        sectors.append(company.sector or "Unknown")
+        vintages.append(deal.created_at.year)
+        dates.append(day)
+        amounts.append(amount)
+        if not terminal:
+            realized.append((day, amount))
+
+    for deal, company in deals:
+        if not deal.created_at or not deal.our_target or deal.our_target <= 0:
+            continue
+        invested_on = deal.created_at.date()
+        add(deal, company, invested_on, -float(deal.our_target))
+        # Same mock distributions as the fund ledger
+        if deal.status == DealStatus.TRACK:
+            distributed_on = invested_on + MOCK_DISTRIBUTION_DELAY
+            if distributed_on <= as_of:
+                add(deal, company, distributed_on, float(deal.our_target) * MOCK_DISTRIBUTION_MULTIPLE)
+        residual = residual_value_of(deal)
+        if residual > 0:
+            add(deal, company, as_of, residual, terminal=True)
+            investments.append((invested_on, residual))
+
+    if not amounts:
+        return {"by_deal": {}, "by_sector": {}, "by_vintage": {}, "rolling_quarterly": []}
+
+    # Rolling fund IRR: flows to date plus the NAV of positions held at each quarter end
+    quarters = xirr_engine.quarter_ends(min(dates), as_of)
+    invested_days = xirr_engine.to_days([invested_on for invested_on, _ in investments])
+    order = np.argsort(invested_days)
+    held_value = np.concatenate([[0.0], np.cumsum(np.array([value for _, value in investments])[order])])
+    navs = held_value[np.searchsorted(invested_days[order], xirr_engine.to_days(quarters), side="right")]
+    rolling = xirr_engine.rolling_xirr(
+        [day for day, _ in realized], [amount for _, amount in realized], quarters, terminal_values=navs
+    )
+
+    return {
+        "by_deal": {deal_id: _percent(rate) for deal_id, rate in xirr_engine.xirr_by(deal_ids, dates, amounts).items()},
+        "by_sector": {sector: _percent(rate) for sector, rate in xirr_engine.xirr_by(sectors, dates, amounts).items()},
+        "by_vintage": {vintage: _percent(rate) for vintage, rate in xirr_engine.xirr_by(vintages, dates, amounts).items()},
+        "rolling_quarterly": [
+            {"quarter_end": quarter.isoformat(), "irr": _percent(rate)} for quarter, rate in zip(quarters, rolling)
+        ],
+    }
+
+def _load_company_deals(db: Session) -> List[Any]:
+    """Every company with each of its deals (deal is None for companies without one)"""
+    return db.exec(select(Company, Deal).join(Deal, Company.id == Deal.company_id, isouter=True)).all()
 
 # ===========================
 # MODULE 1: FUND PERFORMANCE
 # ===========================
 
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Query date (ISO datetime or YYYY-MM-DD) as a datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # If parsing fails, try with date only
+        return datetime.strptime(value, "%Y-%m-%d")
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    parsed = _parse_datetime(value)
+    return parsed.date() if parsed else None
+
+
+def cashflow_rows(entries: List[Any]) -> List[Dict[str, Any]]:
+    """Capital call and distribution ledger entries as cashflow rows"""
+    return [
+        {
+            "date": entry.entry_date.isoformat(),
+            "amount": entry.amount,  # Negative for calls, positive for distributions
+            "type": entry.entry_type,
+            "company": entry.company,
+            "deal_id": entry.deal_id
+        }
+        for entry in entries
+    ]
+
+
+def fund_valuations(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "paid_in_capital": metrics["paid_in_capital"],
+        "residual_value": metrics["residual_value"],
+        "total_value": metrics["residual_value"],  # Residual + any realized distributions
+        "calculated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/fund/cashflows")
 async def get_fund_cashflows(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -74,60 +159,7 @@ async def get_fund_cashflows(
 ):
     """Get fund cashflow data (capital calls and distributions)"""
     try:
-        # Get deals with investment data
-        deals_query = select(Deal, Company).join(Company, Deal.company_id == Company.id)
-        
-        if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date)
-                deals_query = deals_query.where(Deal.created_at >= start_dt)
-            except ValueError:
-                # If parsing fails, try with date only
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                deals_query = deals_query.where(Deal.created_at >= start_dt)
-        if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date)
-                deals_query = deals_query.where(Deal.created_at <= end_dt)
-            except ValueError:
-                # If parsing fails, try with date only
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                deals_query = deals_query.where(Deal.created_at <= end_dt)
-        
-        deals = db.exec(deals_query).all()
-        
-        cashflows = []
-        
-        for deal, company in deals:
-            # Skip deals without creation date
-            if not deal.created_at:
-                continue
-                
-            # Capital calls (investments)
-            if deal.our_target and deal.our_target > 0:
-                cashflows.append({
-                    "date": deal.created_at.date().isoformat(),
-                    "amount": -float(deal.our_target),  # Negative for cash outflow
-                    "type": "call",
-                    "company": company.name,
-                    "deal_id": deal.id
-                })
-            
-            # Mock distributions for closed deals (would come from actual distribution records)
-            if deal.status == DealStatus.TRACK and deal.our_target:
-                # Simulate some distributions for demo
-                distribution_date = deal.created_at + timedelta(days=365)
-                distribution_amount = float(deal.our_target) * 1.5  # 1.5x return simulation
-                
-                cashflows.append({
-                    "date": distribution_date.date().isoformat(),
-                    "amount": distribution_amount,  # Positive for cash inflow
-                    "type": "distribution",
-                    "company": company.name,
-                    "deal_id": deal.id
-                })
-        
-        return cashflows
+        return cashflow_rows(fund_ledger.entries(db, _parse_date(start_date), _parse_date(end_date)))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch cashflows: {str(e)}")
@@ -140,30 +172,7 @@ async def get_fund_valuations(
 ):
     """Get fund valuation data (paid-in capital, residual value)"""
     try:
-        # Calculate paid-in capital from all investments
-        deals = db.exec(select(Deal).where(Deal.our_target.isnot(None))).all()
-        
-        paid_in_capital = sum(float(deal.our_target) for deal in deals if deal.our_target)
-        
-        # Calculate residual value (current portfolio value)
-        # For demo, use a multiplier based on deal performance
-        residual_value = 0
-        for deal in deals:
-            if deal.our_target and deal.status in [DealStatus.DEAL, DealStatus.TRACK]:
-                # Mock current valuation - would come from regular portfolio updates
-                multiplier = {
-                    DealStatus.DEAL: 1.2,  # Early stage growth
-                    DealStatus.TRACK: 2.1   # Mature portfolio company
-                }.get(deal.status, 1.0)
-                
-                residual_value += float(deal.our_target) * multiplier
-        
-        return {
-            "paid_in_capital": paid_in_capital,
-            "residual_value": residual_value,
-            "total_value": residual_value,  # Residual + any realized distributions
-            "calculated_at": datetime.now().isoformat()
-        }
+        return fund_valuations(fund_ledger.metrics(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch valuations: {str(e)}")
@@ -171,77 +180,189 @@ async def get_fund_valuations(
 
 @router.get("/fund/metrics")
 async def get_fund_metrics(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Calculate comprehensive fund performance metrics"""
+    """Calculate comprehensive fund performance metrics (IRR, TVPI, DPI, MOIC) from the fund ledger"""
     try:
-        # Get cashflows and valuations
-        cashflows_response = await get_fund_cashflows(start_date=None, end_date=None, current_user=current_user, db=db)
-        valuations = await get_fund_valuations(current_user=current_user, db=db)
-        
-        # Convert to CashFlow objects for XIRR calculation
-        cashflow_objects = []
-        for cf in cashflows_response:
-            # cf["date"] is already a string in YYYY-MM-DD format
-            try:
-                cf_date = datetime.fromisoformat(cf["date"]).date()
-            except ValueError:
-                # If it's just a date string, parse it directly
-                cf_date = datetime.strptime(cf["date"], "%Y-%m-%d").date()
-            
-            cashflow_objects.append(CashFlow(
-                date=cf_date,
-                amount=cf["amount"],
-                type=cf["type"]
-            ))
-        
-        # Add current NAV as final cashflow for IRR calculation
-        if valuations["residual_value"] > 0:
-            cashflow_objects.append(CashFlow(
-                date=datetime.now().date(),
-                amount=valuations["residual_value"],
-                type="valuation"
-            ))
-        
-        # Calculate IRR
-        irr = xirr(cashflow_objects)
-        
-        # Calculate other metrics
-        paid_in_capital = valuations["paid_in_capital"]
-        residual_value = valuations["residual_value"]
-        
-        # Total distributions
-        total_distributions = sum(cf["amount"] for cf in cashflows_response if cf["type"] == "distribution")
-        
-        # TVPI = (Distributions + Residual Value) / Paid-In Capital
-        tvpi = (total_distributions + residual_value) / paid_in_capital if paid_in_capital > 0 else 0
-        
-        # DPI = Distributions / Paid-In Capital
-        dpi = total_distributions / paid_in_capital if paid_in_capital > 0 else 0
-        
-        # MOIC = Total Value / Invested Capital (same as TVPI in this case)
-        moic = tvpi
+        metrics = fund_ledger.metrics(db, _parse_date(start_date), _parse_date(end_date))
+        metrics["calculated_at"] = datetime.now().isoformat()
+        return metrics
         
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to calculate fund metrics: {str(e)}")
+
+
+@router.get("/fund/metrics/history")
+async def get_fund_metrics_history(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    interval: str = Query("quarter", pattern="^(month|quarter|year)$", description="Point spacing"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Since-inception fund metrics at each period end, for charting"""
+    try:
         return {
-            "irr": round(irr * 100, 2),  # Convert to percentage
-            "tvpi": round(tvpi, 2),
-            "dpi": round(dpi, 2),
-            "moic": round(moic, 2),
-            "paid_in_capital": paid_in_capital,
-            "residual_value": residual_value,
-            "total_distributions": total_distributions,
+            "interval": interval,
+            "series": fund_ledger.history(db, _parse_date(start_date), _parse_date(end_date), interval),
             "calculated_at": datetime.now().isoformat()
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to calculate fund metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch fund metrics history: {str(e)}")
+
+
+class FundSimulationRequest(BaseModel):
+    scenarios: int = Field(20_000, description="Number of simulated scenarios")
+    seed: Optional[int] = Field(None, description="Random seed; the same seed and inputs give the same result")
+    as_of: Optional[str] = Field(None, description="Simulation date (YYYY-MM-DD); exits happen after it")
+    fund_size: Optional[float] = Field(None, description="Committed capital (defaults to the invested total)")
+    management_fee: float = Field(0.02, description="Annual management fee on committed capital")
+    fee_years: int = Field(10, description="Years management fees are charged")
+    carry: float = Field(0.20, description="Carried interest on profits")
+    fund_life_years: int = Field(10, description="Remaining positions are sold at the end of fund life")
+    distribution_lag_quarters: int = Field(1, description="Quarters from exit to LP distribution")
+    market_volatility: float = Field(0.25, description="Volatility of the fund-wide market factor")
+    outcomes: Dict[str, List[Tuple[float, float, float]]] = Field(
+        default_factory=dict, description="Per stage (probability, low multiple, high multiple) exit buckets"
+    )
+    exit_years: Dict[str, Tuple[float, float]] = Field(
+        default_factory=dict, description="Per stage (earliest, latest) years from investment to exit"
+    )
+
+
+@router.post("/fund/simulate")
+async def simulate_fund(
+    request: FundSimulationRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Monte Carlo fund outcomes for the current portfolio: percentile bands of net TVPI,
+    net IRR and gross MOIC, exits per year, quarterly LP distributions and DPI, the
+    capital call schedule, and per-position outcome odds
+    """
+    try:
+        assumptions = SimulationAssumptions(**request.dict(exclude={"as_of"}))
+        deals = db.exec(select(Deal, Company).join(Company, Deal.company_id == Company.id)).all()
+        return await fund_simulator.run_async(
+            positions_from_deals(deals), assumptions, _parse_date(request.as_of) or datetime.now().date()
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to simulate fund outcomes: {str(e)}")
+
+
+@router.get("/fund/irr-breakdown")
+async def get_fund_irr_breakdown(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """IRR (%) per deal, sector and vintage year, and the fund's since-inception IRR by quarter"""
+    try:
+        deals = db.exec(select(Deal, Company).join(Company, Deal.company_id == Company.id)).all()
+        breakdown = irr_breakdown(deals, datetime.now().date())
+        breakdown["calculated_at"] = datetime.now().isoformat()
+        return breakdown
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to calculate IRR breakdown: {str(e)}")
 
 
 # ===========================
 # MODULE 2: PORTFOLIO PERFORMANCE
 # ===========================
 
+def company_metrics(companies: List[Company], reported: Optional[pd.DataFrame] = None) -> List[Dict[str, Any]]:
+    """Latest performance metrics per portfolio company: reported KPIs where available, mock figures otherwise"""
+    metrics = []
+    for company in companies:
+        # Mock financial metrics (would come from company reporting)
+        base_metrics = {
+            "company_id": company.id,
+            "company_name": company.name,
+            "sector": company.sector,
+        }
+
+        # Generate realistic metrics based on company type and sector
+        if company.company_type and company.company_type.value == "crypto":
+            # Crypto company metrics
+            metrics.append({
+                **base_metrics,
+                "mrr": 45000,
+                "arr": 540000,
+                "revenue": 135000,  # Quarterly
+                "gross_margin": 0.75,
+                "ltv": 12000,
+                "cac": 800,
+                "burn": 85000,  # Monthly
+                "cash_balance": 850000,
+                "headcount": 12,
+                "churn_rate": 0.05,
+                "net_rev_retention": 1.15,
+                # Previous period for growth calculations
+                "prev_mrr": 38000,
+                "prev_arr": 456000
+            })
+        elif "AI" in company.sector or "ai" in company.name.lower():
+            # AI company metrics
+            metrics.append({
+                **base_metrics,
+                "mrr": 125000,
+                "arr": 1500000,
+                "revenue": 375000,
+                "gross_margin": 0.80,
+                "ltv": 24000,
+                "cac": 1200,
+                "burn": 180000,
+                "cash_balance": 2100000,
+                "headcount": 28,
+                "churn_rate": 0.03,
+                "net_rev_retention": 1.25,
+                "prev_mrr": 98000,
+                "prev_arr": 1176000
+            })
+        else:
+            # Traditional SaaS/tech company
+            metrics.append({
+                **base_metrics,
+                "mrr": 85000,
+                "arr": 1020000,
+                "revenue": 255000,
+                "gross_margin": 0.72,
+                "ltv": 18000,
+                "cac": 950,
+                "burn": 125000,
+                "cash_balance": 1500000,
+                "headcount": 22,
+                "churn_rate": 0.04,
+                "net_rev_retention": 1.18,
+                "prev_mrr": 72000,
+                "prev_arr": 864000
+            })
+
+    if not metrics:
+        return []
+
+    # Reported KPIs replace the mock figures for companies that have them
+    frame = pd.DataFrame(metrics).set_index("company_id")
+    frame["reported"] = False
+    if reported is not None and not reported.empty:
+        reporting = frame.index.intersection(reported.index)
+        kpi_columns = [column for column in frame.columns if column in KPI_METRICS or column.startswith("prev_")]
+        frame.loc[reporting, kpi_columns] = np.nan
+        frame = reported.loc[reporting].combine_first(frame).reindex(frame.index)
+        frame.loc[reporting, "reported"] = True
+
+    # Growth, LTV:CAC and runway for all companies at once
+    return records(derive_metrics(frame))
+
+
 @router.get("/companies/metrics")
 async def get_portfolio_company_metrics(
     period: str = Query("monthly", description="Period for metrics"),
@@ -250,92 +371,81 @@ async def get_portfolio_company_metrics(
 ):
     """Get portfolio company performance metrics"""
     try:
-        companies = db.exec(select(Company)).all()
+        return company_metrics(db.exec(select(Company)).all(), kpi_store.latest(db))
         
-        metrics = []
-        for company in companies:
-            # Mock financial metrics (would come from company reporting)
-            base_metrics = {
-                "company_id": company.id,
-                "company_name": company.name,
-                "sector": company.sector,
-            }
-            
-            # Generate realistic metrics based on company type and sector
-            if company.company_type and company.company_type.value == "crypto":
-                # Crypto company metrics
-                metrics.append({
-                    **base_metrics,
-                    "mrr": 45000,
-                    "arr": 540000,
-                    "revenue": 135000,  # Quarterly
-                    "gross_margin": 0.75,
-                    "ltv": 12000,
-                    "cac": 800,
-                    "burn": 85000,  # Monthly
-                    "cash_balance": 850000,
-                    "headcount": 12,
-                    "churn_rate": 0.05,
-                    "net_rev_retention": 1.15,
-                    # Previous period for growth calculations
-                    "prev_mrr": 38000,
-                    "prev_arr": 456000
-                })
-            elif "AI" in company.sector or "ai" in company.name.lower():
-                # AI company metrics
-                metrics.append({
-                    **base_metrics,
-                    "mrr": 125000,
-                    "arr": 1500000,
-                    "revenue": 375000,
-                    "gross_margin": 0.80,
-                    "ltv": 24000,
-                    "cac": 1200,
-                    "burn": 180000,
-                    "cash_balance": 2100000,
-                    "headcount": 28,
-                    "churn_rate": 0.03,
-                    "net_rev_retention": 1.25,
-                    "prev_mrr": 98000,
-                    "prev_arr": 1176000
-                })
-            else:
-                # Traditional SaaS/tech company
-                metrics.append({
-                    **base_metrics,
-                    "mrr": 85000,
-                    "arr": 1020000,
-                    "revenue": 255000,
-                    "gross_margin": 0.72,
-                    "ltv": 18000,
-                    "cac": 950,
-                    "burn": 125000,
-                    "cash_balance": 1500000,
-                    "headcount": 22,
-                    "churn_rate": 0.04,
-                    "net_rev_retention": 1.18,
-                    "prev_mrr": 72000,
-                    "prev_arr": 864000
-                })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch company metrics: {str(e)}")
+
+
+@router.post("/companies/kpis")
+async def ingest_company_kpis(
+    rows: List[Dict[str, Any]],
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk ingest reported KPIs as long rows ({company_id|company, metric, period, value})
+    or wide rows ({company_id|company, period, mrr, arr, ...}). Existing values are replaced.
+    """
+    try:
+        return kpi_store.ingest(db, rows, source="json")
         
-        # Calculate derived metrics
-        for metric in metrics:
-            # MRR Growth Rate
-            metric["mrr_growth"] = (metric["mrr"] - metric["prev_mrr"]) / metric["prev_mrr"] if metric["prev_mrr"] > 0 else 0
-            
-            # ARR Growth Rate
-            metric["arr_growth"] = (metric["arr"] - metric["prev_arr"]) / metric["prev_arr"] if metric["prev_arr"] > 0 else 0
-            
-            # LTV:CAC Ratio
-            metric["ltv_cac_ratio"] = metric["ltv"] / metric["cac"] if metric["cac"] > 0 else 0
-            
-            # Runway (months)
-            metric["runway_months"] = metric["cash_balance"] / metric["burn"] if metric["burn"] > 0 else 999
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to ingest KPIs: {str(e)}")
+
+
+@router.post("/companies/kpis/csv")
+async def ingest_company_kpis_csv(
+    csv_text: str = Body(..., media_type="text/csv", description="CSV export in long or wide layout"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk ingest reported KPIs from a CSV export"""
+    try:
+        return kpi_store.ingest_csv(db, csv_text)
         
-        return metrics
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to ingest KPI CSV: {str(e)}")
+
+
+@router.get("/companies/kpis")
+async def get_company_kpis(
+    metrics: Optional[List[str]] = Query(None, description="Metrics to include (all when omitted)"),
+    company_ids: Optional[List[str]] = Query(None, alias="company_id", description="Companies to include"),
+    start_date: Optional[str] = Query(None, description="First period end (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Last period end (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Reported KPI series per company and period, with growth, LTV:CAC and runway"""
+    try:
+        series = kpi_store.series(db, metrics, _parse_date(start_date), _parse_date(end_date), company_ids)
+        return records(series)
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch company metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch KPIs: {str(e)}")
+
+
+@router.get("/companies/kpis/cohorts")
+async def get_company_kpi_cohorts(
+    by: str = Query("sector", pattern=f"^({'|'.join(COHORTS)})$", description="Cohort: sector, vintage or founded"),
+    start_date: Optional[str] = Query(None, description="First period end (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Last period end (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """KPI totals and median growth per cohort and reporting period"""
+    try:
+        return {
+            "by": by,
+            "cohorts": kpi_store.cohorts(db, by, _parse_date(start_date), _parse_date(end_date)),
+            "updated_at": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch KPI cohorts: {str(e)}")
 
 
 # ===========================
@@ -349,39 +459,29 @@ async def get_deal_stages(
 ):
     """Get deal counts by pipeline stage"""
     try:
-        stages = []
-        
-        # Count deals by status (using existing deal statuses as pipeline stages)
-        for status in DealStatus:
-            count = db.exec(
-                select(func.count(Deal.id)).where(Deal.status == status)
-            ).first()
-            
-            # Map deal status to pipeline stages
-            stage_mapping = {
-                DealStatus.PLANNED: "sourced",
-                DealStatus.MEETING: "screened", 
-                DealStatus.RESEARCH: "due-diligence",
-                DealStatus.DEAL: "term-sheet",
-                DealStatus.TRACK: "closed",
-                DealStatus.PASSED: "passed",
-                DealStatus.CLOSED: "completed"
-            }
-            
-            stage_name = stage_mapping.get(status, status.value.lower())
-            
-            stages.append({
-                "stage": stage_name,
-                "count": count or 0,
-                "status": status.value
-            })
-        
-        return stages
+        return pipeline_analytics.stage_counts(db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch deal stages: {str(e)}")
 
 
+@router.get("/deals/funnel")
+async def get_deal_funnel(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get funnel conversion rates and average time spent in each pipeline stage"""
+    try:
+        return {
+            "funnel": pipeline_analytics.funnel(db),
+            "time_in_stage": pipeline_analytics.time_in_stage(db),
+            "updated_at": datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch deal funnel: {str(e)}")
+
+
 @router.get("/deals/history")
 async def get_deal_history(
     from_date: Optional[str] = Query(None, description="From date (YYYY-MM-DD)"),
@@ -391,50 +491,7 @@ async def get_deal_history(
 ):
     """Get deal history for pipeline analytics"""
     try:
-        query = select(Deal)
-        
-        if from_date:
-            try:
-                from_dt = datetime.fromisoformat(from_date)
-                query = query.where(Deal.created_at >= from_dt)
-            except ValueError:
-                from_dt = datetime.strptime(from_date, "%Y-%m-%d")
-                query = query.where(Deal.created_at >= from_dt)
-        if to_date:
-            try:
-                to_dt = datetime.fromisoformat(to_date)
-                query = query.where(Deal.created_at <= to_dt)
-            except ValueError:
-                to_dt = datetime.strptime(to_date, "%Y-%m-%d")
-                query = query.where(Deal.created_at <= to_dt)
-        
-        deals = db.exec(query).all()
-        
-        history = []
-        for deal in deals:
-            # Mock closed date based on status
-            closed_at = None
-            outcome = "pending"
-            
-            if deal.status == DealStatus.TRACK:
-                closed_at = deal.updated_at + timedelta(days=45)  # Mock close time
-                outcome = "won"
-            elif deal.status == DealStatus.PASSED:
-                closed_at = deal.updated_at + timedelta(days=30)
-                outcome = "passed"
-            elif deal.status == DealStatus.CLOSED:
-                closed_at = deal.updated_at
-                outcome = "completed"
-            
-            history.append({
-                "deal_id": deal.id,
-                "created_at": deal.created_at.isoformat(),
-                "closed_at": closed_at.isoformat() if closed_at else None,
-                "outcome": outcome,
-                "cycle_time_days": (closed_at - deal.created_at).days if closed_at else None
-            })
-        
-        return history
+        return pipeline_analytics.deal_history(db, _parse_datetime(from_date), _parse_datetime(to_date))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch deal history: {str(e)}")
@@ -444,6 +501,33 @@ async def get_deal_history(
 # MODULE 4: MARKET TRENDS
 # ===========================
 
+def market_funding(interval: str = "quarterly") -> Dict[str, Any]:
+    """VC funding market trends"""
+    # Mock market funding data (would come from external sources like Crunchbase)
+    if interval == "quarterly":
+        funding_data = [
+            {"period": "2024Q1", "total_deals": 2340, "total_funding": 45_600_000_000},
+            {"period": "2024Q2", "total_deals": 2180, "total_funding": 41_200_000_000},
+            {"period": "2024Q3", "total_deals": 1980, "total_funding": 38_700_000_000},
+            {"period": "2024Q4", "total_deals": 2100, "total_funding": 42_100_000_000},
+            {"period": "2025Q1", "total_deals": 2250, "total_funding": 46_800_000_000},
+        ]
+    else:  # yearly
+        funding_data = [
+            {"period": "2021", "total_deals": 12_400, "total_funding": 240_000_000_000},
+            {"period": "2022", "total_deals": 10_800, "total_funding": 195_000_000_000},
+            {"period": "2023", "total_deals": 9_200, "total_funding": 158_000_000_000},
+            {"period": "2024", "total_deals": 8_600, "total_funding": 167_600_000_000},
+        ]
+
+    return {
+        "interval": interval,
+        "data": funding_data,
+        "source": "Market Intelligence (Mock Data)",
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/market/funding")
 async def get_market_funding(
     interval: str = Query("quarterly", description="quarterly or yearly"),
@@ -451,34 +535,36 @@ async def get_market_funding(
 ):
     """Get VC funding market trends"""
     try:
-        # Mock market funding data (would come from external sources like Crunchbase)
-        if interval == "quarterly":
-            funding_data = [
-                {"period": "2024Q1", "total_deals": 2340, "total_funding": 45_600_000_000},
-                {"period": "2024Q2", "total_deals": 2180, "total_funding": 41_200_000_000},
-                {"period": "2024Q3", "total_deals": 1980, "total_funding": 38_700_000_000},
-                {"period": "2024Q4", "total_deals": 2100, "total_funding": 42_100_000_000},
-                {"period": "2025Q1", "total_deals": 2250, "total_funding": 46_800_000_000},
-            ]
-        else:  # yearly
-            funding_data = [
-                {"period": "2021", "total_deals": 12_400, "total_funding": 240_000_000_000},
-                {"period": "2022", "total_deals": 10_800, "total_funding": 195_000_000_000},
-                {"period": "2023", "total_deals": 9_200, "total_funding": 158_000_000_000},
-                {"period": "2024", "total_deals": 8_600, "total_funding": 167_600_000_000},
-            ]
-        
-        return {
-            "interval": interval,
-            "data": funding_data,
-            "source": "Market Intelligence (Mock Data)",
-            "updated_at": datetime.now().isoformat()
-        }
+        return market_funding(interval)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch funding trends: {str(e)}")
 
 
+def market_exits(interval: str = "yearly") -> Dict[str, Any]:
+    """Exit activity data"""
+    if interval == "yearly":
+        exit_data = [
+            {"period": "2021", "ipo_count": 245, "ma_count": 1240, "total_exit_value": 85_000_000_000},
+            {"period": "2022", "ipo_count": 86, "ma_count": 980, "total_exit_value": 42_000_000_000},
+            {"period": "2023", "ipo_count": 34, "ma_count": 720, "total_exit_value": 28_000_000_000},
+            {"period": "2024", "ipo_count": 67, "ma_count": 890, "total_exit_value": 38_500_000_000},
+        ]
+    else:  # quarterly
+        exit_data = [
+            {"period": "2024Q3", "ipo_count": 12, "ma_count": 185, "total_exit_value": 8_200_000_000},
+            {"period": "2024Q4", "ipo_count": 18, "ma_count": 220, "total_exit_value": 12_800_000_000},
+            {"period": "2025Q1", "ipo_count": 15, "ma_count": 195, "total_exit_value": 9_600_000_000},
+        ]
+
+    return {
+        "interval": interval,
+        "data": exit_data,
+        "source": "Exit Intelligence (Mock Data)",
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/market/exits")
 async def get_market_exits(
     interval: str = Query("yearly", description="quarterly or yearly"),
@@ -486,31 +572,31 @@ async def get_market_exits(
 ):
     """Get exit activity data"""
     try:
-        if interval == "yearly":
-            exit_data = [
-                {"period": "2021", "ipo_count": 245, "ma_count": 1240, "total_exit_value": 85_000_000_000},
-                {"period": "2022", "ipo_count": 86, "ma_count": 980, "total_exit_value": 42_000_000_000},
-                {"period": "2023", "ipo_count": 34, "ma_count": 720, "total_exit_value": 28_000_000_000},
-                {"period": "2024", "ipo_count": 67, "ma_count": 890, "total_exit_value": 38_500_000_000},
-            ]
-        else:  # quarterly
-            exit_data = [
-                {"period": "2024Q3", "ipo_count": 12, "ma_count": 185, "total_exit_value": 8_200_000_000},
-                {"period": "2024Q4", "ipo_count": 18, "ma_count": 220, "total_exit_value": 12_800_000_000},
-                {"period": "2025Q1", "ipo_count": 15, "ma_count": 195, "total_exit_value": 9_600_000_000},
-            ]
-        
-        return {
-            "interval": interval,
-            "data": exit_data,
-            "source": "Exit Intelligence (Mock Data)",
-            "updated_at": datetime.now().isoformat()
-        }
+        return market_exits(interval)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch exit data: {str(e)}")
 
 
+def sector_allocation(sector_counts: Dict[str, int]) -> Dict[str, Any]:
+    """Portfolio sector allocation against market benchmarks"""
+    # Add market benchmark data
+    market_allocation = {
+        "AI/ML": {"portfolio": sector_counts.get("AI/ML", 0), "market_share": 18.5},
+        "FinTech": {"portfolio": sector_counts.get("FinTech", 0), "market_share": 22.1},
+        "HealthTech": {"portfolio": sector_counts.get("HealthTech", 0), "market_share": 15.3},
+        "Blockchain/Crypto": {"portfolio": sector_counts.get("Blockchain/Crypto", 0), "market_share": 8.7},
+        "Enterprise SaaS": {"portfolio": sector_counts.get("Enterprise SaaS", 0), "market_share": 28.4},
+        "Other": {"portfolio": sum(v for k, v in sector_counts.items() if k not in ["AI/ML", "FinTech", "HealthTech", "Blockchain/Crypto", "Enterprise SaaS"]), "market_share": 7.0}
+    }
+
+    return {
+        "portfolio_allocation": market_allocation,
+        "total_companies": sum(sector_counts.values()),
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/market/sector-allocation")
 async def get_sector_allocation(
     current_user: User = Depends(get_current_active_user),
@@ -518,29 +604,7 @@ async def get_sector_allocation(
 ):
     """Get sector allocation data"""
     try:
-        # Get actual portfolio sector allocation
-        companies = db.exec(select(Company)).all()
-        
-        sector_counts = {}
-        for company in companies:
-            sector = company.sector or "Unknown"
-            sector_counts[sector] = sector_counts.get(sector, 0) + 1
-        
-        # Add market benchmark data
-        market_allocation = {
-            "AI/ML": {"portfolio": sector_counts.get("AI/ML", 0), "market_share": 18.5},
-            "FinTech": {"portfolio": sector_counts.get("FinTech", 0), "market_share": 22.1},
-            "HealthTech": {"portfolio": sector_counts.get("HealthTech", 0), "market_share": 15.3},
-            "Blockchain/Crypto": {"portfolio": sector_counts.get("Blockchain/Crypto", 0), "market_share": 8.7},
-            "Enterprise SaaS": {"portfolio": sector_counts.get("Enterprise SaaS", 0), "market_share": 28.4},
-            "Other": {"portfolio": sum(v for k, v in sector_counts.items() if k not in ["AI/ML", "FinTech", "HealthTech", "Blockchain/Crypto", "Enterprise SaaS"]), "market_share": 7.0}
-        }
-        
-        return {
-            "portfolio_allocation": market_allocation,
-            "total_companies": len(companies),
-            "updated_at": datetime.now().isoformat()
-        }
+        return sector_allocation(pipeline_analytics.sector_counts(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch sector allocation: {str(e)}")
@@ -550,6 +614,31 @@ async def get_sector_allocation(
 # MODULE 5: LP REPORTING
 # ===========================
 
+def lp_calls() -> Dict[str, Any]:
+    """LP capital call schedule and amounts"""
+    # Mock LP call schedule (would come from fund administration system)
+    calls = [
+        {"call_number": 1, "date": "2023-01-15", "amount": 25_000_000, "purpose": "Initial closing and first investments"},
+        {"call_number": 2, "date": "2023-06-30", "amount": 18_000_000, "purpose": "Follow-on investments Q2"},
+        {"call_number": 3, "date": "2023-12-15", "amount": 22_000_000, "purpose": "New investments Q4"},
+        {"call_number": 4, "date": "2024-06-30", "amount": 15_000_000, "purpose": "Follow-on and new investments H1"},
+        {"call_number": 5, "date": "2024-12-15", "amount": 20_000_000, "purpose": "Portfolio support and new deals"},
+    ]
+
+    total_called = sum(call["amount"] for call in calls)
+    fund_size = 150_000_000  # $150M fund
+    remaining_commitment = fund_size - total_called
+
+    return {
+        "calls": calls,
+        "total_called": total_called,
+        "fund_size": fund_size,
+        "remaining_commitment": remaining_commitment,
+        "call_percentage": (total_called / fund_size) * 100,
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/lp/calls")
 async def get_lp_calls(
     current_user: User = Depends(get_current_active_user),
@@ -557,32 +646,38 @@ async def get_lp_calls(
 ):
     """Get LP capital call schedule and amounts"""
     try:
-        # Mock LP call schedule (would come from fund administration system)
-        calls = [
-            {"call_number": 1, "date": "2023-01-15", "amount": 25_000_000, "purpose": "Initial closing and first investments"},
-            {"call_number": 2, "date": "2023-06-30", "amount": 18_000_000, "purpose": "Follow-on investments Q2"},
-            {"call_number": 3, "date": "2023-12-15", "amount": 22_000_000, "purpose": "New investments Q4"},
-            {"call_number": 4, "date": "2024-06-30", "amount": 15_000_000, "purpose": "Follow-on and new investments H1"},
-            {"call_number": 5, "date": "2024-12-15", "amount": 20_000_000, "purpose": "Portfolio support and new deals"},
-        ]
-        
-        total_called = sum(call["amount"] for call in calls)
-        fund_size = 150_000_000  # $150M fund
-        remaining_commitment = fund_size - total_called
-        
-        return {
-            "calls": calls,
-            "total_called": total_called,
-            "fund_size": fund_size,
-            "remaining_commitment": remaining_commitment,
-            "call_percentage": (total_called / fund_size) * 100,
-            "updated_at": datetime.now().isoformat()
-        }
+        return lp_calls()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch LP calls: {str(e)}")
 
 
+def lp_distributions() -> Dict[str, Any]:
+    """LP distribution schedule and amounts"""
+    # Mock distribution schedule (would come from realized exits)
+    distributions = [
+        {"distribution_number": 1, "date": "2024-03-30", "amount": 8_500_000, "source": "Exit: TechCorp acquisition"},
+        {"distribution_number": 2, "date": "2024-09-15", "amount": 12_300_000, "source": "Exit: AIStartup IPO"},
+        {"distribution_number": 3, "date": "2024-12-20", "amount": 6_800_000, "source": "Secondary sale: DataCo"},
+    ]
+
+    total_distributed = sum(dist["amount"] for dist in distributions)
+
+    # Get total capital called for DPI calculation
+    calls_data = lp_calls()
+    total_called = calls_data["total_called"]
+
+    dpi = total_distributed / total_called if total_called > 0 else 0
+
+    return {
+        "distributions": distributions,
+        "total_distributed": total_distributed,
+        "total_called": total_called,
+        "dpi": round(dpi, 2),
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/lp/distributions")
 async def get_lp_distributions(
     current_user: User = Depends(get_current_active_user),
@@ -590,28 +685,7 @@ async def get_lp_distributions(
 ):
     """Get LP distribution schedule and amounts"""
     try:
-        # Mock distribution schedule (would come from realized exits)
-        distributions = [
-            {"distribution_number": 1, "date": "2024-03-30", "amount": 8_500_000, "source": "Exit: TechCorp acquisition"},
-            {"distribution_number": 2, "date": "2024-09-15", "amount": 12_300_000, "source": "Exit: AIStartup IPO"},
-            {"distribution_number": 3, "date": "2024-12-20", "amount": 6_800_000, "source": "Secondary sale: DataCo"},
-        ]
-        
-        total_distributed = sum(dist["amount"] for dist in distributions)
-        
-        # Get total capital called for DPI calculation
-        calls_data = await get_lp_calls(current_user=current_user, db=db)
-        total_called = calls_data["total_called"]
-        
-        dpi = total_distributed / total_called if total_called > 0 else 0
-        
-        return {
-            "distributions": distributions,
-            "total_distributed": total_distributed,
-            "total_called": total_called,
-            "dpi": round(dpi, 2),
-            "updated_at": datetime.now().isoformat()
-        }
+        return lp_distributions()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch distributions: {str(e)}")
@@ -621,6 +695,42 @@ async def get_lp_distributions(
 # MODULE 6: OPERATIONS & TEAM
 # ===========================
 
+def compliance_status(companies: List[Company]) -> Dict[str, Any]:
+    """Portfolio company reporting compliance status"""
+    # Mock compliance data (would come from portfolio management system)
+    compliance_data = []
+    total_companies = len(companies)
+    compliant_count = 0
+
+    for i, company in enumerate(companies):
+        # Simulate different compliance statuses
+        is_compliant = (i % 4) != 0  # 75% compliance rate
+        days_overdue = 0 if is_compliant else (i % 15) + 1
+
+        if is_compliant:
+            compliant_count += 1
+
+        compliance_data.append({
+            "company_id": company.id,
+            "company_name": company.name,
+            "is_compliant": is_compliant,
+            "last_report_date": (datetime.now() - timedelta(days=30 if is_compliant else 30 + days_overdue)).date().isoformat(),
+            "days_overdue": days_overdue,
+            "report_type": "Monthly Update"
+        })
+
+    compliance_rate = (compliant_count / total_companies) * 100 if total_companies > 0 else 100
+
+    return {
+        "compliance_data": compliance_data,
+        "total_companies": total_companies,
+        "compliant_companies": compliant_count,
+        "compliance_rate": round(compliance_rate, 1),
+        "overdue_companies": total_companies - compliant_count,
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/operations/compliance-status")
 async def get_compliance_status(
     current_user: User = Depends(get_current_active_user),
@@ -628,45 +738,65 @@ async def get_compliance_status(
 ):
     """Get portfolio company reporting compliance status"""
     try:
-        companies = db.exec(select(Company)).all()
-        
-        # Mock compliance data (would come from portfolio management system)
-        compliance_data = []
-        total_companies = len(companies)
-        compliant_count = 0
-        
-        for i, company in enumerate(companies):
-            # Simulate different compliance statuses
-            is_compliant = (i % 4) != 0  # 75% compliance rate
-            days_overdue = 0 if is_compliant else (i % 15) + 1
-            
-            if is_compliant:
-                compliant_count += 1
-            
-            compliance_data.append({
-                "company_id": company.id,
-                "company_name": company.name,
-                "is_compliant": is_compliant,
-                "last_report_date": (datetime.now() - timedelta(days=30 if is_compliant else 30 + days_overdue)).date().isoformat(),
-                "days_overdue": days_overdue,
-                "report_type": "Monthly Update"
-            })
-        
-        compliance_rate = (compliant_count / total_companies) * 100 if total_companies > 0 else 100
-        
-        return {
-            "compliance_data": compliance_data,
-            "total_companies": total_companies,
-            "compliant_companies": compliant_count,
-            "compliance_rate": round(compliance_rate, 1),
-            "overdue_companies": total_companies - compliant_count,
-            "updated_at": datetime.now().isoformat()
-        }
+        return compliance_status(db.exec(select(Company)).all())
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch compliance status: {str(e)}")
 
 
+def gp_activity() -> Dict[str, Any]:
+    """GP team activity metrics"""
+    # Mock GP activity data (would come from CRM/activity tracking)
+    gp_activities = [
+        {
+            "partner_name": "Sarah Chen",
+            "role": "Managing Partner",
+            "companies_contacted": 45,
+            "meetings_attended": 18,
+            "deals_reviewed": 32,
+            "board_meetings": 8,
+            "portfolio_check_ins": 12,
+            "avg_response_time_hours": 4.2
+        },
+        {
+            "partner_name": "Michael Rodriguez",
+            "role": "General Partner",
+            "companies_contacted": 38,
+            "meetings_attended": 22,
+            "deals_reviewed": 28,
+            "board_meetings": 6,
+            "portfolio_check_ins": 15,
+            "avg_response_time_hours": 6.1
+        },
+        {
+            "partner_name": "David Kim",
+            "role": "Principal",
+            "companies_contacted": 52,
+            "meetings_attended": 31,
+            "deals_reviewed": 41,
+            "board_meetings": 4,
+            "portfolio_check_ins": 18,
+            "avg_response_time_hours": 3.8
+        }
+    ]
+
+    # Calculate team totals
+    team_summary = {
+        "total_companies_contacted": sum(gp["companies_contacted"] for gp in gp_activities),
+        "total_meetings": sum(gp["meetings_attended"] for gp in gp_activities),
+        "total_deals_reviewed": sum(gp["deals_reviewed"] for gp in gp_activities),
+        "total_board_meetings": sum(gp["board_meetings"] for gp in gp_activities),
+        "avg_team_response_time": sum(gp["avg_response_time_hours"] for gp in gp_activities) / len(gp_activities)
+    }
+
+    return {
+        "gp_activities": gp_activities,
+        "team_summary": team_summary,
+        "reporting_period": "Last 30 days",
+        "updated_at": datetime.now().isoformat()
+    }
+
+
 @router.get("/operations/gp-activity")
 async def get_gp_activity(
     current_user: User = Depends(get_current_active_user),
@@ -674,55 +804,7 @@ async def get_gp_activity(
 ):
     """Get GP team activity metrics"""
     try:
-        # Mock GP activity data (would come from CRM/activity tracking)
-        gp_activities = [
-            {
-                "partner_name": "Sarah Chen",
-                "role": "Managing Partner",
-                "companies_contacted": 45,
-                "meetings_attended": 18,
-                "deals_reviewed": 32,
-                "board_meetings": 8,
-                "portfolio_check_ins": 12,
-                "avg_response_time_hours": 4.2
-            },
-            {
-                "partner_name": "Michael Rodriguez",
-                "role": "General Partner",
-                "companies_contacted": 38,
-                "meetings_attended": 22,
-                "deals_reviewed": 28,
-                "board_meetings": 6,
-                "portfolio_check_ins": 15,
-                "avg_response_time_hours": 6.1
-            },
-            {
-                "partner_name": "David Kim",
-                "role": "Principal",
-                "companies_contacted": 52,
-                "meetings_attended": 31,
-                "deals_reviewed": 41,
-                "board_meetings": 4,
-                "portfolio_check_ins": 18,
-                "avg_response_time_hours": 3.8
-            }
-        ]
-        
-        # Calculate team totals
-        team_summary = {
-            "total_companies_contacted": sum(gp["companies_contacted"] for gp in gp_activities),
-            "total_meetings": sum(gp["meetings_attended"] for gp in gp_activities),
-            "total_deals_reviewed": sum(gp["deals_reviewed"] for gp in gp_activities),
-            "total_board_meetings": sum(gp["board_meetings"] for gp in gp_activities),
-            "avg_team_response_time": sum(gp["avg_response_time_hours"] for gp in gp_activities) / len(gp_activities)
-        }
-        
-        return {
-            "gp_activities": gp_activities,
-            "team_summary": team_summary,
-            "reporting_period": "Last 30 days",
-            "updated_at": datetime.now().isoformat()
-        }
+        return gp_activity()
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch GP activity: {str(e)}")
@@ -732,6 +814,47 @@ async def get_gp_activity(
 # MODULE 7: RISK & COMPLIANCE
 # ===========================
 
+def risk_positions(company_deals: List[Any]) -> List[Dict[str, Any]]:
+    """Position value, beta and weight per (company, deal) row"""
+    positions = []
+    total_portfolio_value = 0
+
+    for company, deal in company_deals:
+        # Calculate position value (investment + current valuation markup)
+        investment_amount = float(deal.our_target) if deal and deal.our_target else 1_000_000  # Default for mock
+        current_value = investment_amount * 1.8  # Mock 80% markup
+        total_portfolio_value += current_value
+
+        # Mock beta calculation (would use actual market data)
+        beta = {
+            "AI/ML": 1.4,
+            "FinTech": 1.1,
+            "HealthTech": 0.9,
+            "Blockchain/Crypto": 2.1,
+            "Enterprise SaaS": 1.2
+        }.get(company.sector, 1.0)
+
+        positions.append({
+            "company_id": company.id,
+            "company_name": company.name,
+            "sector": company.sector,
+            "investment_amount": investment_amount,
+            "current_value": current_value,
+            "beta": beta,
+            "weight": 0,  # Will calculate after total
+            "risk_rating": "Medium" if beta < 1.5 else "High"
+        })
+
+    # Calculate position weights
+    for position in positions:
+        position["weight"] = position["current_value"] / total_portfolio_value if total_portfolio_value > 0 else 0
+
+    # Sort by value descending
+    positions.sort(key=lambda x: x["current_value"], reverse=True)
+
+    return positions
+
+
 @router.get("/risk/positions")
 async def get_risk_positions(
     current_user: User = Depends(get_current_active_user),
@@ -739,51 +862,50 @@ async def get_risk_positions(
 ):
     """Get portfolio risk positions and betas"""
     try:
-        companies_query = select(Company, Deal).join(Deal, Company.id == Deal.company_id, isouter=True)
-        results = db.exec(companies_query).all()
-        
-        positions = []
-        total_portfolio_value = 0
-        
-        for company, deal in results:
-            # Calculate position value (investment + current valuation markup)
-            investment_amount = float(deal.our_target) if deal and deal.our_target else 1_000_000  # Default for mock
-            current_value = investment_amount * 1.8  # Mock 80% markup
-            total_portfolio_value += current_value
-            
-            # Mock beta calculation (would use actual market data)
-            beta = {
-                "AI/ML": 1.4,
-                "FinTech": 1.1,
-                "HealthTech": 0.9,
-                "Blockchain/Crypto": 2.1,
-                "Enterprise SaaS": 1.2
-            }.get(company.sector, 1.0)
-            
-            positions.append({
-                "company_id": company.id,
-                "company_name": company.name,
-                "sector": company.sector,
-                "investment_amount": investment_amount,
-                "current_value": current_value,
-                "beta": beta,
-                "weight": 0,  # Will calculate after total
-                "risk_rating": "Medium" if beta < 1.5 else "High"
-            })
-        
-        # Calculate position weights
-        for position in positions:
-            position["weight"] = position["current_value"] / total_portfolio_value if total_portfolio_value > 0 else 0
-        
-        # Sort by value descending
-        positions.sort(key=lambda x: x["current_value"], reverse=True)
-        
-        return positions
+        return risk_positions(_load_company_deals(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch risk positions: {str(e)}")
 
 
+def risk_metrics(positions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concentration, beta and sector risk metrics for risk positions"""
+    # Calculate concentration risk
+    total_value = sum(pos["current_value"] for pos in positions)
+    top_5_weight = sum(pos["current_value"] for pos in positions[:5]) / total_value if total_value > 0 else 0
+
+    # Calculate portfolio beta (weighted average)
+    portfolio_beta = sum(pos["beta"] * pos["weight"] for pos in positions)
+
+    # Mock other risk metrics (would use actual returns data)
+    metrics = {
+        "portfolio_beta": round(portfolio_beta, 2),
+        "volatility": 0.24,  # 24% annual volatility
+        "sharpe_ratio": 1.45,  # (Return - Risk Free Rate) / Volatility
+        "max_drawdown": -0.18,  # -18% maximum drawdown
+        "var_95": -0.08,  # 95% Value at Risk
+        "concentration_risk": {
+            "top_1_weight": positions[0]["weight"] if positions else 0,
+            "top_3_weight": sum(pos["weight"] for pos in positions[:3]),
+            "top_5_weight": top_5_weight,
+            "hhi_index": sum(pos["weight"] ** 2 for pos in positions)  # Herfindahl-Hirschman Index
+        },
+        "sector_concentration": {},
+        "correlation_matrix": {}  # Would contain sector/company correlations
+    }
+
+    # Calculate sector concentration
+    sector_values = {}
+    for pos in positions:
+        sector = pos["sector"] or "Unknown"
+        sector_values[sector] = sector_values.get(sector, 0) + pos["current_value"]
+
+    for sector, value in sector_values.items():
+        metrics["sector_concentration"][sector] = value / total_value if total_value > 0 else 0
+
+    return metrics
+
+
 @router.get("/risk/metrics")
 async def get_risk_metrics(
     current_user: User = Depends(get_current_active_user),
@@ -791,42 +913,122 @@ async def get_risk_metrics(
 ):
     """Get portfolio risk metrics including volatility and correlations"""
     try:
-        positions = await get_risk_positions(current_user=current_user, db=db)
-        
-        # Calculate concentration risk
-        total_value = sum(pos["current_value"] for pos in positions)
-        top_5_weight = sum(pos["current_value"] for pos in positions[:5]) / total_value if total_value > 0 else 0
-        
-        # Calculate portfolio beta (weighted average)
-        portfolio_beta = sum(pos["beta"] * pos["weight"] for pos in positions)
-        
-        # Mock other risk metrics (would use actual returns data)
-        risk_metrics = {
-            "portfolio_beta": round(portfolio_beta, 2),
-            "volatility": 0.24,  # 24% annual volatility
-            "sharpe_ratio": 1.45,  # (Return - Risk Free Rate) / Volatility
-            "max_drawdown": -0.18,  # -18% maximum drawdown
-            "var_95": -0.08,  # 95% Value at Risk
-            "concentration_risk": {
-                "top_1_weight": positions[0]["weight"] if positions else 0,
-                "top_3_weight": sum(pos["weight"] for pos in positions[:3]),
-                "top_5_weight": top_5_weight,
-                "hhi_index": sum(pos["weight"] ** 2 for pos in positions)  # Herfindahl-Hirschman Index
-            },
-            "sector_concentration": {},
-            "correlation_matrix": {}  # Would contain sector/company correlations
-        }
-        
-        # Calculate sector concentration
-        sector_values = {}
-        for pos in positions:
-            sector = pos["sector"] or "Unknown"
-            sector_values[sector] = sector_values.get(sector, 0) + pos["current_value"]
-        
-        for sector, value in sector_values.items():
-            risk_metrics["sector_concentration"][sector] = value / total_value if total_value > 0 else 0
-        
-        return risk_metrics
+        return risk_metrics(risk_positions(_load_company_deals(db)))
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to calculate risk metrics: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to calculate risk metrics: {str(e)}")
+
+
+# ===========================
+# DASHBOARD BUNDLE
+# ===========================
+
+def _detached_company_deals(db: Session) -> List[Any]:
+    """Company/deal rows detached from the session, so widget threads never lazy-load on it"""
+    rows = _load_company_deals(db)
+    for company, deal in rows:
+        db.expunge(company)
+        if deal is not None:
+            db.expunge(deal)
+    return rows
+
+
+def _unique_companies(rows: List[Any]) -> List[Company]:
+    return list({company.id: company for company, _ in rows}.values())
+
+
+# Shared base datasets: each is loaded at most once per bundle request
+dashboard_bundle = DashboardBundle()
+dashboard_bundle.dataset("company_deals", lambda ctx: _detached_company_deals(ctx.session))
+dashboard_bundle.dataset("companies", lambda ctx: _unique_companies(ctx["company_deals"]), requires=["company_deals"])
+dashboard_bundle.dataset(
+    "deal_companies", lambda ctx: [(deal, company) for company, deal in ctx["company_deals"] if deal is not None],
+    requires=["company_deals"]
+)
+dashboard_bundle.dataset("company_kpis", lambda ctx: kpi_store.latest(ctx.session))
+dashboard_bundle.dataset("risk_positions", lambda ctx: risk_positions(ctx["company_deals"]), requires=["company_deals"])
+# Ledger reads rebuild (and commit) a stale ledger, so they load first
+dashboard_bundle.dataset(
+    "fund_metrics", lambda ctx: fund_ledger.metrics(ctx.session, _parse_date(ctx.params.get("start_date")), _parse_date(ctx.params.get("end_date"))),
+    commits=True
+)
+dashboard_bundle.dataset(
+    "fund_entries", lambda ctx: cashflow_rows(
+        fund_ledger.entries(ctx.session, _parse_date(ctx.params.get("start_date")), _parse_date(ctx.params.get("end_date")))
+    ),
+    commits=True
+)
+dashboard_bundle.dataset("stage_counts", lambda ctx: pipeline_analytics.stage_counts(ctx.session))
+dashboard_bundle.dataset("funnel", lambda ctx: pipeline_analytics.funnel(ctx.session))
+dashboard_bundle.dataset("time_in_stage", lambda ctx: pipeline_analytics.time_in_stage(ctx.session))
+dashboard_bundle.dataset(
+    "deal_history", lambda ctx: pipeline_analytics.deal_history(
+        ctx.session, _parse_datetime(ctx.params.get("start_date")), _parse_datetime(ctx.params.get("end_date"))
+    )
+)
+dashboard_bundle.dataset("sector_counts", lambda ctx: pipeline_analytics.sector_counts(ctx.session))
+
+# Widgets, named after their standalone endpoints
+dashboard_bundle.widget("fund.cashflows", lambda ctx: ctx["fund_entries"], datasets=["fund_entries"])
+dashboard_bundle.widget("fund.valuations", lambda ctx: fund_valuations(ctx["fund_metrics"]), datasets=["fund_metrics"])
+dashboard_bundle.widget(
+    "fund.metrics", lambda ctx: {**ctx["fund_metrics"], "calculated_at": datetime.now().isoformat()}, datasets=["fund_metrics"]
+)
+dashboard_bundle.widget(
+    "fund.irr_breakdown", lambda ctx: irr_breakdown(ctx["deal_companies"], datetime.now().date()), datasets=["deal_companies"]
+)
+dashboard_bundle.widget(
+    "companies.metrics", lambda ctx: company_metrics(ctx["companies"], ctx["company_kpis"]), datasets=["companies", "company_kpis"]
+)
+dashboard_bundle.widget("deals.stages", lambda ctx: ctx["stage_counts"], datasets=["stage_counts"])
+dashboard_bundle.widget(
+    "deals.funnel", lambda ctx: {"funnel": ctx["funnel"], "time_in_stage": ctx["time_in_stage"]},
+    datasets=["funnel", "time_in_stage"]
+)
+dashboard_bundle.widget("deals.history", lambda ctx: ctx["deal_history"], datasets=["deal_history"])
+dashboard_bundle.widget("market.funding", lambda ctx: market_funding())
+dashboard_bundle.widget("market.exits", lambda ctx: market_exits())
+dashboard_bundle.widget(
+    "market.sector_allocation", lambda ctx: sector_allocation(ctx["sector_counts"]), datasets=["sector_counts"]
+)
+dashboard_bundle.widget("lp.calls", lambda ctx: lp_calls())
+dashboard_bundle.widget("lp.distributions", lambda ctx: lp_distributions())
+dashboard_bundle.widget("operations.compliance", lambda ctx: compliance_status(ctx["companies"]), datasets=["companies"])
+dashboard_bundle.widget("operations.gp_activity", lambda ctx: gp_activity())
+dashboard_bundle.widget("risk.positions", lambda ctx: ctx["risk_positions"], datasets=["risk_positions"])
+dashboard_bundle.widget("risk.metrics", lambda ctx: risk_metrics(ctx["risk_positions"]), datasets=["risk_positions"])
+
+
+class DashboardBundleRequest(BaseModel):
+    widgets: Optional[List[str]] = Field(None, description="Widgets to evaluate (all when omitted)")
+    etags: Dict[str, str] = Field(default_factory=dict, description="Last ETag seen per widget")
+    start_date: Optional[str] = Field(None, description="Start date (YYYY-MM-DD) for fund and deal history widgets")
+    end_date: Optional[str] = Field(None, description="End date (YYYY-MM-DD) for fund and deal history widgets")
+
+
+@router.post("/dashboard")
+async def get_dashboard_bundle(
+    request: DashboardBundleRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Evaluate several dashboard widgets in one round trip. Shared datasets load once;
+    widgets whose ETag matches the one sent come back as not_modified without data.
+    """
+    try:
+        return await dashboard_bundle.evaluate(
+            db, request.widgets, request.etags,
+            {"start_date": request.start_date, "end_date": request.end_date}
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to evaluate dashboard bundle: {str(e)}")
+
+
+@router.get("/dashboard/widgets")
+async def get_dashboard_widgets(current_user: User = Depends(get_current_active_user)):
+    """Widget names accepted by the dashboard bundle"""
+    return {"widgets": dashboard_bundle.widget_names}
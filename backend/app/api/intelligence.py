@@ -5,8 +5,10 @@ Provides proactive AI features with investment context
 
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Dict, Any, List, Optional
+import json
 import logging
 
+from ..services.chroma_filters import FilterError
 from ..services.unified_chroma_service import UnifiedChromaService
 from ..services.investment_intelligence_service import (
     create_investment_intelligence_service,
@@ -25,7 +27,8 @@ def get_chroma_service():
     """Get or create ChromaDB service singleton"""
     global _chroma_service
     if _chroma_service is None:
-        _chroma_service = UnifiedChromaService()
+        from ..services.unified_chroma_service import unified_chroma_service
+        _chroma_service = unified_chroma_service
     return _chroma_service
 
 
@@ -187,7 +190,9 @@ async def semantic_search(
     collection: str,
     query: str,
     n_results: int = Query(default=10, description="Number of results to return"),
+    filters: Optional[str] = Query(default=None, description='JSON filter spec, e.g. {"date": {"$gte": "2025-01-01"}}'),
     tenant_id: str = Query(default="default", description="Tenant ID for data isolation"),
+    workspace_id: Optional[str] = Query(default="default", description="Workspace scope"),
     chroma_service: UnifiedChromaService = Depends(get_chroma_service)
 ) -> Dict[str, Any]:
     """Perform semantic search across investment intelligence collections"""
@@ -209,12 +214,18 @@ async def semantic_search(
                 detail=f"Collection must be one of: {', '.join(valid_collections)}"
             )
         
-        results = await chroma_service.semantic_search(
-            collection_name=collection,
-            query=query,
-            tenant_id=tenant_id,
-            n_results=n_results
-        )
+        try:
+            filter_spec = json.loads(filters) if filters else None
+            results = await chroma_service.semantic_search(
+                collection_name=collection,
+                query=query,
+                filters=filter_spec,
+                tenant_id=tenant_id,
+                workspace_id=workspace_id,
+                n_results=n_results
+            )
+        except (json.JSONDecodeError, FilterError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filters: {e}")
         
         return {
             "success": True,
@@ -242,7 +253,8 @@ async def health_check(
         collections_info = {}
         for name, collection in chroma_service.collections.items():
             try:
-                count = collection.count()
+                partition = chroma_service.partitions.get(name)
+                count = partition.count() if partition is not None else collection.count()
                 collections_info[name] = {"document_count": count, "status": "healthy"}
             except Exception as e:
                 collections_info[name] = {"status": "error", "error": str(e)}
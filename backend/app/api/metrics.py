@@ -5,6 +5,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from ..models.users import User
 from ..core.auth import get_current_active_user
 from ..middleware.metrics import get_metrics_middleware
+from ..services.llm_metrics import llm_metrics
+from ..services.intent_router import get_intent_router
+from ..services.chroma_ingestion import ingestion_stats
+from ..services.embedding_service import embedding_service
+from ..services.chroma_retention import memory_compactor
+from ..services.chroma_runtime import chroma_runtime
 
 router = APIRouter()
 
@@ -34,6 +40,11 @@ async def get_metrics(
     
     # Get current metrics
     metrics_data = middleware.get_metrics()
+    metrics_data['llm'] = llm_metrics.snapshot()['totals']
+    metrics_data['ingestion'] = ingestion_stats()
+    metrics_data['embeddings'] = embedding_service.stats()
+    metrics_data['chroma'] = chroma_runtime.stats()
+    metrics_data['retention'] = memory_compactor.stats()
     
     # Add user context
     metrics_data['requested_by'] = {
@@ -71,6 +82,7 @@ async def reset_metrics(
         )
     
     middleware.reset_metrics()
+    llm_metrics.reset()
     
     return {
         "message": "Metrics reset successfully",
@@ -79,6 +91,34 @@ async def reset_metrics(
     }
 
 
+@router.get("/llm", response_model=Dict[str, Any])
+async def get_llm_metrics(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get per-call AI layer metrics.
+    
+    Requires authentication. Provides, grouped by caller, model and terminal intent:
+    - Prompt/completion/cached token totals and estimated cost
+    - Latency and time-to-first-token histograms (p50/p95/p99)
+    - Tool call latency histograms and error counts
+    """
+    return llm_metrics.snapshot()
+
+
+@router.get("/intent-router", response_model=Dict[str, Any])
+async def get_intent_router_metrics(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get terminal fast-path intent router statistics.
+    
+    Hit rate, hits per intent and the most recent commands that fell through to
+    LLM intent parsing (candidates for new fast-path coverage).
+    """
+    return get_intent_router().stats()
+
+
 @router.get("/health")
 async def health_check():
     """
@@ -19,6 +19,8 @@ from ..services.market_data_service import MarketDataService
 from ..services.portfolio_service import PortfolioService
 from ..services.company_service import CompanyService
 from ..services.exa_service import ExaService
+from ..services.llm_metrics import llm_call_context, set_current_intent
+from ..services.intent_router import get_intent_router
 from ..core.auth import get_current_user_optional
 from ..models.users import User
 from ..database import get_db
@@ -149,6 +151,10 @@ class AITerminalInterpreter:
         """
         Main entry point - AI-first intent parsing and tool routing
         """
+        with llm_call_context(intent="interpreter.unparsed"):
+            return await self._interpret_and_execute(command, context)
+    
+    async def _interpret_and_execute(self, command: str, context: Dict[str, Any] = None) -> CommandResponse:
         interaction_id = str(uuid.uuid4())
         start_time = time.time()
         trace = {
@@ -161,9 +167,15 @@ class AITerminalInterpreter:
         }
         
         try:
-            # Step 1: Parse intent using AI with system prompt
-            trace["routing_path"].append("ai_intent_parsing")
-            intent_result = await self._parse_intent_ai(command)
+            # Step 1: Deterministic fast path; parse intent using AI only when it is not confident
+            fast_path = get_intent_router(self.session).route(command)
+            if fast_path is not None:
+                trace["routing_path"].append("fast_path_intent")
+                trace["fast_path_cues"] = fast_path.cues
+                intent_result = fast_path.intent
+            else:
+                trace["routing_path"].append("ai_intent_parsing")
+                intent_result = await self._parse_intent_ai(command)
             
             # Handle case where intent_result might be a string
             if isinstance(intent_result, dict):
@@ -180,6 +192,7 @@ class AITerminalInterpreter:
             
             trace["confidence"] = confidence
             trace["detected_intent"] = intent
+            set_current_intent(f"interpreter.{intent.get('intent')}")
             
             # Step 2: Self-check - validate confidence and required fields
             validation_result = self._validate_intent(intent, confidence)
@@ -300,7 +313,11 @@ Examples:
             return self._fallback_intent_parsing(command)
     
     def _fallback_intent_parsing(self, command: str) -> Dict[str, Any]:
-        """Fallback intent parsing using simple patterns"""
+        """Fallback intent parsing when the LLM is unavailable: fast-path classifier, then simple patterns"""
+        fast_path = get_intent_router(self.session).classify(command)
+        if fast_path is not None and fast_path.confidence >= 0.5:
+            return fast_path.intent
+
         command_lower = command.lower().strip()
         
         # Simple pattern-based intent detection
@@ -975,7 +992,13 @@ Be concise and actionable.
                 )
                 deal_data = result.all()
                 
-                if not deal_data:
+                # Listed holdings are priced in one batched round
+                valuation = await self.portfolio_service.get_valued_summary(
+                    (context or {}).get("user_id", "default"), session=session
+                )
+                holdings_totals = valuation.get("totals")
+                
+                if not deal_data and not holdings_totals:
                     return CommandResponse(
                         success=True,
                         message="No portfolio data found. Add some investments to get started.",
@@ -1007,13 +1030,27 @@ Top Holdings:
                 for holding in holdings[:5]:
                     portfolio_summary += f"  • {holding['company']}: ${holding['investment_amount']/1000:.0f}k\n"
                 
+                if holdings_totals:
+                    portfolio_summary += f"""
+📈 Listed Holdings:   ${holdings_totals['market_value']:,.0f} ({holdings_totals['priced']}/{holdings_totals['positions']} priced)
+💹 Unrealized P&L:    ${holdings_totals['unrealized_pnl']:+,.0f}
+"""
+                    for position in valuation["positions"][:5]:
+                        if position["market_value"] is not None:
+                            portfolio_summary += f"  • {position['symbol']}: ${position['market_value']:,.0f} ({position['weight']:.1%})\n"
+                
                 return CommandResponse(
                     success=True,
                     message=portfolio_summary,
                     data={
                         "total_invested": total_invested,
                         "active_deals": active_deals,
-                        "holdings": holdings
+                        "holdings": holdings,
+                        "listed_holdings": {
+                            key: valuation[key]
+                            for key in ("positions", "totals", "sector_exposure", "asset_class_exposure", "priced_at")
+                            if key in valuation
+                        }
                     }
                 )
                 
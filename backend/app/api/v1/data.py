@@ -11,6 +11,7 @@ from ...services.smart_cache_service import SmartCacheService
 from ...services.company_data_service import company_data_service
 from ...services.widget_data_enrichment import widget_data_enrichment_service
 from ...services.structured_widget_service import structured_widget_service
+from ...services.widget_cache import widget_cache, ttl_for, STRUCTURED_WIDGET_TYPE
 # from ...services.tavily_service import TavilyService  # Disabled - removed fallback integration
 from ...models.cache import CacheResponse, BatchResponse
 from ...core.auth import get_current_user
@@ -940,6 +941,12 @@ async def invalidate_company_cache(
         raise HTTPException(status_code=500, detail="Cache invalidation failed")
 
 
+def _purge_widget_cache():
+    with Session(engine) as session:
+        purged = widget_cache.purge_expired(session)
+    logger.info(f"Purged {purged} expired widget cache entries")
+
+
 @router.post("/cache/cleanup")
 async def cleanup_expired_cache(
     background_tasks: BackgroundTasks,
@@ -957,6 +964,7 @@ async def cleanup_expired_cache(
     
     # Run cleanup as background task
     background_tasks.add_task(cache_service.cleanup_expired_cache)
+    background_tasks.add_task(_purge_widget_cache)
     
     return {
         'status': 'cleanup_started',
@@ -1006,12 +1014,21 @@ async def get_structured_widget_data(
     try:
         logger.info(f"🎨 Fetching structured widget data for company: {company_id}")
         
-        # Get structured widget data
-        widget_data = await structured_widget_service.get_widget_data(
-            company_id=company_id,
-            widget_types=widget_types,
-            include_level=include_level
-        )
+        # Get structured widget data (cached until the shortest widget TTL or a data source change)
+        cache_config = {"widget_types": sorted(widget_types), "include_level": include_level}
+        # Sessions are opened only around the cache read and write, not across the computation
+        with Session(engine) as session:
+            widget_data = widget_cache.get(session, company_id, STRUCTURED_WIDGET_TYPE, cache_config)
+        if widget_data is None:
+            widget_data = await structured_widget_service.get_widget_data(
+                company_id=company_id,
+                widget_types=widget_types,
+                include_level=include_level
+            )
+            with Session(engine) as session:
+                widget_cache.set(session, company_id, STRUCTURED_WIDGET_TYPE, cache_config, widget_data,
+                                 ttl=min(ttl_for(widget_type) for widget_type in widget_types))
+                session.commit()
         
         logger.info(f"✅ Structured widget data prepared for {widget_data['company_info']['name']}")
         
@@ -1059,10 +1076,17 @@ async def get_legacy_compatible_widget_data(
         logger.info(f"📋 Fetching legacy-compatible data for company: {company_id}")
         
         # Get data in legacy format
-        legacy_data = await structured_widget_service.get_legacy_compatibility_data(
-            company_id=company_id,
-            force_fallback=force_fallback
-        )
+        async def compute():
+            return await structured_widget_service.get_legacy_compatibility_data(
+                company_id=company_id,
+                force_fallback=force_fallback
+            )
+        
+        if force_fallback:
+            legacy_data = await compute()
+        else:
+            with Session(engine) as session:
+                legacy_data = await widget_cache.get_or_compute(session, company_id, "legacy", {}, compute)
         
         logger.info(f"✅ Legacy-compatible data prepared for {legacy_data.get('name', company_id)}")
         
@@ -1136,6 +1160,11 @@ async def refresh_company_for_widgets(
             force_refresh=force_external_calls
         )
         
+        # Fresh data: drop every cached widget for this company
+        with Session(engine) as session:
+            widget_cache.invalidate_company(session, str(company.id))
+            session.commit()
+        
         logger.info(f"✅ Widget refresh completed for {company.name}")
         
         return {
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
 from typing import List, Optional
 from datetime import datetime
@@ -10,6 +11,7 @@ from ...models import (
 )
 from ...core.auth import get_current_user_optional
 from ...models.users import User
+from ...services.cap_table import cap_table_engine, company_holdings, ownership_details, person_holdings
 
 router = APIRouter()
 
@@ -27,7 +29,11 @@ def list_ownerships(
     limit: int = Query(100, le=1000, description="Number of ownerships to return")
 ):
     """List all ownership records with optional filtering."""
-    query = select(Ownership)
+    query = (
+        select(Ownership, Company, Person)
+        .outerjoin(Company, Ownership.company_id == Company.id)
+        .outerjoin(Person, Ownership.person_id == Person.id)
+    )
     
     if company_id:
         query = query.where(Ownership.company_id == company_id)
@@ -42,23 +48,7 @@ def list_ownerships(
         query = query.where(Ownership.is_active == is_active)
     
     query = query.offset(skip).limit(limit)
-    ownerships = session.exec(query).all()
-    
-    # Load related data
-    result = []
-    for ownership in ownerships:
-        company = session.get(Company, ownership.company_id)
-        person = session.get(Person, ownership.person_id)
-        
-        ownership_dict = ownership.dict()
-        if company:
-            ownership_dict["company"] = company.dict()
-        if person:
-            ownership_dict["person"] = person.dict()
-        
-        result.append(OwnershipReadWithDetails(**ownership_dict))
-    
-    return result
+    return ownership_details(session.exec(query).all())
 
 
 @router.get("/types", response_model=dict)
@@ -223,30 +213,11 @@ def get_company_ownership(
     is_active: Optional[bool] = Query(True, description="Filter by active status")
 ):
     """Get all ownership records for a specific company."""
-    company = session.get(Company, company_id)
+    company, holdings = company_holdings(session, company_id, is_active=is_active)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    query = select(Ownership).where(Ownership.company_id == company_id)
-    
-    if is_active is not None:
-        query = query.where(Ownership.is_active == is_active)
-    
-    ownerships = session.exec(query).all()
-    
-    # Load person data
-    result = []
-    for ownership in ownerships:
-        person = session.get(Person, ownership.person_id)
-        
-        ownership_dict = ownership.dict()
-        ownership_dict["company"] = company.dict()
-        if person:
-            ownership_dict["person"] = person.dict()
-        
-        result.append(OwnershipReadWithDetails(**ownership_dict))
-    
-    return result
+    return ownership_details((ownership, company, person) for ownership, person in holdings)
 
 
 @router.get("/person/{person_id}", response_model=List[OwnershipReadWithDetails])
@@ -258,30 +229,11 @@ def get_person_ownership(
     is_active: Optional[bool] = Query(True, description="Filter by active status")
 ):
     """Get all ownership records for a specific person."""
-    person = session.get(Person, person_id)
+    person, holdings = person_holdings(session, person_id, is_active=is_active)
     if not person:
         raise HTTPException(status_code=404, detail="Person not found")
     
-    query = select(Ownership).where(Ownership.person_id == person_id)
-    
-    if is_active is not None:
-        query = query.where(Ownership.is_active == is_active)
-    
-    ownerships = session.exec(query).all()
-    
-    # Load company data
-    result = []
-    for ownership in ownerships:
-        company = session.get(Company, ownership.company_id)
-        
-        ownership_dict = ownership.dict()
-        ownership_dict["person"] = person.dict()
-        if company:
-            ownership_dict["company"] = company.dict()
-        
-        result.append(OwnershipReadWithDetails(**ownership_dict))
-    
-    return result
+    return ownership_details((ownership, company, person) for ownership, company in holdings)
 
 
 @router.post("/company/{company_id}/cap-table", response_model=List[OwnershipReadWithDetails])
@@ -293,33 +245,53 @@ def get_company_cap_table(
     share_class: Optional[str] = Query(None, description="Filter by share class")
 ):
     """Get company cap table with ownership breakdown."""
-    company = session.get(Company, company_id)
-    if not company:
+    details = cap_table_engine.details(session, company_id, share_class=share_class)
+    if details is None:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    query = select(Ownership).where(
-        Ownership.company_id == company_id,
-        Ownership.is_active == True
-    )
-    
-    if share_class:
-        query = query.where(Ownership.share_class == share_class)
-    
-    # Order by ownership percentage (descending) and then by ownership type
-    query = query.order_by(Ownership.percentage.desc(), Ownership.ownership_type)
-    
-    ownerships = session.exec(query).all()
+    return details
+
+
+@router.get("/company/{company_id}/cap-table/summary", response_model=dict)
+def get_company_cap_table_summary(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    company_id: str,
+    share_class: Optional[str] = Query(None, description="Only list positions in this share class")
+):
+    """Get fully-diluted cap table with holder, share class and ownership type rollups."""
+    cap_table = cap_table_engine.cap_table(session, company_id, share_class=share_class)
+    if cap_table is None:
+        raise HTTPException(status_code=404, detail="Company not found")
     
-    # Load person data and add company info
-    result = []
-    for ownership in ownerships:
-        person = session.get(Person, ownership.person_id)
-        
-        ownership_dict = ownership.dict()
-        ownership_dict["company"] = company.dict()
-        if person:
-            ownership_dict["person"] = person.dict()
-        
-        result.append(OwnershipReadWithDetails(**ownership_dict))
+    return cap_table
+
+
+class ProFormaRequest(BaseModel):
+    investment: float = Field(..., gt=0, description="New money raised in the round")
+    pre_money_valuation: float = Field(..., gt=0, description="Fully-diluted pre-money valuation")
+    option_pool: float = Field(0.0, ge=0, lt=1, description="Unallocated option pool as a fraction of post-money, created pre-money")
+    share_class: str = Field("new_round", description="Share class issued to the new investors")
+
+
+@router.post("/company/{company_id}/cap-table/pro-forma", response_model=dict)
+def get_company_pro_forma(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    company_id: str,
+    round_in: ProFormaRequest
+):
+    """Model dilution of a new priced round on the company cap table."""
+    try:
+        pro_forma = cap_table_engine.pro_forma(
+            session, company_id, round_in.investment, round_in.pre_money_valuation,
+            option_pool=round_in.option_pool, round_class=round_in.share_class
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if pro_forma is None:
+        raise HTTPException(status_code=404, detail="Company not found")
     
-    return result
\ No newline at end of file
+    return pro_forma
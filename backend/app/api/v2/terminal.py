@@ -10,7 +10,7 @@ from datetime import datetime
 import json
 import os
 
-from ...core.claude_terminal import ClaudeTerminal, QueryResult
+from ...core.claude_terminal import ClaudeTerminal, QueryResult, get_claude_terminal
 from ...database import get_db
 from sqlmodel import Session
 
@@ -69,8 +69,8 @@ async def process_terminal_query_v2(
                 detail="AI service not configured. Set REDPILL_API_KEY or OPENAI_API_KEY environment variable."
             )
         
-        # Initialize Claude terminal
-        terminal = ClaudeTerminal()
+        # Shared Claude terminal (tool catalog is built once per process)
+        terminal = get_claude_terminal()
         
         # Process query with AI reasoning
         # Ensure user_id is in context for AI to use
@@ -90,7 +90,10 @@ async def process_terminal_query_v2(
                 "api_configured": bool(api_key),
                 "context_provided": bool(request.context),
                 "tools_available": ["search_companies", "get_market_data", "analyze_portfolio", 
-                                  "create_investment_analysis", "get_trending_analysis", "execute_portfolio_action"]
+                                  "create_investment_analysis", "get_trending_analysis", "execute_portfolio_action"],
+                "tools_ranked": [
+                    name for name, _ in terminal.tools_service.get_tool_catalog().rank(request.query)[:8]
+                ]
             }
         
         # Convert to V2 response format
@@ -143,7 +146,7 @@ async def test_old_vs_new_system(db: Session = Depends(get_db)):
     }
     
     # New system (actual result)
-    terminal = ClaudeTerminal()
+    terminal = get_claude_terminal()
     new_result = await terminal.process_query(biotech_query)
     
     new_system_result = {
@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     
     # AI Services
     openai_api_key: Optional[str] = "sk-9JABKD0bYW6s8VN6PoIG0LUOj1uo44TrXm0MNJWXe7GWP1wR"
+    openai_base_url: Optional[str] = None  # Override to use an OpenAI-compatible server (e.g. the offline mock)
     anthropic_api_key: Optional[str] = None
     pinecone_api_key: Optional[str] = None
     pinecone_environment: str = "us-east-1"
@@ -66,6 +67,11 @@ class Settings(BaseSettings):
     enrichment_timeout_seconds: int = 30
     max_enrichment_sources: int = 5
     
+    # Vector memory retention (time-bucketed collections, see chroma_retention.py)
+    conversation_retention_days: int = 365
+    market_intelligence_retention_days: int = 90
+    memory_compaction_interval_seconds: int = 6 * 60 * 60
+    
     # Rate Limiting
     api_rate_limit_per_minute: int = 100
     
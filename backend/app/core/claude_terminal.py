@@ -11,6 +11,7 @@ from datetime import datetime
 from pydantic import BaseModel
 from ..services.ai_service import AIService
 from ..services.intelligent_tools import IntelligentToolsService
+from ..services.llm_metrics import llm_call_context
 
 
 class QueryResult(BaseModel):
@@ -23,6 +24,13 @@ class QueryResult(BaseModel):
     follow_up_suggestions: List[str] = []
 
 
+# Number of query-relevant tools offered to the model per request
+TOOL_TOP_K = 6
+
+# Tools the system prompt requires on every request
+PINNED_TOOLS = ["format_financial_table"]
+
+
 class ClaudeTerminal:
     """
     True Claude Code level terminal - AI reasons about tools, no hardcoded patterns
@@ -36,9 +44,16 @@ class ClaudeTerminal:
         """
         Main processing method - let AI reason about what to do
         """
+        user_id = (user_context or {}).get("user_id")
+        with llm_call_context(intent="claude_terminal.query", user_id=user_id):
+            return await self._process_query(user_query, user_context)
+    
+    async def _process_query(self, user_query: str, user_context: Optional[Dict] = None) -> QueryResult:
         try:
-            # Get all available tools with their schemas
-            available_tools = await self.tools_service.get_tool_definitions()
+            # Get only the tools relevant to this query from the precompiled catalog
+            available_tools = self.tools_service.select_tool_definitions(
+                user_query, top_k=TOOL_TOP_K, pinned=PINNED_TOOLS
+            )
             
             # Build system prompt with tool capabilities
             system_prompt = self._build_system_prompt(available_tools)
@@ -147,22 +162,17 @@ Trust your intelligence. Understand semantically. Choose tools wisely. Provide p
         reasoning = ""
         
         # Check if AI wants to use tools
-        print(f"DEBUG: AI response keys: {response.keys()}")
         if "tool_calls" in response:
-            print(f"DEBUG: Found {len(response['tool_calls'])} tool calls")
             # Execute tool calls sequentially or in parallel as needed
             for tool_call in response["tool_calls"]:
                 tool_name = tool_call["function"]["name"]
                 tool_args = json.loads(tool_call["function"]["arguments"])
                 
                 # Execute the tool
-                print(f"DEBUG: About to execute tool {tool_name} with args {tool_args}")
                 tool_result = await self.tools_service.execute_tool(
                     tool_name=tool_name,
                     arguments=tool_args
                 )
-                print(f"DEBUG: Tool result: {tool_result}")
-                
                 tools_used.append(tool_name)
                 
                 # Merge tool results (ToolResult is a Pydantic model)
@@ -210,4 +220,15 @@ If there is a "formatted_table" in the data, display it prominently.
             data=combined_data,
             tools_used=tools_used,
             reasoning=reasoning
-        )
\ No newline at end of file
+        )
+
+
+_claude_terminal: Optional[ClaudeTerminal] = None
+
+
+def get_claude_terminal() -> ClaudeTerminal:
+    """Get the shared ClaudeTerminal instance (services and tool catalog are built once)"""
+    global _claude_terminal
+    if _claude_terminal is None:
+        _claude_terminal = ClaudeTerminal()
+    return _claude_terminal
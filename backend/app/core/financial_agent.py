@@ -6,17 +6,20 @@ Based on Gemini CLI architecture patterns - AI reasons then uses tools
 from typing import Dict, Any, Optional, List
 import logging
 import json
+import asyncio
 from datetime import datetime
 
 from ..services.ai_service import AIService
 from ..services.openbb_service import OpenBBService
-from ..services.portfolio_service import portfolio_service
+from ..services.portfolio_service import Trade, portfolio_service, resolve_import_path
+from ..services.portfolio_context_store import portfolio_context_store
 from ..services.market_data_service import MarketDataService
 from ..services.builtin_market_service import builtin_market_service
 from ..services.chart_service import ChartService
 from ..services.company_service import CompanyService
 from ..services.chroma_memory_service import chroma_memory_service
 from ..services.unified_chroma_service import unified_chroma_service
+from ..services.llm_metrics import llm_call_context, set_current_intent, track_tool_call
 
 
 class FinancialAgent:
@@ -41,6 +44,10 @@ class FinancialAgent:
         """
         Process user command using AI reasoning - core method
         """
+        with llm_call_context(intent="agent.conversation", user_id=user_id):
+            return await self._process_command(user_input, user_id)
+    
+    async def _process_command(self, user_input: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         try:
             # Store user input for context in tools
             self._current_user_input = user_input
@@ -48,11 +55,13 @@ class FinancialAgent:
             # Build comprehensive system prompt
             system_prompt = self._build_system_prompt()
             
-            # Add conversation context from Chroma memory
-            context = await self._build_conversation_context(user_input)
+            # Add conversation context from Chroma memory (memory lookups run concurrently)
+            context, conversation_history = await asyncio.gather(
+                self._build_conversation_context(user_input),
+                self._get_conversation_messages()
+            )
             
-            # DEBUG: Log context to see what AI receives
-            print(f"🔍 DEBUG - Context built: {context[:500]}...")
+            self.logger.debug(f"Context built: {context[:500]}...")
             
             # Construct full prompt for AI reasoning
             full_prompt = f"""{system_prompt}
@@ -76,7 +85,7 @@ Execute ALL steps needed to completely fulfill their request. Use multiple tools
             # Let AI reason and respond using chat method
             ai_response = await self.ai_service.chat(
                 message=full_prompt,
-                conversation_history=await self._get_conversation_messages()
+                conversation_history=conversation_history
             )
             
             # Process AI response and execute any tool calls
@@ -183,18 +192,15 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
     async def _build_conversation_context(self, user_input: str) -> str:
         """Build enhanced conversation context using unified Chroma intelligence"""
         try:
-            # Get relevant conversation memories
-            conversation_memories = await self.unified_memory.semantic_search(
-                "user_conversations",
-                user_input,
-                tenant_id=self.tenant_id,
-                n_results=3
-            )
-            
-            # Get portfolio context
-            portfolio_context = await self.unified_memory.get_portfolio_context(
-                tenant_id=self.tenant_id,
-                query=user_input
+            # Conversation memories need a semantic search; portfolio context is materialized
+            conversation_memories, portfolio_context = await asyncio.gather(
+                self.unified_memory.semantic_search(
+                    "user_conversations",
+                    user_input,
+                    tenant_id=self.tenant_id,
+                    n_results=3
+                ),
+                portfolio_context_store.get(self.tenant_id)
             )
             
             if not conversation_memories and not portfolio_context.get('symbols'):
@@ -252,7 +258,8 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
             recent_memories = await self.memory_service.retrieve_relevant_context(
                 query="recent conversation",
                 session_id=self.session_id,
-                max_results=5
+                max_results=5,
+                tenant_id=self.tenant_id
             )
             
             messages = []
@@ -281,6 +288,8 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
         
         # Execute tool calls if AI requested them
         if tool_calls:
+            # Attribute this command's model and tool calls to the first tool the AI chose
+            set_current_intent(f"agent.{tool_calls[0]['function']['name']}")
             for tool_call in tool_calls:
                 function_name = tool_call["function"]["name"]
                 try:
@@ -369,22 +378,29 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
         }
     
     async def _execute_tool(self, function_name: str, function_args: Dict[str, Any], user_id: str) -> Dict[str, Any]:
-        """Execute a specific tool function with given arguments."""
+        """Execute a specific tool function with given arguments, recording its latency."""
+        async with track_tool_call(function_name, "financial_agent") as call:
+            result = await self._dispatch_tool(function_name, function_args, user_id)
+            call.success = bool(isinstance(result, dict) and result.get("success", True))
+            return result
+    
+    async def _dispatch_tool(self, function_name: str, function_args: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """Dispatch a tool call to its implementation."""
         try:
             if function_name == "get_portfolio":
-                result = portfolio_service.get_summary(user_id)
+                result = await portfolio_service.get_valued_summary(user_id)
                 return result
                 
             elif function_name == "add_portfolio_holding":
                 symbol = function_args.get("symbol")
                 amount = function_args.get("amount")
-                result = portfolio_service.add_holding(user_id, symbol, amount)
+                result = await portfolio_service.add_holding_async(user_id, symbol, amount)
                 return result
                 
             elif function_name == "remove_portfolio_holding":
                 symbol = function_args.get("symbol")
                 amount = function_args.get("amount")
-                result = portfolio_service.remove_holding(user_id, symbol, amount)
+                result = await portfolio_service.remove_holding_async(user_id, symbol, amount)
                 return result
                 
             elif function_name == "get_crypto_price":
@@ -787,6 +803,7 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
                     import pandas as pd
                     import os
                     
+                    file_path = resolve_import_path(file_path)
                     if not os.path.exists(file_path):
                         return {
                             "success": False,
@@ -795,11 +812,11 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
                     
                     # Read the file based on format
                     if file_path.endswith('.csv'):
-                        df = pd.read_csv(file_path)
+                        df = await asyncio.to_thread(pd.read_csv, file_path)
                     elif file_path.endswith(('.xlsx', '.xls')):
-                        df = pd.read_excel(file_path)
+                        df = await asyncio.to_thread(pd.read_excel, file_path)
                     elif file_path.endswith('.json'):
-                        df = pd.read_json(file_path)
+                        df = await asyncio.to_thread(pd.read_json, file_path)
                     else:
                         return {
                             "success": False,
@@ -828,8 +845,8 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
                             "message": f"Could not identify symbol and amount columns. Found columns: {list(df.columns)}. Please ensure your file has columns like 'symbol' and 'amount'."
                         }
                     
-                    # Import holdings
-                    imported_count = 0
+                    # Import holdings: every valid row applied as one batch
+                    trades = []
                     errors = []
                     
                     for _, row in df.iterrows():
@@ -838,14 +855,15 @@ You are NOT just a chatbot - you are an autonomous financial problem-solver that
                             amount = float(row[amount_col])
                             
                             if amount > 0:  # Only import positive amounts
-                                result = portfolio_service.add_holding(user_id, symbol, amount)
-                                if result.get("success"):
-                                    imported_count += 1
-                                else:
-                                    errors.append(f"{symbol}: {result.get('message', 'Unknown error')}")
+                                trades.append(Trade(symbol=symbol, action="add", amount=amount))
                         except Exception as e:
                             errors.append(f"Row error: {str(e)}")
                     
+                    imported_count = 0
+                    if trades:
+                        result = await portfolio_service.apply_trades_async(user_id, trades)
+                        imported_count = sum(1 for outcome in result["results"] if outcome["success"])
+                    
                     message = f"✅ Successfully imported {imported_count} holdings from {os.path.basename(file_path)}"
                     if errors:
                         message += f"\n⚠️ {len(errors)} errors occurred:\n" + "\n".join(errors[:5])
@@ -1445,55 +1463,6 @@ if __name__ == "__main__":
                 "message": f"Error executing {function_name}: {str(e)}"
             }
 
-    async def _store_conversation_memory(self, user_input: str, result: Dict[str, Any]):
-        """Store conversation in persistent Chroma memory with entity extraction"""
-        try:
-            # Extract important entities from the result
-            entities = {
-                "symbols": [],
-                "companies": [],
-                "prices": {},
-                "data": {}
-            }
-            
-            # Extract symbols and companies from the result
-            if "data" in result:
-                data = result["data"]
-                if isinstance(data, dict):
-                    entities["symbols"] = data.get("symbols", [])
-                    entities["companies"] = data.get("companies", [])
-                    entities["data"] = data
-            
-            # Extract symbols from message using regex
-            import re
-            message = result.get("message", "")
-            ticker_pattern = r'\b([A-Z]{1,5})\b(?:\s+quote:|\s+analysis|\s+\$)'
-            found_tickers = re.findall(ticker_pattern, message)
-            entities["symbols"].extend(found_tickers)
-            
-            # Extract prices
-            price_pattern = r'\$([0-9,]+\.?\d*)'
-            found_prices = re.findall(price_pattern, message)
-            for i, ticker in enumerate(found_tickers[:len(found_prices)]):
-                entities["prices"][ticker] = found_prices[i]
-            
-            # Store in Chroma memory
-            memory_id = await self.memory_service.store_conversation(
-                user_input=user_input,
-                assistant_response=result.get("message", ""),
-                entities=entities,
-                metadata={
-                    "tools_used": result.get("tools_used", []),
-                    "success": result.get("success", True)
-                },
-                session_id=self.session_id
-            )
-            
-            self.logger.info(f"Stored conversation in memory: {memory_id}")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to store conversation memory: {e}")
-    
     async def _store_unified_conversation_memory(self, user_input: str, result: Dict[str, Any]):
         """Store conversation in unified Chroma intelligence system"""
         try:
@@ -1755,44 +1724,31 @@ if __name__ == "__main__":
     async def _conduct_deep_research(self, query: str, max_sources: int = 8, focus_areas: list = [], user_id: str = "system") -> Dict[str, Any]:
         """
         Conduct deep research inspired by the frontend DeepResearchAgent
-        Multi-step research workflow with intelligent search and synthesis
+        Concurrent search fan-out, near-duplicate removal, budgeted content fetch,
+        parallel finding extraction and a single synthesis under a deadline
         """
         try:
             from ..services.exa_service import ExaService
-            exa_service = ExaService()
+            from ..services.research_pipeline import ResearchPipeline
             
             # Step 1: Generate focused research plan
             research_plan = self._generate_research_plan(query, focus_areas)
             
-            # Step 2: Execute multi-step search
-            all_search_results = []
-            sources_per_query = max(1, max_sources // len(research_plan))
-            
-            search_progress = []
+            # Steps 2-5: search, dedupe, fetch, extract and synthesize concurrently
+            pipeline = ResearchPipeline(ExaService(), self.ai_service)
+            research = await pipeline.run(query, research_plan, max_sources=max_sources)
+            unique_sources = research.sources
+            search_progress = research.search_progress
             
-            for i, research_query in enumerate(research_plan[:3]):  # Limit to 3 queries for speed
-                try:
-                    search_results = await exa_service.search(research_query, num_results=sources_per_query)
-                    if search_results:
-                        all_search_results.extend(search_results[:sources_per_query])
-                        search_progress.append(f"✅ Step {i+1}: Found {len(search_results)} sources for '{research_query[:50]}...'")
-                    else:
-                        search_progress.append(f"⚠️ Step {i+1}: No sources found for '{research_query[:50]}...'")
-                except Exception as e:
-                    search_progress.append(f"❌ Step {i+1}: Search failed for '{research_query[:50]}...'")
-                    continue
-            
-            # Step 3: Deduplicate and limit sources
-            unique_sources = self._deduplicate_sources(all_search_results)[:max_sources]
-            
-            # Step 4: Extract key findings using AI analysis
-            if unique_sources:
-                findings = await self._extract_research_findings(query, unique_sources)
-            else:
+            findings = research.findings
+            if not unique_sources:
                 findings = [f"Limited information available for '{query}' - may require alternative research approaches"]
+            elif not findings:
+                findings = ["Analysis completed but specific findings require further investigation"]
             
-            # Step 5: Generate comprehensive synthesis
-            synthesis = await self._synthesize_research_findings(query, findings, unique_sources)
+            synthesis = research.synthesis
+            if not synthesis:
+                synthesis = f"Research on '{query}' shows multiple dimensions requiring further analysis."
             
             # Calculate confidence score
             confidence = self._calculate_research_confidence(unique_sources, findings)
@@ -1806,6 +1762,8 @@ if __name__ == "__main__":
                 f"• {len(unique_sources)} unique sources analyzed", 
                 f"• {len(findings)} key findings extracted",
                 f"• {int(confidence * 100)}% research confidence",
+                f"• Completed in {research.elapsed_seconds:.1f}s"
+                + (f" (partial: {', '.join(research.skipped_stages)} timed out)" if research.partial else ""),
                 "",
                 f"🎯 **Key Findings:**"
             ]
@@ -1837,6 +1795,11 @@ if __name__ == "__main__":
                     "findings": findings,
                     "synthesis": synthesis,
                     "confidence_score": confidence,
+                    "partial": research.partial,
+                    "skipped_stages": research.skipped_stages,
+                    "duplicates_removed": research.duplicates_removed,
+                    "content_bytes": research.content_bytes,
+                    "elapsed_seconds": round(research.elapsed_seconds, 3),
                     "sources": [{"title": s.get("title", ""), "url": s.get("url", "")} for s in unique_sources[:5]]
                 }
             }
@@ -1888,88 +1851,6 @@ if __name__ == "__main__":
         
         return base_plans[:4]  # Limit to 4 queries
     
-    def _deduplicate_sources(self, sources: list) -> list:
-        """Remove duplicate sources based on URL and title similarity"""
-        seen_urls = set()
-        unique_sources = []
-        
-        for source in sources:
-            url = source.get('url', '')
-            title = source.get('title', '').lower()
-            
-            # Simple deduplication by URL
-            if url not in seen_urls and url:
-                seen_urls.add(url)
-                unique_sources.append(source)
-        
-        return unique_sources
-    
-    async def _extract_research_findings(self, query: str, sources: list) -> list:
-        """Extract key findings from sources using AI analysis"""
-        try:
-            # Prepare source material for analysis
-            source_material = ""
-            for i, source in enumerate(sources[:6], 1):  # Limit to prevent token overflow
-                title = source.get('title', 'Unknown Title')
-                text = source.get('text', source.get('snippet', ''))[:300]
-                source_material += f"Source {i}: {title}\n{text}\n---\n"
-            
-            analysis_prompt = f"""Research Query: "{query}"
-
-Source Material:
-{source_material}
-
-Extract 5-6 key factual findings that directly address the research query. Focus on:
-- Concrete facts and data points
-- Recent developments or changes
-- Financial metrics or performance indicators
-- Strategic decisions or announcements
-- Market trends or competitive positioning
-
-Each finding should be concise, specific, and actionable for investment analysis.
-Format as bullet points starting with "•"."""
-
-            response = await self.ai_service.generate_response(analysis_prompt)
-            
-            findings = []
-            if response:
-                lines = response.split('\n')
-                for line in lines:
-                    clean_line = line.replace('•', '').replace('-', '').strip()
-                    if len(clean_line) > 20:  # Filter out short lines
-                        findings.append(clean_line)
-            
-            return findings[:6] if findings else ["Analysis completed but specific findings require further investigation"]
-            
-        except Exception as e:
-            return [f"Research analysis encountered technical issues: {str(e)[:100]}"]
-    
-    async def _synthesize_research_findings(self, query: str, findings: list, sources: list) -> str:
-        """Synthesize findings into executive summary"""
-        try:
-            if not findings:
-                return f"Research on '{query}' is ongoing. Limited public information available at this time."
-            
-            synthesis_prompt = f"""Research Query: "{query}"
-
-Key Findings:
-{chr(10).join(f"• {finding}" for finding in findings)}
-
-Sources Analyzed: {len(sources)}
-
-Create a concise executive summary (2-3 sentences) that:
-1. Directly answers the research query
-2. Highlights the most important insights
-3. Provides actionable intelligence for investment decisions
-
-Keep it professional and focused on key takeaways."""
-
-            response = await self.ai_service.generate_response(synthesis_prompt)
-            return response if response else "Research completed. Additional analysis may be needed for comprehensive insights."
-            
-        except Exception:
-            return f"Research on '{query}' shows multiple dimensions requiring further analysis."
-    
     def _calculate_research_confidence(self, sources: list, findings: list) -> float:
         """Calculate confidence score based on source quality and findings"""
         if not sources or not findings:
@@ -27,6 +27,9 @@ def create_db_and_tables():
         WorkflowExecution, MarketDataSnapshot, ResearchAnalysis,
         InvestmentMemo, WorkflowTemplate, AnalyticsEvent
     )
+    from .models.creations import CreationRecord
+    from .models.fund_ledger import FundLedgerEntry, FundDailyTotal, FundLedgerState
+    from .models.portfolio_kpis import PortfolioKPI
     
     SQLModel.metadata.create_all(engine)
 
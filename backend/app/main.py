@@ -2,12 +2,58 @@ from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
 from .config import settings
 from .database import create_db_and_tables
 from .middleware.metrics import MetricsMiddleware, set_metrics_middleware
 
 
+async def warm_up_memory_services() -> bool:
+    """Initialize the Chroma-backed memory services off the event loop"""
+    from .services.unified_chroma_service import unified_chroma_service
+    from .services.chroma_memory_service import chroma_memory_service
+    results = await asyncio.gather(unified_chroma_service.initialize(), chroma_memory_service.initialize())
+    if all(results):
+        print("✅ Vector memory ready")
+        # Documents written before date filters were pushed down need their `_ts` twins
+        from .services.chroma_migration import backfill_epoch_fields_once
+        from .services.chroma_runtime import chroma_runtime
+        try:
+            backfill = await chroma_runtime.run(backfill_epoch_fields_once)
+            if backfill:
+                print(f"✅ Backfilled date fields on {backfill['updated']} memories")
+        except Exception as e:
+            print(f"⚠️ Date field backfill failed: {e}")
+        # Creations recorded before creation_records existed are only in Chroma
+        from .services.creation_recorder import creation_recorder
+        try:
+            indexed = await creation_recorder.rebuild_index_once()
+            if indexed is not None:
+                print(f"✅ Indexed {indexed} existing creations")
+        except Exception as e:
+            print(f"⚠️ Creation index backfill failed: {e}")
+    else:
+        print("⚠️ Vector memory unavailable; it will be retried on first use")
+    return all(results)
+
+
+def memory_readiness() -> dict:
+    """Readiness of the memory services (ready once Chroma is open) and the embedding model"""
+    from .services.unified_chroma_service import unified_chroma_service
+    from .services.chroma_memory_service import chroma_memory_service
+    from .services.embedding_service import embedding_service
+    services = {
+        "unified_memory": unified_chroma_service.readiness(),
+        "conversation_memory": {"ready": chroma_memory_service.ready},
+    }
+    return {
+        "ready": all(service["ready"] for service in services.values()),
+        "services": services,
+        "embedding_model": {"ready": embedding_service.ready},
+    }
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
@@ -16,10 +62,41 @@ async def lifespan(app: FastAPI):
     create_db_and_tables()
     print("✅ Database tables created")
     
+    # Precompile AI tool schemas once so terminal requests never rebuild them
+    from .services.intelligent_tools import IntelligentToolsService
+    catalog = IntelligentToolsService.get_tool_catalog()
+    print(f"✅ Tool catalog compiled ({len(catalog)} tools)")
+    
+    # Load the embedding model in a worker thread so the first memory query is not a cold start
+    from .services.embedding_service import embedding_service
+    embedding_warmup = asyncio.create_task(embedding_service.warm_up())
+    
+    # Open Chroma for the memory services in the background; /health reports when they are ready
+    memory_warmup = asyncio.create_task(warm_up_memory_services())
+    
+    # Drop expired vector memory buckets on a schedule
+    from .services.chroma_retention import memory_compactor
+    memory_compactor.start(settings.memory_compaction_interval_seconds)
+    
     yield
     
     # Shutdown
     print("🛑 Shutting down Redpill VC CRM...")
+    
+    for warmup in (embedding_warmup, memory_warmup):
+        if not warmup.done():
+            warmup.cancel()
+    await memory_compactor.stop()
+    
+    # Write out any vector memory still buffered in write-behind queues
+    from .services.chroma_ingestion import shutdown_ingestion_queues
+    from .services.chroma_runtime import chroma_runtime
+    await shutdown_ingestion_queues()
+    chroma_runtime.shutdown()
+    
+    # Stop fund simulation worker processes
+    from .services.fund_simulator import fund_simulator
+    fund_simulator.shutdown()
 
 
 # Create FastAPI application
@@ -56,9 +133,12 @@ set_metrics_middleware(metrics_middleware_instance)
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (liveness; `ready` turns true once vector memory is open)."""
+    readiness = memory_readiness()
     return {
         "status": "healthy",
+        "ready": readiness["ready"],
+        "readiness": readiness,
         "app": settings.app_name,
         "version": settings.version,
         "environment": "development" if settings.debug else "production",
@@ -98,9 +178,11 @@ from .api import claude_terminal_api  # New Claude Code-style terminal
 from .api.v2 import terminal as terminal_v2  # V2 Terminal with Claude Code intelligence
 from .api.v1 import search
 from .api import intelligence  # Investment intelligence service
+from .api import metrics  # Request and AI-layer metrics
+from .api import gp_dashboard  # GP dashboard modules and widget bundle
 
 # Temporarily disable routers with forward reference issues until we fix Pydantic models
-# from .api import portfolio, workflows, metrics, gp_dashboard, dashboards  
+# from .api import portfolio, workflows, dashboards  
 # from .api.v1 import data, tags, ownership, activities, talent
 from .api.v1 import persons
 
@@ -117,14 +199,14 @@ app.include_router(terminal_v2.router, prefix="/api/v2/terminal", tags=["termina
 app.include_router(config.router, prefix="/api/v1/config", tags=["configuration"])
 app.include_router(creations.router, prefix="/api/v1", tags=["investment-crm"])  # Universal Creation Recording System
 app.include_router(intelligence.router, tags=["intelligence"])  # Investment Intelligence API
+app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
+app.include_router(gp_dashboard.router, prefix="/api/v1/gp", tags=["gp-dashboard"])
 
 # Temporarily disabled routers until Pydantic forward reference issues are fixed
 # app.include_router(portfolio.router, prefix="/api/v1/portfolio", tags=["portfolio"])
 # app.include_router(workflows.router, prefix="/api/v1/workflows", tags=["workflows"])
 # app.include_router(data.router, prefix="/api/v1/data", tags=["data-optimization"])
-# app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["metrics"])
 # app.include_router(dashboards.router, prefix="/api/v1/dashboards", tags=["dashboards"])
-# app.include_router(gp_dashboard.router, prefix="/api/v1/gp", tags=["gp-dashboard"])
 app.include_router(persons.router, prefix="/api/v1/persons", tags=["persons"])
 # app.include_router(tags.router, prefix="/api/v1/tags", tags=["tags"])
 # app.include_router(ownership.router, prefix="/api/v1/ownership", tags=["ownership"])
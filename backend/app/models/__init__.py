@@ -21,6 +21,9 @@ from .talent import (
     CompanyDataSourceTalent, PersonDataSource,
     TALENT_CATEGORIES, ACHIEVEMENT_TYPES, PLATFORM_TYPES, VERIFICATION_STATUS
 )
+from .creations import CreationRecord
+from .fund_ledger import FundLedgerEntry, FundDailyTotal, FundLedgerState
+from .portfolio_kpis import PortfolioKPI
 
 __all__ = [
     "Deal",
@@ -106,5 +109,10 @@ __all__ = [
     "TALENT_CATEGORIES",
     "ACHIEVEMENT_TYPES",
     "PLATFORM_TYPES",
-    "VERIFICATION_STATUS"
+    "VERIFICATION_STATUS",
+    "CreationRecord",
+    "FundLedgerEntry",
+    "FundDailyTotal",
+    "FundLedgerState",
+    "PortfolioKPI"
 ]
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""SQLModel index of terminal creations (charts, tables, analyses)."""
+
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import TIMESTAMP, String, Index, JSON, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+
+class CreationRecord(SQLModel, table=True):
+    """
+    Relational mirror of creation metadata.
+
+    Listing, filtering and pagination run here; the creation payload stays in
+    Chroma and is fetched by id for the rows actually returned.
+    """
+    __tablename__ = "creation_records"
+    __table_args__ = (
+        Index("idx_creation_records_user_created", "user_id", "created_at"),
+        Index("idx_creation_records_user_type_category", "user_id", "creation_type", "category", "created_at"),
+        Index("idx_creation_records_symbols", "symbols", postgresql_using="gin"),
+        Index("idx_creation_records_tags", "tags", postgresql_using="gin"),
+    )
+
+    creation_id: str = Field(primary_key=True, max_length=255)
+    user_id: str = Field(max_length=255)
+    creation_type: str = Field(max_length=50)
+    category: str = Field(max_length=50)
+    title: str
+    description: str = Field(default="")
+
+    openbb_module: str = Field(default="", max_length=255)
+    openbb_tool: str = Field(default="", max_length=255)
+    parameters: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+
+    symbols: List[str] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(String), nullable=False, server_default=text("'{}'"))
+    )
+    sectors: List[str] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(String), nullable=False, server_default=text("'{}'"))
+    )
+    tags: List[str] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(String), nullable=False, server_default=text("'{}'"))
+    )
+
+    file_path: Optional[str] = None
+    chart_url: Optional[str] = None
+    web_url: Optional[str] = None
+    data_period: Optional[str] = None
+    expires_at: Optional[str] = None
+    investment_thesis: Optional[str] = None
+    priority: str = Field(default="normal", max_length=20)
+
+    created_at: datetime = Field(
+        default_factory=datetime.now,
+        sa_column=Column("created_at", TIMESTAMP, nullable=False)
+    )
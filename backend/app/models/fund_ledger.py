@@ -0,0 +1,52 @@
+"""SQLModel classes for the fund performance ledger."""
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
+from typing import Optional
+from datetime import datetime, date
+import uuid
+
+
+class FundLedgerEntry(SQLModel, table=True):
+    """
+    One fund cashflow or valuation change, projected from a deal.
+
+    `amount` is the cash movement (negative for capital calls, positive for
+    distributions); `nav_change` moves the fund's residual value.
+    """
+    __tablename__ = "fund_ledger_entries"
+    __table_args__ = (
+        Index("idx_fund_ledger_entries_date", "entry_date"),
+    )
+
+    id: str = Field(
+        default_factory=lambda: str(uuid.uuid4()),
+        primary_key=True
+    )
+    deal_id: str = Field(max_length=255, index=True)
+    company: Optional[str] = Field(default=None, max_length=255)
+    entry_date: date
+    entry_type: str = Field(max_length=20)  # 'call', 'distribution', 'valuation'
+    amount: float = Field(default=0.0)
+    nav_change: float = Field(default=0.0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class FundDailyTotal(SQLModel, table=True):
+    """Per-day sums of ledger entries; metrics for any range read these rows only"""
+    __tablename__ = "fund_daily_totals"
+
+    day: date = Field(primary_key=True)
+    paid_in: float = Field(default=0.0)
+    distributions: float = Field(default=0.0)
+    nav_change: float = Field(default=0.0)
+    entries: int = Field(default=0)
+
+
+class FundLedgerState(SQLModel, table=True):
+    """Single row shared by every worker: whether the daily totals must be rebuilt"""
+    __tablename__ = "fund_ledger_state"
+
+    id: int = Field(default=1, primary_key=True)
+    stale: bool = Field(default=False)
+    rebuilt_at: Optional[datetime] = None
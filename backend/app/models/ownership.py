@@ -95,4 +95,10 @@ class OwnershipRead(OwnershipBase):
 class OwnershipReadWithDetails(OwnershipRead):
     """Ownership read model with person and company details."""
     person: Optional["PersonRead"] = None
-    company: Optional["CompanyRead"] = None
\ No newline at end of file
+    company: Optional["CompanyRead"] = None
+
+from .companies import CompanyRead  # noqa: E402
+from .persons import PersonRead  # noqa: E402
+
+# Rebuild models to resolve forward references
+OwnershipReadWithDetails.model_rebuild()
@@ -0,0 +1,28 @@
+"""SQLModel classes for reported portfolio company KPIs."""
+
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, UniqueConstraint
+from typing import Optional
+from datetime import datetime, date
+
+
+class PortfolioKPI(SQLModel, table=True):
+    """
+    One reported metric value for a company and reporting period.
+
+    Narrow (company, metric, period, value) rows, so new metrics need no schema
+    change; `period` is the last day of the reporting period.
+    """
+    __tablename__ = "portfolio_kpis"
+    __table_args__ = (
+        UniqueConstraint("company_id", "metric", "period", name="uq_portfolio_kpis_company_metric_period"),
+        Index("idx_portfolio_kpis_period_metric", "period", "metric"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    company_id: str = Field(foreign_key="companies.id", max_length=255)
+    metric: str = Field(max_length=50)
+    period: date
+    value: float
+    source: str = Field(default="manual", max_length=50)  # 'csv', 'json', 'manual'
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
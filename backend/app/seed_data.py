@@ -7,6 +7,7 @@ from app.models.companies import Company
 from app.models.deals import Deal, DealStatus, InvestmentStage
 from app.models.users import User
 from app.models.conversations import Conversation, Message, AIInsight
+from app.services.fund_ledger import fund_ledger
 import uuid
 
 def seed_database():
@@ -181,6 +182,7 @@ def seed_database():
                 session.add(deal)
         
         session.commit()
+        fund_ledger.rebuild(session)
         print("✅ Database seeded with sample VC data")
         print("📊 Created:")
         print(f"   - {len(companies)} companies")
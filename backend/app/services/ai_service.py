@@ -1,13 +1,39 @@
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
+import asyncio
+import logging
 import aiohttp
 from datetime import datetime
+import openai
 from openai import OpenAI
 
 from ..config import settings
+from .llm_metrics import call_with_retries, track_llm_call
 from ..models.deals import Deal
 from ..models.companies import Company
 
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth another attempt (timeouts, conflicts, rate limits, server errors)
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class RedpillAPIError(Exception):
+    """Non-200 response from the Redpill chat completions endpoint"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Connection failures, timeouts and retryable HTTP statuses"""
+    if isinstance(error, (openai.APIConnectionError, aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status in RETRYABLE_STATUS_CODES
+
+
 class AIService:
     """AI service for VC analysis supporting both OpenAI and redpill.ai APIs with tool calling."""
     
@@ -18,21 +44,26 @@ class AIService:
         # Use OpenAI API keys for both OpenAI and Redpill
         if settings.openai_api_key and settings.openai_api_key != "sk-9JABKD0bYW6s8VN6PoIG0LUOj1uo44TrXm0MNJWXe7GWP1wR":
             self.api_key = settings.openai_api_key
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            # openai_base_url points at any OpenAI-compatible server (e.g. benchmarks/mock_llm_server.py)
+            self.base_url = settings.openai_base_url or "https://api.openai.com/v1"
+            # Retries happen in _create_completion so they are counted per call
+            self.client = OpenAI(api_key=settings.openai_api_key, base_url=self.base_url, max_retries=0)
             self.default_model = "gpt-4o"  # Use latest model
             self.use_redpill = False
-            print(f"✅ AI Service configured with OpenAI API (model: {self.default_model})")
+            logger.info(f"✅ AI Service configured with OpenAI API (model: {self.default_model})")
         elif settings.REDPILL_API_KEY:
             # Redpill uses same OpenAI API key format
             self.api_key = settings.REDPILL_API_KEY
+            self.base_url = settings.redpill_api_url
             self.client = OpenAI(
-                base_url="https://api.redpill.ai/v1",
+                base_url=self.base_url,
                 api_key=settings.REDPILL_API_KEY,
-                timeout=120.0  # 2 minutes timeout for Redpill API
+                timeout=120.0,  # 2 minutes timeout for Redpill API
+                max_retries=0
             )
             self.default_model = "phala/gpt-oss-120b"
             self.use_redpill = True
-            print(f"✅ AI Service configured with Redpill API (model: {self.default_model})")
+            logger.info(f"✅ AI Service configured with Redpill API (model: {self.default_model})")
         else:
             # NO MOCK MODE - Fail fast
             raise Exception("No valid API key found. Set OPENAI_API_KEY or REDPILL_API_KEY environment variable.")
@@ -40,6 +71,16 @@ class AIService:
         # Define available tools for function calling
         self.tools = self._define_tools()
     
+    async def _create_completion(self, caller: str, **kwargs):
+        """Run a chat completion in a worker thread, recording tokens, latency and cost"""
+        kwargs.setdefault("model", self.default_model)
+        async with track_llm_call(caller, kwargs["model"]) as call:
+            response = await call_with_retries(
+                call, lambda: asyncio.to_thread(self.client.chat.completions.create, **kwargs), is_retryable
+            )
+            call.set_usage(getattr(response, "usage", None))
+            return response
+    
     def _define_tools(self) -> List[Dict[str, Any]]:
         """Define all available tools for function calling."""
         return [
@@ -453,19 +494,25 @@ Next milestone: {deal.next_milestone or 'Not defined'}
             "stream": stream
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    error_text = await response.text()
-                    print(f"Redpill API error {response.status}: {error_text}")
-                    print(f"Payload sent: {json.dumps(payload, indent=2)}")
-                    raise Exception(f"Redpill AI API error {response.status}: {error_text}")
+        async def post():
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=payload
+                ) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    else:
+                        error_text = await response.text()
+                        logger.error(f"Redpill API error {response.status}: {error_text}")
+                        logger.debug(f"Payload sent: {json.dumps(payload)}")
+                        raise RedpillAPIError(response.status, f"Redpill AI API error {response.status}: {error_text}")
+
+        async with track_llm_call("ai_service.redpill_api", self.default_model) as call:
+            result = await call_with_retries(call, post, is_retryable)
+            call.set_usage(result.get("usage"))
+            return result
 
     async def chat_with_tools(self, messages: List[Dict], tools: List[Dict], tool_choice: str = "auto") -> Dict:
         """Enhanced chat method with function calling support"""
@@ -473,8 +520,8 @@ Next milestone: {deal.next_milestone or 'Not defined'}
             if not self.client:
                 return {"content": "AI service not configured. Please set up API keys."}
             
-            response = self.client.chat.completions.create(
-                model=self.default_model,
+            response = await self._create_completion(
+                "ai_service.chat_with_tools",
                 messages=messages,
                 tools=tools,
                 tool_choice=tool_choice,
@@ -503,9 +550,7 @@ Next milestone: {deal.next_milestone or 'Not defined'}
             return result
             
         except Exception as e:
-            print(f"DEBUG: AI chat_with_tools error: {str(e)}")
-            print(f"DEBUG: AI client configured: {self.use_redpill}")
-            print(f"DEBUG: Model: {self.default_model}")
+            logger.error(f"AI chat_with_tools error (redpill={self.use_redpill}, model={self.default_model}): {e}")
             return {
                 "content": f"Error generating response: {str(e)}",
                 "error": str(e)
@@ -522,20 +567,13 @@ Next milestone: {deal.next_milestone or 'Not defined'}
             raise Exception("AI service not configured - no API key available")
         
         try:
-            if self.use_redpill:
-                response = self.client.chat.completions.create(
-                    model=self.default_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.default_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=max_tokens,
-                    temperature=temperature
-                )
+            # Blocking SDK call runs in a worker thread so concurrent callers overlap
+            response = await self._create_completion(
+                "ai_service.generate_response",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
             
             return response.choices[0].message.content
             
@@ -574,8 +612,8 @@ Next milestone: {deal.next_milestone or 'Not defined'}
                 return response["choices"][0]["message"]["content"]
             elif self.client:
                 # Use OpenAI API
-                response = self.client.chat.completions.create(
-                    model=self.default_model,
+                response = await self._create_completion(
+                    "ai_service.generate_chat_response",
                     messages=messages,
                     max_tokens=8000,
                     temperature=0.7,
@@ -588,7 +626,7 @@ Next milestone: {deal.next_milestone or 'Not defined'}
                 return self._generate_mock_response(user_message, company.name)
             
         except Exception as e:
-            print(f"AI API error: {e}")
+            logger.error(f"AI API error: {e}")
             return f"I apologize, but I'm experiencing technical difficulties. Please try again. (Error: {str(e)[:100]})"
     
     async def generate_quick_analysis(
@@ -636,8 +674,8 @@ Next milestone: {deal.next_milestone or 'Not defined'}
                 content = response["choices"][0]["message"]["content"]
             elif self.client:
                 # Use OpenAI API
-                response = self.client.chat.completions.create(
-                    model=self.default_model,
+                response = await self._create_completion(
+                    "ai_service.generate_quick_analysis",
                     messages=messages,
                     max_tokens=8000,
                     temperature=0.3,  # Lower temperature for more focused analysis
@@ -660,7 +698,7 @@ Next milestone: {deal.next_milestone or 'Not defined'}
             }
             
         except Exception as e:
-            print(f"OpenAI API error in quick analysis: {e}")
+            logger.error(f"OpenAI API error in quick analysis: {e}")
             return {
                 "error": f"Failed to generate analysis: {str(e)[:100]}",
                 "analysis_type": analysis_type,
@@ -707,7 +745,8 @@ Description: {company.description}
 """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
+                "ai_service.generate_investment_memo",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -731,7 +770,7 @@ Description: {company.description}
             }
             
         except Exception as e:
-            print(f"OpenAI API error in memo generation: {e}")
+            logger.error(f"OpenAI API error in memo generation: {e}")
             return {
                 "error": f"Failed to generate investment memo: {str(e)[:100]}",
                 "company": company.name
@@ -795,8 +834,8 @@ Be concise but thorough in your responses. Use only English language in all resp
 
             # Route to appropriate AI provider with tool calling
             if self.client:
-                response = self.client.chat.completions.create(
-                    model=self.default_model,
+                response = await self._create_completion(
+                    "ai_service.chat",
                     messages=messages,
                     max_tokens=8000,
                     temperature=0.7,
@@ -851,7 +890,7 @@ Be concise but thorough in your responses. Use only English language in all resp
             }
 
         except Exception as e:
-            print(f"AI chat error: {e}")
+            logger.error(f"AI chat error: {e}")
             # Return a fallback response
             return {
                 "content": f"I apologize, but I'm experiencing technical difficulties. Error: {str(e)[:100]}",
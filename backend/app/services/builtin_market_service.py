@@ -17,6 +17,8 @@ import json
 import os
 from dotenv import load_dotenv
 
+from .market_symbols import CRYPTO_SYMBOLS, COINGECKO_IDS, STOCK_SYMBOLS, SECTOR_ETFS
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -51,31 +53,11 @@ class BuiltinMarketService:
         self.exa_api_key = os.getenv('EXA_API_KEY')
         
         # Symbol mappings for better recognition
-        self.crypto_symbols = {
-            'bitcoin': 'BTC', 'btc': 'BTC',
-            'ethereum': 'ETH', 'eth': 'ETH', 
-            'solana': 'SOL', 'sol': 'SOL',
-            'polkadot': 'DOT', 'dot': 'DOT',
-            'chainlink': 'LINK', 'link': 'LINK',
-            'cardano': 'ADA', 'ada': 'ADA',
-            'polygon': 'MATIC', 'matic': 'MATIC',
-            'avalanche': 'AVAX', 'avax': 'AVAX',
-            'uniswap': 'UNI', 'uni': 'UNI',
-            'dogecoin': 'DOGE', 'doge': 'DOGE'
-        }
+        self.crypto_symbols = dict(CRYPTO_SYMBOLS)
         
-        self.coingecko_ids = {
-            'BTC': 'bitcoin', 'ETH': 'ethereum', 'SOL': 'solana',
-            'DOT': 'polkadot', 'LINK': 'chainlink', 'ADA': 'cardano',
-            'MATIC': 'polygon', 'AVAX': 'avalanche-2', 'UNI': 'uniswap',
-            'DOGE': 'dogecoin'
-        }
+        self.coingecko_ids = dict(COINGECKO_IDS)
         
-        self.stock_symbols = {
-            'apple': 'AAPL', 'microsoft': 'MSFT', 'google': 'GOOGL',
-            'amazon': 'AMZN', 'tesla': 'TSLA', 'meta': 'META',
-            'nvidia': 'NVDA', 'netflix': 'NFLX', 'dropbox': 'DBX'
-        }
+        self.stock_symbols = dict(STOCK_SYMBOLS)
         
         # Economic data sources
         self.economic_apis = {
@@ -92,12 +74,7 @@ class BuiltinMarketService:
             'DIA': {'name': 'Dow Jones', 'factor': 100}  # DIA ~425 * 100 = 42500 (Dow)
         }
         
-        self.sector_etfs = {
-            'XLK': 'Technology', 'XLF': 'Financial', 'XLV': 'Healthcare',
-            'XLE': 'Energy', 'XLI': 'Industrial', 'XLP': 'Consumer Staples',
-            'XLY': 'Consumer Discretionary', 'XLRE': 'Real Estate',
-            'XLU': 'Utilities', 'XLB': 'Materials', 'XLC': 'Communication'
-        }
+        self.sector_etfs = dict(SECTOR_ETFS)
     
     async def get_crypto_data(self, symbol: str, with_chart: bool = False) -> Dict[str, Any]:
         """Get crypto data with optional chart generation"""
@@ -0,0 +1,365 @@
+"""
+Cap Table Engine - Fully-diluted ownership, share-class rollups and round modelling
+A company's cap table is loaded with one joined query (company, active ownerships and
+their holders) and computed column-wise, so token projects with thousands of holders
+render in milliseconds. Results are cached per company version; writes to ownerships,
+the company or a holder bump the version when the transaction commits.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+from datetime import datetime, timedelta
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_
+from sqlmodel import Session, select
+
+from ..models.companies import Company, CompanyRead
+from ..models.ownership import Ownership, OwnershipReadWithDetails
+from ..models.persons import Person, PersonRead
+from ..utils.frames import records
+from .commit_invalidation import invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+# Longest a computed cap table is served without recomputing
+CACHE_TTL = timedelta(minutes=5)
+
+# Share classes that are convertible rather than outstanding; rows with an exercise price count too
+OPTION_CLASSES = {"option", "options", "warrant", "warrants", "rsu", "rsus", "sar", "pool", "option_pool"}
+
+POOL_CLASS = "option_pool"
+
+COLUMNS = [
+    "id", "person_id", "holder", "ownership_type", "share_class", "shares", "percentage",
+    "exercise_price", "grant_date", "vesting_schedule",
+]
+
+
+def company_holdings(session: Session, company_id: str, is_active: Optional[bool] = True,
+                     share_class: Optional[str] = None) -> Tuple[Optional[Company], List[Tuple[Ownership, Optional[Person]]]]:
+    """The company and its (ownership, person) rows in one query; (None, []) if the company does not exist"""
+    on = [Ownership.company_id == Company.id]
+    if is_active is not None:
+        on.append(Ownership.is_active == is_active)
+    if share_class:
+        on.append(Ownership.share_class == share_class)
+    rows = session.exec(
+        select(Company, Ownership, Person)
+        .outerjoin(Ownership, and_(*on))
+        .outerjoin(Person, Ownership.person_id == Person.id)
+        .where(Company.id == company_id)
+    ).all()
+    if not rows:
+        return None, []
+    return rows[0][0], [(ownership, person) for _, ownership, person in rows if ownership is not None]
+
+
+def person_holdings(session: Session, person_id: str,
+                    is_active: Optional[bool] = True) -> Tuple[Optional[Person], List[Tuple[Ownership, Optional[Company]]]]:
+    """The person and their (ownership, company) rows in one query; (None, []) if the person does not exist"""
+    on = [Ownership.person_id == Person.id]
+    if is_active is not None:
+        on.append(Ownership.is_active == is_active)
+    rows = session.exec(
+        select(Person, Ownership, Company)
+        .outerjoin(Ownership, and_(*on))
+        .outerjoin(Company, Ownership.company_id == Company.id)
+        .where(Person.id == person_id)
+    ).all()
+    if not rows:
+        return None, []
+    return rows[0][0], [(ownership, company) for _, ownership, company in rows if ownership is not None]
+
+
+def _details(rows: Iterable[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> List[OwnershipReadWithDetails]:
+    companies: Dict[str, CompanyRead] = {}
+    persons: Dict[str, PersonRead] = {}
+    result = []
+    for ownership, company, person in rows:
+        if company is not None and company["id"] not in companies:
+            companies[company["id"]] = CompanyRead(**company)
+        if person is not None and person["id"] not in persons:
+            persons[person["id"]] = PersonRead(**person)
+        result.append(OwnershipReadWithDetails(
+            **ownership,
+            company=companies[company["id"]] if company is not None else None,
+            person=persons[person["id"]] if person is not None else None,
+        ))
+    return result
+
+
+def ownership_details(rows: Iterable[Tuple[Ownership, Optional[Company], Optional[Person]]]) -> List[OwnershipReadWithDetails]:
+    """OwnershipReadWithDetails for (ownership, company, person) rows; each company and person is serialized once"""
+    serialized: Dict[int, Dict[str, Any]] = {}
+
+    def data(instance):
+        if instance is None:
+            return None
+        if id(instance) not in serialized:
+            serialized[id(instance)] = instance.model_dump()
+        return serialized[id(instance)]
+
+    return _details((ownership.model_dump(), data(company), data(person)) for ownership, company, person in rows)
+
+
+def _frame(rows: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> pd.DataFrame:
+    frame = pd.DataFrame([
+        {**{column: ownership.get(column) for column in COLUMNS}, "holder": person["name"] if person else None}
+        for ownership, person in rows
+    ], columns=COLUMNS)
+    frame["share_class"] = frame["share_class"].fillna("common")
+    for column in ("shares", "percentage", "exercise_price"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(float)
+    return frame
+
+
+def _rollup(frame: pd.DataFrame, by: str, fully_diluted: float) -> pd.DataFrame:
+    """
+    Positions, distinct holders, shares and fully-diluted percentage per value of `by`
+    from bincounts over factorized keys; `first` is the row of each value's first position.
+    """
+    codes, keys = pd.factorize(frame[by].fillna(""))
+    holder_codes, holder_keys = pd.factorize(frame["person_id"].fillna(""))
+    size = len(keys)
+    pairs = np.unique(codes.astype(np.int64) * max(len(holder_keys), 1) + holder_codes)
+    _, first = np.unique(codes, return_index=True)
+    rollup = pd.DataFrame({
+        by: keys,
+        "positions": np.bincount(codes, minlength=size),
+        "holders": np.bincount(pairs // max(len(holder_keys), 1), minlength=size),
+        "shares": np.bincount(codes, weights=frame["shares"].fillna(0).to_numpy(), minlength=size),
+        "is_option": np.bincount(codes, weights=frame["is_option"].to_numpy(float), minlength=size) > 0,
+        "first": first,
+    })
+    rollup["fully_diluted_pct"] = rollup["shares"] / fully_diluted * 100 if fully_diluted else np.nan
+    return rollup.sort_values(["shares", "first"], ascending=[False, True]).reset_index(drop=True)
+
+
+def compute(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Fully-diluted and outstanding percentages per position, per-holder and per-class
+    rollups. Positions without a share count are sized from their stated percentage of
+    the fully-diluted total; when no position has a share count the table is computed
+    in percentage units and `share_basis` is "percentage".
+    """
+    frame = frame.copy()
+    frame["is_option"] = frame["share_class"].str.lower().isin(OPTION_CLASSES) | frame["exercise_price"].notna()
+
+    known = frame["shares"].notna()
+    if known.any():
+        share_basis = "shares"
+        implied = frame["percentage"].where(~known)
+        implied_pct = float(implied.sum())
+        if implied_pct < 100:
+            fully_diluted = float(frame.loc[known, "shares"].sum()) / (1 - implied_pct / 100)
+            frame["shares"] = frame["shares"].fillna(implied / 100 * fully_diluted)
+    else:
+        share_basis = "percentage"
+        frame["shares"] = frame["percentage"]
+    frame["shares_implied"] = ~known & frame["shares"].notna()
+
+    fully_diluted = float(frame["shares"].sum())
+    outstanding = float(frame.loc[~frame["is_option"], "shares"].sum())
+    frame["fully_diluted_pct"] = frame["shares"] / fully_diluted * 100 if fully_diluted else np.nan
+    frame["outstanding_pct"] = (frame["shares"] / outstanding * 100).where(~frame["is_option"]) if outstanding else np.nan
+    frame = frame.sort_values(["shares", "holder"], ascending=[False, True], na_position="last").reset_index(drop=True)
+
+    holders = _rollup(frame, "person_id", fully_diluted)
+    holders.insert(1, "holder", frame["holder"].to_numpy()[holders["first"].to_numpy()])
+
+    return {
+        "share_basis": share_basis,
+        "totals": {
+            "fully_diluted_shares": fully_diluted,
+            "outstanding_shares": outstanding,
+            "option_shares": fully_diluted - outstanding,
+            "positions": int(len(frame)),
+            "holders": int(frame["person_id"].nunique()),
+            "unsized_positions": int(frame["shares"].isna().sum()),
+        },
+        "positions": frame,
+        "holders": holders.drop(columns=["first", "holders", "is_option"]),
+        "share_classes": _rollup(frame, "share_class", fully_diluted).drop(columns="first"),
+        "ownership_types": _rollup(frame, "ownership_type", fully_diluted).drop(columns="first"),
+    }
+
+
+def pro_forma(table: Dict[str, Any], investment: float, pre_money: float, option_pool: float = 0.0,
+              round_class: str = "new_round") -> Dict[str, Any]:
+    """
+    Pro-forma cap table after a priced round. `pre_money` is the fully-diluted pre-money
+    valuation and `option_pool` the unallocated pool as a fraction of post-money shares,
+    created before the round (so it dilutes existing holders only).
+    """
+    if investment <= 0 or pre_money <= 0:
+        raise ValueError("Investment and pre-money valuation must be positive")
+    fully_diluted = table["totals"]["fully_diluted_shares"]
+    if not fully_diluted:
+        raise ValueError("Cap table has no sized positions")
+    step_up = 1 + investment / pre_money
+    if option_pool < 0 or option_pool * step_up >= 1:
+        raise ValueError("Option pool must be between 0 and 1 / (1 + investment / pre-money)")
+
+    pool_shares = option_pool * step_up * fully_diluted / (1 - option_pool * step_up)
+    price = pre_money / (fully_diluted + pool_shares)
+    new_shares = investment / price
+    post = fully_diluted + pool_shares + new_shares
+
+    positions = table["positions"][["id", "person_id", "holder", "ownership_type", "share_class", "shares", "fully_diluted_pct"]].copy()
+    positions["post_money_pct"] = positions["shares"] / post * 100
+    positions["dilution_pct"] = positions["post_money_pct"] - positions["fully_diluted_pct"]
+    positions["post_money_value"] = positions["shares"] * price
+
+    classes = table["share_classes"][["share_class", "shares", "fully_diluted_pct"]]
+    added = pd.DataFrame(
+        [(round_class, new_shares, np.nan), (POOL_CLASS, pool_shares, np.nan)], columns=classes.columns
+    )
+    classes = pd.concat([classes, added[added["shares"] > 0]], ignore_index=True)
+    classes = classes.groupby("share_class", sort=False).agg(shares=("shares", "sum"), fully_diluted_pct=("fully_diluted_pct", "sum"))
+    classes["post_money_pct"] = classes["shares"] / post * 100
+    classes["dilution_pct"] = classes["post_money_pct"] - classes["fully_diluted_pct"]
+
+    per_share = table["share_basis"] == "shares"
+    return {
+        "round": {
+            "investment": investment,
+            "pre_money": pre_money,
+            "post_money": pre_money + investment,
+            "price_per_share": price if per_share else None,
+            "new_shares": new_shares if per_share else None,
+            "pool_shares": pool_shares if per_share else None,
+            "investor_pct": new_shares / post * 100,
+            "pool_pct": pool_shares / post * 100,
+            "existing_holders_pct": fully_diluted / post * 100,
+            "post_money_shares": post if per_share else None,
+        },
+        "positions": records(positions),
+        "share_classes": records(classes.sort_values("shares", ascending=False).reset_index()),
+    }
+
+
+class CapTableEngine:
+    """Computes company cap tables and caches them per company version"""
+
+    def __init__(self, ttl: timedelta = CACHE_TTL, clock: Callable[[], datetime] = datetime.utcnow):
+        self._ttl = ttl
+        self._clock = clock
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._companies_by_person: Dict[str, set] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def version(self, company_id: str) -> int:
+        return self._versions.get(company_id, 0)
+
+    def _entry(self, session: Session, company_id: str) -> Optional[Dict[str, Any]]:
+        version = self.version(company_id)
+        entry = self._entries.get(company_id)
+        if entry is not None and entry["version"] == version and self._clock() < entry["expires_at"]:
+            self._stats["hits"] += 1
+            return entry
+
+        self._stats["misses"] += 1
+        started = time.perf_counter()
+        company, holdings = company_holdings(session, company_id)
+        if company is None:
+            return None
+        # Plain data, so cached entries outlive the session that loaded them
+        rows = [(ownership.model_dump(), person.model_dump() if person is not None else None) for ownership, person in holdings]
+        table = compute(_frame(rows))
+        entry = {
+            "version": version,
+            "expires_at": self._clock() + self._ttl,
+            "company": company.model_dump(),
+            "rows": rows,
+            "table": table,
+            "records": {key: records(table[key]) for key in ("positions", "holders", "share_classes", "ownership_types")},
+            "details": None,
+        }
+        entry["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self._entries[company_id] = entry
+        for _, person in rows:
+            if person is not None:
+                self._companies_by_person.setdefault(person["id"], set()).add(company_id)
+        return entry
+
+    def cap_table(self, session: Session, company_id: str, share_class: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Fully-diluted cap table with holder, share-class and ownership-type rollups; None if the company does not exist"""
+        entry = self._entry(session, company_id)
+        if entry is None:
+            return None
+        cached = entry["records"]
+        positions = cached["positions"]
+        if share_class:
+            positions = [row for row in positions if row["share_class"] == share_class]
+        return {
+            "company_id": company_id,
+            "version": entry["version"],
+            "share_basis": entry["table"]["share_basis"],
+            "totals": dict(entry["table"]["totals"]),
+            "positions": list(positions),
+            "holders": list(cached["holders"]),
+            "share_classes": list(cached["share_classes"]),
+            "ownership_types": list(cached["ownership_types"]),
+            "compute_ms": entry["elapsed_ms"],
+        }
+
+    def pro_forma(self, session: Session, company_id: str, investment: float, pre_money: float,
+                  option_pool: float = 0.0, round_class: str = "new_round") -> Optional[Dict[str, Any]]:
+        """Pro-forma dilution of a new round on the cached cap table; None if the company does not exist"""
+        entry = self._entry(session, company_id)
+        if entry is None:
+            return None
+        return {"company_id": company_id, **pro_forma(entry["table"], investment, pre_money, option_pool, round_class)}
+
+    def details(self, session: Session, company_id: str, share_class: Optional[str] = None) -> Optional[List[OwnershipReadWithDetails]]:
+        """Active ownerships with person and company details, largest percentage first"""
+        entry = self._entry(session, company_id)
+        if entry is None:
+            return None
+        if entry["details"] is None:
+            # Same order as ORDER BY percentage DESC, ownership_type on Postgres (NULLs first)
+            rows = sorted(entry["rows"], key=lambda row: row[0]["ownership_type"])
+            rows.sort(key=lambda row: (row[0]["percentage"] is None, row[0]["percentage"] or 0), reverse=True)
+            entry["details"] = _details((ownership, entry["company"], person) for ownership, person in rows)
+        if share_class:
+            return [detail for detail in entry["details"] if detail.share_class == share_class]
+        return list(entry["details"])
+
+    def forget_company(self, company_id: str) -> None:
+        self._versions[company_id] = self.version(company_id) + 1
+        self._entries.pop(company_id, None)
+        self._stats["invalidations"] += 1
+
+    def forget_person(self, person_id: str) -> None:
+        for company_id in self._companies_by_person.pop(person_id, ()):
+            self.forget_company(company_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._companies_by_person.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "cached_companies": len(self._entries)}
+
+
+# Global instance
+cap_table_engine = CapTableEngine()
+
+
+def _forget_company(company_id: str) -> None:
+    cap_table_engine.forget_company(company_id)
+
+
+def _forget_person(person_id: str) -> None:
+    cap_table_engine.forget_person(person_id)
+
+
+invalidate_on_commit({
+    Ownership: (lambda ownership: ownership.company_id, _forget_company),
+    Company: (lambda company: company.id, _forget_company),
+    Person: (lambda person: person.id, _forget_person),
+})
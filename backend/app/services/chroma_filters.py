@@ -0,0 +1,219 @@
+"""
+Chroma Filters - Compile rich metadata filter specs into Chroma where clauses
+Supports $and/$or, comparison ranges (dates become numeric epoch fields), $in/$nin
+lists, document text matching and tenant/workspace scoping, so every filter is
+pushed down into the query instead of being applied in Python afterwards
+"""
+
+from typing import Dict, List, Any, Optional, Union
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+# Comparison operators Chroma accepts on metadata fields
+_FIELD_OPERATORS = frozenset({"$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin"})
+_RANGE_OPERATORS = frozenset({"$gt", "$gte", "$lt", "$lte"})
+_DOCUMENT_OPERATORS = frozenset({"$contains", "$not_contains"})
+
+# Suffix of the numeric twin stored for every date-like metadata field
+EPOCH_SUFFIX = "_ts"
+
+DOCUMENT_KEY = "$document"
+
+Scalar = Union[str, int, float, bool]
+
+
+class FilterError(ValueError):
+    """Raised for filter specs that cannot be expressed as a Chroma query"""
+
+
+def is_date_field(name: str) -> bool:
+    return name in ("date", "timestamp") or name.endswith("_date")
+
+
+def to_epoch(value: Union[str, datetime, date, int, float]) -> float:
+    """Seconds since the epoch for datetimes, dates and ISO-8601 strings (naive = UTC)"""
+    if isinstance(value, bool):
+        raise FilterError(f"Cannot use boolean {value!r} as a date")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise FilterError(f"Not an ISO-8601 date: {value!r}")
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        # Every stored `_ts` twin reads naive values as UTC; keep new ones comparable
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def add_epoch_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a numeric `<field>_ts` twin for each ISO date metadata field (in place)"""
+    for key, value in list(metadata.items()):
+        if is_date_field(key) and isinstance(value, str) and value:
+            try:
+                metadata[f"{key}{EPOCH_SUFFIX}"] = to_epoch(value)
+            except FilterError:
+                continue
+    return metadata
+
+
+@dataclass
+class CompiledFilter:
+    """Chroma query arguments produced from a filter spec"""
+    where: Optional[Dict[str, Any]] = None
+    where_document: Optional[Dict[str, Any]] = None
+    matches_nothing: bool = False
+
+    def query_kwargs(self) -> Dict[str, Any]:
+        kwargs = {}
+        if self.where:
+            kwargs["where"] = self.where
+        if self.where_document:
+            kwargs["where_document"] = self.where_document
+        return kwargs
+
+
+class _MatchesNothing(Exception):
+    pass
+
+
+def compile_filter(
+    spec: Optional[Dict[str, Any]] = None,
+    tenant_id: Optional[str] = None,
+    workspace_id: Optional[str] = None,
+) -> CompiledFilter:
+    """
+    Compile a filter spec into Chroma `where`/`where_document` clauses.
+
+    Spec syntax (Mongo-style):
+        {"ticker": "BTC"}                                  equality
+        {"action_type": {"$in": ["buy", "hold"]}}           membership
+        {"date": {"$gte": "2025-01-01", "$lt": datetime}}   ranges (dates -> date_ts epoch)
+        {"$or": [{...}, {...}], "$and": [...]}              boolean composition
+        {"$document": {"$contains": "BTC"}}                 full-text on the document
+    """
+    spec = dict(spec or {})
+    document_spec = spec.pop(DOCUMENT_KEY, None)
+
+    clauses: List[Dict[str, Any]] = []
+    if tenant_id is not None:
+        clauses.append({"tenant_id": {"$eq": tenant_id}})
+    if workspace_id is not None:
+        clauses.append({"workspace_id": {"$eq": workspace_id}})
+
+    try:
+        if spec:
+            clauses.append(_compile_node(spec))
+    except _MatchesNothing:
+        return CompiledFilter(matches_nothing=True)
+
+    return CompiledFilter(
+        where=_combine("$and", clauses),
+        where_document=_compile_document(document_spec) if document_spec is not None else None,
+    )
+
+
+def _combine(operator: str, clauses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Chroma requires at least two operands for $and/$or
+    flattened: List[Dict[str, Any]] = []
+    for clause in clauses:
+        if clause is None:
+            continue
+        if operator in clause and len(clause) == 1:
+            flattened.extend(clause[operator])
+        else:
+            flattened.append(clause)
+    if not flattened:
+        return None
+    if len(flattened) == 1:
+        return flattened[0]
+    return {operator: flattened}
+
+
+def _compile_node(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not isinstance(node, dict) or not node:
+        raise FilterError(f"Filter must be a non-empty object, got {node!r}")
+
+    clauses = []
+    for key, value in node.items():
+        if key in ("$and", "$or"):
+            if not isinstance(value, list) or not value:
+                raise FilterError(f"{key} needs a non-empty list")
+            if key == "$and":
+                clauses.append(_combine("$and", [_compile_node(child) for child in value]))
+            else:
+                branches = []
+                for child in value:
+                    try:
+                        branches.append(_compile_node(child))
+                    except _MatchesNothing:
+                        continue
+                if not branches:
+                    raise _MatchesNothing()
+                clauses.append(_combine("$or", branches))
+        elif key.startswith("$"):
+            raise FilterError(f"Unsupported operator at top level: {key}")
+        else:
+            clauses.extend(_compile_field(key, value))
+    return _combine("$and", clauses)
+
+
+def _compile_field(field: str, condition: Any) -> List[Dict[str, Any]]:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    if not condition:
+        raise FilterError(f"Empty condition for {field}")
+
+    clauses = []
+    for operator, operand in condition.items():
+        if operator not in _FIELD_OPERATORS:
+            raise FilterError(f"Unsupported operator {operator} on {field}")
+
+        target = field
+        if operator in _RANGE_OPERATORS:
+            if is_date_field(field) or isinstance(operand, (datetime, date)):
+                target = f"{field}{EPOCH_SUFFIX}"
+                operand = to_epoch(operand)
+            elif isinstance(operand, bool) or not isinstance(operand, (int, float)):
+                raise FilterError(f"Range filter on {field} needs a number or date, got {operand!r}")
+        elif operator in ("$in", "$nin"):
+            if not isinstance(operand, (list, tuple, set)):
+                raise FilterError(f"{operator} on {field} needs a list")
+            operand = [_scalar(field, item) for item in operand]
+            if not operand:
+                if operator == "$in":
+                    raise _MatchesNothing()
+                continue  # $nin of nothing excludes nothing
+        else:
+            operand = _scalar(field, operand)
+
+        clauses.append({target: {operator: operand}})
+    return clauses
+
+
+def _scalar(field: str, value: Any) -> Scalar:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    raise FilterError(f"Unsupported value for {field}: {value!r}")
+
+
+def _compile_document(spec: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(spec, dict) or not spec:
+        raise FilterError(f"{DOCUMENT_KEY} filter must be a non-empty object")
+
+    clauses = []
+    for operator, operand in spec.items():
+        if operator in ("$and", "$or"):
+            clauses.append(_combine(operator, [_compile_document(child) for child in operand]))
+        elif operator in _DOCUMENT_OPERATORS:
+            if not isinstance(operand, str) or not operand:
+                raise FilterError(f"{operator} needs a non-empty string")
+            clauses.append({operator: operand})
+        else:
+            raise FilterError(f"Unsupported document operator {operator}")
+    return _combine("$and", clauses)
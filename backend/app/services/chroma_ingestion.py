@@ -0,0 +1,271 @@
+"""
+Chroma Ingestion - Async write-behind batching for vector memory writes
+Documents are buffered per collection and written with one upsert per batch
+on a worker thread, so request handlers never wait on Chroma I/O or embedding.
+Failed batches are retried with exponential backoff, then dead-lettered
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# Live queues, flushed together on application shutdown
+_active_queues: "weakref.WeakSet[ChromaIngestionQueue]" = weakref.WeakSet()
+
+# Most recent dead-lettered documents kept per queue for inspection
+MAX_DEAD_LETTERS = 1000
+
+
+@dataclass
+class PendingDocument:
+    """A document waiting to be written"""
+    doc_id: str
+    content: str
+    metadata: Dict[str, Any]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class ChromaIngestionQueue:
+    """
+    Write-behind queue in front of Chroma collections.
+
+    A collection's buffer is flushed when it reaches max_batch_size documents or
+    when its oldest document has waited flush_interval seconds. Once max_pending
+    documents are buffered, callers flush inline (backpressure) instead of growing
+    the buffer without bound. Writes use upsert so a retried batch is idempotent:
+    a failed batch is written again after retry_backoff * 2**n seconds, and after
+    max_attempts failures its documents move to `dead_letters`.
+    With an `embedder`, each batch is embedded in one call and written with
+    precomputed vectors; otherwise Chroma's collection embedding function is used.
+    """
+
+    def __init__(
+        self,
+        collection_resolver: Callable[[str], Any],
+        name: str = "chroma",
+        max_batch_size: int = 64,
+        flush_interval: float = 0.25,
+        max_pending: int = 2000,
+        max_attempts: int = 3,
+        retry_backoff: float = 0.5,
+        embedder: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+        runner: Callable[..., Awaitable[Any]] = asyncio.to_thread,
+    ):
+        self._resolve_collection = collection_resolver
+        self._embedder = embedder
+        self._run_blocking = runner
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+        self._buffers: Dict[str, List[PendingDocument]] = {}
+        self._retries: List[Tuple[float, str, List[PendingDocument]]] = []
+        self.dead_letters: "deque[Tuple[str, PendingDocument]]" = deque(maxlen=MAX_DEAD_LETTERS)
+        self._pending = 0
+        self._closed = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "batches": 0,
+            "backpressure_flushes": 0,
+            "max_pending_seen": 0,
+            "last_flush_ms": 0.0,
+            "max_queue_delay_ms": 0.0,
+        }
+        _active_queues.add(self)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def enqueue(self, collection_name: str, doc_id: str, content: str, metadata: Dict[str, Any]) -> str:
+        """Buffer a document for writing and return its id immediately"""
+        if self._closed:
+            # After shutdown, fall back to a direct write
+            await self._write_batch(collection_name, [PendingDocument(doc_id, content, metadata)])
+            await self._drain_retries()
+            return doc_id
+
+        self._ensure_worker()
+        buffer = self._buffers.setdefault(collection_name, [])
+        buffer.append(PendingDocument(doc_id, content, metadata))
+        self._pending += 1
+        self._stats["enqueued"] += 1
+        self._stats["max_pending_seen"] = max(self._stats["max_pending_seen"], self._pending)
+
+        if self._pending >= self.max_pending:
+            self._stats["backpressure_flushes"] += 1
+            await self.flush()
+        elif len(buffer) >= self.max_batch_size:
+            self._wakeup.set()
+        return doc_id
+
+    async def flush(self, collection_name: Optional[str] = None) -> int:
+        """Write everything buffered (optionally for one collection) and wait for completion"""
+        self._ensure_lock()
+        names = [collection_name] if collection_name else list(self._buffers)
+        written = 0
+        async with self._flush_lock:
+            for name in names:
+                while self._buffers.get(name):
+                    written += await self._flush_batch(name)
+        return written
+
+    async def close(self) -> None:
+        """Stop the worker and flush whatever is still buffered"""
+        self._closed = True
+        if self._worker is not None and not self._worker.done() and self._loop is asyncio.get_running_loop():
+            self._wakeup.set()
+            try:
+                await self._worker
+            except Exception as e:
+                logger.error(f"Ingestion worker for {self.name} failed during shutdown: {e}")
+        if self._pending:
+            await self.flush()
+        await self._drain_retries()
+        logger.info(f"Ingestion queue {self.name} closed ({self._stats['written']} documents written)")
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": self._pending,
+            "retrying": sum(len(batch) for _, _, batch in self._retries),
+            "pending_by_collection": {name: len(docs) for name, docs in self._buffers.items() if docs},
+            "avg_batch_size": round(self._stats["written"] / batches, 2) if batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "max_pending": self.max_pending,
+            "closed": self._closed,
+        }
+
+    def _ensure_lock(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Event loop changed (e.g. a new loop per test); rebind loop-owned primitives
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker = None
+
+    def _ensure_worker(self) -> None:
+        self._ensure_lock()
+        if self._worker is None or self._worker.done():
+            self._worker = self._loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._flush_ready()
+            except Exception as e:
+                logger.error(f"Ingestion worker for {self.name} flush failed: {e}")
+
+    async def _flush_ready(self) -> None:
+        now = time.monotonic()
+        async with self._flush_lock:
+            for name in list(self._buffers):
+                buffer = self._buffers[name]
+                while buffer and (len(buffer) >= self.max_batch_size or now - buffer[0].enqueued_at >= self.flush_interval):
+                    await self._flush_batch(name)
+            await self._retry_due(now)
+
+    async def _retry_due(self, now: float) -> None:
+        due = [entry for entry in self._retries if entry[0] <= now]
+        self._retries = [entry for entry in self._retries if entry[0] > now]
+        for _, name, batch in due:
+            self._stats["retried"] += len(batch)
+            await self._write_batch(name, batch)
+
+    async def _drain_retries(self) -> None:
+        """Retry failed batches until they are written or dead-lettered (bounded by max_attempts)"""
+        self._ensure_lock()
+        while self._retries:
+            await asyncio.sleep(max(0.0, min(entry[0] for entry in self._retries) - time.monotonic()))
+            async with self._flush_lock:
+                await self._retry_due(time.monotonic())
+
+    async def _flush_batch(self, collection_name: str) -> int:
+        buffer = self._buffers[collection_name]
+        batch = buffer[:self.max_batch_size]
+        del buffer[:len(batch)]
+        self._pending -= len(batch)
+
+        delay_ms = (time.monotonic() - batch[0].enqueued_at) * 1000
+        self._stats["max_queue_delay_ms"] = round(max(self._stats["max_queue_delay_ms"], delay_ms), 2)
+        return await self._write_batch(collection_name, batch)
+
+    async def _write_batch(self, collection_name: str, batch: List[PendingDocument]) -> int:
+        started = time.perf_counter()
+        try:
+            embeddings = await self._embedder([doc.content for doc in batch]) if self._embedder else None
+            await self._run_blocking(self._upsert, collection_name, batch, embeddings)
+        except Exception as e:
+            self._stats["failed"] += len(batch)
+            self._requeue(collection_name, batch, e)
+            return 0
+
+        self._stats["written"] += len(batch)
+        self._stats["batches"] += 1
+        self._stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.debug(f"Wrote batch of {len(batch)} documents to {collection_name}")
+        return len(batch)
+
+    def _requeue(self, collection_name: str, batch: List[PendingDocument], error: Exception) -> None:
+        """Schedule a failed batch for retry with exponential backoff, or dead-letter it"""
+        attempts = max(doc.attempts for doc in batch) + 1
+        for doc in batch:
+            doc.attempts = attempts
+        if attempts >= self.max_attempts:
+            self.dead_letters.extend((collection_name, doc) for doc in batch)
+            self._stats["dead_lettered"] += len(batch)
+            logger.error(f"Dead-lettered {len(batch)} documents for {collection_name} after {attempts} attempts: {error}")
+            return
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        self._retries.append((time.monotonic() + delay, collection_name, batch))
+        logger.warning(f"Failed to write batch of {len(batch)} documents to {collection_name} (attempt {attempts}), retrying in {delay}s: {error}")
+
+    def _upsert(self, collection_name: str, batch: List[PendingDocument], embeddings: Optional[List[List[float]]] = None) -> None:
+        collection = self._resolve_collection(collection_name)
+        collection.upsert(
+            ids=[doc.doc_id for doc in batch],
+            documents=[doc.content for doc in batch],
+            metadatas=[doc.metadata for doc in batch],
+            embeddings=embeddings,
+        )
+
+
+def ingestion_stats() -> Dict[str, Any]:
+    """Stats for every live ingestion queue, keyed by queue name"""
+    return {queue.name: queue.stats() for queue in list(_active_queues)}
+
+
+async def shutdown_ingestion_queues() -> None:
+    """Flush and close all live ingestion queues (call on application shutdown)"""
+    for queue in list(_active_queues):
+        try:
+            await queue.close()
+        except Exception as e:
+            logger.error(f"Failed to close ingestion queue {queue.name}: {e}")
@@ -1,6 +1,8 @@
 """
 Chroma-based AI Memory Service for RedPill Terminal
 Provides persistent, intelligent conversation memory using vector embeddings
+Backed by the unified `user_conversations` collection on the shared Chroma runtime;
+run migrate_conversation_memory.py once to fold the old ~/.redpill/memory store in
 """
 
 import logging
@@ -11,12 +13,16 @@ from datetime import datetime, timedelta
 import asyncio
 from dataclasses import dataclass
 
-import chromadb
-from chromadb.config import Settings
-import openai
+from .chroma_filters import add_epoch_fields
+from .chroma_retention import get_partitioned_collection
+from .chroma_runtime import chroma_runtime
+from .embedding_service import embedding_service
 
 logger = logging.getLogger(__name__)
 
+# Conversations live in the unified collection; session_id maps to its thread_id
+CONVERSATIONS_COLLECTION = "user_conversations"
+
 
 @dataclass
 class ConversationMemory:
@@ -38,45 +44,31 @@ class ChromaMemoryService:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.openai_client = None
-        self.chroma_client = None
-        self.collection = None
-        self.memory_path = os.path.join(os.path.expanduser("~"), ".redpill", "memory")
-        self._initialize_clients()
+        self.memory_path = chroma_runtime.path
+        # A lazy view: nothing is opened until the first read or write (or `initialize()`)
+        self.conversations = get_partitioned_collection(CONVERSATIONS_COLLECTION)
+        self._ready = False
+    
+    @property
+    def chroma_client(self):
+        return chroma_runtime.client
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready
     
-    def _initialize_clients(self):
-        """Initialize ChromaDB and OpenAI clients"""
+    async def initialize(self) -> bool:
+        """Open the conversation partitions off the event loop (embeddings come from the shared embedding service)"""
+        if self._ready:
+            return True
         try:
-            # Initialize OpenAI for embeddings - disable for now to use Chroma's default
-            openai_key = None  # Disable OpenAI embeddings for now, use Chroma's default
-            if openai_key:
-                self.openai_client = openai.OpenAI(api_key=openai_key)
-                self.logger.info("OpenAI client initialized for embeddings")
-            else:
-                self.logger.warning("No OpenAI API key found - using Chroma's default embeddings")
-            
-            # Initialize ChromaDB with persistent storage
-            os.makedirs(self.memory_path, exist_ok=True)
-            
-            self.chroma_client = chromadb.PersistentClient(
-                path=self.memory_path,
-                settings=Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True
-                )
-            )
-            
-            # Get or create conversation collection
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="conversation_memory",
-                metadata={"description": "RedPill AI conversation memory with semantic search"}
-            )
-            
-            self.logger.info(f"ChromaDB initialized with {self.collection.count()} existing memories")
-            
+            count = await chroma_runtime.run(self.conversations.count)
+            self._ready = True
+            self.logger.info(f"ChromaDB initialized with {count} existing memories")
+            return True
         except Exception as e:
             self.logger.error(f"Failed to initialize memory service: {e}")
-            raise
+            return False
     
     async def store_conversation(
         self, 
@@ -84,10 +76,14 @@ class ChromaMemoryService:
         assistant_response: str,
         entities: Dict[str, Any],
         metadata: Dict[str, Any],
-        session_id: str = "default"
+        session_id: str = "default",
+        tenant_id: str = "default",
+        workspace_id: str = "default"
     ) -> str:
         """Store a conversation exchange in memory with embeddings"""
         try:
+            await self.initialize()
+            
             # Generate unique ID
             memory_id = f"{session_id}_{int(datetime.now().timestamp())}_{hash(user_input) % 10000}"
             
@@ -97,18 +93,28 @@ class ChromaMemoryService:
             # Generate embedding
             embedding = await self._generate_embedding(embedding_text)
             
-            # Prepare metadata for Chroma
+            # Prepare metadata for Chroma (unified conversation schema plus legacy fields)
+            timestamp = datetime.now().isoformat()
             chroma_metadata = {
+                "source_type": "conversation",
+                "tenant_id": tenant_id,
+                "workspace_id": workspace_id,
+                "thread_id": session_id,
+                "date": timestamp,
+                "ingestion_date": timestamp,
                 "session_id": session_id,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "user_input": user_input[:500],  # Truncate for metadata
                 "tools_used": json.dumps(metadata.get("tools_used", [])),
                 "success": metadata.get("success", True),
                 "entities_count": len(entities.get("symbols", [])) + len(entities.get("companies", []))
             }
+            add_epoch_fields(chroma_metadata)
+            written_at = self.conversations.stamp(chroma_metadata)
             
-            # Store in ChromaDB
-            self.collection.add(
+            # Store in the current monthly bucket
+            await chroma_runtime.run(
+                self.conversations.collection_for(written_at).add,
                 documents=[embedding_text],
                 embeddings=[embedding] if embedding else None,
                 metadatas=[chroma_metadata],
@@ -127,22 +133,28 @@ class ChromaMemoryService:
         query: str, 
         session_id: str = "default",
         max_results: int = 5,
-        time_window_hours: int = 24
+        time_window_hours: int = 24,
+        tenant_id: str = "default"
     ) -> List[ConversationMemory]:
         """Retrieve relevant conversation context based on semantic similarity"""
         try:
-            if not self.collection:
+            if not self.conversations or not await self.initialize():
                 return []
             
             # Generate query embedding
             query_embedding = await self._generate_embedding(query)
             
             # Search ChromaDB for relevant memories (remove time filter for now due to Chroma issues)
-            results = self.collection.query(
+            results = await self.conversations.query(
                 query_embeddings=[query_embedding] if query_embedding else None,
                 query_texts=[query] if not query_embedding else None,
                 n_results=max_results,
-                where={"session_id": {"$eq": session_id}}
+                where={
+                    "$and": [
+                        {"tenant_id": {"$eq": tenant_id}},
+                        {"thread_id": {"$eq": session_id}}
+                    ]
+                }
             )
             
             # Convert results to ConversationMemory objects
@@ -157,7 +169,7 @@ class ChromaMemoryService:
                             assistant_response=results["documents"][0][i],
                             entities={"tools_used": json.loads(metadata.get("tools_used", "[]"))},
                             metadata={"success": metadata.get("success", True)},
-                            timestamp=datetime.fromisoformat(metadata.get("timestamp", datetime.now().isoformat())),
+                            timestamp=datetime.fromisoformat(metadata.get("timestamp") or metadata.get("date") or datetime.now().isoformat()),
                             session_id=metadata.get("session_id", session_id),
                             embedding=results["embeddings"][0][i] if results["embeddings"] else None
                         )
@@ -176,16 +188,21 @@ class ChromaMemoryService:
     async def get_recent_entities(
         self, 
         session_id: str = "default", 
-        hours_back: int = 2
+        hours_back: int = 2,
+        tenant_id: str = "default"
     ) -> Dict[str, List[str]]:
         """Get recently mentioned entities (symbols, companies) from conversation history"""
         try:
-            results = self.collection.query(
-                query_texts=["stocks symbols companies trading"],
+            await self.initialize()
+            query_embedding = await self._generate_embedding("stocks symbols companies trading")
+            results = await self.conversations.query(
+                query_embeddings=[query_embedding] if query_embedding else None,
+                query_texts=["stocks symbols companies trading"] if not query_embedding else None,
                 n_results=10,
                 where={
                     "$and": [
-                        {"session_id": {"$eq": session_id}},
+                        {"tenant_id": {"$eq": tenant_id}},
+                        {"thread_id": {"$eq": session_id}},
                         {"entities_count": {"$gt": 0}}
                     ]
                 }
@@ -238,48 +255,30 @@ class ChromaMemoryService:
         return " | ".join(parts)
     
     async def _generate_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding using OpenAI or fallback to Chroma's default"""
+        """Generate embedding via the shared (cached, batched) embedding service"""
         try:
-            if self.openai_client:
-                response = self.openai_client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=text[:8000]  # Token limit
-                )
-                return response.data[0].embedding
-            else:
-                # Let Chroma handle embeddings with default model
-                return None
+            return await embedding_service.embed_one(text)
         except Exception as e:
             self.logger.warning(f"Embedding generation failed: {e}")
             return None
     
-    async def cleanup_old_memories(self, days_to_keep: int = 30):
-        """Clean up old conversation memories"""
+    async def cleanup_old_memories(self, days_to_keep: int = 30) -> Dict[str, int]:
+        """Drop conversation buckets (and legacy rows) older than days_to_keep"""
         try:
-            cutoff_time = datetime.now() - timedelta(days=days_to_keep)
-            cutoff_iso = cutoff_time.isoformat()
-            
-            # Query old memories
-            old_results = self.collection.query(
-                query_texts=["cleanup"],
-                n_results=1000,
-                where={"timestamp": {"$lt": cutoff_iso}}
-            )
-            
-            if old_results["ids"] and old_results["ids"][0]:
-                old_ids = old_results["ids"][0]
-                self.collection.delete(ids=old_ids)
-                self.logger.info(f"Cleaned up {len(old_ids)} old memories")
-                
+            result = await self.conversations.compact(retention_days=days_to_keep)
+            self.logger.info(f"Cleaned up {result['documents_deleted']} old memories, {result['buckets_dropped']} buckets")
+            return result
         except Exception as e:
             self.logger.warning(f"Memory cleanup failed: {e}")
+            return {"buckets_dropped": 0, "documents_deleted": 0}
     
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory statistics"""
         try:
-            total_memories = self.collection.count()
+            total_memories = self.conversations.count()
             return {
                 "total_memories": total_memories,
+                "buckets": self.conversations.bucket_keys(),
                 "storage_path": self.memory_path,
                 "status": "active"
             }
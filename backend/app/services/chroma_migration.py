@@ -0,0 +1,156 @@
+"""
+Chroma Migration - Fold the legacy conversation_memory store into unified collections
+Copies documents, metadata and stored embeddings from ~/.redpill/memory into the
+shared runtime's user_conversations collection (idempotent: ids are prefixed and upserted).
+Also backfills the numeric `<field>_ts` date twins onto documents written before
+date range filters were pushed down into Chroma.
+"""
+
+from typing import Dict, Any, Optional, List
+import logging
+import os
+
+from .chroma_filters import add_epoch_fields
+from .chroma_runtime import ChromaRuntime, chroma_runtime
+
+logger = logging.getLogger(__name__)
+
+LEGACY_MEMORY_PATH = os.path.join(os.path.expanduser("~"), ".redpill", "memory")
+LEGACY_COLLECTION = "conversation_memory"
+TARGET_COLLECTION = "user_conversations"
+MIGRATED_ID_PREFIX = "legacy_"
+
+# Written into the Chroma directory once every collection has its `_ts` twins
+EPOCH_BACKFILL_MARKER = ".epoch_fields_backfilled"
+
+
+def to_unified_metadata(metadata: Dict[str, Any], tenant_id: str = "default") -> Dict[str, Any]:
+    """Map a legacy conversation_memory record onto the unified conversation schema"""
+    session_id = metadata.get("session_id") or "default"
+    timestamp = metadata.get("timestamp")
+    unified = {
+        "source_type": "conversation",
+        "tenant_id": tenant_id,
+        "workspace_id": "default",
+        "thread_id": session_id,
+        "session_id": session_id,
+        "date": timestamp,
+        "timestamp": timestamp,
+        "user_input": metadata.get("user_input"),
+        "tools_used": metadata.get("tools_used"),
+        "success": metadata.get("success"),
+        "entities_count": metadata.get("entities_count"),
+        "migrated_from": LEGACY_COLLECTION,
+    }
+    # Chroma rejects None metadata values
+    return add_epoch_fields({key: value for key, value in unified.items() if value is not None})
+
+
+def migrate_conversation_memory(
+    legacy_path: str = LEGACY_MEMORY_PATH,
+    runtime: ChromaRuntime = chroma_runtime,
+    batch_size: int = 256,
+    dry_run: bool = False,
+    tenant_id: str = "default",
+    legacy_client: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Copy every legacy memory into the unified conversations collection"""
+    if legacy_client is None:
+        if not os.path.isdir(legacy_path):
+            return {"status": "skipped", "reason": f"no legacy store at {legacy_path}", "migrated": 0}
+        legacy_client = ChromaRuntime(legacy_path).client
+
+    try:
+        source = legacy_client.get_collection(LEGACY_COLLECTION)
+    except Exception:
+        return {"status": "skipped", "reason": f"no {LEGACY_COLLECTION} collection", "migrated": 0}
+
+    target = runtime.get_collection(TARGET_COLLECTION)
+    total = source.count()
+    migrated = 0
+    offset = 0
+
+    while offset < total:
+        page = source.get(
+            limit=batch_size,
+            offset=offset,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        ids = page["ids"]
+        if not ids:
+            break
+        offset += len(ids)
+
+        embeddings = page.get("embeddings")
+        if embeddings is not None and len(embeddings) == len(ids):
+            embeddings = [list(map(float, vector)) for vector in embeddings]
+        else:
+            embeddings = None
+
+        if not dry_run:
+            target.upsert(
+                ids=[f"{MIGRATED_ID_PREFIX}{doc_id}" for doc_id in ids],
+                documents=page["documents"],
+                metadatas=[to_unified_metadata(m or {}, tenant_id) for m in page["metadatas"]],
+                embeddings=embeddings,
+            )
+        migrated += len(ids)
+        logger.info(f"Migrated {migrated}/{total} legacy conversation memories")
+
+    return {
+        "status": "dry_run" if dry_run else "migrated",
+        "source": f"{legacy_path}:{LEGACY_COLLECTION}",
+        "target": f"{runtime.path}:{TARGET_COLLECTION}",
+        "migrated": migrated,
+    }
+
+
+def backfill_epoch_fields(
+    runtime: ChromaRuntime = chroma_runtime,
+    collection_names: Optional[List[str]] = None,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Add the missing `<field>_ts` twins to every document's date metadata (idempotent)"""
+    names = collection_names if collection_names is not None else runtime.list_collection_names()
+    updated: Dict[str, int] = {}
+    for name in names:
+        collection = runtime.get_collection(name)
+        total = collection.count()
+        offset = 0
+        updated[name] = 0
+        while offset < total:
+            page = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+
+            ids, metadatas = [], []
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = dict(metadata or {})
+                with_twins = add_epoch_fields(dict(metadata))
+                if with_twins.keys() != metadata.keys():
+                    ids.append(doc_id)
+                    metadatas.append(with_twins)
+            if ids and not dry_run:
+                collection.update(ids=ids, metadatas=metadatas)
+            updated[name] += len(ids)
+        if updated[name]:
+            logger.info(f"Backfilled date twins on {updated[name]} documents in {name}")
+
+    return {
+        "status": "dry_run" if dry_run else "backfilled",
+        "collections": updated,
+        "updated": sum(updated.values()),
+    }
+
+
+def backfill_epoch_fields_once(runtime: ChromaRuntime = chroma_runtime) -> Optional[Dict[str, Any]]:
+    """Run backfill_epoch_fields unless this Chroma directory has already been backfilled"""
+    marker = os.path.join(runtime.path, EPOCH_BACKFILL_MARKER)
+    if os.path.exists(marker):
+        return None
+    result = backfill_epoch_fields(runtime)
+    with open(marker, "w") as f:
+        f.write(f"{result['updated']}\n")
+    return result
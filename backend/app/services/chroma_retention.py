@@ -0,0 +1,320 @@
+"""
+Chroma Retention - Time-bucketed memory collections and scheduled compaction
+Collections with a retention policy are written to monthly buckets
+(`<name>__YYYY_MM`); queries fan out over the live buckets and compaction drops
+whole expired buckets, so storage and query cost stay bounded as history grows
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import asyncio
+import logging
+import os
+import time
+
+from ..config import settings
+from .chroma_filters import FilterError, to_epoch
+from .chroma_runtime import ChromaRuntime, chroma_runtime
+
+logger = logging.getLogger(__name__)
+
+# Numeric write time stamped on every document; buckets and compaction key off it
+PARTITION_TIME_FIELD = "ingestion_date_ts"
+
+BUCKET_SEPARATOR = "__"
+
+# Metadata fields used to date legacy (pre-bucketing) documents, most specific first
+_LEGACY_TIME_FIELDS = ("ingestion_date_ts", "date_ts", "ingestion_date", "timestamp", "date")
+
+_LEGACY_SCAN_PAGE = 500
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How long documents in a collection are kept"""
+    retention_days: int
+
+
+RETENTION_POLICIES: Dict[str, RetentionPolicy] = {
+    "user_conversations": RetentionPolicy(settings.conversation_retention_days),
+    "market_intelligence": RetentionPolicy(settings.market_intelligence_retention_days),
+}
+
+
+def bucket_key(ts: float) -> str:
+    moment = datetime.fromtimestamp(ts, tz=timezone.utc)
+    return f"{moment.year:04d}_{moment.month:02d}"
+
+
+def bucket_bounds(key: str) -> Tuple[float, float]:
+    """[start, end) of a monthly bucket as epoch seconds"""
+    year, month = (int(part) for part in key.split("_"))
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start.timestamp(), end.timestamp()
+
+
+def bucket_collection_name(base_name: str, key: str) -> str:
+    return f"{base_name}{BUCKET_SEPARATOR}{key}"
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class PartitionedCollection:
+    """
+    A logical collection stored as monthly Chroma collections.
+
+    The unbucketed base collection is kept as a read-only legacy partition: it is
+    still queried, and compaction deletes its expired documents by id.
+    """
+
+    def __init__(
+        self,
+        base_name: str,
+        policy: RetentionPolicy,
+        runtime: ChromaRuntime = chroma_runtime,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.base_name = base_name
+        self.policy = policy
+        self.runtime = runtime
+        self.clock = clock
+        self._bucket_keys: Optional[set] = None
+
+    @property
+    def legacy(self):
+        return self.runtime.get_collection(self.base_name)
+
+    def cutoff(self, retention_days: Optional[int] = None) -> float:
+        days = self.policy.retention_days if retention_days is None else retention_days
+        return self.clock() - days * 86400
+
+    def stamp(self, metadata: Dict[str, Any], ts: Optional[float] = None) -> float:
+        """Set the partition time on metadata and return it"""
+        ts = self.clock() if ts is None else ts
+        metadata[PARTITION_TIME_FIELD] = ts
+        return ts
+
+    def bucket_name_for(self, ts: Optional[float] = None) -> str:
+        key = bucket_key(self.clock() if ts is None else ts)
+        self._known_keys().add(key)
+        return bucket_collection_name(self.base_name, key)
+
+    def collection_for(self, ts: Optional[float] = None):
+        """Bucket collection that receives documents written at `ts` (default: now)"""
+        return self.runtime.get_collection(self.bucket_name_for(ts))
+
+    def bucket_keys(self) -> List[str]:
+        """Live bucket keys, newest first (expired buckets awaiting compaction are skipped)"""
+        cutoff = self.cutoff()
+        return sorted(
+            (key for key in self._known_keys() if bucket_bounds(key)[1] > cutoff),
+            reverse=True,
+        )
+
+    def collections(self) -> List[Any]:
+        return [self.legacy] + [
+            self.runtime.get_collection(bucket_collection_name(self.base_name, key))
+            for key in self.bucket_keys()
+        ]
+
+    def count(self) -> int:
+        return sum(collection.count() for collection in self.collections())
+
+    async def query(self, n_results: int = 10, **query_kwargs) -> Dict[str, Any]:
+        """Chroma-shaped query result merged across partitions by distance"""
+        partials = await asyncio.gather(*(
+            self.runtime.run(collection.query, n_results=n_results, **query_kwargs)
+            for collection in self.collections()
+        ))
+        return _merge_query_results(partials, n_results)
+
+    async def compact(self, retention_days: Optional[int] = None) -> Dict[str, int]:
+        """Drop expired buckets whole; delete expired rows from straddling and legacy partitions"""
+        cutoff = self.cutoff(retention_days)
+        dropped = 0
+        deleted = 0
+
+        keys = await self.runtime.run(lambda: sorted(self._known_keys()))
+        for key in keys:
+            start, end = bucket_bounds(key)
+            name = bucket_collection_name(self.base_name, key)
+            if end <= cutoff:
+                await self.runtime.run(self.runtime.drop_collection, name)
+                self._known_keys().discard(key)
+                dropped += 1
+            elif start < cutoff:
+                collection = self.runtime.get_collection(name)
+                before = await self.runtime.run(collection.count)
+                await self.runtime.run(collection.delete, where={PARTITION_TIME_FIELD: {"$lt": cutoff}})
+                deleted += before - await self.runtime.run(collection.count)
+
+        deleted += await self.runtime.run(self._prune_legacy, cutoff)
+        if dropped or deleted:
+            logger.info(f"Compacted {self.base_name}: dropped {dropped} buckets, deleted {deleted} documents")
+        return {"buckets_dropped": dropped, "documents_deleted": deleted}
+
+    def _prune_legacy(self, cutoff: float) -> int:
+        # Legacy rows may only carry ISO dates, so they are dated from metadata, not a where clause
+        collection = self.legacy
+        expired: List[str] = []
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=_LEGACY_SCAN_PAGE, offset=offset)
+            ids = page.get("ids") or []
+            for doc_id, metadata in zip(ids, page.get("metadatas") or []):
+                written = _document_time(metadata or {})
+                if written is not None and written < cutoff:
+                    expired.append(doc_id)
+            if len(ids) < _LEGACY_SCAN_PAGE:
+                break
+            offset += len(ids)
+
+        for start in range(0, len(expired), _LEGACY_SCAN_PAGE):
+            collection.delete(ids=expired[start:start + _LEGACY_SCAN_PAGE])
+        return len(expired)
+
+    def _known_keys(self) -> set:
+        if self._bucket_keys is None:
+            prefix = f"{self.base_name}{BUCKET_SEPARATOR}"
+            self._bucket_keys = {
+                name[len(prefix):]
+                for name in self.runtime.list_collection_names()
+                if name.startswith(prefix)
+            }
+        return self._bucket_keys
+
+
+def _document_time(metadata: Dict[str, Any]) -> Optional[float]:
+    for field in _LEGACY_TIME_FIELDS:
+        value = metadata.get(field)
+        if value in (None, ""):
+            continue
+        try:
+            return to_epoch(value)
+        except FilterError:
+            continue
+    return None
+
+
+def _merge_query_results(partials: List[Dict[str, Any]], n_results: int) -> Dict[str, Any]:
+    query_count = max((len(partial.get("ids") or []) for partial in partials), default=0)
+    merged = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": None}
+
+    for q in range(query_count):
+        rows = []
+        for partial in partials:
+            ids = (partial.get("ids") or [[]])[q]
+            for i, doc_id in enumerate(ids):
+                rows.append((
+                    partial["distances"][q][i] if partial.get("distances") else 0.0,
+                    doc_id,
+                    partial["documents"][q][i] if partial.get("documents") else None,
+                    partial["metadatas"][q][i] if partial.get("metadatas") else None,
+                ))
+        rows.sort(key=lambda row: row[0])
+        rows = rows[:n_results]
+        merged["distances"].append([row[0] for row in rows])
+        merged["ids"].append([row[1] for row in rows])
+        merged["documents"].append([row[2] for row in rows])
+        merged["metadatas"].append([row[3] for row in rows])
+    return merged
+
+
+_partitioned: Dict[str, PartitionedCollection] = {}
+
+
+def get_partitioned_collection(base_name: str) -> Optional[PartitionedCollection]:
+    """Shared partitioned view of a collection, or None if it has no retention policy"""
+    policy = RETENTION_POLICIES.get(base_name)
+    if policy is None:
+        return None
+    if base_name not in _partitioned:
+        _partitioned[base_name] = PartitionedCollection(base_name, policy)
+    return _partitioned[base_name]
+
+
+class MemoryCompactor:
+    """Periodically compacts every partitioned collection and reports reclaimed space"""
+
+    def __init__(self, runtime: ChromaRuntime = chroma_runtime):
+        self.runtime = runtime
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "buckets_dropped": 0,
+            "documents_deleted": 0,
+            "bytes_reclaimed": 0,
+            "last_run": None,
+        }
+
+    async def run_once(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        bytes_before = await asyncio.to_thread(directory_size, self.runtime.path)
+
+        collections = {}
+        for name in RETENTION_POLICIES:
+            collections[name] = await get_partitioned_collection(name).compact()
+
+        bytes_after = await asyncio.to_thread(directory_size, self.runtime.path)
+        report = {
+            "collections": collections,
+            "buckets_dropped": sum(c["buckets_dropped"] for c in collections.values()),
+            "documents_deleted": sum(c["documents_deleted"] for c in collections.values()),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "bytes_reclaimed": max(0, bytes_before - bytes_after),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "finished_at": datetime.now().isoformat(),
+        }
+
+        self._stats["runs"] += 1
+        self._stats["buckets_dropped"] += report["buckets_dropped"]
+        self._stats["documents_deleted"] += report["documents_deleted"]
+        self._stats["bytes_reclaimed"] += report["bytes_reclaimed"]
+        self._stats["last_run"] = report
+        return report
+
+    def start(self, interval_seconds: float) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval_seconds))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "scheduled": self._task is not None and not self._task.done(),
+            "policies": {name: policy.retention_days for name, policy in RETENTION_POLICIES.items()},
+        }
+
+    async def _loop(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._stats["failures"] += 1
+                logger.error(f"Memory compaction failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Global compactor, scheduled from the application lifespan
+memory_compactor = MemoryCompactor()
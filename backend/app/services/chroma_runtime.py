@@ -0,0 +1,128 @@
+"""
+Chroma Runtime - One shared ChromaDB client and a bounded thread pool for its I/O
+All memory services open collections here and run blocking Chroma calls through
+`chroma_runtime.run`, so vector queries never block the event loop
+"""
+
+from typing import Dict, List, Any, Optional, Callable, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Existing unified memory location, so unified collections are kept as-is
+DEFAULT_CHROMA_PATH = os.path.join(os.path.expanduser("~"), ".redpill", "unified_memory")
+
+# Chroma's SQLite/HNSW layer gains little beyond a handful of concurrent callers
+DEFAULT_MAX_WORKERS = 4
+
+
+class ChromaRuntime:
+    """
+    Process-wide ChromaDB runtime.
+
+    The PersistentClient and collections are created lazily on first use; Chroma
+    operations execute on a dedicated pool of `max_workers` threads, so a burst of
+    memory queries queues here instead of exhausting the default executor.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHROMA_PATH, max_workers: int = DEFAULT_MAX_WORKERS, client_factory: Optional[Callable[[str], Any]] = None):
+        self.path = path
+        self.max_workers = max_workers
+        self._client_factory = client_factory or self._persistent_client
+        self._client = None
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+
+    @staticmethod
+    def _persistent_client(path: str):
+        import chromadb
+        from chromadb.config import Settings
+
+        os.makedirs(path, exist_ok=True)
+        return chromadb.PersistentClient(
+            path=path,
+            settings=Settings(
+                anonymized_telemetry=False,
+                allow_reset=True
+            )
+        )
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory(self.path)
+                    logger.info(f"Chroma runtime opened at {self.path}")
+        return self._client
+
+    def get_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        """Shared collection handle, created on first request"""
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(name=name, metadata=metadata)
+                    self._collections[name] = collection
+        return collection
+
+    def list_collection_names(self) -> List[str]:
+        return [getattr(collection, "name", collection) for collection in self.client.list_collections()]
+
+    def drop_collection(self, name: str) -> None:
+        """Delete a collection and its index files, evicting the cached handle"""
+        with self._lock:
+            self._collections.pop(name, None)
+            self.client.delete_collection(name=name)
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Execute a blocking Chroma call on the runtime's thread pool"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chroma")
+
+        self._submitted += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "client_open": self._client is not None,
+            "collections": sorted(self._collections),
+            "max_workers": self.max_workers,
+            "submitted": self._submitted,
+            "in_flight": self._submitted - self._completed,
+            "failed": self._failed,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Global runtime shared by every Chroma-backed service
+chroma_runtime = ChromaRuntime()
@@ -0,0 +1,54 @@
+"""
+Commit Invalidation - Drop in-process cache entries when ORM writes commit
+Services register a map of model -> (key of a changed instance, invalidation for that
+key). Flushes note the keys of watched instances on the session, and the invalidations
+run once per key after the transaction commits (never on rollback), so a concurrent
+read cannot re-cache the old value before the write is visible.
+
+Only this process's sessions are seen: caches using these hooks also expire entries
+on a TTL, which bounds how long another worker's write can go unnoticed.
+"""
+
+from typing import Dict, Any, Callable, Hashable, Tuple, Type, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+
+# (key of a changed instance, or None to skip it; invalidation called with that key)
+Watch = Tuple[Callable[[Any], Hashable], Callable[[Any], None]]
+
+PENDING_KEY = "commit_invalidations"
+
+
+def note_change(session: OrmSession, invalidate: Callable[[Any], None], key: Hashable) -> None:
+    """Run `invalidate(key)` once the session's transaction commits"""
+    session.info.setdefault(PENDING_KEY, set()).add((invalidate, key))
+
+
+def invalidate_on_commit(watches: Dict[Union[Type, Tuple[Type, ...]], Watch]) -> Callable:
+    """
+    Register `watches`: writes to a model (or tuple of models) invalidate their key on
+    commit. Returns the after_flush listener (for event.remove).
+    """
+
+    def note_watched(session, flush_context):
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            for models, (key_of, invalidate) in watches.items():
+                if isinstance(instance, models):
+                    key = key_of(instance)
+                    if key is not None:
+                        note_change(session, invalidate, key)
+
+    event.listen(OrmSession, "after_flush", note_watched)
+    return note_watched
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _run_invalidations(session):
+    for invalidate, key in session.info.pop(PENDING_KEY, ()):
+        invalidate(key)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_invalidations(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,99 @@
+"""
+Creation Index - Postgres mirror of creation metadata for listing and filtering
+Filters (type, category, symbols, tags, date range) and pagination run as indexed
+SQL; the recorder then fetches only the returned creations' payloads from Chroma
+"""
+
+from typing import Dict, List, Any, Optional, Callable
+from datetime import datetime
+import logging
+
+from sqlalchemy import func
+from sqlmodel import Session, select, col
+
+from ..models.creations import CreationRecord
+
+logger = logging.getLogger(__name__)
+
+
+def _default_session() -> Session:
+    from ..database import engine
+    return Session(engine)
+
+
+class CreationIndex:
+    """Indexed creation metadata (see idx_creation_records_* in the model)"""
+
+    def __init__(self, session_factory: Callable[[], Session] = _default_session):
+        self._session_factory = session_factory
+
+    def build_query(
+        self,
+        user_id: str,
+        creation_type: Optional[str] = None,
+        category: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        """Newest-first SELECT for a user's creations matching every given filter"""
+        query = select(CreationRecord).where(CreationRecord.user_id == user_id)
+        if creation_type:
+            query = query.where(CreationRecord.creation_type == creation_type)
+        if category:
+            query = query.where(CreationRecord.category == category)
+        if symbols:
+            # && on the GIN-indexed array: any of the requested symbols
+            query = query.where(col(CreationRecord.symbols).overlap(list(symbols)))
+        if tags:
+            # @> on the GIN-indexed array: all of the requested tags
+            query = query.where(col(CreationRecord.tags).contains(list(tags)))
+        if since:
+            query = query.where(CreationRecord.created_at >= since)
+        if until:
+            query = query.where(CreationRecord.created_at < until)
+        return query.order_by(col(CreationRecord.created_at).desc(), col(CreationRecord.creation_id))
+
+    def list(self, user_id: str, limit: int = 50, offset: int = 0, **filters) -> List[CreationRecord]:
+        query = self.build_query(user_id, **filters).offset(offset).limit(limit)
+        with self._session_factory() as session:
+            return list(session.exec(query).all())
+
+    def count(self, user_id: str, **filters) -> int:
+        query = self.build_query(user_id, **filters).order_by(None)
+        with self._session_factory() as session:
+            return session.exec(select(func.count()).select_from(query.subquery())).one()
+
+    def get(self, user_id: str, creation_id: str) -> Optional[CreationRecord]:
+        with self._session_factory() as session:
+            record = session.get(CreationRecord, creation_id)
+            return record if record is not None and record.user_id == user_id else None
+
+    def category_summary(self, user_id: str) -> List[Dict[str, Any]]:
+        """Creation counts per (category, creation_type), aggregated in SQL"""
+        query = (
+            select(
+                CreationRecord.category,
+                CreationRecord.creation_type,
+                func.count().label("count"),
+                func.max(CreationRecord.created_at).label("latest"),
+            )
+            .where(CreationRecord.user_id == user_id)
+            .group_by(CreationRecord.category, CreationRecord.creation_type)
+        )
+        with self._session_factory() as session:
+            return [
+                {"category": category, "creation_type": creation_type, "count": count, "latest": latest}
+                for category, creation_type, count, latest in session.exec(query).all()
+            ]
+
+    def upsert(self, *records: CreationRecord) -> None:
+        with self._session_factory() as session:
+            for record in records:
+                session.merge(record)
+            session.commit()
+
+
+# Global creation index
+creation_index = CreationIndex()
@@ -9,6 +9,7 @@ This system treats every OpenBB output as a "creation" that should be:
 4. Integrated into investment workflows
 """
 
+import asyncio
 import json
 import logging
 from typing import Dict, Any, List, Optional, Union
@@ -16,9 +17,23 @@ from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
 import hashlib
+import os
 from pathlib import Path
 
-from .unified_chroma_service import UnifiedChromaService
+from ..models.creations import CreationRecord
+from .chroma_runtime import chroma_runtime
+from .creation_index import creation_index
+from .hybrid_search import HybridSearchEngine
+from .unified_chroma_service import unified_chroma_service
+
+# Chroma collection holding creation payloads (metadata is mirrored in creation_records)
+CREATIONS_COLLECTION = "research_reports"
+
+# Marker (in the Chroma directory) recording that existing creations were mirrored into creation_records
+CREATION_INDEX_MARKER = ".creation_index_backfilled"
+
+# Creations whose index write failed are retried in-process; beyond this many, only the startup backfill catches up
+MAX_UNINDEXED = 1000
 
 
 class CreationType(Enum):
@@ -112,7 +127,10 @@ class UniversalCreationRecorder:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.chroma_service = UnifiedChromaService()
+        self.chroma_service = unified_chroma_service
+        self.index = creation_index
+        self._unindexed: Dict[str, CreationRecord] = {}
+        self.search_engine = HybridSearchEngine(lambda: self.chroma_service.collections.get(CREATIONS_COLLECTION))
         self.collection_name = "openbb_creations"
         
         # Ensure the creations collection exists
@@ -279,86 +297,255 @@ class UniversalCreationRecorder:
         creation_type: Optional[CreationType] = None,
         category: Optional[CreationCategory] = None,
         symbols: Optional[List[str]] = None,
-        limit: int = 50
+        limit: int = 50,
+        offset: int = 0,
+        tags: Optional[List[str]] = None
     ) -> List[Creation]:
-        """Retrieve user's creations with filters"""
+        """Retrieve user's creations with filters, newest first"""
         
+        filters = {
+            "creation_type": creation_type.value if isinstance(creation_type, CreationType) else creation_type,
+            "category": category.value if isinstance(category, CreationCategory) else category,
+            "symbols": symbols,
+            "tags": tags
+        }
+        
+        await self._retry_unindexed()
         try:
-            # Get all documents from research_reports collection for this user
-            collection = self.chroma_service.collections.get("research_reports")
+            # Filtering and pagination happen in the indexed creation_records table
+            records = await asyncio.to_thread(self.index.list, user_id, limit=limit, offset=offset, **filters)
+        except Exception as e:
+            self.logger.warning(f"Creation index unavailable, scanning Chroma instead: {e}")
+            return await self._scan_user_creations(user_id, limit=limit, offset=offset, **filters)
+        
+        creations = await self._load_creations(records)
+        self.logger.info(f"📚 Retrieved {len(creations)} creations for user {user_id}")
+        return creations
+    
+    async def get_creation(self, user_id: str, creation_id: str) -> Optional[Creation]:
+        """Fetch a single creation by id"""
+        await self._retry_unindexed()
+        try:
+            record = await asyncio.to_thread(self.index.get, user_id, creation_id)
+        except Exception as e:
+            self.logger.warning(f"Creation index unavailable, scanning Chroma instead: {e}")
+            matches = [c for c in await self._scan_user_creations(user_id, limit=None) if c.metadata.creation_id == creation_id]
+            return matches[0] if matches else None
+        
+        if record is None:
+            return None
+        return (await self._load_creations([record]))[0]
+    
+    async def get_category_overview(self, user_id: str, recent_per_category: int = 5) -> Dict[str, Any]:
+        """Creation counts per category with the most recent items of each"""
+        await self._retry_unindexed()
+        try:
+            rows = await asyncio.to_thread(self.index.category_summary, user_id)
+            categories = {}
+            for row in rows:
+                entry = categories.setdefault(row["category"], {
+                    "name": row["category"],
+                    "count": 0,
+                    "recent_items": [],
+                    "creation_types": []
+                })
+                entry["count"] += row["count"]
+                entry["creation_types"].append(row["creation_type"])
+            
+            recent = await asyncio.gather(*(
+                asyncio.to_thread(self.index.list, user_id, limit=recent_per_category, category=name)
+                for name in categories
+            ))
+            for name, records in zip(categories, recent):
+                categories[name]["recent_items"] = [
+                    {
+                        "creation_id": record.creation_id,
+                        "title": record.title,
+                        "created_at": record.created_at.isoformat(),
+                        "symbols": list(record.symbols)
+                    }
+                    for record in records
+                ]
+        except Exception as e:
+            self.logger.warning(f"Creation index unavailable, scanning Chroma instead: {e}")
+            categories = {}
+            for creation in await self._scan_user_creations(user_id, limit=None):
+                entry = categories.setdefault(creation.metadata.category.value, {
+                    "name": creation.metadata.category.value,
+                    "count": 0,
+                    "recent_items": [],
+                    "creation_types": []
+                })
+                entry["count"] += 1
+                if creation.metadata.creation_type.value not in entry["creation_types"]:
+                    entry["creation_types"].append(creation.metadata.creation_type.value)
+                if len(entry["recent_items"]) < recent_per_category:
+                    entry["recent_items"].append({
+                        "creation_id": creation.metadata.creation_id,
+                        "title": creation.metadata.title,
+                        "created_at": creation.metadata.created_at,
+                        "symbols": creation.metadata.symbols
+                    })
+        
+        return {
+            "categories": list(categories.values()),
+            "total_creations": sum(entry["count"] for entry in categories.values())
+        }
+    
+    async def rebuild_index(self, batch_size: int = 500) -> int:
+        """Mirror every creation stored in Chroma into creation_records (idempotent)"""
+        collection = self.chroma_service.collections.get(CREATIONS_COLLECTION)
+        if not collection:
+            return 0
+        
+        await self.chroma_service.ingestion.flush()
+        indexed = 0
+        offset = 0
+        while True:
+            page = await chroma_runtime.run(collection.get, include=["metadatas"], limit=batch_size, offset=offset)
+            records = []
+            for doc_id, metadata_dict in zip(page["ids"], page["metadatas"]):
+                if "creation_type" not in (metadata_dict or {}):
+                    continue
+                try:
+                    records.append(self._to_record(self._metadata_from_chroma(metadata_dict)))
+                except Exception as e:
+                    self.logger.warning(f"Skipping unparseable creation {doc_id}: {e}")
+            if records:
+                await asyncio.to_thread(self.index.upsert, *records)
+                indexed += len(records)
+            if len(page["ids"]) < batch_size:
+                break
+            offset += len(page["ids"])
+        
+        self.logger.info(f"📇 Indexed {indexed} creations")
+        return indexed
+    
+    async def rebuild_index_once(self) -> Optional[int]:
+        """Run rebuild_index unless this Chroma directory's creations were already mirrored"""
+        marker = os.path.join(chroma_runtime.path, CREATION_INDEX_MARKER)
+        if os.path.exists(marker) or not self.chroma_service.collections.get(CREATIONS_COLLECTION):
+            return None
+        indexed = await self.rebuild_index()
+        with open(marker, "w") as f:
+            f.write(f"{indexed}\n")
+        return indexed
+    
+    async def _index(self, *records: CreationRecord) -> None:
+        """Mirror records into creation_records, queueing them for retry if the database is unavailable"""
+        for record in records:
+            if self._unindexed.get(record.creation_id) is record:
+                del self._unindexed[record.creation_id]
+            self._unindexed[record.creation_id] = record
+        await self._retry_unindexed()
+    
+    async def _retry_unindexed(self) -> None:
+        if not self._unindexed:
+            return
+        records = list(self._unindexed.values())
+        try:
+            await asyncio.to_thread(self.index.upsert, *records)
+        except Exception as e:
+            self.logger.warning(f"Failed to index {len(records)} creations, will retry: {e}")
+            # A restart loses the queue: make the next startup backfill reconcile from Chroma
+            marker = os.path.join(chroma_runtime.path, CREATION_INDEX_MARKER)
+            if os.path.exists(marker):
+                os.remove(marker)
+            while len(self._unindexed) > MAX_UNINDEXED:
+                self._unindexed.pop(next(iter(self._unindexed)))
+            return
+        for record in records:
+            if self._unindexed.get(record.creation_id) is record:
+                del self._unindexed[record.creation_id]
+    
+    async def _load_creations(self, records: List[CreationRecord]) -> List[Creation]:
+        """Attach Chroma payloads (fetched by id) to index rows, preserving their order"""
+        if not records:
+            return []
+        
+        collection = self.chroma_service.collections.get(CREATIONS_COLLECTION)
+        ids = [record.creation_id for record in records]
+        documents = await self._get_documents(collection, ids)
+        
+        missing = [doc_id for doc_id in ids if doc_id not in documents]
+        if missing:
+            # Recently recorded creations may still be in the write-behind queue
+            await self.chroma_service.ingestion.flush()
+            documents.update(await self._get_documents(collection, missing))
+        
+        creations = []
+        for record in records:
+            try:
+                payload = json.loads(documents[record.creation_id]) if record.creation_id in documents else {}
+            except json.JSONDecodeError:
+                payload = {}
+            creations.append(Creation(
+                metadata=self._from_record(record),
+                data=payload.get("data", {}),
+                summary=payload.get("summary"),
+                key_insights=payload.get("key_insights", [])
+            ))
+        return creations
+    
+    async def _get_documents(self, collection, ids: List[str]) -> Dict[str, str]:
+        if collection is None or not ids:
+            return {}
+        results = await chroma_runtime.run(collection.get, ids=ids, include=["documents"])
+        return dict(zip(results["ids"], results["documents"]))
+    
+    async def _scan_user_creations(
+        self,
+        user_id: str,
+        creation_type: Optional[str] = None,
+        category: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        limit: Optional[int] = 50,
+        offset: int = 0
+    ) -> List[Creation]:
+        """Fallback when the index is unreachable: read all of the user's creations from Chroma"""
+        try:
+            collection = self.chroma_service.collections.get(CREATIONS_COLLECTION)
             if not collection:
                 return []
             
-            # Use ChromaDB's get method to retrieve all documents for user
-            results = collection.get(
-                where={"tenant_id": user_id},
-                limit=limit
-            )
+            results = await chroma_runtime.run(collection.get, where={"tenant_id": user_id})
             
-            # Convert results back to Creation objects
             creations = []
             for i, doc_id in enumerate(results["ids"]):
                 try:
-                    doc_content = results["documents"][i]
                     metadata_dict = results["metadatas"][i]
                     
                     # Skip if not our creation format
                     if "creation_type" not in metadata_dict:
                         continue
                     
+                    metadata = self._metadata_from_chroma(metadata_dict)
+                    
                     # Apply filters
-                    if creation_type and metadata_dict.get("creation_type") != creation_type.value:
+                    if creation_type and metadata.creation_type.value != creation_type:
                         continue
-                    if category and metadata_dict.get("category") != category.value:
+                    if category and metadata.category.value != category:
+                        continue
+                    if symbols and not any(s in metadata.symbols for s in symbols):
+                        continue
+                    if tags and not all(t in metadata.tags for t in tags):
                         continue
-                    if symbols:
-                        creation_symbols = metadata_dict.get("symbols", [])
-                        if not any(s in creation_symbols for s in symbols):
-                            continue
-                    
-                    # Parse document content
-                    creation_data = json.loads(doc_content)
-                    
-                    # Convert metadata dict to CreationMetadata object
-                    # Handle dataclass conversion
-                    metadata_copy = metadata_dict.copy()
-                    # Remove non-CreationMetadata fields
-                    for key in ["tenant_id", "workspace_id", "ingestion_date", "doc_id"]:
-                        metadata_copy.pop(key, None)
-                    
-                    # Convert flattened fields back to lists/objects
-                    if "symbols" in metadata_copy and isinstance(metadata_copy["symbols"], str):
-                        metadata_copy["symbols"] = metadata_copy["symbols"].split(",") if metadata_copy["symbols"] else []
-                    if "sectors" in metadata_copy and isinstance(metadata_copy["sectors"], str):
-                        metadata_copy["sectors"] = metadata_copy["sectors"].split(",") if metadata_copy["sectors"] else []
-                    if "tags" in metadata_copy and isinstance(metadata_copy["tags"], str):
-                        metadata_copy["tags"] = metadata_copy["tags"].split(",") if metadata_copy["tags"] else []
-                    if "parameters" in metadata_copy and isinstance(metadata_copy["parameters"], str):
-                        metadata_copy["parameters"] = json.loads(metadata_copy["parameters"]) if metadata_copy["parameters"] else {}
-                    
-                    # Convert enum strings back to enums
-                    if "creation_type" in metadata_copy:
-                        metadata_copy["creation_type"] = CreationType(metadata_copy["creation_type"])
-                    if "category" in metadata_copy:
-                        metadata_copy["category"] = CreationCategory(metadata_copy["category"])
-                    
-                    metadata = CreationMetadata(**metadata_copy)
                     
-                    creation = Creation(
+                    creation_data = json.loads(results["documents"][i])
+                    creations.append(Creation(
                         metadata=metadata,
                         data=creation_data.get("data", {}),
                         summary=creation_data.get("summary"),
                         key_insights=creation_data.get("key_insights", [])
-                    )
-                    
-                    creations.append(creation)
+                    ))
                     
                 except Exception as e:
                     self.logger.warning(f"Failed to parse creation {doc_id}: {e}")
                     continue
             
-            self.logger.info(f"📚 Retrieved {len(creations)} creations for user {user_id}")
-            return creations
+            creations.sort(key=lambda c: c.metadata.created_at or "", reverse=True)
+            return creations[offset:offset + limit if limit is not None else None]
             
         except Exception as e:
             self.logger.error(f"Failed to retrieve creations: {e}")
@@ -368,29 +555,44 @@ class UniversalCreationRecorder:
         self,
         user_id: str,
         query: str,
-        n_results: int = 20
+        n_results: int = 20,
+        creation_type: Optional[CreationType] = None,
+        category: Optional[CreationCategory] = None,
+        symbols: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None
     ) -> List[Creation]:
-        """Search creations using semantic search"""
+        """Hybrid (BM25 + vector) search over the user's creations, best match first"""
         
         try:
-            # Use existing unified search for now
-            # TODO: Implement dedicated creation search
-            results = {"documents": [[]], "metadatas": [[]]}
+            filters: Dict[str, Any] = {
+                "creation_type": creation_type.value if creation_type else [t.value for t in CreationType]
+            }
+            if category:
+                filters["category"] = category.value
+            if symbols:
+                filters["symbols"] = symbols
+            if tags:
+                filters["tags"] = tags
+            
+            ranked = await self.search_engine.search(user_id, query, filters=filters, n_results=n_results)
+            ids = [doc_id for doc_id, _ in ranked]
+            rows = await self._get_ranked_rows(ids)
             
             creations = []
-            for i, doc in enumerate(results["documents"][0]):
-                metadata_dict = results["metadatas"][0][i]
-                creation_data = json.loads(doc)
-                
-                metadata = CreationMetadata(**metadata_dict)
-                creation = Creation(
-                    metadata=metadata,
-                    data=creation_data.get("data", {}),
-                    summary=creation_data.get("summary"),
-                    key_insights=creation_data.get("key_insights", [])
-                )
-                
-                creations.append(creation)
+            for doc_id in ids:
+                if doc_id not in rows:
+                    continue
+                document, metadata_dict = rows[doc_id]
+                try:
+                    creation_data = json.loads(document)
+                    creations.append(Creation(
+                        metadata=self._metadata_from_chroma(metadata_dict),
+                        data=creation_data.get("data", {}),
+                        summary=creation_data.get("summary"),
+                        key_insights=creation_data.get("key_insights", [])
+                    ))
+                except Exception as e:
+                    self.logger.warning(f"Failed to parse creation {doc_id}: {e}")
             
             self.logger.info(f"🔍 Found {len(creations)} creations matching '{query}'")
             return creations
@@ -399,8 +601,108 @@ class UniversalCreationRecorder:
             self.logger.error(f"Failed to search creations: {e}")
             return []
     
+    async def search_reports(
+        self,
+        user_id: str,
+        query: str,
+        n_results: int = 20,
+        symbols: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid search over everything in research_reports for the user: recorded
+        creations and stored research reports alike, as raw documents, best match first
+        """
+        try:
+            filters = {"symbols": symbols} if symbols else None
+            ranked = await self.search_engine.search(user_id, query, filters=filters, n_results=n_results)
+            rows = await self._get_ranked_rows([doc_id for doc_id, _ in ranked])
+            return [
+                {"doc_id": doc_id, "score": score, "content": rows[doc_id][0], "metadata": rows[doc_id][1],
+                 "is_creation": "creation_type" in (rows[doc_id][1] or {})}
+                for doc_id, score in ranked if doc_id in rows
+            ]
+        except Exception as e:
+            self.logger.error(f"Failed to search research reports: {e}")
+            return []
+    
+    async def _get_ranked_rows(self, ids: List[str]) -> Dict[str, Any]:
+        """(document, metadata) per id for ranked search hits"""
+        if not ids:
+            return {}
+        collection = self.chroma_service.collections.get(CREATIONS_COLLECTION)
+        found = await chroma_runtime.run(collection.get, ids=ids, include=["documents", "metadatas"])
+        if len(found["ids"]) < len(ids):
+            # Recently recorded documents may still be in the write-behind queue
+            await self.chroma_service.ingestion.flush()
+            found = await chroma_runtime.run(collection.get, ids=ids, include=["documents", "metadatas"])
+        return {doc_id: (document, metadata) for doc_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])}
+    
     # Helper methods
     
+    def _metadata_from_chroma(self, metadata_dict: Dict[str, Any]) -> CreationMetadata:
+        """Rebuild CreationMetadata from its flattened Chroma form"""
+        fields = CreationMetadata.__dataclass_fields__
+        metadata_copy = {key: value for key, value in metadata_dict.items() if key in fields}
+        
+        # Convert flattened fields back to lists/objects
+        for key in ("symbols", "sectors", "tags"):
+            if isinstance(metadata_copy.get(key), str):
+                metadata_copy[key] = metadata_copy[key].split(",") if metadata_copy[key] else []
+        if isinstance(metadata_copy.get("parameters"), str):
+            metadata_copy["parameters"] = json.loads(metadata_copy["parameters"]) if metadata_copy["parameters"] else {}
+        
+        metadata_copy["creation_type"] = CreationType(metadata_copy["creation_type"])
+        metadata_copy["category"] = CreationCategory(metadata_copy["category"])
+        return CreationMetadata(**metadata_copy)
+    
+    def _to_record(self, metadata: CreationMetadata) -> CreationRecord:
+        return CreationRecord(
+            creation_id=metadata.creation_id,
+            user_id=metadata.user_id,
+            creation_type=metadata.creation_type.value,
+            category=metadata.category.value,
+            title=metadata.title,
+            description=metadata.description or "",
+            openbb_module=metadata.openbb_module or "",
+            openbb_tool=metadata.openbb_tool or "",
+            parameters=metadata.parameters or {},
+            symbols=list(metadata.symbols or []),
+            sectors=list(metadata.sectors or []),
+            tags=list(metadata.tags or []),
+            file_path=metadata.file_path or None,
+            chart_url=metadata.chart_url or None,
+            web_url=metadata.web_url or None,
+            data_period=metadata.data_period or None,
+            expires_at=metadata.expires_at or None,
+            investment_thesis=metadata.investment_thesis or None,
+            priority=metadata.priority or "normal",
+            created_at=datetime.fromisoformat(metadata.created_at) if metadata.created_at else datetime.now()
+        )
+    
+    def _from_record(self, record: CreationRecord) -> CreationMetadata:
+        return CreationMetadata(
+            creation_id=record.creation_id,
+            user_id=record.user_id,
+            creation_type=CreationType(record.creation_type),
+            category=CreationCategory(record.category),
+            title=record.title,
+            description=record.description,
+            openbb_module=record.openbb_module,
+            openbb_tool=record.openbb_tool,
+            parameters=record.parameters or {},
+            symbols=list(record.symbols or []),
+            sectors=list(record.sectors or []),
+            file_path=record.file_path,
+            chart_url=record.chart_url,
+            web_url=record.web_url,
+            created_at=record.created_at.isoformat(),
+            data_period=record.data_period,
+            expires_at=record.expires_at,
+            investment_thesis=record.investment_thesis,
+            tags=list(record.tags or []),
+            priority=record.priority
+        )
+    
     def _generate_creation_id(self, creation_type: str, identifier: str, tool: str) -> str:
         """Generate unique creation ID"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -546,15 +848,22 @@ class UniversalCreationRecorder:
                 doc_id=creation.metadata.creation_id
             )
             
-            # Store in ChromaDB using research_reports collection
+            # Store payload in ChromaDB using research_reports collection
             await self.chroma_service.store_document(
-                collection_name="research_reports",
+                collection_name=CREATIONS_COLLECTION,
                 document=chroma_doc,
                 tenant_id=creation.metadata.user_id
             )
             
+            # Keep the keyword index current without waiting for the Chroma write
+            self.search_engine.add(creation.metadata.user_id, creation.metadata.creation_id, document_content, metadata_dict)
+            
         except Exception as e:
             self.logger.error(f"Failed to store creation {creation.metadata.creation_id}: {e}")
+            return
+        
+        # Mirror metadata into the relational index used for listing and filtering
+        await self._index(self._to_record(creation.metadata))
     
     async def _generate_ai_summary(self, data: Dict, metadata: CreationMetadata) -> Optional[str]:
         """Generate AI summary of creation (placeholder)"""
@@ -0,0 +1,180 @@
+"""
+Dashboard Bundle - Evaluate many dashboard widgets in one request
+Widgets declare the base datasets they read (deal/company joins, ledger metrics,
+pipeline aggregates). A bundle request loads each needed dataset once, in dependency
+order, then runs the widget computations concurrently and returns every result with
+its timing and an ETag, so clients can skip widgets that have not changed.
+Widgets only see loaded datasets: the session is not shared with the widget threads.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Timestamps that change on every evaluation and are left out of ETags
+VOLATILE_KEYS = frozenset({"calculated_at", "updated_at"})
+
+
+@dataclass
+class Dataset:
+    """
+    Base data shared by widgets; `load` receives the context with `requires` already loaded.
+    `commits` marks loads that may commit the session (expiring ORM rows loaded before
+    them); they run ahead of the other datasets.
+    """
+    name: str
+    load: Callable[["BundleContext"], Any]
+    requires: Tuple[str, ...] = ()
+    commits: bool = False
+
+
+@dataclass
+class Widget:
+    """A dashboard widget computed from datasets (and request params) only"""
+    name: str
+    compute: Callable[["BundleContext"], Any]
+    datasets: Tuple[str, ...] = ()
+
+
+class BundleContext:
+    """Per-request session, params and loaded datasets"""
+
+    def __init__(self, session: Any, params: Optional[Dict[str, Any]] = None):
+        self.session = session
+        self.params = params or {}
+        self.data: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.data[name]
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _strip_volatile(item) for key, item in value.items() if key not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def etag_of(value: Any) -> str:
+    """Content hash of a widget result, ignoring generation timestamps"""
+    payload = json.dumps(_strip_volatile(value), sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class DashboardBundle:
+    """Registry of datasets and widgets with a shared-load, concurrent-compute evaluator"""
+
+    def __init__(self):
+        self._datasets: Dict[str, Dataset] = {}
+        self._widgets: Dict[str, Widget] = {}
+
+    def dataset(self, name: str, load: Callable[[BundleContext], Any], requires: Iterable[str] = (),
+                commits: bool = False) -> None:
+        self._datasets[name] = Dataset(name, load, tuple(requires), commits)
+
+    def widget(self, name: str, compute: Callable[[BundleContext], Any], datasets: Iterable[str] = ()) -> None:
+        self._widgets[name] = Widget(name, compute, tuple(datasets))
+
+    @property
+    def widget_names(self) -> List[str]:
+        return list(self._widgets)
+
+    def plan(self, widgets: Iterable[str]) -> List[str]:
+        """Datasets needed by `widgets`, each once, dependencies first and committing loads ahead"""
+        order: List[str] = []
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if name in order:
+                return
+            if name in path:
+                raise ValueError(f"Dataset cycle: {' -> '.join(path + (name,))}")
+            if name not in self._datasets:
+                raise ValueError(f"Unknown dataset: {name}")
+            for required in self._datasets[name].requires:
+                visit(required, path + (name,))
+            order.append(name)
+
+        for widget in widgets:
+            if widget not in self._widgets:
+                raise ValueError(f"Unknown widget: {widget}")
+            for name in self._widgets[widget].datasets:
+                visit(name, ())
+
+        needed, order = order, []
+        for name in [name for name in needed if self._datasets[name].commits] + needed:
+            visit(name, ())
+        return order
+
+    def load(self, context: BundleContext, plan: List[str]) -> None:
+        """Load planned datasets in order on the request session (one query plan per request)"""
+        for name in plan:
+            failed = [required for required in self._datasets[name].requires if required in context.errors]
+            if failed:
+                context.errors[name] = f"requires failed dataset {failed[0]}"
+                continue
+            started = time.perf_counter()
+            try:
+                context.data[name] = self._datasets[name].load(context)
+            except Exception as e:
+                logger.warning(f"Dashboard dataset {name} failed: {e}")
+                context.errors[name] = str(e)
+            context.timings[name] = _elapsed_ms(started)
+        # Widgets run concurrently in other threads and must not use the (non thread-safe) session
+        context.session = None
+
+    def _evaluate_widget(self, name: str, context: BundleContext, etag: Optional[str]) -> Dict[str, Any]:
+        widget = self._widgets[name]
+        started = time.perf_counter()
+        failed = [dataset for dataset in widget.datasets if dataset in context.errors]
+        if failed:
+            return {"status": "error", "error": f"Dataset {failed[0]} failed: {context.errors[failed[0]]}",
+                    "elapsed_ms": _elapsed_ms(started)}
+        try:
+            data = widget.compute(context)
+        except Exception as e:
+            logger.warning(f"Dashboard widget {name} failed: {e}")
+            return {"status": "error", "error": str(e), "elapsed_ms": _elapsed_ms(started)}
+
+        current = etag_of(data)
+        result = {"status": "not_modified" if current == etag else "ok", "etag": current, "elapsed_ms": _elapsed_ms(started)}
+        if current != etag:
+            result["data"] = data
+        return result
+
+    async def evaluate(self, session: Any, widgets: Optional[List[str]] = None,
+                       etags: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Evaluate `widgets` (all when omitted). Datasets load once on `session` in a worker
+        thread; widgets then compute concurrently from the loaded data only (the context's
+        session is cleared), and those whose ETag matches
+        `etags[widget]` come back as not_modified without data.
+        Raises ValueError for unknown widget names.
+        """
+        started = time.perf_counter()
+        names = list(dict.fromkeys(widgets or self._widgets))
+        plan = self.plan(names)
+        context = BundleContext(session, params)
+        await asyncio.to_thread(self.load, context, plan)
+
+        etags = etags or {}
+        results = await asyncio.gather(*[
+            asyncio.to_thread(self._evaluate_widget, name, context, etags.get(name)) for name in names
+        ])
+        return {
+            "widgets": dict(zip(names, results)),
+            "datasets": {name: {"elapsed_ms": context.timings.get(name), "error": context.errors.get(name)} for name in plan},
+            "elapsed_ms": _elapsed_ms(started),
+        }
@@ -0,0 +1,264 @@
+"""
+Embedding Service - Warm local model with micro-batching and a content-hash cache
+Concurrent requests are coalesced into one model call; every text is embedded at
+most once per model thanks to an in-memory LRU backed by an on-disk SQLite cache
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Sequence, Tuple
+from array import array
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Same model Chroma uses by default, so vectors stay compatible with existing collections
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+EmbeddingModel = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def _default_model() -> EmbeddingModel:
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+
+class EmbeddingService:
+    """
+    Shared text embedding service.
+
+    - One model instance, loaded once in a worker thread (see `warm_up`)
+    - Requests arriving within `batch_window_ms` are embedded in a single call
+    - Identical texts in flight share one computation
+    - Results are cached by sha256(model, text) in memory and on disk
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], EmbeddingModel] = _default_model,
+        model_name: str = DEFAULT_MODEL_NAME,
+        cache_dir: Optional[str] = os.path.join(os.path.expanduser("~"), ".redpill", "embedding_cache"),
+        max_batch_size: int = 32,
+        batch_window_ms: float = 5.0,
+        memory_cache_size: int = 10_000,
+    ):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.memory_cache_size = memory_cache_size
+
+        self._model_factory = model_factory
+        self._model: Optional[EmbeddingModel] = None
+        self._model_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: List[Tuple[str, str]] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._drainer: Optional[asyncio.Task] = None
+
+        self._stats = {
+            "requested": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "computed": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "errors": 0,
+            "model_load_ms": None,
+            "last_batch_ms": 0.0,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    async def warm_up(self) -> bool:
+        """Load the model (and run one inference) off the event loop"""
+        try:
+            await asyncio.to_thread(self._load_model)
+            return True
+        except Exception as e:
+            logger.warning(f"Embedding model warm-up failed: {e}")
+            return False
+
+    async def embed_one(self, text: str) -> List[float]:
+        return (await self.embed([text]))[0]
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embeddings for texts, in order; raises if the model fails"""
+        self._bind_loop()
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        waiting: List[Tuple[int, asyncio.Future]] = []
+
+        for i, text in enumerate(texts):
+            self._stats["requested"] += 1
+            key = self._key(text)
+            cached = self._memory_get(key)
+            if cached is not None:
+                self._stats["memory_hits"] += 1
+                results[i] = cached
+                continue
+
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._loop.create_future()
+                self._inflight[key] = future
+                self._queue.append((key, text))
+            else:
+                self._stats["coalesced"] += 1
+            waiting.append((i, future))
+
+        if waiting:
+            if self._drainer is None or self._drainer.done():
+                self._drainer = self._loop.create_task(self._drain())
+            for i, future in waiting:
+                # Shield so one cancelled caller does not fail others waiting on the same text
+                results[i] = await asyncio.shield(future)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        requested = self._stats["requested"]
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "model": self.model_name,
+            "ready": self.ready,
+            "cache_hit_rate": round(hits / requested, 4) if requested else 0.0,
+            "memory_cache_entries": len(self._memory),
+            "avg_batch_size": round(self._stats["computed"] / self._stats["batches"], 2) if self._stats["batches"] else 0.0,
+            "pending": len(self._queue),
+        }
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures belong to a loop; start fresh when called from a new one
+            self._loop = loop
+            self._queue = []
+            self._inflight = {}
+            self._drainer = None
+
+    async def _drain(self) -> None:
+        await asyncio.sleep(self.batch_window)
+        while self._queue:
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:len(batch)]
+            started = time.perf_counter()
+            try:
+                vectors, disk_hits = await asyncio.to_thread(self._compute, batch)
+            except Exception as e:
+                self._stats["errors"] += len(batch)
+                logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+                for key, _ in batch:
+                    future = self._inflight.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._stats["disk_hits"] += disk_hits
+            self._stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            for (key, _), vector in zip(batch, vectors):
+                self._memory_put(key, vector)
+                future = self._inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(vector)
+
+    def _compute(self, batch: List[Tuple[str, str]]) -> Tuple[List[List[float]], int]:
+        """Disk lookups plus one model call for the misses (runs in a worker thread)"""
+        vectors: Dict[str, List[float]] = self._disk_get_many([key for key, _ in batch])
+        disk_hits = len(vectors)
+        missing = [(key, text) for key, text in batch if key not in vectors]
+
+        if missing:
+            model = self._load_model()
+            computed = [[float(x) for x in vector] for vector in model([text for _, text in missing])]
+            for (key, _), vector in zip(missing, computed):
+                vectors[key] = vector
+            self._disk_put_many([(key, vectors[key]) for key, _ in missing])
+            self._stats["computed"] += len(missing)
+            self._stats["batches"] += 1
+
+        return [vectors[key] for key, _ in batch], disk_hits
+
+    def _load_model(self) -> EmbeddingModel:
+        if self._model is not None:
+            return self._model
+        with self._model_lock:
+            if self._model is None:
+                started = time.perf_counter()
+                model = self._model_factory()
+                model(["warm up"])  # Forces lazy weights/session creation now, not on first request
+                self._model = model
+                self._stats["model_load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                logger.info(f"Embedding model {self.model_name} loaded in {self._stats['model_load_ms']}ms")
+        return self._model
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_cache_size:
+            self._memory.popitem(last=False)
+
+    def _disk_connection(self) -> Optional[sqlite3.Connection]:
+        if self.cache_dir is None:
+            return None
+        if self._disk is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk = sqlite3.connect(os.path.join(self.cache_dir, "embeddings.sqlite"), check_same_thread=False)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._disk.commit()
+        return self._disk
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        try:
+            with self._disk_lock:
+                connection = self._disk_connection()
+                if connection is None or not keys:
+                    return {}
+                placeholders = ",".join("?" * len(keys))
+                rows = connection.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache read failed: {e}")
+            return {}
+        found = {}
+        for key, blob in rows:
+            vector = array("f")
+            vector.frombytes(blob)
+            found[key] = vector.tolist()
+        return found
+
+    def _disk_put_many(self, items: List[Tuple[str, List[float]]]) -> None:
+        try:
+            with self._disk_lock:
+                connection = self._disk_connection()
+                if connection is None:
+                    return
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in items],
+                )
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
+
+
+# Global embedding service instance (model loads on warm_up or first use)
+embedding_service = EmbeddingService()
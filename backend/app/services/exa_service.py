@@ -48,35 +48,37 @@ class ExaService:
             self.client = None
             self.logger.warning("Exa API key not configured - service will be limited")
     
-    async def search(self, query: str, num_results: int = 10) -> List[Dict[str, Any]]:
+    async def search(self, query: str, num_results: int = 10, include_contents: bool = True) -> List[Dict[str, Any]]:
         """
         Basic search method for general web queries with structured JSON results.
         Used by financial agent for internet access.
+        
+        Blocking Exa client calls run in a worker thread so concurrent searches overlap.
+        Pass include_contents=False to skip the page-content fetch (see fetch_contents).
         """
         if self.use_mock or not self.client:
             return self._get_mock_search_results(query, num_results)
         
         try:
             # Use Exa's neural search for better financial/business results  
-            search_response = self.client.search(
+            search_response = await asyncio.to_thread(
+                self.client.search,
                 query=query,
                 num_results=num_results,
                 use_autoprompt=True  # Let Exa optimize the query
             )
             
             # Get content for the results using a separate call if needed
-            if hasattr(search_response, 'results') and search_response.results:
-                try:
-                    urls = [result.url for result in search_response.results]
-                    content_response = self.client.get_contents(urls)
-                    content_map = {content.url: content.text for content in content_response.contents}
-                except:
-                    content_map = {}
+            content_map = {}
+            if include_contents and getattr(search_response, 'results', None):
+                content_map = await self.fetch_contents(
+                    [result.url for result in search_response.results], max_characters=500
+                )
             
             results = []
             for result in search_response.results:
                 # Use content from content_map if available, otherwise fallback
-                text = content_map.get(result.url, "")[:500] if 'content_map' in locals() else ""
+                text = content_map.get(result.url, "")
                 if not text and hasattr(result, 'text') and result.text:
                     text = result.text[:500]
                 
@@ -95,6 +97,24 @@ class ExaService:
             self.logger.error(f"Exa search failed for '{query}': {e}")
             return self._get_mock_search_results(query, num_results)
     
+    async def fetch_contents(self, urls: List[str], max_characters: int = 4000) -> Dict[str, str]:
+        """
+        Fetch page text for many URLs in one Exa call, truncated per URL.
+        Returns a url -> text map; missing or failed URLs are simply absent.
+        """
+        if not urls or self.use_mock or not self.client:
+            return {}
+        
+        try:
+            content_response = await asyncio.to_thread(self.client.get_contents, urls)
+            return {
+                content.url: (content.text or "")[:max_characters]
+                for content in content_response.contents
+            }
+        except Exception as e:
+            self.logger.warning(f"Exa content fetch failed for {len(urls)} urls: {e}")
+            return {}
+    
     def _get_mock_search_results(self, query: str, num_results: int = 10) -> List[Dict[str, Any]]:
         """
         Generate intelligent mock search results based on query analysis.
@@ -0,0 +1,289 @@
+"""
+Fund Ledger - Incrementally maintained fund cashflows, valuations and daily totals
+Deal writes project the deal into ledger entries (capital call, valuation mark, mock
+distribution) and adjust per-day running totals in the same transaction, so TVPI,
+DPI, MOIC and IRR for any date range are computed from one row per active day
+instead of scanning deals and companies on every dashboard load.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from datetime import datetime, date, timedelta
+import logging
+
+import numpy as np
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select, col
+
+from ..models.deals import Deal, DealStatus
+from ..models.companies import Company
+from ..models.fund_ledger import FundLedgerEntry, FundDailyTotal, FundLedgerState
+from . import xirr_engine
+
+logger = logging.getLogger(__name__)
+
+# Mock current valuation multiples - would come from regular portfolio updates
+RESIDUAL_MULTIPLIERS = {
+    DealStatus.DEAL: 1.2,  # Early stage growth
+    DealStatus.TRACK: 2.1   # Mature portfolio company
+}
+
+# Mock distributions for tracked deals (would come from actual distribution records)
+MOCK_DISTRIBUTION_MULTIPLE = 1.5
+MOCK_DISTRIBUTION_DELAY = timedelta(days=365)
+
+INTERVAL_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+
+LEDGER_STATE_ID = 1
+
+
+def residual_value_of(deal: Deal) -> float:
+    """Current (mock) value of our position in a deal"""
+    if not deal.our_target or deal.status not in RESIDUAL_MULTIPLIERS:
+        return 0.0
+    return float(deal.our_target) * RESIDUAL_MULTIPLIERS[deal.status]
+
+
+def deal_entries(deal: Deal, company: Optional[str] = None) -> List[FundLedgerEntry]:
+    """
+    Ledger entries for a deal's current state: the call (held at cost), a valuation
+    mark to its residual value as of its last update, and the mock distribution.
+    """
+    if not deal.created_at or not deal.our_target or deal.our_target <= 0:
+        return []
+    invested = float(deal.our_target)
+    invested_on = deal.created_at.date()
+    entries = [FundLedgerEntry(
+        deal_id=deal.id, company=company, entry_date=invested_on,
+        entry_type="call", amount=-invested, nav_change=invested
+    )]
+
+    mark = residual_value_of(deal) - invested
+    if mark:
+        marked_on = max(invested_on, (deal.updated_at or deal.created_at).date())
+        entries.append(FundLedgerEntry(
+            deal_id=deal.id, company=company, entry_date=marked_on,
+            entry_type="valuation", nav_change=mark
+        ))
+
+    if deal.status == DealStatus.TRACK:
+        entries.append(FundLedgerEntry(
+            deal_id=deal.id, company=company, entry_date=invested_on + MOCK_DISTRIBUTION_DELAY,
+            entry_type="distribution", amount=invested * MOCK_DISTRIBUTION_MULTIPLE
+        ))
+    return entries
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator > 0 else 0
+
+
+def _upsert(session: Session, model, values: Dict[str, Any], key: str, increment: bool = False) -> None:
+    """
+    INSERT ... ON CONFLICT (key) DO UPDATE in one statement. With increment=True the
+    existing row's columns are increased by the values (col = col + excluded.col).
+    """
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(model).values(**values)
+    columns = model.__table__.c
+    updates = {
+        column: columns[column] + statement.excluded[column] if increment else statement.excluded[column]
+        for column in values if column != key
+    }
+    session.execute(statement.on_conflict_do_update(index_elements=[key], set_=updates))
+
+
+class FundLedger:
+    """
+    Fund ledger over fund_ledger_entries and fund_daily_totals.
+
+    Write methods join the caller's transaction (inside a savepoint, so a ledger
+    failure never blocks the deal write) and add their deltas to the day rows with
+    an atomic upsert, so concurrent writers on the same day never lose one. A failed
+    sync marks the shared fund_ledger_state row stale and the next read, in any
+    worker, rebuilds the ledger from the deals table.
+    """
+
+    # ---- writes ----
+
+    def sync_deal(self, session: Session, deal: Deal, company: Optional[str] = None) -> None:
+        """Replace a deal's entries with its current projection"""
+        try:
+            with session.begin_nested():
+                if company is None:
+                    company_row = session.get(Company, deal.company_id)
+                    company = company_row.name if company_row else None
+                self._replace(session, deal.id, deal_entries(deal, company))
+        except Exception as e:
+            logger.warning(f"Fund ledger sync failed for deal {deal.id}, will rebuild on next read: {e}")
+            self._set_stale(session, True)
+
+    def remove_deal(self, session: Session, deal_id: str) -> None:
+        try:
+            with session.begin_nested():
+                self._replace(session, deal_id, [])
+        except Exception as e:
+            logger.warning(f"Fund ledger removal failed for deal {deal_id}, will rebuild on next read: {e}")
+            self._set_stale(session, True)
+
+    def rebuild(self, session: Session) -> int:
+        """Re-project every deal (backfill, or recovery after a failed sync); returns entry count"""
+        # Writing the state row first locks it, so concurrent rebuilds run one at a time
+        self._set_stale(session, True)
+        session.exec(delete(FundLedgerEntry))
+        session.exec(delete(FundDailyTotal))
+        entries: List[FundLedgerEntry] = []
+        for deal, company in session.exec(select(Deal, Company).join(Company, Deal.company_id == Company.id)).all():
+            entries.extend(deal_entries(deal, company.name))
+        session.add_all(entries)
+        self._apply_deltas(session, self._day_deltas(entries, sign=1))
+        self._set_stale(session, False, rebuilt_at=datetime.utcnow())
+        session.commit()
+        logger.info(f"Fund ledger rebuilt with {len(entries)} entries")
+        return len(entries)
+
+    def _replace(self, session: Session, deal_id: str, entries: List[FundLedgerEntry]) -> None:
+        previous = session.exec(select(FundLedgerEntry).where(FundLedgerEntry.deal_id == deal_id)).all()
+        totals = self._day_deltas(previous, sign=-1)
+        for day, deltas in self._day_deltas(entries, sign=1).items():
+            current = totals.setdefault(day, np.zeros(4))
+            current += deltas
+        for entry in previous:
+            session.delete(entry)
+        session.add_all(entries)
+        self._apply_deltas(session, totals)
+
+    @staticmethod
+    def _day_deltas(entries: Iterable[FundLedgerEntry], sign: int) -> Dict[date, np.ndarray]:
+        """(paid_in, distributions, nav_change, entries) deltas per day"""
+        deltas: Dict[date, np.ndarray] = {}
+        for entry in entries:
+            row = deltas.setdefault(entry.entry_date, np.zeros(4))
+            row += sign * np.array([max(-entry.amount, 0.0), max(entry.amount, 0.0), entry.nav_change, 1.0])
+        return deltas
+
+    @staticmethod
+    def _apply_deltas(session: Session, deltas: Dict[date, np.ndarray]) -> None:
+        if not deltas:
+            return
+        for day, (paid_in, distributions, nav_change, count) in deltas.items():
+            _upsert(session, FundDailyTotal, {
+                "day": day, "paid_in": float(paid_in), "distributions": float(distributions),
+                "nav_change": float(nav_change), "entries": int(count),
+            }, "day", increment=True)
+        session.exec(delete(FundDailyTotal).where(
+            col(FundDailyTotal.day).in_(list(deltas)), FundDailyTotal.entries <= 0
+        ))
+
+    @staticmethod
+    def _set_stale(session: Session, stale: bool, rebuilt_at: Optional[datetime] = None) -> None:
+        values = {"id": LEDGER_STATE_ID, "stale": stale}
+        if rebuilt_at:
+            values["rebuilt_at"] = rebuilt_at
+        _upsert(session, FundLedgerState, values, "id")
+
+    # ---- reads ----
+
+    def ensure_populated(self, session: Session) -> None:
+        """Rebuild from deals if the ledger has never been built or any worker marked it stale"""
+        stale = session.exec(select(FundLedgerState.stale).where(FundLedgerState.id == LEDGER_STATE_ID)).first()
+        if stale is False:
+            return
+        self.rebuild(session)
+
+    def daily_totals(self, session: Session, end: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(day numbers, [paid_in, distributions, nav_change] per day) up to `end`, oldest first"""
+        self.ensure_populated(session)
+        query = select(FundDailyTotal.day, FundDailyTotal.paid_in, FundDailyTotal.distributions, FundDailyTotal.nav_change)
+        if end:
+            query = query.where(FundDailyTotal.day <= end)
+        rows = session.exec(query.order_by(col(FundDailyTotal.day))).all()
+        days = xirr_engine.to_days([row[0] for row in rows])
+        values = np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), 3)
+        return days, values
+
+    def entries(self, session: Session, start: Optional[date] = None, end: Optional[date] = None,
+                entry_types: Tuple[str, ...] = ("call", "distribution")) -> List[FundLedgerEntry]:
+        self.ensure_populated(session)
+        query = select(FundLedgerEntry).where(col(FundLedgerEntry.entry_type).in_(entry_types))
+        if start:
+            query = query.where(FundLedgerEntry.entry_date >= start)
+        if end:
+            query = query.where(FundLedgerEntry.entry_date <= end)
+        return list(session.exec(query.order_by(col(FundLedgerEntry.entry_date), col(FundLedgerEntry.deal_id))).all())
+
+    def metrics(self, session: Session, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Fund metrics over [start, end]. With a start date the NAV held at the start is
+        treated as invested capital (a horizon IRR/TVPI); without one, since inception.
+        """
+        days, values = self.daily_totals(session, end)
+        start_day = xirr_engine.to_days([start])[0] if start else None
+        in_range = days >= start_day if start else np.ones(len(days), dtype=bool)
+        paid_in, distributions = values[in_range, 0].sum(), values[in_range, 1].sum()
+        residual = values[:, 2].sum()
+        opening = values[~in_range, 2].sum()
+
+        flow_days = list(days[in_range])
+        flows = list(values[in_range, 1] - values[in_range, 0])
+        if opening > 0:
+            flow_days.insert(0, start_day)
+            flows.insert(0, -opening)
+        # Mark the NAV at the end of the range (or today, after any scheduled flows)
+        as_of = end or datetime.now().date()
+        if not end and len(days):
+            as_of = max(as_of, self._to_date(days[-1]))
+        if residual > 0:
+            flow_days.append(xirr_engine.to_days([as_of])[0])
+            flows.append(residual)
+        irr = xirr_engine.xirr(np.array(flow_days, dtype=np.int64), flows)
+
+        tvpi = _ratio(distributions + residual, paid_in + opening)
+        return {
+            "irr": round(irr * 100, 2) if irr is not None else 0.0,
+            "tvpi": round(tvpi, 2),
+            "dpi": round(_ratio(distributions, paid_in + opening), 2),
+            "moic": round(tvpi, 2),
+            "paid_in_capital": float(paid_in),
+            "residual_value": float(residual),
+            "total_distributions": float(distributions),
+            "start_date": start.isoformat() if start else None,
+            "end_date": end.isoformat() if end else None,
+        }
+
+    def history(self, session: Session, start: Optional[date] = None, end: Optional[date] = None,
+                interval: str = "quarter") -> List[Dict[str, Any]]:
+        """Since-inception metrics at each period end in [start, end], for charting"""
+        days, values = self.daily_totals(session, end)
+        if not len(days):
+            return []
+        end = end or datetime.now().date()
+        points = xirr_engine.period_ends(max(start or date.min, self._to_date(days[0])), end, INTERVAL_MONTHS[interval])
+        point_days = xirr_engine.to_days(points)
+
+        # Running totals at each point from the per-day aggregate
+        cumulative = np.vstack([np.zeros(3), np.cumsum(values, axis=0)])
+        at_point = cumulative[np.searchsorted(days, point_days, side="right")]
+        paid_in, distributions, residual = at_point[:, 0], at_point[:, 1], at_point[:, 2]
+        irrs = xirr_engine.rolling_xirr(days, values[:, 1] - values[:, 0], point_days, terminal_values=residual)
+
+        return [
+            {
+                "date": point.isoformat(),
+                "paid_in_capital": float(paid_in[i]),
+                "total_distributions": float(distributions[i]),
+                "residual_value": float(residual[i]),
+                "tvpi": round(_ratio(distributions[i] + residual[i], paid_in[i]), 2),
+                "dpi": round(_ratio(distributions[i], paid_in[i]), 2),
+                "irr": round(irrs[i] * 100, 2) if irrs[i] is not None else None,
+            }
+            for i, point in enumerate(points)
+        ]
+
+    @staticmethod
+    def _to_date(day_number: int) -> date:
+        return date(1970, 1, 1) + timedelta(days=int(day_number))
+
+
+# Global instance
+fund_ledger = FundLedger()
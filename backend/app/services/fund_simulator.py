@@ -0,0 +1,396 @@
+"""
+Fund Simulator - Monte Carlo outcomes for the fund's portfolio positions
+Each scenario draws an exit multiple (stage-specific outcome buckets scaled by a
+fund-wide market factor) and an exit date for every position, then rolls the exits
+up into quarterly gross proceeds, LP distributions after carry, and net TVPI/IRR.
+All scenarios are sampled as arrays; scenario chunks run in a process pool and each
+chunk has its own child seed, so results depend only on the seed and scenario count.
+"""
+
+from typing import Dict, List, Any, Optional, Tuple, Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from . import xirr_engine
+
+logger = logging.getLogger(__name__)
+
+# Exit outcome buckets per investment stage: (probability, low multiple, high multiple)
+STAGE_OUTCOMES: Dict[str, List[Tuple[float, float, float]]] = {
+    "pre_seed": [(0.50, 0.0, 0.2), (0.22, 0.2, 1.0), (0.14, 1.0, 3.0), (0.09, 3.0, 10.0), (0.05, 10.0, 60.0)],
+    "seed": [(0.45, 0.0, 0.2), (0.25, 0.2, 1.0), (0.15, 1.0, 3.0), (0.10, 3.0, 10.0), (0.05, 10.0, 50.0)],
+    "series_a": [(0.35, 0.0, 0.2), (0.25, 0.2, 1.0), (0.20, 1.0, 3.0), (0.14, 3.0, 10.0), (0.06, 10.0, 30.0)],
+    "series_b": [(0.25, 0.0, 0.3), (0.25, 0.3, 1.0), (0.30, 1.0, 3.0), (0.15, 3.0, 8.0), (0.05, 8.0, 20.0)],
+    "series_c": [(0.15, 0.0, 0.5), (0.25, 0.5, 1.0), (0.40, 1.0, 2.5), (0.17, 2.5, 5.0), (0.03, 5.0, 10.0)],
+    "series_d_plus": [(0.12, 0.0, 0.5), (0.25, 0.5, 1.0), (0.45, 1.0, 2.5), (0.15, 2.5, 5.0), (0.03, 5.0, 8.0)],
+    "growth": [(0.12, 0.0, 0.5), (0.25, 0.5, 1.0), (0.45, 1.0, 2.5), (0.15, 2.5, 5.0), (0.03, 5.0, 8.0)],
+    "pre_ipo": [(0.10, 0.3, 0.8), (0.30, 0.8, 1.2), (0.45, 1.2, 2.0), (0.15, 2.0, 4.0)],
+    "pre_tge": [(0.45, 0.0, 0.2), (0.20, 0.2, 1.0), (0.15, 1.0, 3.0), (0.12, 3.0, 10.0), (0.08, 10.0, 100.0)],
+    "post_tge": [(0.30, 0.0, 0.3), (0.30, 0.3, 1.0), (0.25, 1.0, 3.0), (0.15, 3.0, 10.0)],
+}
+
+# Years from investment to exit per stage, drawn uniformly from (earliest, latest)
+STAGE_EXIT_YEARS: Dict[str, Tuple[float, float]] = {
+    "pre_seed": (6.0, 10.0),
+    "seed": (5.0, 9.0),
+    "series_a": (4.0, 8.0),
+    "series_b": (3.0, 7.0),
+    "series_c": (3.0, 6.0),
+    "series_d_plus": (2.0, 5.0),
+    "growth": (2.0, 5.0),
+    "pre_ipo": (1.0, 3.0),
+    "pre_tge": (1.0, 4.0),
+    "post_tge": (0.5, 3.0),
+}
+
+DEFAULT_STAGE = "seed"
+
+# Deal statuses that are portfolio positions (the ones the fund ledger marks)
+PORTFOLIO_STATUSES = ("deal", "track")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Scenarios per chunk; fixed so that results do not depend on the number of workers
+CHUNK_SCENARIOS = 5000
+
+MAX_SCENARIOS = 200_000
+
+
+@dataclass
+class Position:
+    deal_id: str
+    company: str
+    stage: str
+    invested: float
+    invested_on: date
+
+
+@dataclass
+class SimulationAssumptions:
+    scenarios: int = 20_000
+    seed: Optional[int] = None
+    fund_size: Optional[float] = None  # Committed capital; the invested total when omitted
+    management_fee: float = 0.02  # Annual, on committed capital
+    fee_years: int = 10
+    carry: float = 0.20
+    fund_life_years: int = 10  # Positions still held at the end are sold at their drawn multiple
+    distribution_lag_quarters: int = 1
+    market_volatility: float = 0.25  # Lognormal fund-wide factor applied to every multiple
+    outcomes: Dict[str, List[Tuple[float, float, float]]] = field(default_factory=dict)
+    exit_years: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not 1 <= self.scenarios <= MAX_SCENARIOS:
+            raise ValueError(f"scenarios must be between 1 and {MAX_SCENARIOS}")
+        if not 0 <= self.carry < 1 or not 0 <= self.management_fee < 1:
+            raise ValueError("carry and management_fee must be fractions in [0, 1)")
+        if self.market_volatility < 0 or self.distribution_lag_quarters < 0 or self.fund_life_years < 1:
+            raise ValueError("market_volatility and distribution_lag_quarters must be >= 0 and fund_life_years >= 1")
+        for stage, buckets in self.outcomes.items():
+            if not buckets or abs(sum(p for p, _, _ in buckets) - 1) > 1e-6:
+                raise ValueError(f"Outcome probabilities for {stage} must sum to 1")
+            if any(p < 0 or low < 0 or high < low for p, low, high in buckets):
+                raise ValueError(f"Outcome buckets for {stage} need probability >= 0 and 0 <= low <= high")
+        for stage, (earliest, latest) in self.exit_years.items():
+            if not 0 <= earliest <= latest:
+                raise ValueError(f"Exit years for {stage} need 0 <= earliest <= latest")
+
+    def stage_outcomes(self, stage: str) -> List[Tuple[float, float, float]]:
+        return self.outcomes.get(stage) or STAGE_OUTCOMES.get(stage) or STAGE_OUTCOMES[DEFAULT_STAGE]
+
+    def stage_exit_years(self, stage: str) -> Tuple[float, float]:
+        return self.exit_years.get(stage) or STAGE_EXIT_YEARS.get(stage) or STAGE_EXIT_YEARS[DEFAULT_STAGE]
+
+
+def positions_from_deals(deals: Sequence[Any]) -> List[Position]:
+    """Portfolio positions from (deal, company) rows, sized at our target investment"""
+    positions = []
+    for deal, company in deals:
+        status = getattr(deal.status, "value", deal.status)
+        if status not in PORTFOLIO_STATUSES or not deal.created_at or not deal.our_target or deal.our_target <= 0:
+            continue
+        positions.append(Position(
+            deal_id=deal.id,
+            company=company.name if company else "",
+            stage=getattr(deal.stage, "value", deal.stage) or DEFAULT_STAGE,
+            invested=float(deal.our_target),
+            invested_on=deal.created_at.date() if isinstance(deal.created_at, datetime) else deal.created_at,
+        ))
+    return positions
+
+
+def _quarter(days: np.ndarray) -> np.ndarray:
+    """Calendar quarter number (quarters since 1970) of day numbers"""
+    months = np.asarray(days, dtype="datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return months // 3
+
+
+def _quarter_end_days(quarters: np.ndarray) -> np.ndarray:
+    next_quarter_start = (quarters + 1) * 3
+    return np.asarray(next_quarter_start, dtype="datetime64[M]").astype("datetime64[D]").astype(np.int64) - 1
+
+
+def _bands(values: np.ndarray) -> Dict[str, Optional[float]]:
+    """Percentile bands and mean of one sample (NaNs ignored)"""
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {**{f"p{p}": None for p in PERCENTILES}, "mean": None}
+    bands = np.percentile(values, PERCENTILES)
+    return {**{f"p{p}": float(v) for p, v in zip(PERCENTILES, bands)}, "mean": float(values.mean())}
+
+
+def _column_bands(values: np.ndarray) -> List[Dict[str, float]]:
+    """Percentile bands and mean of every column of a (scenarios, periods) array"""
+    bands = np.percentile(values, PERCENTILES, axis=0)
+    means = values.mean(axis=0)
+    return [
+        {**{f"p{p}": float(bands[k, j]) for k, p in enumerate(PERCENTILES)}, "mean": float(means[j])}
+        for j in range(values.shape[1])
+    ]
+
+
+def _prepare(positions: List[Position], assumptions: SimulationAssumptions, as_of: date) -> Dict[str, Any]:
+    """Per-position and per-quarter arrays shared by every scenario chunk"""
+    stages = sorted({position.stage for position in positions})
+    stage_index = {stage: k for k, stage in enumerate(stages)}
+    n_buckets = max(len(assumptions.stage_outcomes(stage)) for stage in stages)
+
+    # Outcome buckets padded to the same width with zero-probability buckets
+    cumulative = np.ones((len(stages), n_buckets))
+    lows = np.zeros((len(stages), n_buckets))
+    highs = np.zeros((len(stages), n_buckets))
+    for k, stage in enumerate(stages):
+        buckets = np.array(assumptions.stage_outcomes(stage), dtype=float)
+        cumulative[k, :len(buckets)] = np.cumsum(buckets[:, 0]) / buckets[:, 0].sum()
+        lows[k, :len(buckets)], highs[k, :len(buckets)] = buckets[:, 1], buckets[:, 2]
+    exit_range = np.array([assumptions.stage_exit_years(stage) for stage in stages], dtype=float)
+
+    invested_days = xirr_engine.to_days([position.invested_on for position in positions])
+    invested = np.array([position.invested for position in positions], dtype=float)
+
+    start_q = int(_quarter(invested_days).min())
+    first_future_q = int(_quarter(xirr_engine.to_days([as_of]))[0]) + 1
+    last_q = max(start_q + assumptions.fund_life_years * 4 - 1, first_future_q + assumptions.distribution_lag_quarters)
+    quarters = np.arange(start_q, last_q + 1)
+
+    # Calls are known up front: investments when made, fees quarterly on committed capital
+    committed = float(assumptions.fund_size or invested.sum())
+    investment_calls = np.bincount(_quarter(invested_days) - start_q, weights=invested, minlength=len(quarters))
+    fees = np.where(quarters < start_q + assumptions.fee_years * 4, assumptions.management_fee * committed / 4, 0.0)
+
+    return {
+        "stage": np.array([stage_index[position.stage] for position in positions]),
+        "invested": invested,
+        "invested_days": invested_days,
+        "cumulative": cumulative,
+        "lows": lows,
+        "highs": highs,
+        "exit_range": exit_range,
+        "start_q": start_q,
+        "first_future_q": first_future_q,
+        "last_q": last_q,
+        "quarter_end_days": _quarter_end_days(quarters),
+        "investment_calls": investment_calls,
+        "fees": fees,
+        "committed": committed,
+        "carry": assumptions.carry,
+        "lag": assumptions.distribution_lag_quarters,
+        "volatility": assumptions.market_volatility,
+    }
+
+
+def _simulate_chunk(inputs: Dict[str, Any], seed: np.random.SeedSequence, n: int) -> Dict[str, np.ndarray]:
+    """Simulate `n` scenarios; runs in worker processes"""
+    rng = np.random.default_rng(seed)
+    stage, invested = inputs["stage"], inputs["invested"]
+    n_positions = len(invested)
+    n_quarters = len(inputs["quarter_end_days"])
+    start_q, last_q = inputs["start_q"], inputs["last_q"]
+
+    # Exit multiples: bucket by inverse CDF, uniform within the bucket, times the market factor
+    draw = rng.random((n, n_positions))
+    bucket = (draw[:, :, None] > inputs["cumulative"][stage][None, :, :]).sum(axis=2)
+    bucket = np.minimum(bucket, inputs["cumulative"].shape[1] - 1)
+    low, high = inputs["lows"][stage[None, :], bucket], inputs["highs"][stage[None, :], bucket]
+    sigma = inputs["volatility"]
+    market = np.exp(sigma * rng.standard_normal((n, 1)) - sigma ** 2 / 2)
+    multiples = (low + rng.random((n, n_positions)) * (high - low)) * market
+
+    # Exit dates: never before next quarter, at the latest at the end of fund life
+    earliest, latest = inputs["exit_range"][stage, 0], inputs["exit_range"][stage, 1]
+    years = earliest + rng.random((n, n_positions)) * (latest - earliest)
+    exit_days = inputs["invested_days"][None, :] + np.round(years * xirr_engine.DAYS_PER_YEAR).astype(np.int64)
+    exit_q = np.clip(_quarter(exit_days), inputs["first_future_q"], last_q) - start_q
+    paid_q = np.minimum(exit_q + inputs["lag"], last_q - start_q)
+
+    # Gross proceeds per scenario and quarter, then the European waterfall on cumulative proceeds
+    proceeds = invested[None, :] * multiples
+    rows = np.arange(n)[:, None]
+    gross = np.bincount((rows * n_quarters + paid_q).ravel(), weights=proceeds.ravel(), minlength=n * n_quarters).reshape(n, n_quarters)
+    calls = inputs["investment_calls"] + inputs["fees"]
+    paid_in = calls.sum()
+    cumulative = np.cumsum(gross, axis=1)
+    lp_cumulative = np.minimum(cumulative, paid_in) + (1 - inputs["carry"]) * np.maximum(cumulative - paid_in, 0)
+    lp = np.diff(lp_cumulative, axis=1, prepend=0.0)
+
+    # Net IRR of every scenario in one solve
+    irr = xirr_engine.xirr_matrix(lp - calls[None, :], inputs["quarter_end_days"])
+
+    exit_cells = (rows * n_quarters + exit_q).ravel()
+    exit_counts = np.bincount(exit_cells, minlength=n * n_quarters).reshape(n, n_quarters)
+    exit_values = np.bincount(exit_cells, weights=proceeds.ravel(), minlength=n * n_quarters).reshape(n, n_quarters)
+
+    return {
+        "gross_moic": proceeds.sum(axis=1) / invested.sum(),
+        "net_tvpi": lp.sum(axis=1) / paid_in,
+        "net_irr": irr,
+        "lp": lp,
+        "exit_counts": exit_counts,
+        "exit_values": exit_values,
+        "multiple_sum": multiples.sum(axis=0),
+        "loss_count": (multiples < 1).sum(axis=0),
+        "big_count": (multiples >= 3).sum(axis=0),
+    }
+
+
+def _chunk_plan(assumptions: SimulationAssumptions) -> List[Tuple[np.random.SeedSequence, int]]:
+    sizes = [min(CHUNK_SCENARIOS, assumptions.scenarios - start) for start in range(0, assumptions.scenarios, CHUNK_SCENARIOS)]
+    return list(zip(np.random.SeedSequence(assumptions.seed).spawn(len(sizes)), sizes))
+
+
+def _yearly(values: np.ndarray, years: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(scenarios, quarters) summed into (scenarios, calendar years)"""
+    labels, index = np.unique(years, return_inverse=True)
+    summed = np.zeros((values.shape[0], len(labels)))
+    np.add.at(summed.T, index, values.T)
+    return labels, summed
+
+
+def _summarize(positions: List[Position], inputs: Dict[str, Any], chunks: List[Dict[str, np.ndarray]],
+               assumptions: SimulationAssumptions, as_of: date) -> Dict[str, Any]:
+    combined = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in ("gross_moic", "net_tvpi", "net_irr", "lp", "exit_counts", "exit_values")}
+    scenarios = len(combined["net_tvpi"])
+    quarter_ends = [date.fromordinal(int(day) + date(1970, 1, 1).toordinal()) for day in inputs["quarter_end_days"]]
+    calls = inputs["investment_calls"] + inputs["fees"]
+    paid_in = float(calls.sum())
+    future = np.array([quarter_end > as_of for quarter_end in quarter_ends])
+
+    years, exit_counts = _yearly(combined["exit_counts"], np.array([quarter_end.year for quarter_end in quarter_ends]))
+    _, exit_values = _yearly(combined["exit_values"], np.array([quarter_end.year for quarter_end in quarter_ends]))
+    used_years = exit_counts.sum(axis=0) > 0
+    cumulative_dpi = np.cumsum(combined["lp"], axis=1) / paid_in
+
+    multiple_sum = sum(chunk["multiple_sum"] for chunk in chunks)
+    loss_count = sum(chunk["loss_count"] for chunk in chunks)
+    big_count = sum(chunk["big_count"] for chunk in chunks)
+
+    return {
+        "scenarios": scenarios,
+        "seed": assumptions.seed,
+        "as_of": as_of.isoformat(),
+        "positions_count": len(positions),
+        "invested": float(inputs["invested"].sum()),
+        "committed": inputs["committed"],
+        "paid_in": paid_in,
+        "fund": {
+            "net_tvpi": _bands(combined["net_tvpi"]),
+            "gross_moic": _bands(combined["gross_moic"]),
+            "net_irr": _bands(combined["net_irr"]),
+            "probability_of_loss": float((combined["net_tvpi"] < 1).mean()),
+            "probability_3x": float((combined["net_tvpi"] >= 3).mean()),
+        },
+        "exits": [
+            {"year": int(year), "exit_count": count, "exit_value": value}
+            for year, count, value in zip(years[used_years], _column_bands(exit_counts[:, used_years]), _column_bands(exit_values[:, used_years]))
+        ],
+        "distributions": [
+            {"quarter_end": quarter_end.isoformat(), "amount": amount, "cumulative_dpi": dpi}
+            for quarter_end, amount, dpi, is_future in zip(quarter_ends, _column_bands(combined["lp"]), _column_bands(cumulative_dpi), future)
+            if is_future
+        ],
+        "calls": [
+            {"quarter_end": quarter_end.isoformat(), "investments": float(investment), "fees": float(fee),
+             "amount": float(investment + fee), "projected": bool(is_future)}
+            for quarter_end, investment, fee, is_future in zip(quarter_ends, inputs["investment_calls"], inputs["fees"], future)
+            if investment or fee
+        ],
+        "positions": [
+            {"deal_id": position.deal_id, "company": position.company, "stage": position.stage, "invested": position.invested,
+             "expected_multiple": float(total / scenarios), "probability_of_loss": float(losses / scenarios),
+             "probability_3x": float(big / scenarios)}
+            for position, total, losses, big in zip(positions, multiple_sum, loss_count, big_count)
+        ],
+    }
+
+
+def _empty_result(assumptions: SimulationAssumptions, as_of: date) -> Dict[str, Any]:
+    return {"scenarios": 0, "seed": assumptions.seed, "as_of": as_of.isoformat(), "positions_count": 0,
+            "invested": 0.0, "committed": 0.0, "paid_in": 0.0, "fund": {}, "exits": [], "distributions": [],
+            "calls": [], "positions": []}
+
+
+class FundSimulator:
+    """Monte Carlo fund outcomes, with scenario chunks spread over a process pool"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers if max_workers is not None else min(4, os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers only import numpy and this module, not the web app
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def run(self, positions: List[Position], assumptions: Optional[SimulationAssumptions] = None,
+            as_of: Optional[date] = None) -> Dict[str, Any]:
+        """Simulate in this process (same results as run_async for the same seed)"""
+        assumptions = assumptions or SimulationAssumptions()
+        as_of = as_of or date.today()
+        if not positions:
+            return _empty_result(assumptions, as_of)
+        started = time.perf_counter()
+        inputs = _prepare(positions, assumptions, as_of)
+        chunks = [_simulate_chunk(inputs, seed, n) for seed, n in _chunk_plan(assumptions)]
+        result = _summarize(positions, inputs, chunks, assumptions, as_of)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def run_async(self, positions: List[Position], assumptions: Optional[SimulationAssumptions] = None,
+                        as_of: Optional[date] = None) -> Dict[str, Any]:
+        """Simulate with scenario chunks in the process pool (in a thread when max_workers is 0)"""
+        assumptions = assumptions or SimulationAssumptions()
+        as_of = as_of or date.today()
+        if not positions:
+            return _empty_result(assumptions, as_of)
+        if self.max_workers == 0:
+            return await asyncio.to_thread(self.run, positions, assumptions, as_of)
+
+        started = time.perf_counter()
+        inputs = _prepare(positions, assumptions, as_of)
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        chunks = await asyncio.gather(*[
+            loop.run_in_executor(pool, _simulate_chunk, inputs, seed, n) for seed, n in _chunk_plan(assumptions)
+        ])
+        result = await asyncio.to_thread(_summarize, positions, inputs, list(chunks), assumptions, as_of)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Simulated {assumptions.scenarios} scenarios for {len(positions)} positions in {result['elapsed_ms']}ms")
+        return result
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global instance
+fund_simulator = FundSimulator()
@@ -0,0 +1,310 @@
+"""
+Hybrid Search - BM25 keyword ranking fused with vector similarity
+An in-memory inverted index per tenant (updated as documents are stored) is
+combined with Chroma nearest-neighbour results via reciprocal rank fusion;
+tenant scoping and metadata filters are applied before either side ranks.
+Each process keeps its own index, so it picks up documents stored by other
+workers by checking Chroma for unseen ids every INDEX_REFRESH_SECONDS.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+from collections import Counter, defaultdict
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+
+from .chroma_runtime import chroma_runtime
+from .embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant (Cormack et al.); dampens the weight of top ranks
+RRF_K = 60
+
+# Each side contributes this many candidates per requested result before fusion
+CANDIDATE_MULTIPLIER = 4
+
+# Metadata fields kept in memory for pre-ranking filters; list fields match on overlap
+FILTER_FIELDS = ("creation_type", "category", "source_type", "priority")
+LIST_FILTER_FIELDS = ("symbols", "tags", "sectors")
+
+# Metadata fields of creations that carry searchable text
+_TEXT_FIELDS = ("title", "description", "symbols", "sectors", "tags", "openbb_tool", "openbb_module", "investment_thesis")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[a-z0-9]+)*")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "the", "to", "with", "show", "me", "my", "get",
+})
+
+_LOAD_PAGE = 500
+
+# A loaded tenant index is checked against Chroma for new ids this often
+INDEX_REFRESH_SECONDS = 30.0
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [item for item in value.split(",") if item]
+    return list(value or [])
+
+
+def document_text(document: str, metadata: Dict[str, Any]) -> str:
+    """Searchable text: creation metadata plus its summary/insights, else the raw document"""
+    if "creation_type" not in metadata:
+        return document or ""
+
+    parts = [" ".join(_as_list(metadata.get(field))) if field in LIST_FILTER_FIELDS else str(metadata.get(field) or "")
+             for field in _TEXT_FIELDS]
+    try:
+        payload = json.loads(document) if document else {}
+        parts.append(payload.get("summary") or "")
+        parts.extend(payload.get("key_insights") or [])
+    except (json.JSONDecodeError, AttributeError):
+        pass
+    # Module paths like equity.price.historical are searchable by their parts too
+    parts.append(str(metadata.get("openbb_module") or "").replace(".", " "))
+    return " ".join(part for part in parts if part)
+
+
+class BM25Index:
+    """Incrementally maintained Okapi BM25 index"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: str, text: str) -> None:
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings[term][doc_id] = tf
+        self._terms[doc_id] = list(counts)
+        self._lengths[doc_id] = sum(counts.values())
+        self._total_length += self._lengths[doc_id]
+
+    def remove(self, doc_id: str) -> None:
+        for term in self._terms.pop(doc_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id, 0)
+
+    def search(self, query: str, limit: int, allowed: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """Top `limit` (doc_id, score) for the query, restricted to `allowed` ids when given"""
+        if not self._lengths:
+            return []
+        doc_count = len(self._lengths)
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+class HybridSearchEngine:
+    """
+    Hybrid retrieval over one Chroma collection.
+
+    Each tenant's BM25 index is loaded from Chroma on first search and kept current
+    through `add` (this process's writes) and periodic refreshes (other workers'
+    writes); filters narrow both the keyword and the vector candidates.
+    """
+
+    def __init__(self, collection_resolver, embedder=None, runner=None, clock=time.monotonic):
+        self._resolve = collection_resolver
+        self._embed = embedder or embedding_service.embed_one
+        self._run = runner or chroma_runtime.run
+        self._clock = clock
+        self._indexes: Dict[str, BM25Index] = {}
+        self._fields: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._loaded: Dict[str, float] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {"searches": 0, "last_search_ms": 0.0, "vector_failures": 0, "refreshes": 0}
+
+    def add(self, tenant_id: str, doc_id: str, document: str, metadata: Dict[str, Any]) -> None:
+        """Index (or re-index) one document for a tenant"""
+        index = self._indexes.setdefault(tenant_id, BM25Index())
+        index.add(doc_id, document_text(document, metadata))
+        fields = {field: metadata.get(field) for field in FILTER_FIELDS if metadata.get(field) not in (None, "")}
+        fields.update({field: set(_as_list(metadata.get(field))) for field in LIST_FILTER_FIELDS})
+        self._fields.setdefault(tenant_id, {})[doc_id] = fields
+
+    def remove(self, tenant_id: str, doc_id: str) -> None:
+        if tenant_id in self._indexes:
+            self._indexes[tenant_id].remove(doc_id)
+            self._fields[tenant_id].pop(doc_id, None)
+
+    async def search(
+        self,
+        tenant_id: str,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        n_results: int = 20,
+    ) -> List[Tuple[str, float]]:
+        """Fused (doc_id, score) ranking; filter values may be a scalar or a list of accepted values"""
+        started = time.perf_counter()
+        await self._ensure_loaded(tenant_id)
+
+        allowed = self._matching_ids(tenant_id, filters or {})
+        if not allowed:
+            return []
+        depth = n_results * CANDIDATE_MULTIPLIER
+
+        keyword = [doc_id for doc_id, _ in self._indexes[tenant_id].search(query, depth, allowed)]
+        vector = await self._vector_search(tenant_id, query, allowed, filters or {}, depth)
+        fused = reciprocal_rank_fusion([keyword, vector])[:n_results]
+
+        self._stats["searches"] += 1
+        self._stats["last_search_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return fused
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "tenants": len(self._indexes),
+            "documents": sum(len(index) for index in self._indexes.values()),
+        }
+
+    def _matching_ids(self, tenant_id: str, filters: Dict[str, Any]) -> Set[str]:
+        docs = self._fields.get(tenant_id, {})
+        if not filters:
+            return set(docs)
+
+        allowed = set()
+        for doc_id, fields in docs.items():
+            for field, wanted in filters.items():
+                wanted = set(wanted) if isinstance(wanted, (list, tuple, set)) else {wanted}
+                if field in LIST_FILTER_FIELDS:
+                    if not fields.get(field, set()) & wanted:
+                        break
+                elif fields.get(field) not in wanted:
+                    break
+            else:
+                allowed.add(doc_id)
+        return allowed
+
+    async def _vector_search(self, tenant_id: str, query: str, allowed: Set[str], filters: Dict[str, Any], depth: int) -> List[str]:
+        collection = self._resolve()
+        if collection is None:
+            return []
+        try:
+            embedding = await self._embed(query)
+            if len(allowed) < len(self._fields.get(tenant_id, {})):
+                # Filters already resolved to ids: rank only those
+                scope = {"ids": list(allowed)}
+            else:
+                scope = {"where": {"tenant_id": tenant_id}}
+            results = await self._run(
+                collection.query,
+                query_embeddings=[embedding],
+                n_results=min(depth, len(allowed)),
+                include=["distances"],
+                **scope
+            )
+        except Exception as e:
+            # Keyword ranking alone still answers the query
+            self._stats["vector_failures"] += 1
+            logger.warning(f"Vector side of hybrid search failed: {e}")
+            return []
+        return [doc_id for doc_id in (results.get("ids") or [[]])[0] if doc_id in allowed]
+
+    def _fresh(self, tenant_id: str) -> bool:
+        loaded_at = self._loaded.get(tenant_id)
+        return loaded_at is not None and self._clock() - loaded_at < INDEX_REFRESH_SECONDS
+
+    async def _ensure_loaded(self, tenant_id: str) -> None:
+        if self._fresh(tenant_id):
+            return
+        lock = self._load_locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            if self._fresh(tenant_id):
+                return
+            collection = self._resolve()
+            if collection is not None:
+                if tenant_id in self._loaded:
+                    await self._load_new(tenant_id, collection)
+                else:
+                    await self._load_all(tenant_id, collection)
+            self._indexes.setdefault(tenant_id, BM25Index())
+            self._fields.setdefault(tenant_id, {})
+            self._loaded[tenant_id] = self._clock()
+
+    async def _load_all(self, tenant_id: str, collection) -> None:
+        offset = 0
+        while True:
+            page = await self._run(
+                collection.get,
+                where={"tenant_id": tenant_id},
+                include=["documents", "metadatas"],
+                limit=_LOAD_PAGE,
+                offset=offset
+            )
+            self._add_page(tenant_id, page)
+            if len(page["ids"]) < _LOAD_PAGE:
+                break
+            offset += len(page["ids"])
+        logger.info(f"Hybrid search index loaded for {tenant_id}: {len(self._indexes.get(tenant_id, ()))} documents")
+
+    async def _load_new(self, tenant_id: str, collection) -> None:
+        """Index documents other workers stored since the last load (ids first, then only the new ones)"""
+        self._stats["refreshes"] += 1
+        known = self._indexes.get(tenant_id, ())
+        new_ids: List[str] = []
+        offset = 0
+        while True:
+            page = await self._run(collection.get, where={"tenant_id": tenant_id}, include=[], limit=_LOAD_PAGE, offset=offset)
+            new_ids.extend(doc_id for doc_id in page["ids"] if doc_id not in known)
+            if len(page["ids"]) < _LOAD_PAGE:
+                break
+            offset += len(page["ids"])
+        for start in range(0, len(new_ids), _LOAD_PAGE):
+            self._add_page(tenant_id, await self._run(
+                collection.get, ids=new_ids[start:start + _LOAD_PAGE], include=["documents", "metadatas"]
+            ))
+        if new_ids:
+            logger.info(f"Hybrid search index for {tenant_id} picked up {len(new_ids)} new documents")
+
+    def _add_page(self, tenant_id: str, page: Dict[str, Any]) -> None:
+        for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            # Documents indexed via add() while loading are newer than what Chroma returned
+            if doc_id not in self._indexes.get(tenant_id, ()):
+                self.add(tenant_id, doc_id, document, metadata or {})
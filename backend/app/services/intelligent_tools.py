@@ -4,6 +4,7 @@ No hardcoded parameters - AI extracts what it needs dynamically
 """
 
 from typing import Dict, Any, List, Optional, Union
+import csv
 import json
 import asyncio
 import logging
@@ -17,10 +18,28 @@ from ..services.openbb_tool_executor import openbb_executor
 from ..services.creation_recorder import creation_recorder
 from ..services.market_data_service import MarketDataService
 from ..services.company_service import CompanyService
-from ..services.portfolio_service import PortfolioService
-from ..services.unified_chroma_service import UnifiedChromaService
+from ..services.portfolio_service import PortfolioService, resolve_import_path
+from ..services.unified_chroma_service import unified_chroma_service
 from ..services.table_formatter import FinancialTableFormatter, format_quotes_table, format_portfolio_table
 from ..services.creation_output_manager import output_manager
+from ..services.tool_catalog import ToolCatalog
+from ..services.llm_metrics import track_tool_call
+
+logger = logging.getLogger(__name__)
+
+# Built once per process by IntelligentToolsService.get_tool_catalog()
+_tool_catalog: Optional[ToolCatalog] = None
+
+
+def _read_import_rows(path: str, format: Optional[str]) -> List[Dict[str, Any]]:
+    """Holding rows from a JSON list or a CSV file with lower-cased headers"""
+    with open(path, "r") as f:
+        if format == "json":
+            return json.load(f)
+        return [
+            {key.strip().lower(): value for key, value in row.items() if key}
+            for row in csv.DictReader(f)
+        ]
 
 
 class ToolResult(BaseModel):
@@ -42,11 +61,44 @@ class IntelligentToolsService:
         self.market_data = MarketDataService()
         self.company_service = CompanyService()
         self.portfolio_service = PortfolioService()
-        self.chroma_service = UnifiedChromaService()
+        self.chroma_service = unified_chroma_service
         self.table_formatter = FinancialTableFormatter()
     
+    @classmethod
+    def get_tool_catalog(cls) -> ToolCatalog:
+        """Get the process-wide precompiled tool catalog, building it on first use"""
+        global _tool_catalog
+        if _tool_catalog is None:
+            custom_tools = cls._custom_tool_definitions()
+            
+            # Add ALL OpenBB tools from the comprehensive registry
+            # Get high-priority OpenBB tools (Critical and High priority)
+            openbb_tools = openbb_registry.get_all_ai_tool_schemas(max_priority=ToolPriority.HIGH)
+            
+            # Index OpenBB category/returns/examples alongside the schema text
+            extra_text = {
+                tool.name: " ".join(filter(None, [tool.category, tool.module_path.replace(".", " "), tool.returns, tool.example_usage]))
+                for tool in openbb_registry.tools.values()
+            }
+            
+            _tool_catalog = ToolCatalog(custom_tools + openbb_tools, extra_text=extra_text)
+            logger.info(
+                f"✅ Registered {len(_tool_catalog)} total AI tools ({len(custom_tools)} custom + {len(openbb_tools)} OpenBB), "
+                f"~{_tool_catalog.total_token_estimate} schema tokens"
+            )
+        return _tool_catalog
+    
     async def get_tool_definitions(self) -> List[Dict[str, Any]]:
         """Get OpenAI function calling definitions for all tools"""
+        return self.get_tool_catalog().all_schemas()
+    
+    def select_tool_definitions(self, query: str, top_k: int = 8, pinned: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get definitions for only the tools most relevant to a query"""
+        return self.get_tool_catalog().select(query, top_k=top_k, pinned=pinned or [])
+    
+    @staticmethod
+    def _custom_tool_definitions() -> List[Dict[str, Any]]:
+        """OpenAI function calling definitions for the custom RedPill tools"""
         
         # Start with custom RedPill tools
         custom_tools = [
@@ -542,22 +594,19 @@ class IntelligentToolsService:
             }
         ]
         
-        # Add ALL OpenBB tools from the comprehensive registry
-        # Get high-priority OpenBB tools (Critical and High priority)
-        openbb_tools = openbb_registry.get_all_ai_tool_schemas(max_priority=ToolPriority.HIGH)
-        
-        # Combine custom RedPill tools with OpenBB tools
-        all_tools = custom_tools + openbb_tools
-        
-        self.logger.info(f"✅ Registered {len(all_tools)} total AI tools ({len(custom_tools)} custom + {len(openbb_tools)} OpenBB)")
-        
-        return all_tools
+        return custom_tools
     
     async def execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> ToolResult:
-        """Execute a tool with given arguments"""
+        """Execute a tool with given arguments, recording its latency"""
+        async with track_tool_call(tool_name, "intelligent_tools") as call:
+            result = await self._dispatch_tool(tool_name, arguments)
+            call.success = result.success
+            return result
+    
+    async def _dispatch_tool(self, tool_name: str, arguments: Dict[str, Any]) -> ToolResult:
+        """Dispatch a tool call to its implementation"""
         try:
             self.logger.info(f"Executing tool: {tool_name} with arguments: {arguments}")
-            print(f"DEBUG: Executing tool: {tool_name} with arguments: {arguments}")
             if tool_name == "search_companies":
                 return await self._search_companies(**arguments)
             elif tool_name == "get_market_data":
@@ -1299,7 +1348,7 @@ This analysis is for informational purposes only and does not constitute investm
         
         try:
             if action == "add" and symbol and amount:
-                result = self.portfolio_service.add_holding(user_id, symbol, amount)
+                result = await self.portfolio_service.add_holding_async(user_id, symbol, amount)
                 return ToolResult(
                     success=result["success"],
                     message=result["message"],
@@ -1307,7 +1356,7 @@ This analysis is for informational purposes only and does not constitute investm
                 )
             
             elif action == "remove" and symbol:
-                result = self.portfolio_service.remove_holding(user_id, symbol, amount)
+                result = await self.portfolio_service.remove_holding_async(user_id, symbol, amount)
                 return ToolResult(
                     success=result["success"],
                     message=result["message"],
@@ -1315,11 +1364,13 @@ This analysis is for informational purposes only and does not constitute investm
                 )
             
             elif action == "import" and file_path:
-                # Import portfolio functionality
+                # Import portfolio functionality: every row applied as one batch
+                rows = await asyncio.to_thread(_read_import_rows, resolve_import_path(file_path), format)
+                result = await self.portfolio_service.import_holdings_async(user_id, rows)
                 return ToolResult(
                     success=True,
-                    message=f"Imported portfolio from {file_path}",
-                    data={"action": action, "file_path": file_path, "format": format}
+                    message=f"Imported {len(result['changed'])} positions from {file_path}",
+                    data={"action": action, "file_path": file_path, "format": format, "result": result}
                 )
             
             else:
@@ -0,0 +1,431 @@
+"""
+Intent Router - Deterministic fast path for common terminal commands
+An Aho-Corasick phrase matcher plus a symbol/company gazetteer resolves high-confidence
+intents and entities without an LLM call; everything else falls through to AI parsing
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+import re
+import threading
+import time
+
+from .market_symbols import CRYPTO_SYMBOLS, STOCK_SYMBOLS, SECTOR_ETFS, INDEX_ETFS
+
+logger = logging.getLogger(__name__)
+
+# Intents resolved at or above this confidence skip the LLM
+FAST_PATH_THRESHOLD = 0.85
+
+# Rebuild the gazetteer periodically so newly added companies are recognized
+GAZETTEER_TTL_SECONDS = 300
+
+# Symbols that are also ordinary English words only match when typed in uppercase
+_AMBIGUOUS_SYMBOLS = frozenset({"dot", "link", "uni", "sol", "ada", "meta", "doge"})
+
+# Uppercase tokens that look like tickers but never are
+_NON_TICKERS = frozenset({
+    "API", "APIS", "CSV", "ETF", "ETFS", "USD", "AI", "CEO", "CFO", "IPO", "VS", "US", "UK",
+    "EU", "PE", "EPS", "GDP", "CPI", "FOMC", "FED", "IT", "OK", "ME", "MY", "TO", "OF",
+    "AND", "OR", "THE", "FOR", "IN", "ON", "VC", "ROI", "YTD", "QOQ", "YOY", "ATH",
+})
+
+_UPPER_TOKEN = re.compile(r"\b[A-Z]{2,5}\b")
+_FILE_PATH = re.compile(r"(~?/[^\s]+)")
+
+_SECTORS = {
+    "technology": "Technology", "tech": "Technology",
+    "healthcare": "Healthcare", "health": "Healthcare",
+    "financial": "Financial", "finance": "Financial", "financials": "Financial",
+    "energy": "Energy",
+    "consumer discretionary": "Consumer Discretionary",
+    "consumer staples": "Consumer Staples",
+    "industrial": "Industrial", "industrials": "Industrial",
+    "materials": "Materials",
+    "utilities": "Utilities",
+    "real estate": "Real Estate",
+    "communication": "Communication", "communications": "Communication",
+}
+
+# Cue phrases -> cue names (a phrase may signal several cues)
+_CUES: Dict[str, Tuple[str, ...]] = {
+    "market overview": ("market",), "market indices": ("market",), "show market": ("market",),
+    "market summary": ("market",), "market status": ("market",), "global market": ("market",),
+    "markets today": ("market",),
+    "economic calendar": ("calendar",), "economic events": ("calendar",),
+    "upcoming events": ("calendar",), "fomc meeting": ("calendar",), "cpi release": ("calendar",),
+    "start backend": ("start_backend",), "start the backend": ("start_backend",),
+    "api keys": ("api_keys",), "api key": ("api_keys",), "check api": ("api_keys",),
+    "api status": ("api_keys",),
+    "import": ("import",),
+    "portfolio": ("portfolio",),
+    "news": ("news",), "headlines": ("news",),
+    "etf": ("etf",), "holdings": ("etf",), "breakdown": ("etf", "sector"),
+    "sector": ("sector",), "sectors": ("sector", "etf"),
+    "correlation": ("correlation",), "correlated": ("correlation",), "correlate": ("correlation",),
+    "vs": ("versus",), "versus": ("versus",),
+    "compare": ("compare",), "comparison": ("compare",),
+    "income statement": ("fundamentals",), "balance sheet": ("fundamentals",),
+    "cash flow": ("fundamentals",), "fundamentals": ("fundamentals",),
+    "financials": ("fundamentals",), "ratios": ("fundamentals",),
+    "price": ("quote",), "prices": ("quote",), "quote": ("quote",), "quotes": ("quote",),
+    "chart": ("quote",), "trading at": ("quote",),
+    # Action verbs that signal writes (investments, deals) - always left to the LLM
+    "add": ("action",), "buy": ("action",), "sell": ("action",), "invest": ("action",),
+    "invested": ("action",), "remove": ("action",), "track": ("action",), "create": ("action",),
+}
+
+_EXACT_COMMANDS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "help": ("system_control", {"action": "help"}),
+    "?": ("system_control", {"action": "help"}),
+    "commands": ("system_control", {"action": "help"}),
+    "what can you do": ("system_control", {"action": "help"}),
+    "companies": ("company_analysis", {}),
+    "company list": ("company_analysis", {}),
+    "list companies": ("company_analysis", {}),
+    "list all companies": ("company_analysis", {}),
+    "portfolio": ("portfolio_overview", {}),
+}
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over lowercase phrases with whole-word matching"""
+
+    def __init__(self, phrases: Dict[str, Iterable[Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+
+        for phrase, payloads in phrases.items():
+            state = 0
+            for char in phrase:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].extend((len(phrase), payload) for payload in payloads)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, Any]]:
+        """All whole-word matches as (start, end, payload), in order of end position"""
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payload in self._out[state]:
+                start = i + 1 - length
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == len(text) or not text[i + 1].isalnum()):
+                    matches.append((start, i + 1, payload))
+        return matches
+
+
+@dataclass(frozen=True)
+class GazetteerEntry:
+    """A recognized instrument or company"""
+    symbol: Optional[str]
+    kind: str               # crypto | stock | etf | company | sector
+    name: str
+    case_sensitive: bool = False
+
+
+def build_gazetteer(
+    crypto_symbols: Dict[str, str] = CRYPTO_SYMBOLS,
+    stock_symbols: Dict[str, str] = STOCK_SYMBOLS,
+    companies: Iterable[Tuple[str, Optional[str]]] = (),
+) -> Dict[str, GazetteerEntry]:
+    """Alias (lowercase) -> entry. Later sources win, so curated symbol maps override DB names."""
+    gazetteer: Dict[str, GazetteerEntry] = {}
+
+    for name, token_symbol in companies:
+        alias = (name or "").strip().lower()
+        if len(alias) < 3:
+            continue
+        if token_symbol:
+            gazetteer[alias] = GazetteerEntry(token_symbol.upper(), "crypto", name)
+        else:
+            gazetteer[alias] = GazetteerEntry(None, "company", name)
+
+    for etf, label in {**INDEX_ETFS, **SECTOR_ETFS}.items():
+        gazetteer[etf.lower()] = GazetteerEntry(etf, "etf", label, case_sensitive=True)
+
+    for alias, symbol in stock_symbols.items():
+        gazetteer[alias] = GazetteerEntry(symbol, "stock", alias.title(), alias in _AMBIGUOUS_SYMBOLS)
+        gazetteer.setdefault(symbol.lower(), GazetteerEntry(symbol, "stock", alias.title()))
+
+    for alias, symbol in crypto_symbols.items():
+        ambiguous = alias in _AMBIGUOUS_SYMBOLS
+        gazetteer[alias] = GazetteerEntry(symbol, "crypto", alias.title(), ambiguous)
+
+    for alias, sector in _SECTORS.items():
+        gazetteer.setdefault(alias, GazetteerEntry(None, "sector", sector))
+
+    return gazetteer
+
+
+@dataclass
+class FastPathResult:
+    """A deterministic intent classification"""
+    intent: Dict[str, Any]
+    confidence: float
+    cues: List[str] = field(default_factory=list)
+
+    @property
+    def intent_name(self) -> str:
+        return self.intent["intent"]
+
+
+class IntentRouter:
+    """
+    Compiled fast-path classifier for terminal commands.
+    Produces intents in the same schema as the LLM parser so results feed the router table directly.
+    """
+
+    def __init__(self, gazetteer: Optional[Dict[str, GazetteerEntry]] = None,
+                 threshold: float = FAST_PATH_THRESHOLD, log_every: int = 100):
+        self.gazetteer = gazetteer if gazetteer is not None else build_gazetteer()
+        self.threshold = threshold
+        self.log_every = log_every
+        self.built_at = time.monotonic()
+
+        phrases: Dict[str, List[Any]] = {}
+        for phrase, cues in _CUES.items():
+            phrases.setdefault(phrase, []).extend(("cue", cue) for cue in cues)
+        for alias, entry in self.gazetteer.items():
+            phrases.setdefault(alias, []).append(("entity", entry))
+        self._matcher = PhraseMatcher(phrases)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._by_intent: Dict[str, int] = {}
+        self._recent_misses: deque = deque(maxlen=50)
+
+    def classify(self, command: str) -> Optional[FastPathResult]:
+        """Best deterministic classification, or None when nothing matched"""
+        lower = command.lower().strip()
+        normalized = lower.rstrip(" ?!.") or lower
+
+        if normalized in _EXACT_COMMANDS:
+            name, entities = _EXACT_COMMANDS[normalized]
+            return FastPathResult({"intent": name, "entities": dict(entities), "confidence": 0.97}, 0.97, ["exact"])
+
+        cues, entities = self._scan(command, lower)
+        candidates = self._candidates(command, cues, entities)
+        if not candidates:
+            return None
+
+        candidates.sort(key=lambda c: -c.confidence)
+        best = candidates[0]
+        runner_up = next((c for c in candidates[1:] if c.intent_name != best.intent_name), None)
+        if runner_up is not None and best.confidence - runner_up.confidence < 0.05:
+            best.confidence -= 0.1
+        if "action" in cues:
+            best.confidence -= 0.2
+
+        best.confidence = round(max(0.0, best.confidence), 2)
+        best.intent["confidence"] = best.confidence
+        best.cues = sorted(cues)
+        return best
+
+    def route(self, command: str) -> Optional[FastPathResult]:
+        """Classify and record a hit only when confident enough to skip the LLM"""
+        result = self.classify(command)
+        hit = result is not None and result.confidence >= self.threshold
+
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._by_intent[result.intent_name] = self._by_intent.get(result.intent_name, 0) + 1
+            else:
+                self._misses += 1
+                self._recent_misses.append(command[:120])
+            total = self._hits + self._misses
+            should_log = self.log_every and total % self.log_every == 0
+
+        if not hit:
+            logger.debug(f"Fast-path miss ({result.intent_name if result else 'no match'} "
+                         f"@ {result.confidence if result else 0.0}): {command[:120]}")
+        if should_log:
+            logger.info(f"Fast-path intent router hit rate {self.hit_rate:.1%} over {total} commands")
+        return result if hit else None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self.hit_rate, 4),
+                "threshold": self.threshold,
+                "by_intent": dict(sorted(self._by_intent.items(), key=lambda item: -item[1])),
+                "recent_misses": list(self._recent_misses),
+                "gazetteer_size": len(self.gazetteer),
+            }
+
+    def _scan(self, command: str, lower: str) -> Tuple[set, Dict[str, List[Any]]]:
+        cues = set()
+        spans = []
+        for start, end, (kind, payload) in self._matcher.find(lower):
+            if kind == "cue":
+                cues.add(payload)
+            elif not payload.case_sensitive or command[start:end].isupper():
+                spans.append((start, end, payload))
+
+        # Longest non-overlapping entity spans win ("bitcoin cash" over "bitcoin")
+        spans.sort(key=lambda s: (s[0], -(s[1] - s[0])))
+        entries: List[GazetteerEntry] = []
+        last_end = -1
+        for start, end, entry in spans:
+            if start >= last_end:
+                entries.append(entry)
+                last_end = end
+
+        entities: Dict[str, List[Any]] = {"tickers": [], "companies": [], "kinds": [], "sectors": []}
+        for entry in entries:
+            if entry.kind == "sector":
+                entities["sectors"].append(entry.name)
+                continue
+            if entry.kind in ("stock", "company") and entry.name.lower() != (entry.symbol or "").lower():
+                if entry.name not in entities["companies"]:
+                    entities["companies"].append(entry.name)
+            if entry.symbol and entry.symbol not in entities["tickers"]:
+                entities["tickers"].append(entry.symbol)
+                entities["kinds"].append(entry.kind)
+            elif not entry.symbol:
+                entities["kinds"].append(entry.kind)
+
+        # Uppercase tokens we do not know yet are probably tickers, but lower confidence
+        if not command.isupper():
+            for token in _UPPER_TOKEN.findall(command):
+                if token not in _NON_TICKERS and token not in entities["tickers"]:
+                    entities["tickers"].append(token)
+                    entities["kinds"].append("unknown")
+        return cues, entities
+
+    def _candidates(self, command: str, cues: set, entities: Dict[str, List[Any]]) -> List[FastPathResult]:
+        tickers = entities["tickers"]
+        kinds = [k for k in entities["kinds"] if k != "company"]
+        companies = entities["companies"]
+        unknown_penalty = 0.05 if "unknown" in kinds else 0.0
+        candidates: List[FastPathResult] = []
+
+        def add(intent: str, confidence: float, **found):
+            candidates.append(FastPathResult({"intent": intent, "entities": found}, confidence))
+
+        if "start_backend" in cues:
+            add("system_control", 0.95, action="start")
+        if "api_keys" in cues:
+            add("system_control", 0.92, action="check_api")
+        if "market" in cues:
+            add("monitor_dashboard", 0.92 if not tickers else 0.8)
+        if "calendar" in cues:
+            add("economic_calendar", 0.9, country=["US"])
+
+        if "import" in cues:
+            path = _FILE_PATH.search(command)
+            portfolio_type = "crypto" if "crypto" in command.lower() else "general"
+            add("import_portfolio", 0.93 if path else 0.6,
+                file_path=path.group(1) if path else None, portfolio_type=portfolio_type, action="import")
+        elif "portfolio" in cues:
+            add("portfolio_overview", 0.9 if not tickers else 0.7)
+
+        if "correlation" in cues or ("versus" in cues and "compare" not in cues and "quote" not in cues):
+            base = 0.93 if "correlation" in cues else 0.88
+            if len(tickers) >= 2:
+                add("correlation_analysis", base - unknown_penalty, asset1=tickers[0], asset2=tickers[1],
+                    period=self._period(command), tickers=tickers[:2])
+            else:
+                add("correlation_analysis", 0.6, asset1=None, asset2=None, period=self._period(command), tickers=tickers)
+
+        if "compare" in cues and len(tickers) >= 2:
+            intent = "chart_token_compare" if all(k == "crypto" for k in kinds) else "chart_company"
+            add(intent, 0.9 - unknown_penalty, tickers=tickers, companies=companies, action="compare")
+
+        if "fundamentals" in cues and tickers:
+            add("chart_company", 0.92 - unknown_penalty, tickers=tickers, companies=companies, action="fundamentals")
+
+        if "news" in cues:
+            add("news_analysis", (0.9 - unknown_penalty) if (tickers or companies) else 0.7,
+                tickers=tickers, companies=companies, action="news")
+
+        etf_tickers = [t for t, k in zip(tickers, kinds) if k == "etf"]
+        if "etf" in cues and etf_tickers:
+            add("etf_analysis", 0.9, tickers=etf_tickers)
+        elif "sector" in cues and not etf_tickers:
+            add("sector_analysis", 0.9 if entities["sectors"] else 0.86,
+                sector=entities["sectors"][0] if entities["sectors"] else None)
+
+        if "quote" in cues and tickers:
+            if all(k == "crypto" for k in kinds):
+                add("chart_token_compare", 0.9, tickers=tickers)
+            elif all(k in ("stock", "etf", "unknown") for k in kinds):
+                add("chart_company", 0.9 - unknown_penalty, tickers=tickers, companies=companies,
+                    query=f"stock price for {' '.join(companies + tickers)}")
+            else:
+                add("chart_company", 0.7, tickers=tickers, companies=companies)
+
+        return candidates
+
+    @staticmethod
+    def _period(command: str) -> str:
+        match = re.search(r"(\d+)\s*[-\s]?(d|day|days|w|week|weeks|m|month|months)\b", command.lower())
+        if not match:
+            return "90d"
+        return f"{match.group(1)}{match.group(2)[0]}"
+
+
+_intent_router: Optional[IntentRouter] = None
+_intent_router_lock = threading.Lock()
+
+
+def get_intent_router(session=None) -> IntentRouter:
+    """Shared router; the gazetteer (including Company table names) is rebuilt after GAZETTEER_TTL_SECONDS"""
+    global _intent_router
+    router = _intent_router
+    if router is not None and time.monotonic() - router.built_at < GAZETTEER_TTL_SECONDS:
+        return router
+
+    with _intent_router_lock:
+        if _intent_router is None or time.monotonic() - _intent_router.built_at >= GAZETTEER_TTL_SECONDS:
+            rebuilt = IntentRouter(build_gazetteer(companies=_load_companies(session)))
+            if _intent_router is not None:
+                # Keep hit-rate counters across gazetteer refreshes
+                rebuilt._hits, rebuilt._misses = _intent_router._hits, _intent_router._misses
+                rebuilt._by_intent = _intent_router._by_intent
+                rebuilt._recent_misses = _intent_router._recent_misses
+            _intent_router = rebuilt
+        return _intent_router
+
+
+def _load_companies(session) -> List[Tuple[str, Optional[str]]]:
+    if session is None:
+        return []
+    try:
+        from sqlmodel import select
+        from ..models.companies import Company
+        return [(name, token) for name, token in session.exec(select(Company.name, Company.token_symbol)).all()]
+    except Exception as e:
+        logger.warning(f"Could not load companies for intent gazetteer: {e}")
+        return []
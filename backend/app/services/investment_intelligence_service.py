@@ -11,6 +11,8 @@ from dataclasses import dataclass
 import asyncio
 
 from .unified_chroma_service import UnifiedChromaService, SourceType, ChromaDocument
+from .portfolio_context_store import portfolio_context_store
+from .portfolio_service import portfolio_service
 
 logger = logging.getLogger(__name__)
 
@@ -64,38 +66,13 @@ class InvestmentIntelligenceService:
                 "sector_allocation": {}
             }
             
-            # Get portfolio holdings
-            portfolio_results = await self.chroma.semantic_search(
-                collection_name="portfolio_memory",
-                query="current holdings positions",
-                filters={"action_type": {"$in": ["buy", "hold"]}},
-                tenant_id=tenant_id,
-                n_results=50
-            )
-            
-            # Extract unique symbols
-            symbols = set()
-            for result in portfolio_results:
-                if result.get("metadata", {}).get("ticker"):
-                    symbols.add(result["metadata"]["ticker"])
-                    context["holdings"].append({
-                        "symbol": result["metadata"]["ticker"],
-                        "action": result["metadata"].get("action_type"),
-                        "date": result["metadata"].get("date")
-                    })
-            
-            # Get watchlist
-            watchlist_results = await self.chroma.semantic_search(
-                collection_name="portfolio_memory",
-                query="watching tracking monitoring",
-                filters={"action_type": {"$eq": "watch"}},
-                tenant_id=tenant_id,
-                n_results=30
-            )
-            
-            for result in watchlist_results:
-                if result.get("metadata", {}).get("ticker"):
-                    context["watchlist"].append(result["metadata"]["ticker"])
+            # Holdings and watchlist come from the materialized portfolio state
+            portfolio = await portfolio_context_store.get(tenant_id)
+            context["holdings"] = [
+                {"symbol": h["symbol"], "action": "hold" if h.get("amount") else "buy", "date": h.get("date")}
+                for h in portfolio["holdings"]
+            ]
+            context["watchlist"] = [w["symbol"] for w in portfolio["watchlist"]]
             
             # Get recent research
             research_results = await self.chroma.semantic_search(
@@ -429,6 +406,7 @@ class InvestmentIntelligenceService:
             portfolio_actions = await self.chroma.semantic_search(
                 collection_name="portfolio_memory",
                 query="buy sell trade add remove",
+                filters={"date": {"$gte": lookback_date}},
                 tenant_id=tenant_id,
                 n_results=50
             )
@@ -505,12 +483,18 @@ class InvestmentIntelligenceService:
             # Get proactive insights
             insights = await self.generate_proactive_insights(tenant_id)
             
+            # Live valuation (all holdings priced in one batched round)
+            valuation = await portfolio_service.get_valued_summary(tenant_id)
+            
             summary = {
                 "overview": {
                     "total_holdings": len(context.get("holdings", [])),
                     "watchlist_size": len(context.get("watchlist", [])),
                     "investment_themes": context.get("investment_themes", []),
-                    "sector_allocation": context.get("sector_allocation", {})
+                    "sector_allocation": context.get("sector_allocation", {}),
+                    "valuation": valuation.get("totals", {}),
+                    "sector_exposure": valuation.get("sector_exposure", {}),
+                    "top_positions": valuation.get("positions", [])[:5]
                 },
                 "recent_activity": {
                     "patterns": patterns,
@@ -543,6 +527,15 @@ class InvestmentIntelligenceService:
                         "rationale": f"High concentration with {context['sector_allocation'][top_sector]} holdings"
                     })
             
+            exposure = valuation.get("sector_exposure") or {}
+            if exposure:
+                top_sector = max(exposure, key=exposure.get)
+                if exposure[top_sector] > 0.4:  # Over 40% of market value in one sector
+                    summary["recommendations"].append({
+                        "action": f"Rebalance away from {top_sector}",
+                        "rationale": f"{top_sector} is {exposure[top_sector]:.0%} of portfolio market value"
+                    })
+            
             return summary
             
         except Exception as e:
@@ -0,0 +1,248 @@
+"""
+KPI Store - Reported portfolio company KPIs as a narrow time series
+Companies report (company, metric, period, value) rows, ingested in bulk from CSV or
+JSON with one upsert per chunk. Reads fetch a period range for every company in one
+query and pivot it into a (company, period) x metric frame, so growth rates, ratios,
+runway and cohort rollups are computed column-wise across the whole portfolio.
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Union
+from datetime import datetime, date
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select, col
+
+from ..models.companies import Company
+from ..models.deals import Deal
+from ..models.portfolio_kpis import PortfolioKPI
+from ..utils.frames import records
+
+logger = logging.getLogger(__name__)
+
+KPI_METRICS = (
+    "mrr", "arr", "revenue", "gross_margin", "ltv", "cac", "burn",
+    "cash_balance", "headcount", "churn_rate", "net_rev_retention",
+)
+
+# Growth is measured against the company's previous reported period
+GROWTH_METRICS = ("mrr", "arr", "revenue")
+
+# Summed across a cohort in rollups (growth and ratios use the median instead)
+ROLLUP_TOTALS = ("mrr", "arr", "revenue", "burn", "cash_balance", "headcount")
+
+COHORTS = ("sector", "vintage", "founded")
+
+# Runway reported for companies that are not burning cash
+NO_BURN_RUNWAY_MONTHS = 999
+
+UPSERT_CHUNK = 1000
+
+_ID_COLUMNS = {"company_id", "company", "period", "source"}
+
+
+def _long_frame(records: Union[pd.DataFrame, Iterable[Dict[str, Any]]]) -> pd.DataFrame:
+    """
+    (company_id, company, metric, period, value) rows from long records
+    ({"company_id", "metric", "period", "value"}) or wide ones ({"company_id", "period", "mrr", ...}).
+    Companies may be given by id or by name; rows without a valid period or value are dropped.
+    """
+    frame = records.copy() if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+    if frame.empty:
+        return pd.DataFrame(columns=["company_id", "company", "metric", "period", "value"])
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    for column in ("company_id", "company"):
+        if column not in frame:
+            frame[column] = None
+
+    if "metric" not in frame:
+        metrics = [column for column in frame.columns if column not in _ID_COLUMNS]
+        frame = frame.melt(id_vars=["company_id", "company", "period"], value_vars=metrics, var_name="metric")
+
+    frame = frame[["company_id", "company", "metric", "period", "value"]].copy()
+    frame["metric"] = frame["metric"].astype(str).str.strip().str.lower()
+    frame["period"] = pd.to_datetime(frame["period"], errors="coerce").dt.date
+    frame["value"] = pd.to_numeric(frame["value"], errors="coerce")
+    return frame.dropna(subset=["period", "value"])
+
+
+def _upsert_statement(dialect: str):
+    insert = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}.get(dialect)
+    if insert is None:
+        raise ValueError(f"KPI upserts are not supported on {dialect}")
+    statement = insert(PortfolioKPI.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=["company_id", "metric", "period"],
+        set_={
+            "value": statement.excluded.value,
+            "source": statement.excluded.source,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def derive_metrics(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Growth, LTV:CAC and runway for every row at once. Growth uses `prev_<metric>`
+    columns when present, otherwise the previous row of the same company (rows are
+    expected in (company_id, period) order).
+    """
+    frame = frame.copy()
+    for metric in GROWTH_METRICS:
+        if metric not in frame:
+            continue
+        prev_column = f"prev_{metric}"
+        if prev_column not in frame:
+            frame[prev_column] = frame.groupby(level="company_id")[metric].shift(1)
+        previous = frame[prev_column].where(frame[prev_column] > 0)
+        frame[f"{metric}_growth"] = (frame[metric] - previous) / previous
+
+    if "ltv" in frame and "cac" in frame:
+        frame["ltv_cac_ratio"] = frame["ltv"] / frame["cac"].where(frame["cac"] > 0)
+    if "cash_balance" in frame and "burn" in frame:
+        burning = frame["burn"] > 0
+        frame["runway_months"] = np.where(
+            burning, frame["cash_balance"] / frame["burn"].where(burning), NO_BURN_RUNWAY_MONTHS
+        )
+        frame.loc[frame["cash_balance"].isna() | frame["burn"].isna(), "runway_months"] = np.nan
+    return frame
+
+
+class KPIStore:
+    """Bulk ingest and vectorized reads over portfolio_kpis"""
+
+    # ---- ingest ----
+
+    def ingest(self, session: Session, rows: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+               source: str = "json") -> Dict[str, Any]:
+        """Upsert KPI records (long or wide) in chunks; returns counts and unresolved companies"""
+        frame = _long_frame(rows)
+        submitted = len(frame)
+
+        # Resolve company ids and names in one query
+        ids = set(frame["company_id"].dropna().astype(str))
+        names = set(frame["company"].dropna().astype(str))
+        known = session.exec(
+            select(Company.id, Company.name).where(or_(col(Company.id).in_(ids), col(Company.name).in_(names)))
+        ).all() if ids or names else []
+        id_by_name = {name: company_id for company_id, name in known}
+        known_ids = {company_id for company_id, _ in known}
+
+        resolved = [
+            company_id if isinstance(company_id, str) and company_id in known_ids else id_by_name.get(company)
+            for company_id, company in zip(frame["company_id"], frame["company"])
+        ]
+        unknown = sorted({
+            str(company if isinstance(company, str) else company_id)
+            for company_id, company, resolved_id in zip(frame["company_id"], frame["company"], resolved)
+            if resolved_id is None
+        })
+        frame["company_id"] = resolved
+        frame = frame.dropna(subset=["company_id"])
+        frame = frame.drop_duplicates(subset=["company_id", "metric", "period"], keep="last")
+
+        now = datetime.utcnow()
+        values = [
+            {"company_id": company_id, "metric": metric, "period": period, "value": float(value),
+             "source": source, "updated_at": now}
+            for company_id, metric, period, value in
+            zip(frame["company_id"], frame["metric"], frame["period"], frame["value"])
+        ]
+        statement = _upsert_statement(session.get_bind().dialect.name)
+        for start in range(0, len(values), UPSERT_CHUNK):
+            session.exec(statement, params=values[start:start + UPSERT_CHUNK])
+        session.commit()
+
+        logger.info(f"Ingested {len(values)} KPI values for {frame['company_id'].nunique()} companies from {source}")
+        return {
+            "rows": len(values),
+            "skipped": submitted - len(values),
+            "companies": int(frame["company_id"].nunique()),
+            "metrics": sorted(frame["metric"].unique().tolist()),
+            "unknown_companies": unknown,
+        }
+
+    def ingest_csv(self, session: Session, text: str, source: str = "csv") -> Dict[str, Any]:
+        """Ingest a CSV export (long or wide layout, one header row)"""
+        return self.ingest(session, pd.read_csv(io.StringIO(text), dtype={"company_id": str, "company": str}), source)
+
+    # ---- reads ----
+
+    def frame(self, session: Session, metrics: Optional[List[str]] = None, start: Optional[date] = None,
+              end: Optional[date] = None, company_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """(company_id, period) x metric values for a period range, from one query"""
+        query = select(PortfolioKPI.company_id, PortfolioKPI.period, PortfolioKPI.metric, PortfolioKPI.value)
+        if metrics:
+            query = query.where(col(PortfolioKPI.metric).in_(metrics))
+        if start:
+            query = query.where(PortfolioKPI.period >= start)
+        if end:
+            query = query.where(PortfolioKPI.period <= end)
+        if company_ids:
+            query = query.where(col(PortfolioKPI.company_id).in_(company_ids))
+
+        long = pd.DataFrame(session.exec(query).all(), columns=["company_id", "period", "metric", "value"])
+        if long.empty:
+            return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=["company_id", "period"]))
+        wide = long.pivot(index=["company_id", "period"], columns="metric", values="value").sort_index()
+        wide.columns.name = None
+        return wide
+
+    def series(self, session: Session, metrics: Optional[List[str]] = None, start: Optional[date] = None,
+               end: Optional[date] = None, company_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        KPI series with derived metrics for every company and period. Earlier periods are
+        read too, so growth at the first period in range is against the prior report.
+        """
+        series = derive_metrics(self.frame(session, metrics, None, end, company_ids))
+        if start and not series.empty:
+            series = series[series.index.get_level_values("period") >= start]
+        return series
+
+    def latest(self, session: Session, end: Optional[date] = None) -> pd.DataFrame:
+        """Each company's latest reported period (with previous-period values), indexed by company_id"""
+        series = self.series(session, end=end)
+        if series.empty:
+            return pd.DataFrame(index=pd.Index([], name="company_id"))
+        return series.groupby(level="company_id").tail(1).reset_index(level="period")
+
+    def cohorts(self, session: Session, by: str = "sector", start: Optional[date] = None,
+                end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Per-cohort, per-period rollups: totals of size metrics and medians of growth and
+        ratios. Cohorts are sector, vintage (year of the first deal) or founding year.
+        """
+        if by not in COHORTS:
+            raise ValueError(f"Unknown cohort {by}; expected one of {', '.join(COHORTS)}")
+        series = self.series(session, start=start, end=end)
+        if series.empty:
+            return []
+
+        company_ids = series.index.get_level_values("company_id").unique().tolist()
+        if by == "vintage":
+            query = select(Deal.company_id, func.min(Deal.created_at)).where(col(Deal.company_id).in_(company_ids)).group_by(Deal.company_id)
+            labels = {company_id: first.year for company_id, first in session.exec(query).all() if first}
+        else:
+            column = Company.sector if by == "sector" else Company.founded_year
+            labels = dict(session.exec(select(Company.id, column).where(col(Company.id).in_(company_ids))).all())
+
+        frame = series.reset_index()
+        frame["cohort"] = frame["company_id"].map(labels).fillna("Unknown").astype(str)
+        aggregations = {"companies": ("company_id", "nunique")}
+        aggregations.update({f"total_{metric}": (metric, "sum") for metric in ROLLUP_TOTALS if metric in frame})
+        aggregations.update({
+            f"median_{column}": (column, "median")
+            for column in [f"{metric}_growth" for metric in GROWTH_METRICS] + ["ltv_cac_ratio", "runway_months"]
+            if column in frame
+        })
+        rollup = frame.groupby(["cohort", "period"]).agg(**aggregations)
+        return records(rollup)
+
+
+# Global instance
+kpi_store = KPIStore()
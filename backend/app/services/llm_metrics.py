@@ -0,0 +1,391 @@
+"""
+LLM Metrics - Per-call instrumentation for model and tool calls
+Tracks tokens, time-to-first-token, latency, retries and cost per caller/model/intent,
+aggregates them into histograms and writes each model call to ApiUsageLog.
+"""
+
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
+from dataclasses import dataclass, field, asdict
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (prompt, completion); unknown models fall back to "default"
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "phala/gpt-oss-120b": (0.10, 0.50),
+    "default": (1.00, 3.00),
+}
+
+# Latency histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 30000, 60000, 120000)
+
+# Transient model call failures are retried this many times, backing off exponentially
+LLM_MAX_RETRIES = 2
+LLM_RETRY_BACKOFF_SECONDS = 0.5
+
+# Per-request attribution scope for calls made further down the stack
+_current_scope: ContextVar[Optional["LLMRequestScope"]] = ContextVar("llm_request_scope", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of a call from the pricing table"""
+    prompt_price, completion_price = MODEL_PRICING.get(model, MODEL_PRICING["default"])
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class Histogram:
+    """Fixed-bucket histogram with count/sum and bucket-interpolated percentiles"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 2),
+            "avg": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50": round(self.percentile(0.50), 2),
+            "p95": round(self.percentile(0.95), 2),
+            "p99": round(self.percentile(0.99), 2),
+            "max": round(self.max, 2),
+            "buckets": {
+                **{f"le_{bound}": self.counts[i] for i, bound in enumerate(self.buckets)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+@dataclass
+class LLMCallRecord:
+    """One model call; call sites fill in usage before the tracking block exits"""
+    caller: str
+    model: str
+    intent: Optional[str] = None
+    user_id: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    time_to_first_token_ms: Optional[float] = None
+    latency_ms: float = 0.0
+    retries: int = 0
+    cost_estimate: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic, repr=False)
+
+    def mark_first_token(self):
+        """Call from streaming call sites when the first chunk arrives"""
+        if self.time_to_first_token_ms is None:
+            self.time_to_first_token_ms = (time.monotonic() - self.started_at) * 1000
+
+    def set_usage(self, usage: Any):
+        """Copy token counts from an OpenAI SDK usage object or a raw usage dict"""
+        if usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda key, default=None: getattr(usage, key, default)
+        self.prompt_tokens = get("prompt_tokens", 0) or 0
+        self.completion_tokens = get("completion_tokens", 0) or 0
+        details = get("prompt_tokens_details", None)
+        if details is not None:
+            cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+            self.cached_prompt_tokens = cached or 0
+
+
+@dataclass
+class ToolCallRecord:
+    """One tool execution"""
+    tool: str
+    caller: str
+    intent: Optional[str] = None
+    latency_ms: float = 0.0
+    success: bool = True
+
+
+class _Aggregate:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.cost = 0.0
+        self.latency = Histogram()
+        self.ttft = Histogram()
+
+    def add(self, record: LLMCallRecord):
+        self.calls += 1
+        self.errors += 0 if record.success else 1
+        self.retries += record.retries
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cached_prompt_tokens += record.cached_prompt_tokens
+        self.cost += record.cost_estimate
+        self.latency.observe(record.latency_ms)
+        if record.time_to_first_token_ms is not None:
+            self.ttft.observe(record.time_to_first_token_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "cost_estimate_usd": round(self.cost, 6),
+            "latency_ms": self.latency.to_dict(),
+            "time_to_first_token_ms": self.ttft.to_dict(),
+        }
+
+
+class LLMMetrics:
+    """
+    Thread-safe aggregation of model and tool calls, grouped by caller, model and intent.
+    Each model call is also persisted to ApiUsageLog in a worker thread (best effort).
+    """
+
+    def __init__(self, persist: bool = True):
+        self.persist = persist
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._by_caller: Dict[str, _Aggregate] = defaultdict(_Aggregate)
+            self._by_model: Dict[str, _Aggregate] = defaultdict(_Aggregate)
+            self._by_intent: Dict[str, _Aggregate] = defaultdict(_Aggregate)
+            self._tools: Dict[str, Histogram] = defaultdict(Histogram)
+            self._tool_errors: Dict[str, int] = defaultdict(int)
+            self._tools_by_intent: Dict[str, Histogram] = defaultdict(Histogram)
+            self._started = datetime.utcnow()
+
+    def record_llm_call(self, record: LLMCallRecord):
+        with self._lock:
+            self._by_caller[record.caller].add(record)
+            self._by_model[record.model].add(record)
+            self._by_intent[record.intent or "unattributed"].add(record)
+        if self.persist:
+            self._persist_async(record)
+
+    def record_tool_call(self, record: ToolCallRecord):
+        with self._lock:
+            self._tools[record.tool].observe(record.latency_ms)
+            self._tools_by_intent[record.intent or "unattributed"].observe(record.latency_ms)
+            if not record.success:
+                self._tool_errors[record.tool] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = _Aggregate()
+            for aggregate in self._by_model.values():
+                totals.calls += aggregate.calls
+                totals.errors += aggregate.errors
+                totals.prompt_tokens += aggregate.prompt_tokens
+                totals.completion_tokens += aggregate.completion_tokens
+                totals.cached_prompt_tokens += aggregate.cached_prompt_tokens
+                totals.cost += aggregate.cost
+            return {
+                "since": self._started.isoformat(),
+                "totals": {
+                    "calls": totals.calls,
+                    "errors": totals.errors,
+                    "prompt_tokens": totals.prompt_tokens,
+                    "completion_tokens": totals.completion_tokens,
+                    "cached_prompt_tokens": totals.cached_prompt_tokens,
+                    "cost_estimate_usd": round(totals.cost, 6),
+                },
+                "by_caller": {k: v.to_dict() for k, v in self._by_caller.items()},
+                "by_model": {k: v.to_dict() for k, v in self._by_model.items()},
+                "by_intent": {k: v.to_dict() for k, v in self._by_intent.items()},
+                "tools": {
+                    k: {**v.to_dict(), "errors": self._tool_errors.get(k, 0)}
+                    for k, v in self._tools.items()
+                },
+                "tools_by_intent": {k: v.to_dict() for k, v in self._tools_by_intent.items()},
+            }
+
+    def _persist_async(self, record: LLMCallRecord):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._persist(record)
+            return
+        loop.run_in_executor(None, self._persist, record)
+
+    @staticmethod
+    def _persist(record: LLMCallRecord):
+        """Write one model call to ApiUsageLog; failures are logged, never raised"""
+        try:
+            from sqlmodel import Session
+            from ..database import engine
+            from ..models.cache import ApiUsageLog
+
+            params = asdict(record)
+            params.pop("started_at", None)
+            with Session(engine) as session:
+                session.add(ApiUsageLog(
+                    user_id=None,  # Terminal user ids are not users.id foreign keys
+                    api_service="llm",
+                    endpoint=record.caller[:100],
+                    query_params=params,
+                    response_cached=record.cached_prompt_tokens > 0,
+                    cost_estimate=record.cost_estimate,
+                    execution_time_ms=int(record.latency_ms),
+                ))
+                session.commit()
+        except Exception as e:
+            logger.debug(f"LLM usage log write skipped: {e}")
+
+
+class LLMRequestScope:
+    """
+    Buffers the calls made while serving one request. The terminal intent is often
+    only known after the first model call, so calls are attributed when the scope closes.
+    """
+
+    def __init__(self, intent: Optional[str] = None, user_id: Optional[str] = None):
+        self.intent = intent
+        self.user_id = user_id
+        self.llm_calls: List[LLMCallRecord] = []
+        self.tool_calls: List[ToolCallRecord] = []
+
+    def flush(self, metrics: LLMMetrics):
+        for record in self.llm_calls:
+            record.intent = self.intent
+            record.user_id = self.user_id
+            metrics.record_llm_call(record)
+        for record in self.tool_calls:
+            record.intent = self.intent
+            metrics.record_tool_call(record)
+        self.llm_calls, self.tool_calls = [], []
+
+
+@contextmanager
+def llm_call_context(intent: Optional[str] = None, user_id: Optional[str] = None):
+    """Attribute every model/tool call made inside the block to an intent and user"""
+    scope = LLMRequestScope(intent, user_id)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        scope.flush(llm_metrics)
+
+
+def set_current_intent(intent: Optional[str]):
+    """Set the intent for every call in the current request scope, including earlier ones"""
+    scope = _current_scope.get()
+    if scope is not None and intent:
+        scope.intent = intent
+
+
+def _submit(record):
+    scope = _current_scope.get()
+    if isinstance(record, LLMCallRecord):
+        if scope is not None:
+            scope.llm_calls.append(record)
+        else:
+            llm_metrics.record_llm_call(record)
+    elif scope is not None:
+        scope.tool_calls.append(record)
+    else:
+        llm_metrics.record_tool_call(record)
+
+
+@asynccontextmanager
+async def track_llm_call(caller: str, model: str):
+    """
+    Time a model call. Usage:
+
+        async with track_llm_call("ai_service.chat", model) as call:
+            response = ...
+            call.set_usage(response.usage)
+    """
+    record = LLMCallRecord(caller=caller, model=model)
+    try:
+        yield record
+    except Exception as e:
+        record.success = False
+        record.error = str(e)[:200]
+        raise
+    finally:
+        record.latency_ms = (time.monotonic() - record.started_at) * 1000
+        if record.time_to_first_token_ms is None:
+            # Non-streaming: the first token arrives with the full response
+            record.time_to_first_token_ms = record.latency_ms
+        record.cost_estimate = estimate_cost(record.model, record.prompt_tokens, record.completion_tokens)
+        _submit(record)
+
+
+async def call_with_retries(
+    record: LLMCallRecord,
+    attempt: Callable[[], Awaitable[Any]],
+    retryable: Callable[[Exception], bool],
+    max_retries: int = LLM_MAX_RETRIES,
+    backoff: float = LLM_RETRY_BACKOFF_SECONDS,
+) -> Any:
+    """Await `attempt()`, retrying errors that `retryable` accepts; each retry is counted on the record"""
+    for retry in range(max_retries + 1):
+        try:
+            return await attempt()
+        except Exception as e:
+            if retry == max_retries or not retryable(e):
+                raise
+            record.retries += 1
+            logger.warning(f"{record.caller} attempt {retry + 1} failed, retrying: {e}")
+            await asyncio.sleep(backoff * 2 ** retry)
+
+
+@asynccontextmanager
+async def track_tool_call(tool: str, caller: str):
+    """Time a tool execution; set record.success = False for soft failures"""
+    record = ToolCallRecord(tool=tool, caller=caller)
+    started = time.monotonic()
+    try:
+        yield record
+    except Exception:
+        record.success = False
+        raise
+    finally:
+        record.latency_ms = (time.monotonic() - started) * 1000
+        _submit(record)
+
+
+# Global metrics instance
+llm_metrics = LLMMetrics()
@@ -6,6 +6,7 @@ Wraps OpenBB and CoinGecko services to provide non-blocking market data access.
 
 import asyncio
 import httpx
+import inspect
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -91,7 +92,8 @@ class AsyncCoinGeckoClient:
             response = await self.http_client.get(url, params=params)
             
             if response.status_code == 200:
-                return await response.json()
+                data = response.json()
+                return await data if inspect.isawaitable(data) else data
             elif response.status_code == 429:  # Rate limit
                 logger.warning("CoinGecko rate limit hit. Consider upgrading API plan.")
                 return None
@@ -153,6 +155,15 @@ class AsyncCoinGeckoClient:
             logger.error(f"Error getting token price for {symbol}: {e}")
             return None
     
+    async def get_simple_prices(self, token_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """USD price and 24h change for many tokens in one request, keyed by CoinGecko id."""
+        data = await self._make_request('/simple/price', {
+            'ids': ','.join(token_ids),
+            'vs_currencies': 'usd',
+            'include_24hr_change': 'true'
+        })
+        return data or {}
+    
     async def search_token_by_company(self, company_name: str, company_domain: str = None) -> Optional[Dict[str, Any]]:
         """Enhanced token detection using company name and domain."""
         if not company_name:
@@ -372,6 +383,14 @@ class MarketDataService:
             lambda: openbb_service.get_equity_price(ticker, provider)
         )
     
+    async def get_equity_quotes(self, tickers: List[str], provider: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get quotes for many equities in one provider request, in executor."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: openbb_service.get_equity_quotes(tickers, provider)
+        )
+    
     async def get_equity_historical(
         self, 
         ticker: str, 
@@ -0,0 +1,50 @@
+"""
+Market Symbols - Shared name/alias to ticker mappings
+Used by the built-in market service and the terminal fast-path intent router
+"""
+
+from typing import Dict
+
+# Crypto names and symbols (lowercase) -> ticker
+CRYPTO_SYMBOLS: Dict[str, str] = {
+    'bitcoin': 'BTC', 'btc': 'BTC',
+    'ethereum': 'ETH', 'eth': 'ETH',
+    'solana': 'SOL', 'sol': 'SOL',
+    'polkadot': 'DOT', 'dot': 'DOT',
+    'chainlink': 'LINK', 'link': 'LINK',
+    'cardano': 'ADA', 'ada': 'ADA',
+    'polygon': 'MATIC', 'matic': 'MATIC',
+    'avalanche': 'AVAX', 'avax': 'AVAX',
+    'uniswap': 'UNI', 'uni': 'UNI',
+    'dogecoin': 'DOGE', 'doge': 'DOGE'
+}
+
+# Crypto ticker -> CoinGecko coin id
+COINGECKO_IDS: Dict[str, str] = {
+    'BTC': 'bitcoin', 'ETH': 'ethereum', 'SOL': 'solana',
+    'DOT': 'polkadot', 'LINK': 'chainlink', 'ADA': 'cardano',
+    'MATIC': 'polygon', 'AVAX': 'avalanche-2', 'UNI': 'uniswap',
+    'DOGE': 'dogecoin'
+}
+
+# Company names (lowercase) -> stock ticker
+STOCK_SYMBOLS: Dict[str, str] = {
+    'apple': 'AAPL', 'microsoft': 'MSFT', 'google': 'GOOGL',
+    'amazon': 'AMZN', 'tesla': 'TSLA', 'meta': 'META',
+    'nvidia': 'NVDA', 'netflix': 'NFLX', 'dropbox': 'DBX'
+}
+
+# Sector SPDR ETFs -> sector name
+SECTOR_ETFS: Dict[str, str] = {
+    'XLK': 'Technology', 'XLF': 'Financial', 'XLV': 'Healthcare',
+    'XLE': 'Energy', 'XLI': 'Industrial', 'XLP': 'Consumer Staples',
+    'XLY': 'Consumer Discretionary', 'XLRE': 'Real Estate',
+    'XLU': 'Utilities', 'XLB': 'Materials', 'XLC': 'Communication'
+}
+
+# Broad-market ETFs commonly asked about for holdings/sector breakdowns
+INDEX_ETFS: Dict[str, str] = {
+    'SPY': 'S&P 500', 'QQQ': 'NASDAQ 100', 'DIA': 'Dow Jones',
+    'IWM': 'Russell 2000', 'VTI': 'Total Stock Market',
+    'EFA': 'Developed Markets', 'EEM': 'Emerging Markets'
+}
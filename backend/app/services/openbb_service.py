@@ -463,7 +463,36 @@ class OpenBBService:
         except Exception as e:
             print(f"Error getting equity price for {ticker}: {e}")
             return None
-    
+
+    def get_equity_quotes(self, tickers: List[str], provider: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latest quotes for many equities with one request per provider, keyed by ticker
+        """
+        providers_to_try = [provider] if provider else self.providers['equity']
+
+        for prov in providers_to_try:
+            try:
+                result = obb.equity.price.quote(symbol=",".join(tickers), provider=prov)
+
+                quotes = {}
+                for data in result.results or []:
+                    price = getattr(data, 'last_price', None) or getattr(data, 'prev_close', None)
+                    if price is None:
+                        continue
+                    quotes[str(data.symbol).upper()] = {
+                        'price': float(price),
+                        'change_percent': getattr(data, 'change_percent', None),
+                        'currency': getattr(data, 'currency', None),
+                        'name': getattr(data, 'name', None),
+                    }
+                if quotes:
+                    return quotes
+            except Exception as e:
+                print(f"Provider {prov} failed for quotes {','.join(tickers[:5])}...: {e}")
+                continue
+
+        return {}
+
     def get_equity_historical(
         self, 
         ticker: str, 
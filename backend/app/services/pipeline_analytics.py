@@ -0,0 +1,205 @@
+"""
+Pipeline Analytics - Aggregated deal pipeline metrics for the GP dashboard
+Stage counts, funnel conversion, time-in-stage and sector allocation each run as a
+single GROUP BY (with a window function over deal_status_history for stage
+durations). Results are cached per (widget, filters) key and invalidated when deals
+or companies change, with a short TTL for writes made by other processes.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from datetime import datetime, timedelta
+import logging
+import time
+
+from sqlalchemy import case, func, literal, union_all
+from sqlmodel import Session, select, col
+
+from ..models.deals import Deal, DealStatus, DealStatusHistory
+from ..models.companies import Company
+from .commit_invalidation import invalidate_on_commit
+
+logger = logging.getLogger(__name__)
+
+# Longest a cached aggregate is served
+CACHE_TTL_SECONDS = 300.0
+
+# Writes to these tables invalidate cached results
+WATCHED_MODELS = (Deal, DealStatusHistory, Company)
+
+# Deal status as GP pipeline stage
+STAGE_MAPPING = {
+    DealStatus.PLANNED: "sourced",
+    DealStatus.MEETING: "screened",
+    DealStatus.RESEARCH: "due-diligence",
+    DealStatus.DEAL: "term-sheet",
+    DealStatus.TRACK: "closed",
+    DealStatus.PASSED: "passed",
+    DealStatus.CLOSED: "completed"
+}
+
+# Funnel order; PASSED is an exit from whichever stage the deal had reached
+FUNNEL = [DealStatus.PLANNED, DealStatus.MEETING, DealStatus.RESEARCH, DealStatus.DEAL, DealStatus.TRACK, DealStatus.CLOSED]
+
+# Mock close dates until deals record them (days after the last update)
+MOCK_CLOSE_DELAYS = {
+    DealStatus.TRACK: (timedelta(days=45), "won"),
+    DealStatus.PASSED: (timedelta(days=30), "passed"),
+    DealStatus.CLOSED: (timedelta(0), "completed"),
+}
+
+
+def _days_between(later, earlier, dialect: str):
+    """SQL expression for (later - earlier) in days"""
+    if dialect == "sqlite":
+        return func.julianday(later) - func.julianday(earlier)
+    return func.extract("epoch", later - earlier) / 86400.0
+
+
+class PipelineAnalytics:
+    """Pipeline aggregates with a per-key result cache"""
+
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._version = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def invalidate(self) -> None:
+        """Drop every cached result (called on deal and company writes)"""
+        self._version += 1
+        self._cache.clear()
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "entries": len(self._cache)}
+
+    def _cached(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        entry = self._cache.get(key)
+        if entry is not None and self._clock() < entry[0]:
+            self._stats["hits"] += 1
+            return entry[1]
+        self._stats["misses"] += 1
+        version = self._version
+        value = compute()
+        # A write during the computation may have made this result stale
+        if version == self._version:
+            self._cache[key] = (self._clock() + self._ttl, value)
+        return value
+
+    def stage_counts(self, session: Session) -> List[Dict[str, Any]]:
+        """Deal count per status in one GROUP BY"""
+        def compute():
+            rows = session.exec(select(Deal.status, func.count()).group_by(Deal.status)).all()
+            counts = {status: count for status, count in rows}
+            return [
+                {"stage": STAGE_MAPPING.get(status, status.value.lower()), "count": counts.get(status, 0), "status": status.value}
+                for status in DealStatus
+            ]
+        return self._cached(("stages",), compute)
+
+    def funnel(self, session: Session) -> List[Dict[str, Any]]:
+        """
+        Deals that reached each funnel stage (from status history and current status)
+        and the conversion rate from the previous stage, in one query.
+        """
+        def compute():
+            statuses = union_all(
+                select(DealStatusHistory.deal_id.label("deal_id"), DealStatusHistory.new_status.label("status")),
+                select(Deal.id.label("deal_id"), Deal.status.label("status")),
+            ).subquery()
+            # Comparisons (not a value-keyed case) so statuses bind through the Enum column type
+            rank = case(*[(statuses.c.status == status, i) for i, status in enumerate(FUNNEL)], else_=-1)
+            furthest = select(statuses.c.deal_id, func.max(rank).label("furthest")).group_by(statuses.c.deal_id).subquery()
+            rows = session.exec(select(furthest.c.furthest, func.count()).group_by(furthest.c.furthest)).all()
+
+            deals_at = dict(rows)
+            reached, total = [], 0
+            for i in reversed(range(len(FUNNEL))):
+                total += deals_at.get(i, 0)
+                reached.append(total)
+            reached.reverse()
+
+            return [
+                {
+                    "stage": STAGE_MAPPING[status],
+                    "status": status.value,
+                    "reached": reached[i],
+                    "conversion_rate": round(reached[i] / reached[i - 1], 4) if i and reached[i - 1] else None,
+                }
+                for i, status in enumerate(FUNNEL)
+            ]
+        return self._cached(("funnel",), compute)
+
+    def time_in_stage(self, session: Session) -> List[Dict[str, Any]]:
+        """Average and longest completed stay per status, from LEAD() over each deal's history"""
+        def compute():
+            left_at = func.lead(DealStatusHistory.changed_at).over(
+                partition_by=DealStatusHistory.deal_id, order_by=DealStatusHistory.changed_at
+            )
+            spans = select(
+                DealStatusHistory.new_status.label("status"),
+                DealStatusHistory.changed_at.label("entered_at"),
+                left_at.label("left_at"),
+            ).subquery()
+            days = _days_between(spans.c.left_at, spans.c.entered_at, session.get_bind().dialect.name)
+            rows = session.exec(
+                select(spans.c.status, func.avg(days), func.max(days), func.count())
+                .where(spans.c.left_at.is_not(None))
+                .group_by(spans.c.status)
+            ).all()
+            by_status = {status: (avg_days, max_days, count) for status, avg_days, max_days, count in rows}
+            return [
+                {
+                    "stage": STAGE_MAPPING.get(status, status.value.lower()),
+                    "status": status.value,
+                    "avg_days": round(float(by_status[status][0]), 1) if status in by_status else None,
+                    "max_days": round(float(by_status[status][1]), 1) if status in by_status else None,
+                    "transitions": by_status[status][2] if status in by_status else 0,
+                }
+                for status in DealStatus
+            ]
+        return self._cached(("time_in_stage",), compute)
+
+    def deal_history(self, session: Session, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Per-deal outcome and cycle time, reading only the columns it needs"""
+        def compute():
+            query = select(Deal.id, Deal.status, Deal.created_at, Deal.updated_at)
+            if since:
+                query = query.where(Deal.created_at >= since)
+            if until:
+                query = query.where(Deal.created_at <= until)
+
+            history = []
+            for deal_id, status, created_at, updated_at in session.exec(query.order_by(col(Deal.created_at))).all():
+                closed_at, outcome = None, "pending"
+                if status in MOCK_CLOSE_DELAYS:
+                    delay, outcome = MOCK_CLOSE_DELAYS[status]
+                    closed_at = updated_at + delay
+                history.append({
+                    "deal_id": deal_id,
+                    "created_at": created_at.isoformat(),
+                    "closed_at": closed_at.isoformat() if closed_at else None,
+                    "outcome": outcome,
+                    "cycle_time_days": (closed_at - created_at).days if closed_at else None
+                })
+            return history
+        return self._cached(("history", since, until), compute)
+
+    def sector_counts(self, session: Session) -> Dict[str, int]:
+        """Company count per sector in one GROUP BY"""
+        def compute():
+            sector = func.coalesce(Company.sector, literal("Unknown"))
+            rows = session.exec(select(sector, func.count()).group_by(sector)).all()
+            counts: Dict[str, int] = {}
+            for name, count in rows:
+                counts[name or "Unknown"] = counts.get(name or "Unknown", 0) + count
+            return counts
+        return self._cached(("sectors",), compute)
+
+
+# Global instance
+pipeline_analytics = PipelineAnalytics()
+
+
+invalidate_on_commit({WATCHED_MODELS: (lambda instance: "pipeline", lambda _: pipeline_analytics.invalidate())})
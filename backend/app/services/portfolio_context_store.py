@@ -0,0 +1,356 @@
+"""
+Portfolio Context Store - Materialized per-tenant holdings and watchlist
+Portfolio writes (entity mentions stored to portfolio_memory, PortfolioService
+holding changes) are applied to the tenant's state as they happen, so reading the
+context is a dictionary lookup instead of a semantic search. State is written
+through to Redis so a restarted process can skip the one-time rebuild. Each
+process serves reads from its own in-memory copy and, once that copy is older than
+MEMORY_TTL_SECONDS, checks the tenant's generation counter in Redis.
+
+Every write increments the counter, and the Redis copy is tagged with the
+generation it reflects. A copy whose tag is behind the counter is never loaded, so
+when two workers write the same tenant the next reader rebuilds from the sources
+instead of taking either worker's partial snapshot.
+"""
+
+from typing import Dict, List, Any, Optional, Callable
+from datetime import datetime
+import asyncio
+import inspect
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "portfolio_context:"
+REDIS_GENERATION_PREFIX = "portfolio_context_generation:"
+
+# After a Redis error the store runs memory-only for this long before retrying
+REDIS_RETRY_SECONDS = 60.0
+
+# In-memory copies older than this are refreshed from Redis (when Redis is up)
+MEMORY_TTL_SECONDS = 30.0
+
+# How long a write from a worker thread waits for its Redis update on the event loop
+REDIS_SYNC_TIMEOUT_SECONDS = 2.0
+
+# Mention action types that put a symbol on the watchlist (anything held wins)
+WATCH_ACTIONS = ("track", "watch")
+HOLD_ACTIONS = ("buy", "hold")
+
+
+def _default_redis():
+    from ..database import redis_client
+    return redis_client
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"holdings": {}, "watchlist": {}, "last_updated": None}
+
+
+def mention_event(symbol: str, action_type: str, date: Optional[str] = None, sector: Optional[str] = None) -> Dict[str, Any]:
+    """Event for a symbol mentioned in conversation (see _store_portfolio_entities)"""
+    return {"kind": "mention", "symbol": symbol, "action_type": action_type,
+            "date": date or datetime.now().isoformat(), "sector": sector}
+
+
+def holding_event(symbol: str, amount: float, date: Optional[str] = None) -> Dict[str, Any]:
+    """Event for a PortfolioService position; amount <= 0 means the position was closed"""
+    return {"kind": "holding", "symbol": symbol, "amount": amount,
+            "date": date or datetime.now().isoformat()}
+
+
+def apply_event(state: Dict[str, Any], event: Dict[str, Any]) -> None:
+    symbol = (event.get("symbol") or "").upper()
+    if not symbol:
+        return
+    holdings, watchlist = state["holdings"], state["watchlist"]
+    known = holdings.get(symbol) or watchlist.get(symbol) or {}
+    sector = event.get("sector") or known.get("sector")
+    date = event.get("date")
+
+    if event["kind"] == "holding":
+        if event["amount"] > 0:
+            holdings[symbol] = {"symbol": symbol, "sector": sector, "date": date, "amount": event["amount"]}
+            watchlist.pop(symbol, None)
+        else:
+            holdings.pop(symbol, None)
+    elif event.get("action_type") in HOLD_ACTIONS:
+        holdings[symbol] = {**holdings.get(symbol, {}), "symbol": symbol, "sector": sector, "date": date}
+        watchlist.pop(symbol, None)
+    elif event.get("action_type") in WATCH_ACTIONS and symbol not in holdings:
+        watchlist[symbol] = {"symbol": symbol, "sector": sector, "date": date}
+
+    if date and (state["last_updated"] is None or date > state["last_updated"]):
+        state["last_updated"] = date
+
+
+def snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Context in the shape get_portfolio_context has always returned, most recent first"""
+    def recent(entries):
+        return sorted(entries.values(), key=lambda entry: entry.get("date") or "", reverse=True)
+
+    holdings = recent(state["holdings"])
+    watchlist = [{"symbol": w["symbol"], "sector": w.get("sector")} for w in recent(state["watchlist"])]
+    symbols = [h["symbol"] for h in holdings] + [w["symbol"] for w in watchlist]
+    sectors = list(dict.fromkeys(e["sector"] for e in holdings + watchlist if e.get("sector")))
+    return {
+        "symbols": symbols,
+        "sectors": sectors,
+        "holdings": holdings,
+        "watchlist": watchlist,
+        "last_updated": state["last_updated"],
+    }
+
+
+class PortfolioContextStore:
+    """
+    Incrementally maintained portfolio context per tenant.
+
+    Loaders (registered by the services that own the underlying data) return the
+    events needed to rebuild a tenant that is neither in memory nor in Redis; events
+    recorded while that rebuild is running are replayed on top of it.
+    """
+
+    def __init__(self, redis_factory: Optional[Callable[[], Any]] = _default_redis, clock=time.monotonic):
+        self._redis_factory = redis_factory
+        self._clock = clock
+        self._redis_down_until = 0.0
+        self._loaders: List[Callable[[str], Any]] = []
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._generations: Dict[str, Optional[int]] = {}
+        self._stale: set = set()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self._background: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {"reads": 0, "events": 0, "rebuilds": 0, "refreshes": 0, "redis_hits": 0, "redis_errors": 0}
+
+    def add_loader(self, loader: Callable[[str], Any]) -> None:
+        """Register a (sync or async) callable returning a tenant's events for rebuilds"""
+        self._loaders.append(loader)
+
+    def record(self, tenant_id: str, *events: Dict[str, Any]) -> None:
+        """
+        Apply write events; safe to call from sync code paths.
+
+        From a worker thread (PortfolioService writes run under asyncio.to_thread) the
+        Redis update runs on the store's event loop and has finished when this returns;
+        on the event loop thread itself it is scheduled, use record_async to await it.
+        """
+        update = self._apply(tenant_id, events)
+        if update is not None:
+            self._run(update)
+
+    async def record_async(self, tenant_id: str, *events: Dict[str, Any]) -> None:
+        """Apply write events and wait for the Redis generation (and copy) to be updated"""
+        self._loop = asyncio.get_running_loop()
+        update = self._apply(tenant_id, events)
+        if update is not None:
+            await update
+
+    async def get(self, tenant_id: str) -> Dict[str, Any]:
+        """Current context for a tenant; loads after a cold start or once the copy expires"""
+        self._loop = asyncio.get_running_loop()
+        self._stats["reads"] += 1
+        cached = self._snapshots.get(tenant_id)
+        if cached is None or self._expired(tenant_id):
+            cached = await self._load(tenant_id)
+        return cached
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Drop in-memory state so the next read reloads (Redis copies are left alone)"""
+        for mapping in (self._states, self._snapshots, self._loaded_at, self._generations):
+            if tenant_id is None:
+                mapping.clear()
+            else:
+                mapping.pop(tenant_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "tenants": len(self._states), "redis_available": self._redis_available()}
+
+    def _apply(self, tenant_id: str, events) -> Optional[Any]:
+        """Apply events in memory; returns the Redis update to run"""
+        self._stats["events"] += len(events)
+        state = self._states.get(tenant_id)
+        if state is None:
+            # A cold tenant is rebuilt from the loaders on first read; only a rebuild
+            # already in flight may have read its sources before these writes landed
+            lock = self._load_locks.get(tenant_id)
+            if lock is not None and lock.locked():
+                self._pending.setdefault(tenant_id, []).extend(events)
+            else:
+                # The Redis copy no longer reflects the sources: never load it here again
+                self._stale.add(tenant_id)
+        else:
+            for event in events:
+                apply_event(state, event)
+            self._snapshots[tenant_id] = snapshot(state)
+        return self._publish(tenant_id)
+
+    def _expired(self, tenant_id: str) -> bool:
+        # Without Redis the in-memory copy is the only one, so it never goes stale
+        loaded_at = self._loaded_at.get(tenant_id)
+        return (loaded_at is not None and self._clock() - loaded_at >= MEMORY_TTL_SECONDS
+                and self._redis_available())
+
+    async def _load(self, tenant_id: str) -> Dict[str, Any]:
+        lock = self._load_locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            if tenant_id in self._snapshots and not self._expired(tenant_id):
+                return self._snapshots[tenant_id]
+
+            # Refreshing an expired copy: our own earlier writes must reach Redis
+            # first, and writes recorded from here on are replayed as pending events
+            previous = previous_generation = None
+            if tenant_id in self._states:
+                await self._flush_background()
+                previous = self._states.pop(tenant_id)
+                previous_generation = self._generations.pop(tenant_id, None)
+                self._snapshots.pop(tenant_id, None)
+
+            # Read before the copy and the sources, so any write that either of them
+            # might miss has already moved the counter past this generation
+            generation = await self._read_generation(tenant_id)
+            persist = False
+            if previous is not None and (generation is None or generation == previous_generation):
+                # Nobody wrote since our copy was loaded (or Redis is down): keep it
+                state = previous
+            else:
+                if previous is not None:
+                    self._stats["refreshes"] += 1
+                state = None if tenant_id in self._stale else await self._read_redis(tenant_id, generation)
+                if state is not None:
+                    self._stats["redis_hits"] += 1
+                else:
+                    state = await self._rebuild(tenant_id)
+                    persist = True
+            self._stale.discard(tenant_id)
+
+            pending = self._pending.pop(tenant_id, [])
+            for event in pending:
+                apply_event(state, event)
+            self._states[tenant_id] = state
+            self._snapshots[tenant_id] = snapshot(state)
+            self._loaded_at[tenant_id] = self._clock()
+            # Pending writes bumped the counter by an unknown amount relative to ours,
+            # so this copy is never published and the next expiry reloads it
+            self._generations[tenant_id] = None if pending else generation
+            if persist and not pending and generation is not None:
+                await self._write_redis(tenant_id, generation)
+            return self._snapshots[tenant_id]
+
+    async def _rebuild(self, tenant_id: str) -> Dict[str, Any]:
+        self._stats["rebuilds"] += 1
+        events: List[Dict[str, Any]] = []
+        for loader in self._loaders:
+            try:
+                loaded = loader(tenant_id)
+                if inspect.isawaitable(loaded):
+                    loaded = await loaded
+                events.extend(loaded or [])
+            except Exception as e:
+                logger.warning(f"Portfolio context loader failed for {tenant_id}: {e}")
+
+        state = _empty_state()
+        for event in sorted(events, key=lambda event: event.get("date") or ""):
+            apply_event(state, event)
+        logger.info(f"Portfolio context rebuilt for {tenant_id} from {len(events)} events")
+        return state
+
+    def _redis_available(self) -> bool:
+        return self._redis_factory is not None and self._clock() >= self._redis_down_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        self._stats["redis_errors"] += 1
+        self._redis_down_until = self._clock() + REDIS_RETRY_SECONDS
+        logger.warning(f"Redis unavailable for portfolio context, using memory only: {e}")
+
+    async def _read_generation(self, tenant_id: str) -> Optional[int]:
+        if not self._redis_available():
+            return None
+        try:
+            raw = await self._redis_factory().get(REDIS_GENERATION_PREFIX + tenant_id)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return int(raw or 0)
+
+    async def _read_redis(self, tenant_id: str, generation: Optional[int]) -> Optional[Dict[str, Any]]:
+        if generation is None or not self._redis_available():
+            return None
+        try:
+            raw = await self._redis_factory().get(REDIS_KEY_PREFIX + tenant_id)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        state = json.loads(raw) if raw else None
+        # A copy tagged with an older generation misses some worker's writes
+        if state is None or state.pop("generation", None) != generation:
+            return None
+        return state
+
+    async def _write_redis(self, tenant_id: str, generation: int) -> None:
+        state = self._states.get(tenant_id)
+        if state is None or not self._redis_available():
+            return
+        try:
+            await self._redis_factory().set(REDIS_KEY_PREFIX + tenant_id, json.dumps({**state, "generation": generation}))
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def _publish(self, tenant_id: str) -> None:
+        """Bump the tenant's generation; the copy is rewritten only if no other worker wrote in between"""
+        if not self._redis_available():
+            return
+        try:
+            generation = int(await self._redis_factory().incr(REDIS_GENERATION_PREFIX + tenant_id))
+        except Exception as e:
+            self._redis_failed(e)
+            return
+        if tenant_id not in self._states:
+            return
+        if self._generations.get(tenant_id) == generation - 1:
+            self._generations[tenant_id] = generation
+            await self._write_redis(tenant_id, generation)
+        else:
+            # Another worker wrote since our copy was loaded: reload it on the next read
+            self._generations[tenant_id] = None
+            self._loaded_at[tenant_id] = float("-inf")
+
+    def _run(self, coroutine) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            task = loop.create_task(coroutine)
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        elif self._loop is not None and self._loop.is_running():
+            # Worker thread: hand the update to the loop that owns the Redis client and wait
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+            try:
+                future.result(timeout=REDIS_SYNC_TIMEOUT_SECONDS)
+            except Exception as e:
+                future.cancel()
+                logger.warning(f"Portfolio context Redis update did not finish: {e}")
+        else:
+            # Called outside an event loop (scripts, sync tests): memory is still current
+            coroutine.close()
+
+    async def _flush_background(self) -> None:
+        # Writes recorded while waiting schedule new tasks, so wait until none are left
+        current = asyncio.current_task()
+        while True:
+            running = [task for task in self._background if task is not current and not task.done()]
+            if not running:
+                return
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+# Global instance
+portfolio_context_store = PortfolioContextStore()
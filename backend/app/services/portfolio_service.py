@@ -1,13 +1,40 @@
 """
 Portfolio Management Service - Real portfolio storage and operations
+Holdings are cached in memory per user. Each write batch is appended to the user's
+write-ahead log as one fsync'd line; the log is compacted into the JSON snapshot
+(written atomically) every WAL_COMPACT_ENTRIES batches. Writers take a per-user
+thread lock plus a file lock, so concurrent commands in this and other processes
+cannot lose updates, and bulk imports apply as a single batch. The *_async variants
+run the blocking write off the event loop behind a per-user asyncio lock.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+import asyncio
+import fcntl
 import json
 import os
+import threading
 from datetime import datetime
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
+
+from ..config import settings
+from .portfolio_context_store import holding_event, portfolio_context_store
+from .portfolio_valuation import PortfolioValuator, portfolio_valuator, symbol_sectors
+
+# Compact the write-ahead log into the snapshot after this many batches
+WAL_COMPACT_ENTRIES = 200
+
+TRADE_ACTIONS = ("add", "remove", "set")
+
+
+def resolve_import_path(file_path: str, allowed_dir: Optional[str] = None) -> str:
+    """Real path of an import file, which must lie inside the upload directory"""
+    root = os.path.realpath(allowed_dir or settings.upload_directory)
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Imports must come from {allowed_dir or settings.upload_directory}")
+    return path
 
 
 @dataclass
@@ -22,6 +49,48 @@ class Holding:
             self.last_updated = datetime.now().isoformat()
 
 
+@dataclass
+class Trade:
+    """
+    One holding change: `add` increases the position, `remove` reduces it (closing it
+    when amount is None or covers the position), `set` replaces it (imports).
+    """
+    symbol: str
+    action: str = "add"
+    amount: Optional[float] = None
+    price: Optional[float] = None
+
+    def __post_init__(self):
+        self.symbol = self.symbol.strip().upper()
+        if self.action not in TRADE_ACTIONS:
+            raise ValueError(f"Unknown trade action: {self.action}")
+        if self.action != "remove" and self.amount is None:
+            raise ValueError(f"{self.action} {self.symbol} needs an amount")
+
+
+@dataclass
+class _UserPortfolio:
+    holdings: Dict[str, Holding]
+    signature: Tuple
+    wal_entries: int
+
+
+# Shared by every PortfolioService in the process, keyed by snapshot path
+_thread_locks: Dict[str, threading.RLock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _stat_signature(*paths: str) -> Tuple:
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
 class PortfolioService:
     """Real portfolio management - stores and modifies actual holdings"""
     
@@ -29,106 +98,236 @@ class PortfolioService:
         self.logger = logging.getLogger(__name__)
         self.data_dir = "/tmp/redpill_portfolios"
         os.makedirs(self.data_dir, exist_ok=True)
+        self._cache: Dict[str, _UserPortfolio] = {}
+        self._async_locks: Dict[str, asyncio.Lock] = {}
         
     def _get_portfolio_path(self, user_id: str) -> str:
         safe_user_id = user_id.replace('/', '_').replace('\\', '_')
         return os.path.join(self.data_dir, f"{safe_user_id}_portfolio.json")
-    
-    def get_portfolio(self, user_id: str) -> Dict[str, Holding]:
-        """Get user's current portfolio"""
+
+    def _wal_path(self, user_id: str) -> str:
+        return self._get_portfolio_path(user_id)[:-len(".json")] + ".wal"
+
+    def _thread_lock(self, user_id: str) -> threading.RLock:
+        path = self._get_portfolio_path(user_id)
+        with _thread_locks_guard:
+            return _thread_locks.setdefault(path, threading.RLock())
+
+    def _file_lock(self, user_id: str):
+        """Exclusive lock on the user's lock file (serializes writers across processes)"""
+        handle = open(self._get_portfolio_path(user_id)[:-len(".json")] + ".lock", "a")
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def _signature(self, user_id: str) -> Tuple:
+        return _stat_signature(self._get_portfolio_path(user_id), self._wal_path(user_id))
+
+    def _load(self, user_id: str) -> _UserPortfolio:
+        """Cached holdings, reloaded from snapshot + WAL if another writer changed the files"""
+        signature = self._signature(user_id)
+        cached = self._cache.get(user_id)
+        if cached is not None and cached.signature == signature:
+            return cached
+
+        holdings: Dict[str, Holding] = {}
         portfolio_path = self._get_portfolio_path(user_id)
-        
         if os.path.exists(portfolio_path):
             try:
                 with open(portfolio_path, 'r') as f:
                     data = json.load(f)
-                holdings = {}
                 for symbol, holding_data in data.items():
                     holdings[symbol] = Holding(**holding_data)
-                return holdings
             except Exception as e:
                 self.logger.error(f"Error loading portfolio: {e}")
-                return {}
-        return {}
+
+        wal_entries = 0
+        wal_path = self._wal_path(user_id)
+        if os.path.exists(wal_path):
+            with open(wal_path, 'r') as f:
+                for line in f:
+                    try:
+                        changes = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-append; earlier batches are intact
+                        self.logger.warning(f"Skipping incomplete portfolio WAL entry for {user_id}")
+                        continue
+                    for symbol, holding_data in changes.items():
+                        if holding_data is None:
+                            holdings.pop(symbol, None)
+                        else:
+                            holdings[symbol] = Holding(**holding_data)
+                    wal_entries += 1
+
+        cached = _UserPortfolio(holdings, signature, wal_entries)
+        self._cache[user_id] = cached
+        return cached
+    
+    def get_portfolio(self, user_id: str) -> Dict[str, Holding]:
+        """Get user's current portfolio"""
+        with self._thread_lock(user_id):
+            return {symbol: replace(holding) for symbol, holding in self._load(user_id).holdings.items()}
+
+    def _write_snapshot(self, user_id: str, holdings: Dict[str, Holding]) -> None:
+        """Atomically replace the snapshot and truncate the WAL (caller holds the locks)"""
+        portfolio_path = self._get_portfolio_path(user_id)
+        tmp_path = f"{portfolio_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({symbol: asdict(holding) for symbol, holding in holdings.items()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, portfolio_path)
+        if os.path.exists(self._wal_path(user_id)):
+            os.remove(self._wal_path(user_id))
     
     def save_portfolio(self, user_id: str, holdings: Dict[str, Holding]) -> bool:
         """Save portfolio to storage"""
         try:
-            portfolio_path = self._get_portfolio_path(user_id)
-            # Convert holdings to dict for JSON serialization
-            portfolio_data = {}
-            for symbol, holding in holdings.items():
-                portfolio_data[symbol] = asdict(holding)
-            
-            with open(portfolio_path, 'w') as f:
-                json.dump(portfolio_data, f, indent=2)
+            with self._thread_lock(user_id), self._file_lock(user_id):
+                self._write_snapshot(user_id, holdings)
+                self._cache[user_id] = _UserPortfolio(dict(holdings), self._signature(user_id), 0)
             return True
         except Exception as e:
             self.logger.error(f"Error saving portfolio: {e}")
             return False
+
+    def apply_trades(self, user_id: str, trades: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Apply a batch of trades (Trade objects or dicts) as one durable write.
+        Returns per-trade results and the resulting amount of every changed symbol.
+        """
+        trades = [trade if isinstance(trade, Trade) else Trade(**trade) for trade in trades]
+        with self._thread_lock(user_id), self._file_lock(user_id):
+            portfolio = self._load(user_id)
+            holdings = portfolio.holdings
+            now = datetime.now().isoformat()
+            changed: Dict[str, Optional[Holding]] = {}
+            results = []
+
+            for trade in trades:
+                current = holdings.get(trade.symbol)
+                if trade.action == "remove":
+                    if current is None:
+                        results.append({"symbol": trade.symbol, "success": False, "message": f"❌ No {trade.symbol} found in portfolio"})
+                        continue
+                    if trade.amount is None or trade.amount >= current.amount:
+                        del holdings[trade.symbol]
+                        changed[trade.symbol] = None
+                        results.append({"symbol": trade.symbol, "success": True, "removed": current.amount, "remaining": 0})
+                        continue
+                    current = replace(current, amount=current.amount - trade.amount, last_updated=now)
+                elif trade.action == "add" and current is not None:
+                    current = replace(current, amount=current.amount + trade.amount, last_updated=now,
+                                      average_price=trade.price or current.average_price)
+                else:
+                    current = Holding(symbol=trade.symbol, amount=trade.amount, average_price=trade.price, last_updated=now)
+                holdings[trade.symbol] = current
+                changed[trade.symbol] = current
+                results.append({"symbol": trade.symbol, "success": True, "amount": current.amount})
+
+            if changed:
+                try:
+                    self._append_wal(user_id, changed)
+                    portfolio.wal_entries += 1
+                    if portfolio.wal_entries >= WAL_COMPACT_ENTRIES:
+                        self._write_snapshot(user_id, holdings)
+                        portfolio.wal_entries = 0
+                    portfolio.signature = self._signature(user_id)
+                except Exception:
+                    # Nothing durable was written (or only a torn line): drop the cached copy
+                    self._cache.pop(user_id, None)
+                    raise
+
+        for symbol, holding in changed.items():
+            portfolio_context_store.record(
+                user_id, holding_event(symbol, holding.amount if holding else 0, holding.last_updated if holding else None)
+            )
+        return {
+            "results": results,
+            "changed": {symbol: holding.amount if holding else 0 for symbol, holding in changed.items()},
+            "holdings": len(holdings),
+        }
+
+    async def _locked(self, user_id: str, write, *args):
+        """Run a blocking write off the event loop; the per-user async lock keeps one batch per user in flight"""
+        lock = self._async_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            return await asyncio.to_thread(write, user_id, *args)
+
+    async def apply_trades_async(self, user_id: str, trades: Iterable[Any]) -> Dict[str, Any]:
+        return await self._locked(user_id, self.apply_trades, list(trades))
+
+    async def import_holdings_async(self, user_id: str, rows: Iterable[Dict[str, Any]], replace_all: bool = False) -> Dict[str, Any]:
+        return await self._locked(user_id, self.import_holdings, list(rows), replace_all)
+
+    async def add_holding_async(self, user_id: str, symbol: str, amount: float, price: Optional[float] = None) -> Dict[str, Any]:
+        return await self._locked(user_id, self.add_holding, symbol, amount, price)
+
+    async def remove_holding_async(self, user_id: str, symbol: str, amount: Optional[float] = None) -> Dict[str, Any]:
+        return await self._locked(user_id, self.remove_holding, symbol, amount)
+
+    def import_holdings(self, user_id: str, rows: Iterable[Dict[str, Any]], replace_all: bool = False) -> Dict[str, Any]:
+        """Set positions from imported rows ({symbol, amount, price}) in one batch; optionally close the rest"""
+        trades = [
+            Trade(symbol=str(row["symbol"]), action="set", amount=float(row["amount"]),
+                  price=float(row["price"]) if row.get("price") not in (None, "") else None)
+            for row in rows
+        ]
+        if replace_all:
+            imported = {trade.symbol for trade in trades}
+            trades += [Trade(symbol=symbol, action="remove") for symbol in self.get_portfolio(user_id) if symbol not in imported]
+        return self.apply_trades(user_id, trades)
+
+    def _append_wal(self, user_id: str, changed: Dict[str, Optional[Holding]]) -> None:
+        line = json.dumps({symbol: asdict(holding) if holding else None for symbol, holding in changed.items()})
+        with open(self._wal_path(user_id), 'a') as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
     
     def add_holding(self, user_id: str, symbol: str, amount: float, price: Optional[float] = None) -> Dict[str, Any]:
         """Add holding to portfolio"""
         try:
-            holdings = self.get_portfolio(user_id)
+            result = self.apply_trades(user_id, [Trade(symbol=symbol, action="add", amount=amount, price=price)])
             symbol = symbol.upper()
-            
-            if symbol in holdings:
-                # Update existing
-                existing = holdings[symbol]
-                existing.amount += amount
-                if price:
-                    existing.average_price = price
-                existing.last_updated = datetime.now().isoformat()
-            else:
-                # Add new
-                holdings[symbol] = Holding(symbol=symbol, amount=amount, average_price=price)
-            
-            if self.save_portfolio(user_id, holdings):
-                return {
-                    "success": True,
-                    "message": f"✅ Added {amount} {symbol} to portfolio",
-                    "new_total": holdings[symbol].amount
-                }
-            else:
-                return {"success": False, "message": "Failed to save portfolio"}
+            return {
+                "success": True,
+                "message": f"✅ Added {amount} {symbol} to portfolio",
+                "new_total": result["changed"][symbol]
+            }
         except Exception as e:
             return {"success": False, "message": f"Error: {e}"}
     
     def remove_holding(self, user_id: str, symbol: str, amount: Optional[float] = None) -> Dict[str, Any]:
         """Remove or reduce holding - THIS IS THE KEY METHOD"""
         try:
-            holdings = self.get_portfolio(user_id)
+            result = self.apply_trades(user_id, [Trade(symbol=symbol, action="remove", amount=amount)])
+            outcome = result["results"][0]
             symbol = symbol.upper()
             
-            if symbol not in holdings:
-                return {"success": False, "message": f"❌ No {symbol} found in portfolio"}
-            
-            current = holdings[symbol]
+            if not outcome["success"]:
+                return {"success": False, "message": outcome["message"]}
             
-            if amount is None or amount >= current.amount:
-                # Remove completely
-                removed_amount = current.amount
-                del holdings[symbol]
-                message = f"🗑️ Removed all {removed_amount} {symbol} from portfolio"
+            if "removed" in outcome:
+                message = f"🗑️ Removed all {outcome['removed']} {symbol} from portfolio"
             else:
-                # Partial removal
-                current.amount -= amount
-                current.last_updated = datetime.now().isoformat()
-                message = f"🗑️ Removed {amount} {symbol}, {current.amount} remaining"
+                message = f"🗑️ Removed {amount} {symbol}, {outcome['amount']} remaining"
             
-            if self.save_portfolio(user_id, holdings):
-                return {
-                    "success": True,
-                    "message": message,
-                    "remaining_holdings": len(holdings)
-                }
-            else:
-                return {"success": False, "message": "Failed to save changes"}
+            return {
+                "success": True,
+                "message": message,
+                "remaining_holdings": result["holdings"]
+            }
                 
         except Exception as e:
             return {"success": False, "message": f"Error: {e}"}
     
+    def context_events(self, user_id: str) -> List[Dict[str, Any]]:
+        """Current holdings as portfolio context events (used to rebuild the materialized context)"""
+        return [
+            holding_event(symbol, holding.amount, holding.last_updated)
+            for symbol, holding in self.get_portfolio(user_id).items()
+        ]
+    
     def get_summary(self, user_id: str) -> Dict[str, Any]:
         """Get portfolio summary"""
         try:
@@ -157,6 +356,29 @@ class PortfolioService:
         except Exception as e:
             return {"success": False, "message": f"Error: {e}"}
 
+    async def get_valued_summary(self, user_id: str, session=None,
+                                 valuator: Optional[PortfolioValuator] = None) -> Dict[str, Any]:
+        """Portfolio summary with live market value, P&L, weights and sector exposure"""
+        summary = self.get_summary(user_id)
+        if not summary.get("success") or not summary["holdings"]:
+            return summary
+        try:
+            holdings = self.get_portfolio(user_id)
+            sectors = symbol_sectors(session, holdings) if session is not None else None
+            valuation = await (valuator or portfolio_valuator).value_portfolio(holdings, sectors)
+        except Exception as e:
+            self.logger.warning(f"Portfolio valuation failed for {user_id}: {e}")
+            return summary
+
+        totals = valuation["totals"]
+        summary.update(valuation)
+        summary["message"] = (
+            f"📊 Portfolio contains {len(holdings)} assets worth ${totals['market_value']:,.2f}"
+            + (f" ({totals['unrealized_pnl']:+,.2f} unrealized)" if totals["cost_basis"] else "")
+        )
+        return summary
+
 
 # Global instance
-portfolio_service = PortfolioService()
\ No newline at end of file
+portfolio_service = PortfolioService()
+portfolio_context_store.add_loader(portfolio_service.context_events)
\ No newline at end of file
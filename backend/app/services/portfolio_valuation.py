@@ -0,0 +1,270 @@
+"""
+Portfolio Valuation - Market value, P&L, weights and exposure for holdings
+Every symbol in a portfolio is priced in one round: symbols are grouped by quote
+provider, split into provider-sized batches and the batches are fetched concurrently,
+behind a short-TTL price cache. Valuation is computed column-wise across all holdings.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from sqlmodel import Session, select, col
+
+from ..config import settings
+from ..models.companies import Company
+from ..models.dashboards import CompanyDataSource
+from .market_symbols import CRYPTO_SYMBOLS, COINGECKO_IDS
+from ..utils.frames import records
+
+logger = logging.getLogger(__name__)
+
+# Quotes are reused for this long across valuations
+QUOTE_TTL = timedelta(seconds=30)
+
+# Batches fetched at once across all providers
+MAX_CONCURRENT_BATCHES = 8
+
+CRYPTO_SECTOR = "Crypto"
+UNKNOWN_SECTOR = "Unknown"
+
+_CRYPTO_TICKERS = set(CRYPTO_SYMBOLS.values()) | set(COINGECKO_IDS)
+
+
+def is_crypto(symbol: str) -> bool:
+    return symbol.upper() in _CRYPTO_TICKERS
+
+
+class QuoteProvider:
+    """
+    A quote source that prices many symbols per request. `fetch` returns
+    {symbol: {"price", "change_percent", ...}} and omits symbols it could not price.
+    """
+
+    name = "provider"
+    batch_size = 50
+
+    def supports(self, symbol: str) -> bool:
+        return True
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class CoinGeckoQuotes(QuoteProvider):
+    """Crypto prices from CoinGecko /simple/price"""
+
+    name = "coingecko"
+    batch_size = 250
+
+    def supports(self, symbol: str) -> bool:
+        return symbol.upper() in COINGECKO_IDS
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        from .market_data_service import AsyncCoinGeckoClient
+
+        ids = {COINGECKO_IDS[symbol.upper()]: symbol for symbol in symbols}
+        async with AsyncCoinGeckoClient(settings.coingecko_api_key) as client:
+            prices = await client.get_simple_prices(list(ids))
+        return {
+            ids[token_id]: {"price": float(data["usd"]), "change_percent": data.get("usd_24h_change"), "sector": CRYPTO_SECTOR}
+            for token_id, data in prices.items()
+            if token_id in ids and data.get("usd") is not None
+        }
+
+
+class OpenBBEquityQuotes(QuoteProvider):
+    """Equity quotes from OpenBB's multi-symbol quote endpoint"""
+
+    name = "openbb"
+    batch_size = 50
+
+    def supports(self, symbol: str) -> bool:
+        return not is_crypto(symbol)
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        from .market_data_service import market_data_service
+
+        return await market_data_service.get_equity_quotes(symbols)
+
+
+def symbol_sectors(session: Session, symbols: Iterable[str]) -> Dict[str, str]:
+    """Sectors of tracked companies by token symbol or data source ticker"""
+    symbols = sorted({symbol.upper() for symbol in symbols})
+    if not symbols:
+        return {}
+    sectors = dict(session.exec(
+        select(CompanyDataSource.ticker_symbol, Company.sector)
+        .join(Company, CompanyDataSource.company_id == Company.id)
+        .where(col(CompanyDataSource.ticker_symbol).in_(symbols))
+    ).all())
+    sectors.update(session.exec(
+        select(Company.token_symbol, Company.sector).where(col(Company.token_symbol).in_(symbols))
+    ).all())
+    return {symbol.upper(): sector for symbol, sector in sectors.items() if symbol and sector}
+
+
+def _holding_rows(holdings: Any) -> List[Dict[str, Any]]:
+    """Holdings as rows; accepts {symbol: Holding}, {symbol: dict} or a list of dicts"""
+    items = holdings.values() if isinstance(holdings, dict) else holdings
+    rows = []
+    for holding in items:
+        get = holding.get if isinstance(holding, dict) else lambda key, default=None: getattr(holding, key, default)
+        rows.append({
+            "symbol": str(get("symbol")).upper(),
+            "amount": float(get("amount") or 0),
+            "average_price": get("average_price", get("avg_price")),
+        })
+    return rows
+
+
+class PortfolioValuator:
+    """Batched, cached quote fetching and vectorized portfolio valuation"""
+
+    def __init__(self, providers: Optional[List[QuoteProvider]] = None, ttl: timedelta = QUOTE_TTL,
+                 max_concurrency: int = MAX_CONCURRENT_BATCHES, clock: Callable[[], datetime] = datetime.utcnow):
+        self.providers = providers if providers is not None else [CoinGeckoQuotes(), OpenBBEquityQuotes()]
+        self._ttl = ttl
+        self._max_concurrency = max_concurrency
+        self._clock = clock
+        self._prices: Dict[str, tuple] = {}
+        self._stats = {"cache_hits": 0, "fetched": 0, "batches": 0, "failed_batches": 0}
+
+    # ---- quotes ----
+
+    def _provider_for(self, symbol: str) -> Optional[QuoteProvider]:
+        return next((provider for provider in self.providers if provider.supports(symbol)), None)
+
+    async def quotes(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Quotes for every symbol that could be priced; cache misses are fetched in concurrent provider batches"""
+        now = self._clock()
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: Dict[QuoteProvider, List[str]] = {}
+        for symbol in dict.fromkeys(symbol.upper() for symbol in symbols):
+            entry = self._prices.get(symbol)
+            if entry is not None and now < entry[0]:
+                found[symbol] = entry[1]
+                self._stats["cache_hits"] += 1
+                continue
+            provider = self._provider_for(symbol)
+            if provider is not None:
+                missing.setdefault(provider, []).append(symbol)
+
+        batches = [
+            (provider, batch[start:start + provider.batch_size])
+            for provider, batch in missing.items()
+            for start in range(0, len(batch), provider.batch_size)
+        ]
+        if not batches:
+            return found
+
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def fetch(provider: QuoteProvider, batch: List[str]) -> Dict[str, Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await provider.fetch(batch)
+                except Exception as e:
+                    logger.warning(f"{provider.name} quotes failed for {len(batch)} symbols: {e}")
+                    self._stats["failed_batches"] += 1
+                    return {}
+
+        results = await asyncio.gather(*[fetch(provider, batch) for provider, batch in batches])
+        self._stats["batches"] += len(batches)
+
+        expires_at = self._clock() + self._ttl
+        for (provider, batch), prices in zip(batches, results):
+            requested = set(batch)
+            for symbol, quote in prices.items():
+                symbol = symbol.upper()
+                if symbol not in requested:
+                    continue
+                quote = {**quote, "provider": provider.name}
+                found[symbol] = quote
+                self._prices[symbol] = (expires_at, quote)
+                self._stats["fetched"] += 1
+        return found
+
+    def forget(self, symbols: Optional[Iterable[str]] = None) -> None:
+        """Drop cached prices (all of them by default)"""
+        if symbols is None:
+            self._prices.clear()
+        for symbol in symbols or ():
+            self._prices.pop(symbol.upper(), None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "cached_prices": len(self._prices)}
+
+    # ---- valuation ----
+
+    def value(self, holdings: Any, quotes: Dict[str, Dict[str, Any]],
+              sectors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Market value, cost basis, unrealized P&L and weight per position plus portfolio
+        totals and sector/asset-class exposure. Unpriced positions are reported with no
+        market value and excluded from weights.
+        """
+        frame = pd.DataFrame(_holding_rows(holdings), columns=["symbol", "amount", "average_price"])
+        frame = frame[frame["amount"] != 0].groupby("symbol", as_index=False).agg(
+            amount=("amount", "sum"), average_price=("average_price", "last")
+        )
+        quote_frame = pd.DataFrame.from_dict(quotes, orient="index")
+        for column in ("price", "change_percent", "sector", "provider"):
+            if column not in quote_frame:
+                quote_frame[column] = None
+        frame = frame.join(quote_frame[["price", "change_percent", "sector", "provider"]], on="symbol")
+
+        frame["average_price"] = pd.to_numeric(frame["average_price"], errors="coerce")
+        frame["price"] = pd.to_numeric(frame["price"], errors="coerce")
+        frame["asset_class"] = np.where(frame["symbol"].map(is_crypto), "crypto", "equity")
+        known_sectors = frame["symbol"].map(sectors or {})
+        frame["sector"] = known_sectors.fillna(frame["sector"]).fillna(
+            pd.Series(np.where(frame["asset_class"] == "crypto", CRYPTO_SECTOR, UNKNOWN_SECTOR), index=frame.index)
+        )
+
+        frame["market_value"] = frame["amount"] * frame["price"]
+        frame["cost_basis"] = frame["amount"] * frame["average_price"]
+        frame["unrealized_pnl"] = frame["market_value"] - frame["cost_basis"]
+        frame["unrealized_pnl_pct"] = frame["unrealized_pnl"] / frame["cost_basis"].where(frame["cost_basis"] > 0)
+
+        total_value = float(frame["market_value"].sum())
+        frame["weight"] = frame["market_value"] / total_value if total_value else np.nan
+        frame = frame.sort_values(["market_value", "symbol"], ascending=[False, True], na_position="last")
+        priced = frame["price"].notna()
+
+        with_cost = priced & frame["cost_basis"].notna()
+        cost_basis = float(frame.loc[with_cost, "cost_basis"].sum())
+        pnl = float(frame.loc[with_cost, "unrealized_pnl"].sum())
+        weights = frame[priced]
+        return {
+            "positions": records(frame.reset_index(drop=True)),
+            "totals": {
+                "market_value": total_value,
+                "cost_basis": cost_basis,
+                "unrealized_pnl": pnl,
+                "unrealized_pnl_pct": pnl / cost_basis if cost_basis > 0 else None,
+                "positions": int(len(frame)),
+                "priced": int(priced.sum()),
+                "unpriced": frame.loc[~priced, "symbol"].tolist(),
+            },
+            "sector_exposure": weights.groupby("sector")["weight"].sum().sort_values(ascending=False).to_dict(),
+            "asset_class_exposure": weights.groupby("asset_class")["weight"].sum().to_dict(),
+        }
+
+    async def value_portfolio(self, holdings: Any, sectors: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Price every holding in one round of batched requests and value the portfolio"""
+        started = time.perf_counter()
+        rows = _holding_rows(holdings)
+        quotes = await self.quotes(row["symbol"] for row in rows)
+        valuation = self.value(rows, quotes, sectors)
+        valuation["priced_at"] = self._clock().isoformat()
+        valuation["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return valuation
+
+
+# Global instance
+portfolio_valuator = PortfolioValuator()
@@ -0,0 +1,295 @@
+"""
+Research Pipeline - Concurrent, budgeted deep research
+Fan-out search -> near-duplicate removal -> budgeted content fetch ->
+parallel finding extraction (map) -> single synthesis (reduce), all under a deadline
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import re
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# MinHash parameters: 64 permutations of a 2^31-1 universal hash
+_MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = (1 << 31) - 1
+_MINHASH_SEEDS: Tuple[Tuple[int, int], ...] = tuple(
+    (1 + (i * 2654435761) % (_MINHASH_PRIME - 1), (i * 40503 + 12345) % _MINHASH_PRIME)
+    for i in range(_MINHASH_PERMUTATIONS)
+)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Findings kept for synthesis and display (the agent has always used the top 6)
+MAX_FINDINGS = 6
+
+
+@dataclass
+class ResearchBudget:
+    """Limits applied to a single deep research request"""
+    deadline_seconds: float = 25.0
+    max_content_bytes: int = 24_000      # Total page text across all sources
+    max_bytes_per_source: int = 4_000
+    chunk_chars: int = 2_000
+    max_chunks: int = 8                  # Upper bound on parallel extraction calls
+    max_findings: int = MAX_FINDINGS     # Findings passed to the synthesis call
+    similarity_threshold: float = 0.8    # Estimated Jaccard above which sources are duplicates
+    shingle_size: int = 3
+
+
+@dataclass
+class ResearchResult:
+    """Output of a research pipeline run (possibly partial)"""
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    findings: List[str] = field(default_factory=list)
+    synthesis: str = ""
+    search_progress: List[str] = field(default_factory=list)
+    skipped_stages: List[str] = field(default_factory=list)
+    duplicates_removed: int = 0
+    content_bytes: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.skipped_stages)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-gram shingles of normalized text"""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str, shingle_size: int = 3) -> Tuple[int, ...]:
+    """MinHash signature over word shingles"""
+    hashed = [zlib.crc32(s.encode()) for s in shingles(text, shingle_size)]
+    if not hashed:
+        return tuple([_MINHASH_PRIME] * _MINHASH_PERMUTATIONS)
+    return tuple(
+        min((a * h + b) % _MINHASH_PRIME for h in hashed)
+        for a, b in _MINHASH_SEEDS
+    )
+
+
+def estimate_jaccard(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity from two MinHash signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def deduplicate_sources(sources: List[Dict[str, Any]], threshold: float = 0.8, shingle_size: int = 3) -> List[Dict[str, Any]]:
+    """Drop exact-URL duplicates and near-duplicates by title + snippet, keeping the first seen"""
+    seen_urls = set()
+    kept: List[Dict[str, Any]] = []
+    signatures: List[Tuple[int, ...]] = []
+
+    for source in sources:
+        url = source.get("url", "")
+        if not url or url in seen_urls:
+            continue
+        seen_urls.add(url)
+
+        signature = minhash_signature(
+            f"{source.get('title', '')} {source.get('text', source.get('snippet', ''))}", shingle_size
+        )
+        if any(estimate_jaccard(signature, other) >= threshold for other in signatures):
+            continue
+        signatures.append(signature)
+        kept.append(source)
+
+    return kept
+
+
+def parse_findings(response: Optional[str]) -> List[str]:
+    """Turn a bulleted LLM response into individual findings"""
+    findings = []
+    for line in (response or "").split("\n"):
+        clean_line = line.strip().lstrip("•-*").strip()
+        if len(clean_line) > 20:  # Filter out short lines
+            findings.append(clean_line)
+    return findings
+
+
+class ResearchPipeline:
+    """
+    Runs deep research as concurrent stages under a wall-clock deadline.
+    Whatever has completed when the deadline passes is returned as a partial result.
+    """
+
+    def __init__(self, search_service, ai_service, budget: Optional[ResearchBudget] = None):
+        self.search_service = search_service
+        self.ai_service = ai_service
+        self.budget = budget or ResearchBudget()
+
+    async def run(self, query: str, research_plan: List[str], max_sources: int = 8) -> ResearchResult:
+        started = time.monotonic()
+        deadline = started + self.budget.deadline_seconds
+        result = ResearchResult()
+
+        # Stage 1: concurrent search fan-out
+        sources_per_query = max(1, max_sources // max(1, len(research_plan)))
+        raw_sources = await self._fan_out_search(research_plan, sources_per_query, deadline, result)
+
+        # Stage 2: exact + near-duplicate removal
+        unique_sources = deduplicate_sources(
+            raw_sources, self.budget.similarity_threshold, self.budget.shingle_size
+        )[:max_sources]
+        result.duplicates_removed = len(raw_sources) - len(unique_sources)
+        result.sources = unique_sources
+
+        if not unique_sources:
+            result.elapsed_seconds = time.monotonic() - started
+            return result
+
+        # Stage 3: budgeted content fetch
+        await self._fetch_contents(unique_sources, deadline, result)
+
+        # Stage 4: map - parallel finding extraction over source chunks
+        result.findings = await self._map_findings(query, unique_sources, deadline, result)
+
+        # Stage 5: reduce - one synthesis call
+        if result.findings:
+            result.synthesis = await self._reduce_synthesis(query, result.findings, len(unique_sources), deadline, result)
+
+        result.elapsed_seconds = time.monotonic() - started
+        logger.info(
+            f"Research '{query[:50]}' finished in {result.elapsed_seconds:.2f}s: "
+            f"{len(unique_sources)} sources, {len(result.findings)} findings, skipped={result.skipped_stages}"
+        )
+        return result
+
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    async def _gather_until(self, coroutines: List, deadline: float) -> List[Any]:
+        """Run coroutines concurrently; results of unfinished/failed ones are None"""
+        tasks = [asyncio.ensure_future(c) for c in coroutines]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=self._remaining(deadline))
+        for task in pending:
+            task.cancel()
+        results = []
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is None:
+                results.append(task.result())
+            else:
+                if task in done and not task.cancelled():
+                    logger.warning(f"Research task failed: {task.exception()}")
+                results.append(None)
+        return results
+
+    async def _fan_out_search(self, research_plan: List[str], per_query: int, deadline: float, result: ResearchResult) -> List[Dict[str, Any]]:
+        responses = await self._gather_until(
+            [self.search_service.search(q, num_results=per_query, include_contents=False) for q in research_plan],
+            deadline,
+        )
+
+        sources: List[Dict[str, Any]] = []
+        for i, (research_query, found) in enumerate(zip(research_plan, responses), 1):
+            if found is None:
+                result.search_progress.append(f"❌ Step {i}: Search failed or timed out for '{research_query[:50]}...'")
+            elif found:
+                sources.extend(found[:per_query])
+                result.search_progress.append(f"✅ Step {i}: Found {len(found)} sources for '{research_query[:50]}...'")
+            else:
+                result.search_progress.append(f"⚠️ Step {i}: No sources found for '{research_query[:50]}...'")
+        if any(r is None for r in responses) and self._remaining(deadline) == 0:
+            result.skipped_stages.append("search")
+        return sources
+
+    async def _fetch_contents(self, sources: List[Dict[str, Any]], deadline: float, result: ResearchResult) -> None:
+        """Replace snippets with fetched page text, staying within the byte budget"""
+        fetch = getattr(self.search_service, "fetch_contents", None)
+        contents: Dict[str, str] = {}
+        if fetch is not None:
+            fetched = await self._gather_until(
+                [fetch([s["url"] for s in sources], max_characters=self.budget.max_bytes_per_source)],
+                deadline,
+            )
+            if fetched[0] is None:
+                result.skipped_stages.append("fetch")
+            else:
+                contents = fetched[0]
+
+        remaining_bytes = self.budget.max_content_bytes
+        for source in sources:
+            text = contents.get(source["url"]) or source.get("text", source.get("snippet", "")) or ""
+            encoded = text.encode("utf-8")[:min(self.budget.max_bytes_per_source, remaining_bytes)]
+            source["text"] = encoded.decode("utf-8", errors="ignore")
+            remaining_bytes -= len(encoded)
+            result.content_bytes += len(encoded)
+
+    def _chunk_sources(self, sources: List[Dict[str, Any]]) -> List[str]:
+        """Pack numbered source excerpts into at most max_chunks prompts"""
+        chunks: List[str] = []
+        current = ""
+        for i, source in enumerate(sources, 1):
+            excerpt = f"Source {i}: {source.get('title', 'Unknown Title')}\n{source.get('text', '')}\n---\n"
+            if current and len(current) + len(excerpt) > self.budget.chunk_chars:
+                chunks.append(current)
+                current = ""
+            current += excerpt[:self.budget.chunk_chars]
+        if current:
+            chunks.append(current)
+        return chunks[:self.budget.max_chunks]
+
+    async def _extract_chunk(self, query: str, chunk: str) -> List[str]:
+        prompt = f"""Research Query: "{query}"
+
+Source Material:
+{chunk}
+
+Extract up to 3 key factual findings from this material that directly address the research query. Focus on:
+- Concrete facts and data points
+- Recent developments, financial metrics or strategic decisions
+- Market trends or competitive positioning
+
+Each finding should be concise, specific, and actionable for investment analysis.
+Format as bullet points starting with "•"."""
+        return parse_findings(await self.ai_service.generate_response(prompt))
+
+    async def _map_findings(self, query: str, sources: List[Dict[str, Any]], deadline: float, result: ResearchResult) -> List[str]:
+        chunk_findings = await self._gather_until(
+            [self._extract_chunk(query, chunk) for chunk in self._chunk_sources(sources)],
+            deadline,
+        )
+        if any(f is None for f in chunk_findings):
+            result.skipped_stages.append("extract")
+
+        findings: List[str] = []
+        seen = set()
+        for batch in chunk_findings:
+            for finding in batch or []:
+                key = finding.lower()
+                if key not in seen:
+                    seen.add(key)
+                    findings.append(finding)
+        # Chunks follow source rank, so the cap keeps findings from the best sources
+        return findings[:self.budget.max_findings]
+
+    async def _reduce_synthesis(self, query: str, findings: List[str], source_count: int, deadline: float, result: ResearchResult) -> str:
+        prompt = f"""Research Query: "{query}"
+
+Key Findings:
+{chr(10).join(f"• {finding}" for finding in findings)}
+
+Sources Analyzed: {source_count}
+
+Create a concise executive summary (2-3 sentences) that:
+1. Directly answers the research query
+2. Highlights the most important insights
+3. Provides actionable intelligence for investment decisions
+
+Keep it professional and focused on key takeaways."""
+        synthesis = await self._gather_until([self.ai_service.generate_response(prompt)], deadline)
+        if synthesis[0] is None:
+            result.skipped_stages.append("synthesis")
+            return ""
+        return synthesis[0]
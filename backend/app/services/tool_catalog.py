@@ -0,0 +1,207 @@
+"""
+Tool Catalog - Precompiled, immutable AI tool schemas with relevance-based subsetting
+Schemas are serialized once at startup; each query gets only the top-K relevant tools
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import math
+import re
+
+logger = logging.getLogger(__name__)
+
+# Tokens that carry no signal for tool selection
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "get", "give",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "show", "the",
+    "to", "use", "what", "with", "e", "g", "eg", "etc", "not", "do", "can",
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# BM25 parameters
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+# Hashed character n-gram "embedding" dimension
+_EMBEDDING_DIM = 512
+_NGRAM_SIZE = 3
+
+# Weight of lexical (BM25) vs. n-gram vector similarity in the fused score
+_LEXICAL_WEIGHT = 0.7
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split snake_case/punctuation, drop stopwords and plural 's'"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower().replace("_", " ")):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def embed_text(text: str) -> Dict[int, float]:
+    """Sparse, L2-normalized hashed character n-gram vector"""
+    vector: Dict[int, float] = {}
+    for token in tokenize(text):
+        padded = f" {token} "
+        for i in range(max(1, len(padded) - _NGRAM_SIZE + 1)):
+            gram = padded[i:i + _NGRAM_SIZE]
+            bucket = int.from_bytes(hashlib.md5(gram.encode()).digest()[:4], "little") % _EMBEDDING_DIM
+            vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if norm:
+        vector = {k: v / norm for k, v in vector.items()}
+    return vector
+
+
+def _cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """A single precompiled tool schema"""
+    name: str
+    description: str
+    schema_json: str
+    token_estimate: int
+    term_counts: Tuple[Tuple[str, int], ...]
+    length: int
+
+
+class ToolCatalog:
+    """
+    Immutable catalog of AI tool schemas with a keyword (BM25) + n-gram vector index.
+
+    Schemas are serialized once; callers always receive fresh dict copies so the
+    catalog itself can never be mutated by a request.
+    """
+
+    def __init__(self, schemas: Iterable[Dict[str, Any]], extra_text: Optional[Dict[str, str]] = None):
+        extra_text = extra_text or {}
+        entries: List[CatalogEntry] = []
+        vectors: List[Dict[int, float]] = []
+        document_frequency: Dict[str, int] = {}
+        seen = set()
+
+        for schema in schemas:
+            func = schema["function"]
+            name = func["name"]
+            if name in seen:
+                logger.warning(f"Duplicate tool schema skipped: {name}")
+                continue
+            seen.add(name)
+
+            schema_json = json.dumps(schema, separators=(",", ":"), sort_keys=True)
+            index_text = " ".join([
+                name,
+                func.get("description", ""),
+                self._parameter_text(func.get("parameters", {})),
+                extra_text.get(name, ""),
+            ])
+            terms = tokenize(index_text)
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term in counts:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+            entries.append(CatalogEntry(
+                name=name,
+                description=func.get("description", ""),
+                schema_json=schema_json,
+                token_estimate=max(1, len(schema_json) // 4),
+                term_counts=tuple(sorted(counts.items())),
+                length=len(terms),
+            ))
+            vectors.append(embed_text(index_text))
+
+        self._entries: Tuple[CatalogEntry, ...] = tuple(entries)
+        self._positions: Dict[str, int] = {entry.name: i for i, entry in enumerate(entries)}
+        self._vectors: Tuple[Dict[int, float], ...] = tuple(vectors)
+        self._term_counts: Tuple[Dict[str, int], ...] = tuple(dict(e.term_counts) for e in entries)
+        self._avg_length = (sum(e.length for e in entries) / len(entries)) if entries else 0.0
+        total = len(entries)
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        self.total_token_estimate = sum(e.token_estimate for e in entries)
+
+    @staticmethod
+    def _parameter_text(parameters: Dict[str, Any]) -> str:
+        parts = []
+        for param_name, spec in parameters.get("properties", {}).items():
+            parts.append(param_name)
+            parts.append(spec.get("description", ""))
+            if "enum" in spec:
+                parts.extend(str(value) for value in spec["enum"])
+        return " ".join(parts)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    @property
+    def names(self) -> List[str]:
+        return [entry.name for entry in self._entries]
+
+    def all_schemas(self) -> List[Dict[str, Any]]:
+        """Fresh copies of every schema in catalog order"""
+        return [json.loads(entry.schema_json) for entry in self._entries]
+
+    def get_schemas(self, names: Iterable[str]) -> List[Dict[str, Any]]:
+        """Fresh copies of the named schemas, ignoring unknown names"""
+        return [
+            json.loads(self._entries[self._positions[name]].schema_json)
+            for name in names if name in self._positions
+        ]
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """Score every tool against the query, best first (ties keep catalog order)"""
+        query_terms = set(tokenize(query))
+        query_vector = embed_text(query)
+
+        lexical = []
+        for i, entry in enumerate(self._entries):
+            counts = self._term_counts[i]
+            score = 0.0
+            for term in query_terms:
+                tf = counts.get(term)
+                if not tf:
+                    continue
+                norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * entry.length / (self._avg_length or 1))
+                score += self._idf[term] * tf * (_BM25_K1 + 1) / (tf + norm)
+            lexical.append(score)
+
+        max_lexical = max(lexical, default=0.0) or 1.0
+        scored = []
+        for i, entry in enumerate(self._entries):
+            semantic = _cosine(query_vector, self._vectors[i]) if query_vector else 0.0
+            fused = _LEXICAL_WEIGHT * (lexical[i] / max_lexical) + (1 - _LEXICAL_WEIGHT) * semantic
+            scored.append((entry.name, fused, i))
+
+        scored.sort(key=lambda item: (-item[1], item[2]))
+        return [(name, score) for name, score, _ in scored]
+
+    def select(self, query: str, top_k: int = 8, pinned: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Pinned tools plus the top-K most relevant tools for the query"""
+        selected = list(dict.fromkeys(name for name in pinned if name in self._positions))
+        limit = top_k + len(selected)
+        for name, _ in self.rank(query):
+            if len(selected) >= limit:
+                break
+            if name not in selected:
+                selected.append(name)
+        return self.get_schemas(selected)
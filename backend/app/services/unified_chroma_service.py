@@ -12,9 +12,16 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
-import chromadb
-from chromadb.config import Settings
 import asyncio
+import threading
+import time
+
+from .chroma_filters import add_epoch_fields, compile_filter
+from .chroma_ingestion import ChromaIngestionQueue
+from .chroma_retention import get_partitioned_collection
+from .chroma_runtime import chroma_runtime
+from .embedding_service import embedding_service
+from .portfolio_context_store import mention_event, portfolio_context_store
 
 logger = logging.getLogger(__name__)
 
@@ -65,27 +72,85 @@ class UnifiedChromaService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.chroma_client = None
-        self.collections = {}
-        self.memory_path = os.path.join(os.path.expanduser("~"), ".redpill", "unified_memory")
-        self._initialize_chroma()
+        self.memory_path = chroma_runtime.path
+        
+        # Chroma is opened on first use or by `initialize()` (app lifespan), never at import
+        self._collections: Dict[str, Any] = {}
+        self._partitions: Dict[str, Any] = {}
+        self._init_lock = threading.Lock()
+        self._ready = False
+        self._init_error: Optional[str] = None
+        self._init_ms: Optional[float] = None
+        
+        # Write-behind queue: stores return immediately, writes are batched per collection
+        self.ingestion = ChromaIngestionQueue(
+            lambda name: self.collections.get(name) or chroma_runtime.get_collection(name),
+            name="unified_memory",
+            embedder=embedding_service.embed,
+            runner=chroma_runtime.run
+        )
+        
+        # Portfolio context is materialized from portfolio_memory writes
+        portfolio_context_store.add_loader(self._portfolio_events)
+    
+    @property
+    def collections(self) -> Dict[str, Any]:
+        self._ensure_initialized()
+        return self._collections
+    
+    @property
+    def partitions(self) -> Dict[str, Any]:
+        """Collections with a retention policy, written to monthly buckets"""
+        self._ensure_initialized()
+        return self._partitions
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready
+    
+    async def initialize(self) -> bool:
+        """Open Chroma and all collections off the event loop; safe to call repeatedly"""
+        if self._ready:
+            return True
+        try:
+            await chroma_runtime.run(self._ensure_initialized)
+            return True
+        except Exception:
+            return False
+    
+    def readiness(self) -> Dict[str, Any]:
+        return {"ready": self._ready, "init_ms": self._init_ms, "error": self._init_error}
+    
+    def _ensure_initialized(self):
+        if self._ready:
+            return
+        with self._init_lock:
+            if self._ready:
+                return
+            started = time.perf_counter()
+            try:
+                self._initialize_chroma()
+            except Exception as e:
+                # Left pending: the next access retries
+                self._init_error = str(e)
+                raise
+            self._partitions = {
+                name: partition for name in self._collections
+                if (partition := get_partitioned_collection(name)) is not None
+            }
+            self._init_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._init_error = None
+            self._ready = True
     
     def _initialize_chroma(self):
-        """Initialize ChromaDB with all collections"""
+        """Initialize all collections on the shared Chroma runtime"""
         try:
-            os.makedirs(self.memory_path, exist_ok=True)
-            
-            self.chroma_client = chromadb.PersistentClient(
-                path=self.memory_path,
-                settings=Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True
-                )
-            )
+            self.chroma_client = chroma_runtime.client
             
             # Initialize all collections with proper schemas
             self._create_collections()
             
-            self.logger.info(f"Unified Chroma initialized with {len(self.collections)} collections")
+            self.logger.info(f"Unified Chroma initialized with {len(self._collections)} collections")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize unified Chroma service: {e}")
@@ -164,12 +229,9 @@ class UnifiedChromaService:
         
         for name, config in collection_configs.items():
             try:
-                collection = self.chroma_client.get_or_create_collection(
-                    name=name,
-                    metadata=config["metadata"]
-                )
-                self.collections[name] = collection
-                self.logger.info(f"Initialized collection: {name} ({collection.count()} documents)")
+                # Document counts are left to get_memory_stats; counting every collection here slowed startup
+                self._collections[name] = chroma_runtime.get_collection(name, config["metadata"])
+                self.logger.debug(f"Initialized collection: {name}")
             except Exception as e:
                 self.logger.error(f"Failed to create collection {name}: {e}")
     
@@ -180,13 +242,17 @@ class UnifiedChromaService:
         tenant_id: str = "default",
         workspace_id: str = "default"
     ) -> str:
-        """Store a document in the specified collection"""
+        """
+        Queue a document for the specified collection and return its id.
+        The write happens in the background as part of a batch; call
+        `self.ingestion.flush()` when a subsequent read must see it.
+        """
         try:
+            # Opens Chroma off the event loop if the lifespan warm-up has not finished yet
+            await self.initialize()
             if collection_name not in self.collections:
                 raise ValueError(f"Collection {collection_name} does not exist")
             
-            collection = self.collections[collection_name]
-            
             # Ensure tenant isolation
             document.metadata.update({
                 "tenant_id": tenant_id,
@@ -194,15 +260,17 @@ class UnifiedChromaService:
                 "ingestion_date": datetime.now().isoformat(),
                 "doc_id": document.doc_id
             })
+            # Numeric twins of date fields so range filters can be pushed into Chroma
+            add_epoch_fields(document.metadata)
             
-            # Store in ChromaDB
-            collection.add(
-                documents=[document.content],
-                metadatas=[document.metadata],
-                ids=[document.doc_id]
-            )
+            target = collection_name
+            partition = self.partitions.get(collection_name)
+            if partition is not None:
+                target = partition.bucket_name_for(partition.stamp(document.metadata))
             
-            self.logger.info(f"Stored document {document.doc_id} in {collection_name}")
+            await self.ingestion.enqueue(target, document.doc_id, document.content, document.metadata)
+            
+            self.logger.debug(f"Queued document {document.doc_id} for {collection_name}")
             return document.doc_id
             
         except Exception as e:
@@ -215,34 +283,39 @@ class UnifiedChromaService:
         query: str,
         filters: Optional[Dict[str, Any]] = None,
         tenant_id: str = "default",
-        workspace_id: str = "default",
+        workspace_id: Optional[str] = "default",
         n_results: int = 10
     ) -> List[Dict[str, Any]]:
-        """Perform semantic search with tenant isolation and filters"""
+        """
+        Perform semantic search with tenant/workspace isolation and filters.
+        `filters` is compiled by `chroma_filters.compile_filter` (AND/OR, ranges,
+        $in lists, `$document` text matching) and evaluated inside Chroma, so the
+        n_results nearest neighbours are taken from matching documents only.
+        Pass workspace_id=None to search across workspaces. An invalid filter spec
+        raises FilterError rather than being silently widened.
+        """
+        compiled = compile_filter(filters, tenant_id=tenant_id, workspace_id=workspace_id)
         try:
-            if collection_name not in self.collections:
+            await self.initialize()
+            if collection_name not in self.collections or compiled.matches_nothing:
                 return []
             
-            collection = self.collections[collection_name]
-            
-            # Build where clause with tenant isolation - use $and for multiple conditions
-            where_clause = {"tenant_id": tenant_id}  # Simplified for now
-            
-            # Add additional filters one at a time (Chroma limitation)
-            if filters and len(filters) == 1:
-                # Only add simple single filters for now
-                key, value = next(iter(filters.items()))
-                if isinstance(value, dict) and "$eq" in value:
-                    where_clause[key] = value["$eq"]
-                elif isinstance(value, dict) and "$in" in value and len(value["$in"]) == 1:
-                    where_clause[key] = value["$in"][0]
-            
-            # Execute search
-            results = collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=where_clause
-            )
+            # Execute search (repeated questions hit the embedding cache)
+            query_embedding = await embedding_service.embed_one(query)
+            partition = self.partitions.get(collection_name)
+            if partition is not None:
+                results = await partition.query(
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    **compiled.query_kwargs()
+                )
+            else:
+                results = await chroma_runtime.run(
+                    self.collections[collection_name].query,
+                    query_embeddings=[query_embedding],
+                    n_results=n_results,
+                    **compiled.query_kwargs()
+                )
             
             # Format results
             formatted_results = []
@@ -267,52 +340,45 @@ class UnifiedChromaService:
         tenant_id: str = "default",
         query: str = "current holdings and watchlist"
     ) -> Dict[str, Any]:
-        """Get portfolio-aware context for AI responses"""
+        """
+        Get portfolio-aware context for AI responses.
+        Served from the materialized portfolio state; `query` is accepted for
+        compatibility but no vector search is needed.
+        """
         try:
-            # Search portfolio memory (simplified query due to Chroma limitations)
-            portfolio_results = await self.semantic_search(
-                "portfolio_memory", 
-                query,
-                tenant_id=tenant_id,
-                n_results=20
-            )
-            
-            # Extract symbols and companies
-            tracked_symbols = set()
-            portfolio_context = {
-                "symbols": [],
-                "sectors": [],
-                "holdings": [],
-                "watchlist": [],
-                "last_updated": None
-            }
-            
-            for result in portfolio_results:
-                metadata = result["metadata"]
-                if metadata.get("ticker"):
-                    tracked_symbols.add(metadata["ticker"])
-                if metadata.get("action_type") == "buy":
-                    portfolio_context["holdings"].append({
-                        "symbol": metadata.get("ticker"),
-                        "sector": metadata.get("sector"),
-                        "date": metadata.get("date")
-                    })
-                elif metadata.get("action_type") in ["track", "watch"]:
-                    portfolio_context["watchlist"].append({
-                        "symbol": metadata.get("ticker"),
-                        "sector": metadata.get("sector")
-                    })
-            
-            portfolio_context["symbols"] = list(tracked_symbols)
-            portfolio_context["sectors"] = list(set(h.get("sector") for h in 
-                                                portfolio_context["holdings"] + portfolio_context["watchlist"]
-                                                if h.get("sector")))
-            
-            return portfolio_context
-            
+            return await portfolio_context_store.get(tenant_id)
         except Exception as e:
             self.logger.error(f"Failed to get portfolio context: {e}")
-            return {"symbols": [], "sectors": [], "holdings": [], "watchlist": []}
+            return {"symbols": [], "sectors": [], "holdings": [], "watchlist": [], "last_updated": None}
+    
+    async def _portfolio_events(self, tenant_id: str) -> List[Dict[str, Any]]:
+        """Replay a tenant's portfolio_memory entries (metadata only) for a context rebuild"""
+        await self.initialize()
+        collection = self.collections.get("portfolio_memory")
+        if collection is None:
+            return []
+        await self.ingestion.flush()
+        
+        events = []
+        offset, page_size = 0, 500
+        while True:
+            page = await chroma_runtime.run(
+                collection.get,
+                where={"tenant_id": tenant_id},
+                include=["metadatas"],
+                limit=page_size,
+                offset=offset
+            )
+            for metadata in page["metadatas"]:
+                metadata = metadata or {}
+                if metadata.get("ticker"):
+                    events.append(mention_event(
+                        metadata["ticker"], metadata.get("action_type"), metadata.get("date"), metadata.get("sector")
+                    ))
+            if len(page["ids"]) < page_size:
+                break
+            offset += len(page["ids"])
+        return events
     
     async def store_conversation_with_context(
         self,
@@ -384,18 +450,20 @@ class UnifiedChromaService:
                 elif any(word in context.lower() for word in ["watch", "monitor", "track"]):
                     action_type = "watch"
                 
+                date = datetime.now().isoformat()
                 portfolio_doc = ChromaDocument(
                     content=f"User mentioned {symbol} in context: {context[:200]}",
                     metadata={
                         "source_type": SourceType.PORTFOLIO.value,
                         "ticker": symbol,
                         "action_type": action_type,
-                        "date": datetime.now().isoformat(),
+                        "date": date,
                         "context": context[:300]
                     }
                 )
                 
                 await self.store_document("portfolio_memory", portfolio_doc, tenant_id)
+                await portfolio_context_store.record_async(tenant_id, mention_event(symbol, action_type, date))
                 
         except Exception as e:
             self.logger.error(f"Failed to store portfolio entities: {e}")
@@ -407,11 +475,14 @@ class UnifiedChromaService:
                 "collections": {},
                 "total_documents": 0,
                 "storage_path": self.memory_path,
-                "status": "active"
+                "status": "active",
+                "ingestion": self.ingestion.stats(),
+                "portfolio_context": portfolio_context_store.stats()
             }
             
             for name, collection in self.collections.items():
-                count = collection.count()
+                partition = self.partitions.get(name)
+                count = partition.count() if partition is not None else collection.count()
                 stats["collections"][name] = count
                 stats["total_documents"] += count
             
@@ -0,0 +1,285 @@
+"""
+Widget Cache - Two-tier cache for dashboard widget data
+An in-memory front tier over the widget_data_cache table. Keys are derived from the
+widget type and config, the company, and a fingerprint of the company's data sources
+and cached company data, so changing a data source or refreshing company data makes
+every dependent widget miss. Writes to those tables also drop the company's entries
+from the front tier, and a whole layout is read back with one query. Structured widgets
+also read the company's people, tags, ownership and activities; writes to those delete
+the company's stored structured entries in the same transaction.
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple, Awaitable
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select, col
+
+from ..models.dashboards import CompanyDataSource, DashboardLayout, WidgetConfiguration, WidgetDataCache, WidgetType
+from ..models.cache import CompanyDataCache
+from ..models.companies import Company
+from ..models.persons import Person
+from ..models.tags import Tag, CompanyTag
+from ..models.ownership import Ownership
+from ..models.activities import Activity
+from .commit_invalidation import invalidate_on_commit, note_change
+
+logger = logging.getLogger(__name__)
+
+# Time to live per widget type; market data goes stale much faster than fundamentals
+WIDGET_TTLS = {
+    WidgetType.PRICE_CHART.value: timedelta(minutes=5),
+    WidgetType.TECHNICAL_ANALYSIS.value: timedelta(minutes=5),
+    WidgetType.NEWS_FEED.value: timedelta(minutes=15),
+    WidgetType.PORTFOLIO_ALLOCATION.value: timedelta(hours=1),
+    WidgetType.FUNDAMENTALS.value: timedelta(hours=6),
+    WidgetType.PEER_COMPARISON.value: timedelta(hours=6),
+    # Structured widgets from /data/companies/{id}/structured-widgets
+    "activity": timedelta(minutes=10),
+    "financial": timedelta(hours=1),
+    "profile": timedelta(hours=6),
+    "team": timedelta(hours=6),
+    "tags": timedelta(hours=6),
+    "ownership": timedelta(hours=6),
+}
+DEFAULT_TTL = timedelta(hours=1)
+
+# Longest the front tier serves an entry without reading the table
+MEMORY_TTL = timedelta(seconds=30)
+
+KEY_PREFIX = "widget"
+
+# Widget type of /data/companies/{id}/structured-widgets entries
+STRUCTURED_WIDGET_TYPE = "structured"
+
+
+def company_identifier(name: str) -> str:
+    """CompanyDataCache.company_identifier for a company name"""
+    return name.lower().replace(" ", "").replace("-", "")
+
+
+def _widget_type(widget_type: Any) -> str:
+    return widget_type.value if isinstance(widget_type, WidgetType) else str(widget_type)
+
+
+def _config(config: Any) -> Dict[str, Any]:
+    """Widget config as a dict (WidgetConfiguration stores it as a JSON string)"""
+    if isinstance(config, str):
+        try:
+            return json.loads(config or "{}")
+        except json.JSONDecodeError:
+            return {"raw": config}
+    return dict(config or {})
+
+
+def ttl_for(widget_type: Any) -> timedelta:
+    return WIDGET_TTLS.get(_widget_type(widget_type), DEFAULT_TTL)
+
+
+def _key_prefix(company_id: str, widget_type: Any = None) -> str:
+    prefix = f"{KEY_PREFIX}:{company_id}:"
+    return prefix if widget_type is None else f"{prefix}{_widget_type(widget_type)}:"
+
+
+class WidgetCache:
+    """Widget data cache over widget_data_cache with an in-memory front tier"""
+
+    def __init__(self, memory_ttl: timedelta = MEMORY_TTL, clock: Callable[[], datetime] = datetime.utcnow):
+        self._memory_ttl = memory_ttl
+        self._clock = clock
+        self._memory: Dict[str, Tuple[datetime, Any]] = {}
+        self._versions: Dict[str, Tuple[datetime, str]] = {}
+        self._identifiers: Dict[str, str] = {}  # CompanyDataCache identifier -> company id
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "invalidations": 0}
+
+    # ---- keys ----
+
+    def cache_key(self, company_id: str, widget_type: Any, config: Any, versions: str) -> str:
+        """Deterministic key; the company prefix lets invalidation find every entry for a company"""
+        payload = json.dumps({"config": _config(config), "versions": versions}, sort_keys=True, default=str)
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        return f"{_key_prefix(company_id, widget_type)}{digest}"
+
+    def data_versions(self, session: Session, company_id: str) -> str:
+        """Fingerprint of the company's data sources and cached company data"""
+        now = self._clock()
+        cached = self._versions.get(company_id)
+        if cached and now < cached[0]:
+            return cached[1]
+
+        sources = session.exec(
+            select(CompanyDataSource.id, CompanyDataSource.updated_at, CompanyDataSource.ticker_symbol,
+                   CompanyDataSource.exchange, CompanyDataSource.asset_type, CompanyDataSource.is_primary,
+                   CompanyDataSource.sector_index, CompanyDataSource.peer_tickers)
+            .where(CompanyDataSource.company_id == company_id)
+            .order_by(col(CompanyDataSource.id))
+        ).all()
+        company = session.get(Company, company_id)
+        cached_data = []
+        if company:
+            identifier = company_identifier(company.name)
+            self._identifiers[identifier] = company_id
+            cached_data = session.exec(
+                select(CompanyDataCache.data_type, CompanyDataCache.data_version, CompanyDataCache.updated_at)
+                .where(CompanyDataCache.company_identifier == identifier)
+                .order_by(col(CompanyDataCache.data_type))
+            ).all()
+
+        payload = json.dumps([[list(row) for row in sources], [list(row) for row in cached_data]], default=str)
+        versions = hashlib.sha1(payload.encode()).hexdigest()[:16]
+        self._versions[company_id] = (now + self._memory_ttl, versions)
+        return versions
+
+    # ---- reads ----
+
+    def get_many(self, session: Session, company_id: str,
+                 widgets: Iterable[Tuple[Any, Any]]) -> List[Tuple[str, Optional[Any]]]:
+        """(key, data or None) per (widget_type, config); database misses are read in one query"""
+        versions = self.data_versions(session, company_id)
+        keys = [self.cache_key(company_id, widget_type, config, versions) for widget_type, config in widgets]
+        now = self._clock()
+
+        found: Dict[str, Any] = {}
+        for key in keys:
+            entry = self._memory.get(key)
+            if entry is not None and now < entry[0]:
+                found[key] = entry[1]
+                self._stats["memory_hits"] += 1
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            rows = session.exec(
+                select(WidgetDataCache.cache_key, WidgetDataCache.expires_at, WidgetDataCache.data)
+                .where(col(WidgetDataCache.cache_key).in_(missing), WidgetDataCache.expires_at > now)
+            ).all()
+            for key, expires_at, data in rows:
+                value = json.loads(data or "null")
+                found[key] = value
+                self._memory[key] = (min(expires_at, now + self._memory_ttl), value)
+                self._stats["db_hits"] += 1
+            self._stats["misses"] += len([key for key in missing if key not in found])
+
+        return [(key, found.get(key)) for key in keys]
+
+    def get(self, session: Session, company_id: str, widget_type: Any, config: Any = None) -> Optional[Any]:
+        return self.get_many(session, company_id, [(widget_type, config)])[0][1]
+
+    def get_layout(self, session: Session, layout_id: str) -> Optional[Dict[str, Any]]:
+        """Cached data for every visible widget in a layout (None where not cached)"""
+        layout = session.get(DashboardLayout, layout_id)
+        if not layout:
+            return None
+        widgets = session.exec(
+            select(WidgetConfiguration).where(
+                WidgetConfiguration.dashboard_layout_id == layout_id,
+                WidgetConfiguration.is_visible == True
+            )
+        ).all()
+        cached = self.get_many(session, layout.company_id, [(widget.widget_type, widget.config) for widget in widgets])
+        return {
+            widget.id: {"widget_type": _widget_type(widget.widget_type), "cache_key": key, "cached": data is not None, "data": data}
+            for widget, (key, data) in zip(widgets, cached)
+        }
+
+    # ---- writes ----
+
+    def set(self, session: Session, company_id: str, widget_type: Any, config: Any, data: Any,
+            ttl: Optional[timedelta] = None) -> str:
+        """Store widget data under its current key (the caller commits); returns the key"""
+        key = self.cache_key(company_id, widget_type, config, self.data_versions(session, company_id))
+        now = self._clock()
+        expires_at = now + (ttl or ttl_for(widget_type))
+        session.exec(delete(WidgetDataCache).where(WidgetDataCache.cache_key == key))
+        session.add(WidgetDataCache(cache_key=key, expires_at=expires_at, data=json.dumps(data, default=str), created_at=now))
+        self._memory[key] = (min(expires_at, now + self._memory_ttl), data)
+        return key
+
+    async def get_or_compute(self, session: Session, company_id: str, widget_type: Any, config: Any,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached widget data, computing and storing it on a miss"""
+        data = self.get(session, company_id, widget_type, config)
+        if data is None:
+            data = await compute()
+            self.set(session, company_id, widget_type, config, data)
+            session.commit()
+        return data
+
+    def forget_company(self, company_id: str, widget_type: Any = None) -> None:
+        """Drop a company's front-tier entries (of one widget type when given) and data fingerprint"""
+        prefix = _key_prefix(company_id, widget_type)
+        self._versions.pop(company_id, None)
+        for key in [key for key in self._memory if key.startswith(prefix)]:
+            del self._memory[key]
+        self._stats["invalidations"] += 1
+
+    def forget_identifier(self, identifier: str) -> None:
+        company_id = self._identifiers.get(identifier)
+        if company_id:
+            self.forget_company(company_id)
+
+    def invalidate_company(self, session: Session, company_id: str, widget_type: Any = None) -> int:
+        """
+        Delete every stored widget entry (of one widget type when given) for a company
+        (the caller commits); returns rows deleted
+        """
+        self.forget_company(company_id, widget_type)
+        result = session.exec(delete(WidgetDataCache).where(col(WidgetDataCache.cache_key).startswith(_key_prefix(company_id, widget_type))))
+        return result.rowcount or 0
+
+    def purge_expired(self, session: Session) -> int:
+        """Delete expired rows (including entries orphaned by data source changes)"""
+        now = self._clock()
+        self._memory = {key: entry for key, entry in self._memory.items() if now < entry[0]}
+        result = session.exec(delete(WidgetDataCache).where(WidgetDataCache.expires_at <= now))
+        session.commit()
+        return result.rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "memory_entries": len(self._memory)}
+
+
+# Global instance
+widget_cache = WidgetCache()
+
+
+def _forget_company(company_id: str) -> None:
+    widget_cache.forget_company(company_id)
+
+
+def _forget_identifier(identifier: str) -> None:
+    widget_cache.forget_identifier(identifier)
+
+
+def _forget_structured(company_id: str) -> None:
+    widget_cache.forget_company(company_id, STRUCTURED_WIDGET_TYPE)
+
+
+invalidate_on_commit({
+    CompanyDataSource: (lambda source: source.company_id, _forget_company),
+    CompanyDataCache: (lambda cached: cached.company_identifier, _forget_identifier),
+})
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _drop_structured_widgets(session, flush_context):
+    structured, tag_ids = set(), set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (Person, Ownership, Activity, CompanyTag)) and instance.company_id:
+            structured.add(instance.company_id)
+        elif isinstance(instance, Tag):
+            tag_ids.add(instance.id)
+
+    if tag_ids:
+        structured.update(session.connection().execute(
+            select(CompanyTag.company_id).where(col(CompanyTag.tag_id).in_(tag_ids))
+        ).scalars())
+    # Stored entries are keyed on data source versions only, so drop them with this transaction
+    for company_id in structured:
+        session.connection().execute(
+            delete(WidgetDataCache).where(col(WidgetDataCache.cache_key).startswith(_key_prefix(company_id, STRUCTURED_WIDGET_TYPE)))
+        )
+        note_change(session, _forget_structured, company_id)
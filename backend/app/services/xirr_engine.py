@@ -0,0 +1,259 @@
+"""
+XIRR Engine - Vectorized IRR for irregular cashflows
+Solves many IRRs at once (per deal, sector, vintage, or rolling by quarter): discount
+factors are computed in array form over every cashflow of every group, each group's
+root is bracketed by a sign change of NPV, and a safeguarded Newton iteration (bisection
+whenever Newton would leave the bracket or stall) refines all brackets in lockstep
+"""
+
+from typing import Dict, List, Any, Optional, Sequence, Hashable, Tuple, Callable
+from datetime import date, datetime
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_YEAR = 365.0
+
+# Candidate rates for bracketing; adjacent pairs with an NPV sign change hold a root
+RATE_LADDER = np.array([
+    -0.9999, -0.99, -0.95, -0.9, -0.75, -0.5, -0.25, -0.1, 0.0, 0.05, 0.1, 0.2, 0.35,
+    0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 25.0, 100.0, 1000.0, 1e4,
+])
+
+# Finer ladder for dense cashflow matrices, where every rung is one column of a matrix product
+GRID_RATES = np.expm1(np.linspace(np.log1p(-0.99), np.log1p(100.0), 257))
+
+# Rungs for grouped brackets: the fine grid resolves pairs of nearby roots (NPV dipping back
+# across zero between coarse rungs), the coarse ladder adds the extreme rates
+BRACKET_RATES = np.union1d(RATE_LADDER, GRID_RATES)
+
+DEFAULT_GUESS = 0.1
+
+
+def to_days(dates: Sequence[Any]) -> np.ndarray:
+    """Dates (date, datetime, ISO string, datetime64) or integer day numbers as day numbers"""
+    if isinstance(dates, np.ndarray):
+        if dates.dtype.kind in "iu":
+            return dates.astype(np.int64)
+        if dates.dtype.kind == "M":
+            return dates.astype("datetime64[D]").astype(np.int64)
+    values = [d.date() if isinstance(d, datetime) else d for d in dates]
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def _npv_and_derivative(rates: np.ndarray, group: np.ndarray, years: np.ndarray, amounts: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """NPV and dNPV/dr per group at each group's rate"""
+    log_growth = np.log1p(rates)[group]
+    with np.errstate(over="ignore", invalid="ignore"):
+        discounted = amounts * np.exp(-years * log_growth)
+        npv = np.bincount(group, weights=discounted, minlength=n_groups)
+        slope = np.bincount(group, weights=-years * discounted, minlength=n_groups) / (1.0 + rates)
+    return npv, slope
+
+
+def _closest_bracket(values: np.ndarray, ladder: np.ndarray, guess: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per column of NPVs at each `ladder` rate (lo, hi, found): the sign-change interval closest to `guess`"""
+    with np.errstate(invalid="ignore"):
+        changes = (np.sign(values[:-1]) * np.sign(values[1:]) <= 0) & np.isfinite(values[:-1]) & np.isfinite(values[1:])
+    midpoints = (ladder[:-1] + ladder[1:]) / 2
+    distance = np.where(changes, np.abs(np.log1p(midpoints) - np.log1p(guess))[:, None], np.inf)
+    best = np.argmin(distance, axis=0)
+    found = np.isfinite(distance[best, np.arange(values.shape[1])])
+    return ladder[best], ladder[best + 1], found
+
+
+def _bracket(group: np.ndarray, years: np.ndarray, amounts: np.ndarray, n_groups: int, guess: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per group (lo, hi, found): the sign-change interval of BRACKET_RATES closest to `guess`"""
+    values = np.empty((len(BRACKET_RATES), n_groups))
+    for k, rate in enumerate(BRACKET_RATES):
+        values[k], _ = _npv_and_derivative(np.full(n_groups, rate), group, years, amounts, n_groups)
+    return _closest_bracket(values, BRACKET_RATES, guess)
+
+
+def xirr_many(
+    group: Sequence[int],
+    dates: Sequence[Any],
+    amounts: Sequence[float],
+    n_groups: Optional[int] = None,
+    guess: float = DEFAULT_GUESS,
+    tol: float = 1e-10,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Annualized IRR of every group of cashflows in one vectorized solve.
+
+    `group[i]` is the group index (0..n_groups-1) of cashflow i. Time is measured from
+    each group's first cashflow. Groups without an IRR (no sign change in their
+    cashflows, or no bracketed root) are NaN.
+    """
+    group = np.asarray(group, dtype=np.int64)
+    amounts = np.asarray(amounts, dtype=float)
+    days = to_days(dates)
+    n_groups = int(n_groups if n_groups is not None else (group.max() + 1 if len(group) else 0))
+    rates = np.full(n_groups, np.nan)
+    if n_groups == 0:
+        return rates
+
+    first_day = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first_day, group, days)
+    years = (days - first_day[group]) / DAYS_PER_YEAR
+
+    # An IRR needs both an outflow and an inflow
+    has_in = np.bincount(group, weights=(amounts > 0), minlength=n_groups) > 0
+    has_out = np.bincount(group, weights=(amounts < 0), minlength=n_groups) > 0
+    lo, hi, found = _bracket(group, years, amounts, n_groups, guess)
+    solvable = has_in & has_out & found
+
+    x = _refine(lambda r: _npv_and_derivative(r, group, years, amounts, n_groups), lo, hi, solvable, guess, tol, max_iter)
+    rates[solvable] = x[solvable]
+    return rates
+
+
+def _refine(npv: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]], lo: np.ndarray, hi: np.ndarray,
+            solvable: np.ndarray, guess: float, tol: float, max_iter: int) -> np.ndarray:
+    """Safeguarded Newton on every bracket in lockstep; `npv(rates)` gives NPV and slope per group"""
+    f_lo, _ = npv(lo)
+    x = np.clip(np.full(len(lo), guess), lo, hi)
+    x = np.where((x > lo) & (x < hi), x, (lo + hi) / 2)
+    step_before = hi - lo
+    active = solvable.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        f, fp = npv(x)
+
+        # Keep the root bracketed
+        same_side = np.sign(f) == np.sign(f_lo)
+        lo = np.where(active & same_side, x, lo)
+        f_lo = np.where(active & same_side, f, f_lo)
+        hi = np.where(active & ~same_side, x, hi)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - f / fp
+        # Bisect when Newton leaves the bracket or would not halve the previous step
+        bisect = ~np.isfinite(newton) | (newton <= lo) | (newton >= hi) | (np.abs(2 * f) > np.abs(step_before * fp))
+        x_next = np.where(bisect, (lo + hi) / 2, newton)
+        step_before = np.abs(x_next - x)
+
+        converged = (step_before <= tol * (1 + np.abs(x))) | (f == 0) | (hi - lo <= tol * (1 + np.abs(x)))
+        x = np.where(active & (f != 0), x_next, x)
+        active &= ~converged
+
+    if active.any():
+        logger.debug(f"XIRR hit max_iter for {int(active.sum())} groups; returning bracket midpoints")
+    return x
+
+
+def _dense_npv(rates: np.ndarray, years: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """NPV and dNPV/dr of every row of a cashflow matrix at that row's rate"""
+    with np.errstate(over="ignore", invalid="ignore"):
+        discounted = amounts * np.exp(-years[None, :] * np.log1p(rates)[:, None])
+        return discounted.sum(axis=1), -(discounted * years[None, :]).sum(axis=1) / (1.0 + rates)
+
+
+def xirr_matrix(
+    amounts: np.ndarray,
+    dates: Sequence[Any],
+    guess: float = DEFAULT_GUESS,
+    tol: float = 1e-10,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Annualized IRR of every row of a (series, dates) cashflow matrix on one shared date
+    grid, such as simulated quarterly fund flows. NPVs over GRID_RATES come from a single
+    matrix product, so brackets are narrow and Newton needs few steps. Rows without an
+    IRR are NaN.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    rates = np.full(amounts.shape[0], np.nan)
+    if not amounts.size:
+        return rates
+    days = to_days(dates)
+    years = (days - days.min()) / DAYS_PER_YEAR
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        values = (amounts @ np.exp(-np.outer(years, np.log1p(GRID_RATES)))).T
+    lo, hi, found = _closest_bracket(values, GRID_RATES, guess)
+    solvable = (amounts > 0).any(axis=1) & (amounts < 0).any(axis=1) & found
+
+    x = _refine(lambda r: _dense_npv(r, years, amounts), lo, hi, solvable, guess, tol, max_iter)
+    rates[solvable] = x[solvable]
+    return rates
+
+
+def _optional(rate: float) -> Optional[float]:
+    return None if np.isnan(rate) else float(rate)
+
+
+def xirr(dates: Sequence[Any], amounts: Sequence[float], guess: float = DEFAULT_GUESS) -> Optional[float]:
+    """IRR of one cashflow series, or None if it has none"""
+    if len(amounts) < 2:
+        return None
+    return _optional(xirr_many(np.zeros(len(amounts), dtype=np.int64), dates, amounts, n_groups=1, guess=guess)[0])
+
+
+def xirr_by(keys: Sequence[Hashable], dates: Sequence[Any], amounts: Sequence[float], guess: float = DEFAULT_GUESS) -> Dict[Hashable, Optional[float]]:
+    """IRR per distinct key (deal id, sector, vintage year, ...) of the cashflows"""
+    if not len(keys):
+        return {}
+    labels, group = np.unique(np.asarray(keys, dtype=object).astype(str), return_inverse=True)
+    originals = {str(key): key for key in keys}
+    rates = xirr_many(group, dates, amounts, n_groups=len(labels), guess=guess)
+    return {originals[label]: _optional(rate) for label, rate in zip(labels, rates)}
+
+
+def period_ends(start: date, end: date, months: int = 3) -> List[date]:
+    """Calendar period-end dates (months=1 monthly, 3 quarterly, 12 yearly) from the period containing `start` through `end`"""
+    ends = []
+    year, period = start.year, (start.month - 1) // months
+    while True:
+        month = period * months + months
+        last = date(year + (month // 12), month % 12 + 1, 1).toordinal() - 1
+        period_end = date.fromordinal(last)
+        if period_end > end:
+            # Include the partial current period as of `end`
+            if not ends or ends[-1] < end:
+                ends.append(end)
+            return ends
+        ends.append(period_end)
+        year, period = (year + 1, 0) if period == 12 // months - 1 else (year, period + 1)
+
+
+def quarter_ends(start: date, end: date) -> List[date]:
+    """Calendar quarter-end dates from the quarter containing `start` through `end`"""
+    return period_ends(start, end, months=3)
+
+
+def rolling_xirr(
+    dates: Sequence[Any],
+    amounts: Sequence[float],
+    as_of: Sequence[Any],
+    terminal_values: Optional[Sequence[float]] = None,
+    guess: float = DEFAULT_GUESS,
+) -> List[Optional[float]]:
+    """
+    Since-inception IRR as of each date in `as_of` (e.g. quarter_ends), solved together.
+    `terminal_values[j]` (e.g. NAV at that date) is added as an inflow on as_of[j].
+    """
+    days = to_days(dates)
+    amounts = np.asarray(amounts, dtype=float)
+    cutoffs = to_days(as_of)
+    included = days[None, :] <= cutoffs[:, None]
+    group, flow = np.nonzero(included)
+
+    all_group, all_days, all_amounts = [group], [days[flow]], [amounts[flow]]
+    if terminal_values is not None:
+        terminal = np.asarray(terminal_values, dtype=float)
+        nonzero = np.nonzero(terminal)[0]
+        all_group.append(nonzero)
+        all_days.append(cutoffs[nonzero])
+        all_amounts.append(terminal[nonzero])
+
+    rates = xirr_many(
+        np.concatenate(all_group), np.concatenate(all_days), np.concatenate(all_amounts),
+        n_groups=len(cutoffs), guess=guess
+    )
+    return [_optional(rate) for rate in rates]
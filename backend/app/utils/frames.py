@@ -0,0 +1,26 @@
+"""
+Frame Utilities - JSON-ready output for pandas frames
+Shared by the services that compute with pandas (KPI store, portfolio valuation,
+cap table) and return rows to the API.
+"""
+
+from typing import Dict, List, Any
+from datetime import datetime, date
+
+import numpy as np
+import pandas as pd
+
+
+def records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Frame rows as JSON-ready dicts (index levels included, NaN as None, dates as ISO strings)"""
+    if frame.index.names != [None]:
+        frame = frame.reset_index()
+    frame = frame.astype(object).where(frame.notna(), None)
+    rows = frame.to_dict("records")
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, (date, datetime)):
+                row[key] = value.isoformat()
+            elif isinstance(value, np.generic):
+                row[key] = value.item()
+    return rows
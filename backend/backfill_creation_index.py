@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Mirror creations already stored in Chroma into the creation_records index.
+Safe to run more than once.
+"""
+
+import argparse
+import asyncio
+
+from app.database import create_db_and_tables
+from app.services.creation_recorder import creation_recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the creation_records index from Chroma")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    indexed = asyncio.run(creation_recorder.rebuild_index(batch_size=args.batch_size))
+    print(f"✅ Indexed {indexed} creations into creation_records")
+
+
+if __name__ == "__main__":
+    main()
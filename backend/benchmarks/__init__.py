@@ -0,0 +1 @@
+"""Offline benchmarking tools for the RedPill backend."""
@@ -0,0 +1,133 @@
+"""
+Analytics Benchmark - Latency of the in-process analytics hot paths
+Times BM25 keyword search over the hybrid search index, batched XIRR over many deals,
+and cap table computation (cold and cached) for a company with many holders, at each
+requested size. Everything runs in-process on synthetic data and an in-memory SQLite
+database, so no services are needed.
+
+Usage:
+    python -m benchmarks.analytics_benchmark --sizes 1000,5000,20000 --repeat 20
+    python -m benchmarks.analytics_benchmark --cases bm25,xirr --json analytics.json
+"""
+
+from typing import Dict, List, Any, Callable
+import argparse
+import json
+import time
+
+import numpy as np
+
+from .terminal_benchmark import percentile
+
+CASES = ("bm25", "xirr", "cap_table")
+
+
+def measure(run: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """p50/p95/max milliseconds of `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"p50_ms": percentile(timings, 50), "p95_ms": percentile(timings, 95), "max_ms": max(timings)}
+
+
+def bench_bm25(size: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    from app.services.hybrid_search import BM25Index
+
+    index = BM25Index()
+    for i in range(size):
+        index.add(f"d{i}", f"chart {['btc', 'eth', 'sol', 'aapl'][i % 4]} price history report {i}")
+    return {"search": measure(lambda: index.search("eth price", limit=20), repeat)}
+
+
+def bench_xirr(size: int, repeat: int, per_group: int = 8) -> Dict[str, Dict[str, float]]:
+    from app.services.xirr_engine import xirr_many
+
+    rng = np.random.default_rng(0)
+    group = np.repeat(np.arange(size), per_group)
+    days = np.tile(np.arange(per_group) * 120, size) + rng.integers(0, 30, size * per_group)
+    amounts = rng.uniform(0, 2e6, size * per_group)
+    amounts[::per_group] = -5e6
+    return {"solve": measure(lambda: xirr_many(group, days, amounts, n_groups=size), repeat)}
+
+
+def bench_cap_table(size: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+
+    from app.models.companies import Company
+    from app.models.dashboards import WidgetDataCache
+    from app.models.ownership import Ownership
+    from app.models.persons import Person
+    from app.models.users import User
+    from app.services.cap_table import CapTableEngine
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Person.__table__, Ownership.__table__, WidgetDataCache.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(Company(id="token", name="Token"))
+        for i in range(size):
+            session.add(Person(id=f"h{i}", name=f"Holder {i}"))
+            session.add(Ownership(company_id="token", person_id=f"h{i}", ownership_type="INVESTOR", shares=(i + 1) * 10))
+        session.commit()
+
+    cap_tables = CapTableEngine()
+    with Session(engine) as session:
+        def cold():
+            cap_tables.clear()
+            cap_tables.cap_table(session, "token")
+
+        results = {"compute": measure(cold, repeat)}
+        results["cached"] = measure(lambda: cap_tables.cap_table(session, "token"), repeat)
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int, int], Dict[str, Dict[str, float]]]] = {
+    "bm25": bench_bm25,
+    "xirr": bench_xirr,
+    "cap_table": bench_cap_table,
+}
+
+
+def run_benchmark(sizes: List[int], cases: List[str], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for case in cases:
+        for size in sizes:
+            for step, timing in BENCHMARKS[case](size, repeat).items():
+                rows.append({"case": case, "step": step, "size": size, **timing})
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    header = f"{'case':<12}{'step':<10}{'size':>9}{'p50':>12}{'p95':>12}{'max':>12}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(f"{row['case']:<12}{row['step']:<10}{row['size']:>9,}"
+                     f"{row['p50_ms']:>10.2f}ms{row['p95_ms']:>10.2f}ms{row['max_ms']:>10.2f}ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics hot path benchmark (offline)")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="Comma list of documents / deals / holders")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma list of: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=20, help="Measured calls per case and size")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(
+        [int(s) for s in args.sizes.split(",")],
+        [c.strip() for c in args.cases.split(",") if c.strip()],
+        args.repeat,
+    )
+    print(format_report(rows))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Mock LLM Server - Offline OpenAI-compatible stand-in for benchmarking
+Serves /v1/chat/completions (plain, tool-calling and streaming), /v1/embeddings and
+/v1/models with configurable latency, token rate and scripted tool calls.
+
+Usage:
+    python -m benchmarks.mock_llm_server --port 8089 --latency-ms 400 --tokens-per-second 80
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8089/v1 uvicorn app.main:app
+"""
+
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+# Marks the terminal's intent-parse prompt; the user's command is quoted inside it
+INTENT_PROMPT_MARKER = "Return JSON with this exact structure"
+INTENT_COMMAND = re.compile(r'User command: "(.*)"')
+TICKER = re.compile(r"\b[A-Z]{2,5}\b")
+
+
+@dataclass
+class ScriptRule:
+    """
+    Reply for requests whose last user message matches `pattern`. Intent-parse prompts
+    are matched on the quoted command instead, and answered with `intent` (tickers found
+    in the command replace the scripted ones).
+    """
+    pattern: str
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)  # [{"name": ..., "arguments": {...}}]
+    content: Optional[str] = None
+    intent: Optional[Dict[str, Any]] = None  # {"intent": ..., "entities": {...}, "confidence": ...}
+
+    def matches(self, text: str) -> bool:
+        return re.search(self.pattern, text, re.IGNORECASE) is not None
+
+    def intent_reply(self, command: str) -> str:
+        entities = dict(self.intent.get("entities", {}))
+        tickers = list(dict.fromkeys(TICKER.findall(command)))
+        if tickers and "tickers" in entities:
+            entities["tickers"] = tickers
+        return json.dumps({**self.intent, "entities": entities})
+
+
+def _intent(intent: str, confidence: float = 0.95, **entities: Any) -> Dict[str, Any]:
+    return {"intent": intent, "entities": entities, "confidence": confidence}
+
+
+# Realistic defaults for the terminal query mix; tool names cover both the
+# FinancialAgent and IntelligentToolsService tool sets (first one offered wins)
+DEFAULT_SCRIPT: List[ScriptRule] = [
+    ScriptRule(r"\bimport\b.*\bportfolio\b", intent=_intent("import_portfolio", file_path="/tmp/portfolio.csv")),
+    ScriptRule(r"\b(btc|eth|sol|bitcoin|ethereum|crypto)\b.*\bprice\b|\bprice\b.*\b(btc|eth|sol|bitcoin|ethereum)\b", tool_calls=[
+        {"name": "get_crypto_price", "arguments": {"symbol": "BTC"}},
+        {"name": "get_market_data", "arguments": {"symbols": ["BTC"], "asset_type": "crypto"}},
+    ], intent=_intent("chart_token_compare", tickers=["BTC"])),
+    ScriptRule(r"\bportfolio\b", tool_calls=[
+        {"name": "get_portfolio", "arguments": {}},
+        {"name": "analyze_portfolio", "arguments": {"analysis_type": "overview"}},
+    ], intent=_intent("portfolio_overview")),
+    ScriptRule(r"\b(market overview|indices|market)\b", tool_calls=[
+        {"name": "get_market_overview", "arguments": {}},
+        {"name": "openbb_market_overview", "arguments": {}},
+    ], intent=_intent("monitor_dashboard")),
+    ScriptRule(r"\b(compare|chart)\b", tool_calls=[
+        {"name": "create_chart", "arguments": {"symbols": ["NVDA", "AMD"]}},
+        {"name": "generate_multi_asset_comparison_chart", "arguments": {"symbols": ["NVDA", "AMD"]}},
+    ], intent=_intent("chart_company", tickers=["NVDA", "AMD"], action="compare")),
+    ScriptRule(r"\bnews\b", intent=_intent("news_analysis", tickers=["AAPL"], action="news")),
+    ScriptRule(r"\b(research|news)\b", tool_calls=[
+        {"name": "deep_research", "arguments": {"query": "AI chips"}},
+        {"name": "create_investment_analysis", "arguments": {"target": "AI chips"}},
+    ], intent=_intent("generate_research")),
+    ScriptRule(r"\b(quotes?|price|fundamentals|income statement)\b", intent=_intent("chart_company", tickers=["AAPL"])),
+    ScriptRule(r"\bcompan(y|ies)\b", intent=_intent("company_analysis")),
+    ScriptRule(r".", intent=_intent("system_control", confidence=0.6, action="help")),
+]
+
+
+@dataclass
+class MockConfig:
+    """Timing model: first token after latency_ms (+/- jitter), then tokens_per_second"""
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    tokens_per_second: float = 60.0
+    completion_tokens: int = 120
+    embedding_dim: int = 384
+    seed: int = 0
+    script: List[ScriptRule] = field(default_factory=lambda: list(DEFAULT_SCRIPT))
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _message_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content") or ""
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+def _deterministic_embedding(text: str, dim: int) -> List[float]:
+    """Unit vector derived from the text hash; identical texts embed identically"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class MockLLM:
+    """Stateful mock: timing model, script resolution and request statistics"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.stats = {"chat_completions": 0, "streamed": 0, "tool_calls": 0, "embeddings": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def first_token_delay(self) -> float:
+        jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+    def generation_delay(self, tokens: int) -> float:
+        return tokens / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+    def resolve(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Pick the scripted reply: {"content": str} or {"tool_calls": [...]}"""
+        messages = body.get("messages", [])
+        text = _message_text(messages)
+        if INTENT_PROMPT_MARKER in text:
+            return self.resolve_intent(text)
+        offered = {t.get("function", {}).get("name") for t in body.get("tools") or []}
+        # Tool results already present -> the model answers in prose
+        answered = any(m.get("role") == "tool" for m in messages)
+
+        for rule in self.config.script:
+            if not rule.matches(text):
+                continue
+            if rule.tool_calls and offered and not answered:
+                for call in rule.tool_calls:
+                    if call["name"] in offered:
+                        return {"tool_calls": [call]}
+            if rule.content is not None:
+                return {"content": rule.content}
+
+        words = " ".join(["analysis"] * self.config.completion_tokens)
+        return {"content": f"Mock response for: {text[:80]}\n{words}"}
+
+    def resolve_intent(self, prompt: str) -> Dict[str, Any]:
+        """Intent JSON for the command quoted in an intent-parse prompt"""
+        found = INTENT_COMMAND.search(prompt)
+        command = found.group(1) if found else ""
+        for rule in self.config.script:
+            if rule.intent is not None and rule.matches(command):
+                return {"content": rule.intent_reply(command)}
+        return {"content": json.dumps(_intent("system_control", confidence=0.0))}
+
+    def completion(self, body: Dict[str, Any], reply: Dict[str, Any]) -> Dict[str, Any]:
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages", []))) + estimate_tokens(json.dumps(body.get("tools") or []))
+        message: Dict[str, Any] = {"role": "assistant", "content": reply.get("content")}
+        if reply.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call in reply["tool_calls"]
+            ]
+        completion_tokens = estimate_tokens(message["content"] or json.dumps(message.get("tool_calls", [])))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if reply.get("tool_calls") else "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """Build the mock server app (usable in-process with TestClient/ASGITransport)"""
+    mock = MockLLM(config or MockConfig())
+    app = FastAPI(title="Mock LLM Server")
+    app.state.mock = mock
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "mock"} for m in ["gpt-4o", "phala/gpt-oss-120b"]]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        reply = mock.resolve(body)
+        response = mock.completion(body, reply)
+        mock.stats["chat_completions"] += 1
+        mock.stats["tool_calls"] += 1 if reply.get("tool_calls") else 0
+
+        if body.get("stream"):
+            mock.stats["streamed"] += 1
+            return StreamingResponse(_stream(mock, response), media_type="text/event-stream")
+
+        mock.stats["in_flight"] += 1
+        mock.stats["max_in_flight"] = max(mock.stats["max_in_flight"], mock.stats["in_flight"])
+        try:
+            await asyncio.sleep(mock.first_token_delay() + mock.generation_delay(response["usage"]["completion_tokens"]))
+        finally:
+            mock.stats["in_flight"] -= 1
+        return JSONResponse(response)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        mock.stats["embeddings"] += len(inputs)
+        await asyncio.sleep(mock.first_token_delay() / 4)
+        return {
+            "object": "list",
+            "model": body.get("model", "mock-embedding"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": _deterministic_embedding(text, mock.config.embedding_dim)}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": sum(estimate_tokens(t) for t in inputs), "total_tokens": sum(estimate_tokens(t) for t in inputs)},
+        }
+
+    @app.get("/mock/stats")
+    async def stats():
+        return mock.stats
+
+    return app
+
+
+async def _stream(mock: MockLLM, response: Dict[str, Any]):
+    """Server-sent events in the OpenAI chunk format, paced by the timing model"""
+    message = response["choices"][0]["message"]
+    base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"], "model": response["model"]}
+
+    def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        return "data: " + json.dumps({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}) + "\n\n"
+
+    await asyncio.sleep(mock.first_token_delay())
+    yield chunk({"role": "assistant", "content": ""})
+
+    if message.get("tool_calls"):
+        for i, call in enumerate(message["tool_calls"]):
+            yield chunk({"tool_calls": [{"index": i, **call}]})
+        finish_reason = "tool_calls"
+    else:
+        per_token = mock.generation_delay(1)
+        for word in re.findall(r"\S+\s*", message["content"] or ""):
+            await asyncio.sleep(per_token)
+            yield chunk({"content": word})
+        finish_reason = "stop"
+
+    yield chunk({}, finish_reason)
+    yield "data: [DONE]\n\n"
+
+
+def load_script(path: str) -> List[ScriptRule]:
+    """Load rules from a JSON list of {"pattern", "tool_calls"?, "content"?, "intent"?}"""
+    with open(path) as f:
+        return [ScriptRule(**rule) for rule in json.load(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=120, help="Length of unscripted replies")
+    parser.add_argument("--script", help="JSON file of scripted rules (replaces the defaults)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        seed=args.seed,
+    )
+    if args.script:
+        config.script = load_script(args.script)
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Terminal Benchmark - Throughput and latency under rising concurrency
+Drives /api/v1/terminal/execute, /api/v2/terminal/query and /api/v1/chat/chat with
+weighted query mixes and reports p50/p95/p99 latency, throughput and error rate.
+
+Usage (fully offline):
+    python -m benchmarks.mock_llm_server --port 8089 &
+    OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8089/v1 uvicorn app.main:app --port 8000 &
+    python -m benchmarks.terminal_benchmark --base-url http://127.0.0.1:8000 --concurrency 1,4,16 --requests 64
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+import httpx
+
+
+@dataclass
+class Scenario:
+    """One endpoint with a weighted mix of request bodies"""
+    name: str
+    path: str
+    payloads: List[Tuple[float, Dict[str, Any]]]
+
+    def sample(self, rng: random.Random) -> Dict[str, Any]:
+        weights = [w for w, _ in self.payloads]
+        return rng.choices([p for _, p in self.payloads], weights=weights, k=1)[0]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "terminal_execute": Scenario("terminal_execute", "/api/v1/terminal/execute", [
+        (0.30, {"command": "price of BTC"}),
+        (0.20, {"command": "show market overview"}),
+        (0.20, {"command": "show my portfolio"}),
+        (0.15, {"command": "compare NVDA vs AMD chart"}),
+        (0.10, {"command": "research AI chip startups"}),
+        (0.05, {"command": "what can you do?"}),
+    ]),
+    "terminal_v2": Scenario("terminal_v2", "/api/v2/terminal/query", [
+        (0.30, {"query": "price of BTC and ETH", "user_id": "bench"}),
+        (0.25, {"query": "show market overview", "user_id": "bench"}),
+        (0.20, {"query": "analyze my portfolio", "user_id": "bench"}),
+        (0.15, {"query": "compare NVDA vs AMD chart", "user_id": "bench"}),
+        (0.10, {"query": "top crypto companies", "user_id": "bench"}),
+    ]),
+    "chat": Scenario("chat", "/api/v1/chat/chat", [
+        (0.50, {"message": "What are the key risks for an early-stage DeFi protocol?"}),
+        (0.30, {"message": "Summarize the market outlook for AI infrastructure"}),
+        (0.20, {"message": "How should we think about token vesting schedules?"}),
+    ]),
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class LevelResult:
+    scenario: str
+    concurrency: int
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        completed = len(self.latencies_ms) + self.errors
+        return {
+            "scenario": self.scenario,
+            "concurrency": self.concurrency,
+            "requests": completed,
+            "errors": self.errors,
+            "error_rate": round(self.errors / completed, 4) if completed else 0.0,
+            "throughput_rps": round(completed / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "p50_ms": round(percentile(self.latencies_ms, 50), 1),
+            "p95_ms": round(percentile(self.latencies_ms, 95), 1),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 1),
+            "max_ms": round(max(self.latencies_ms, default=0.0), 1),
+        }
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, total_requests: int, rng: random.Random) -> LevelResult:
+    """Issue total_requests with at most `concurrency` in flight"""
+    result = LevelResult(scenario.name, concurrency)
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total_requests):
+        queue.put_nowait(scenario.sample(rng))
+
+    async def worker():
+        while True:
+            try:
+                payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.post(scenario.path, json=payload)
+                ok = response.status_code < 400 and _body_succeeded(response)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                result.latencies_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+
+def _body_succeeded(response: httpx.Response) -> bool:
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return not (isinstance(body, dict) and body.get("success") is False)
+
+
+async def run_benchmark(
+    base_url: str,
+    scenarios: List[str],
+    concurrency_levels: List[int],
+    requests_per_level: int,
+    timeout: float = 120.0,
+    seed: int = 0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    summaries = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=transport) as client:
+        for name in scenarios:
+            scenario = SCENARIOS[name]
+            # Warm-up request so lazy initialization is not measured
+            try:
+                await client.post(scenario.path, json=scenario.sample(rng))
+            except httpx.HTTPError:
+                pass
+            for concurrency in concurrency_levels:
+                level = await run_level(client, scenario, concurrency, max(requests_per_level, concurrency), rng)
+                summaries.append(level.summary())
+    return summaries
+
+
+def format_report(summaries: List[Dict[str, Any]]) -> str:
+    header = f"{'scenario':<18}{'conc':>6}{'reqs':>7}{'err%':>7}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}"
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        lines.append(
+            f"{s['scenario']:<18}{s['concurrency']:>6}{s['requests']:>7}{s['error_rate'] * 100:>6.1f}%"
+            f"{s['throughput_rps']:>9.2f}{s['p50_ms']:>9.0f}ms{s['p95_ms']:>8.0f}ms{s['p99_ms']:>8.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Terminal/chat throughput benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma list of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma list of concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    summaries = asyncio.run(run_benchmark(
+        args.base_url,
+        [s.strip() for s in args.scenarios.split(",") if s.strip()],
+        [int(c) for c in args.concurrency.split(",")],
+        args.requests,
+        timeout=args.timeout,
+        seed=args.seed,
+    ))
+    print(format_report(summaries))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+Vector Memory Benchmark - Ingest and query load against the Chroma-backed memory services
+Grows a scratch store to each requested size with synthetic conversations, creations
+and company profiles (written through UnifiedChromaService, UniversalCreationRecorder
+and read back through ChromaMemoryService), then reports ingest throughput, query
+latency percentiles by filter selectivity, RSS, on-disk size and cold-start time.
+
+Runs fully offline: the store lives under a scratch HOME and every embedding comes from
+a deterministic feature-hashing model, so runs are repeatable and need no model download.
+
+Usage:
+    python -m benchmarks.vector_memory_benchmark --sizes 1000,10000,100000 --concurrency 8
+    python -m benchmarks.vector_memory_benchmark --sizes 100000,1000000 --workloads conversations \\
+        --workdir /data/vector-bench --json vector_memory.json
+"""
+
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .terminal_benchmark import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same dimensionality as all-MiniLM-L6-v2, so index sizes are representative
+DEFAULT_DIM = 384
+
+SECTORS = ["Technology", "Cryptocurrency", "Healthcare", "Energy", "Financials", "Consumer", "Industrials", "Utilities"]
+SYMBOLS = {
+    "Technology": ["AAPL", "MSFT", "NVDA", "GOOGL", "AMD"],
+    "Cryptocurrency": ["BTC", "ETH", "SOL", "AVAX", "LINK"],
+    "Healthcare": ["JNJ", "PFE", "MRNA", "UNH", "LLY"],
+    "Energy": ["XOM", "CVX", "NEE", "ENPH", "SLB"],
+    "Financials": ["JPM", "GS", "MS", "BAC", "V"],
+    "Consumer": ["AMZN", "TSLA", "NKE", "SBUX", "MCD"],
+    "Industrials": ["CAT", "GE", "BA", "HON", "UPS"],
+    "Utilities": ["DUK", "SO", "AEP", "EXC", "SRE"],
+}
+TOPICS = [
+    "earnings", "guidance", "valuation", "margins", "revenue growth", "price action", "momentum",
+    "funding round", "tokenomics", "regulation", "competition", "supply chain", "buybacks",
+    "dividend", "volatility", "market share", "runway", "unit economics", "on-chain activity",
+]
+TOOLS = [
+    ("get_stock_quote", "equity.price.quote"),
+    ("get_income_statement", "equity.fundamental.income"),
+    ("get_crypto_price_history", "crypto.price.historical"),
+    ("get_financial_ratios", "equity.fundamental.ratios"),
+    ("get_news", "news.company"),
+]
+WORKLOADS = ("conversations", "creations", "companies")
+
+# Import time, then time until the memory services have opened the store (what /health waits for)
+STARTUP_SNIPPET = """
+import asyncio, time
+started = time.perf_counter()
+from app.services.unified_chroma_service import unified_chroma_service
+from app.services.chroma_memory_service import chroma_memory_service
+import app.services.creation_recorder
+imported = time.perf_counter() - started
+
+async def ready():
+    return await asyncio.gather(unified_chroma_service.initialize(), chroma_memory_service.initialize())
+
+asyncio.run(ready())
+print(imported, time.perf_counter() - started)
+"""
+
+
+class HashingEmbedding:
+    """
+    Deterministic bag-of-words embedding: each token is hashed to a signed dimension.
+    Texts sharing words land close together, which keeps nearest-neighbour work realistic.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def _feature(token: str, dim: int) -> Tuple[int, float]:
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in text.lower().split():
+            index, sign = self._feature(token.strip(".,:;!?()[]{}\"'"), self.dim)
+            vector[index] += sign
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(text) for text in texts]
+
+
+class SyntheticCorpus:
+    """Reproducible documents: item i is the same for a given seed regardless of concurrency"""
+
+    def __init__(self, seed: int = 0, tenants: int = 20, threads_per_tenant: int = 5):
+        self.seed = seed
+        self.tenants = tenants
+        self.threads_per_tenant = threads_per_tenant
+
+    def _rng(self, kind: str, i: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    def tenant(self, i: int) -> str:
+        return f"bench-{i % self.tenants}"
+
+    def thread(self, i: int) -> str:
+        return f"{self.tenant(i)}-t{(i // self.tenants) % self.threads_per_tenant}"
+
+    @staticmethod
+    def _pick(rng: random.Random) -> Tuple[str, str]:
+        sector = rng.choice(SECTORS)
+        return sector, rng.choice(SYMBOLS[sector])
+
+    def conversation(self, i: int) -> Dict[str, Any]:
+        rng = self._rng("conversation", i)
+        sector, symbol = self._pick(rng)
+        topics = rng.sample(TOPICS, 3)
+        return {
+            "tenant_id": self.tenant(i),
+            "thread_id": self.thread(i),
+            "user_input": f"What is the latest on {symbol} {topics[0]} and {topics[1]}?",
+            "assistant_response": (
+                f"{symbol} ({sector}) shows {topics[0]} trends; {topics[1]} and {topics[2]} "
+                f"are the main drivers this quarter. Note {i}."
+            ),
+            "entities": {"symbols": [symbol], "sectors": [sector]},
+        }
+
+    def creation(self, i: int) -> Dict[str, Any]:
+        rng = self._rng("creation", i)
+        sector, symbol = self._pick(rng)
+        tool, module = rng.choice(TOOLS)
+        return {
+            "creation_id": f"bench_{i}",
+            "user_id": self.tenant(i),
+            "creation_type": rng.choice(["chart", "table", "analysis"]),
+            "title": f"{symbol} {tool.replace('get_', '').replace('_', ' ')}",
+            "openbb_tool": tool,
+            "openbb_module": module,
+            "symbols": [symbol],
+            "sectors": [sector],
+            "summary": f"{symbol} {' '.join(rng.sample(TOPICS, 4))}",
+        }
+
+    def company(self, i: int) -> Dict[str, Any]:
+        rng = self._rng("company", i)
+        sector, symbol = self._pick(rng)
+        return {
+            "tenant_id": self.tenant(i),
+            "ticker": symbol,
+            "sector": sector,
+            "content": f"{symbol} profile {i}: {sector} company focused on {', '.join(rng.sample(TOPICS, 4))}",
+        }
+
+    def query(self, rng: random.Random) -> Tuple[str, str, str]:
+        sector, symbol = self._pick(rng)
+        return f"{symbol} {' '.join(rng.sample(TOPICS, 2))}", sector, symbol
+
+
+@dataclass
+class Services:
+    unified: Any
+    memory: Any
+    recorder: Any
+    runtime: Any
+
+
+class _NullCreationIndex:
+    """Stands in for the Postgres creation index so only the vector path is measured"""
+
+    def upsert(self, *records) -> int:
+        return len(records)
+
+
+def prepare_environment(workdir: str) -> None:
+    """Point every default store path at `workdir`; call before anything imports `app`"""
+    if "app" in sys.modules:
+        raise RuntimeError("prepare_environment must run before the app package is imported")
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["HOME"] = workdir
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def load_services(dim: int = DEFAULT_DIM) -> Services:
+    """Import the memory services and swap in the offline embedding model"""
+    from app.services.embedding_service import embedding_service
+    from app.services.chroma_runtime import chroma_runtime
+    from app.services.unified_chroma_service import unified_chroma_service
+    from app.services.chroma_memory_service import chroma_memory_service
+    from app.services.creation_recorder import creation_recorder
+    from app.services.portfolio_context_store import portfolio_context_store
+
+    embedding_service._model_factory = lambda: HashingEmbedding(dim)
+    # Every benchmark text is new; the disk cache would only add write amplification
+    embedding_service.cache_dir = None
+    creation_recorder.index = _NullCreationIndex()
+    portfolio_context_store._redis_factory = None
+    return Services(unified_chroma_service, chroma_memory_service, creation_recorder, chroma_runtime)
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def measure_startup(workdir: str, timeout: float = 600.0) -> Optional[Dict[str, float]]:
+    """Cold start of the memory services in a fresh interpreter against the populated store"""
+    env = {**os.environ, "HOME": workdir}
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", STARTUP_SNIPPET],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=timeout
+        )
+        imported, ready = (float(value) for value in completed.stdout.strip().splitlines()[-1].split())
+        return {"import_s": round(imported, 3), "ready_s": round(ready, 3)}
+    except (subprocess.TimeoutExpired, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class OpResult:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+
+    def summary(self, **extra) -> Dict[str, Any]:
+        completed = len(self.latencies_ms) + self.errors
+        return {
+            "name": self.name,
+            **extra,
+            "ops": completed,
+            "errors": self.errors,
+            "ops_per_s": round(completed / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "p50_ms": round(percentile(self.latencies_ms, 50), 2),
+            "p95_ms": round(percentile(self.latencies_ms, 95), 2),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 2),
+        }
+
+
+async def run_ops(name: str, indexes: range, op: Callable[[int], Awaitable[Any]], concurrency: int) -> OpResult:
+    """Run op(i) for every i with at most `concurrency` in flight"""
+    result = OpResult(name)
+    pending = iter(indexes)
+
+    async def worker():
+        for i in pending:
+            started = time.perf_counter()
+            try:
+                ok = await op(i)
+            except Exception:
+                ok = False
+            if ok is False:
+                result.errors += 1
+            else:
+                result.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+
+def _ingest_ops(services: Services, corpus: SyntheticCorpus) -> Dict[str, Callable[[int], Awaitable[Any]]]:
+    from app.services.unified_chroma_service import ChromaDocument
+    from app.services.creation_recorder import Creation, CreationCategory, CreationMetadata, CreationType
+
+    async def conversation(i):
+        item = corpus.conversation(i)
+        doc_id = await services.unified.store_conversation_with_context(
+            item["user_input"], item["assistant_response"], item["entities"],
+            {"tools_used": ["get_stock_quote"], "success": True},
+            tenant_id=item["tenant_id"], thread_id=item["thread_id"]
+        )
+        return bool(doc_id)
+
+    async def creation(i):
+        item = corpus.creation(i)
+        metadata = CreationMetadata(
+            creation_id=item["creation_id"], user_id=item["user_id"],
+            creation_type=CreationType(item["creation_type"]), category=CreationCategory.MARKET_DATA,
+            title=item["title"], description=f"Benchmark creation via {item['openbb_tool']}",
+            openbb_module=item["openbb_module"], openbb_tool=item["openbb_tool"],
+            parameters={"symbol": item["symbols"][0]}, symbols=item["symbols"], sectors=item["sectors"],
+            tags=[item["creation_type"], item["symbols"][0].lower()],
+        )
+        await services.recorder._store_creation(Creation(metadata=metadata, data={"rows": i}, summary=item["summary"]))
+
+    async def company(i):
+        item = corpus.company(i)
+        doc = ChromaDocument(
+            content=item["content"],
+            metadata={"source_type": "company", "ticker": item["ticker"], "sector": item["sector"]}
+        )
+        return bool(await services.unified.store_document("company_profiles", doc, item["tenant_id"]))
+
+    return {"conversations": conversation, "creations": creation, "companies": company}
+
+
+def _query_ops(services: Services, corpus: SyntheticCorpus, seed: int) -> Dict[str, List[Tuple[str, float, Callable[[int], Awaitable[Any]]]]]:
+    """Per workload: (name, fraction of the collection the filter admits, op)"""
+    tenants = corpus.tenants
+    per_sector = len(SYMBOLS[SECTORS[0]])
+
+    def query(i):
+        rng = random.Random(f"{seed}:query:{i}")
+        text, sector, symbol = corpus.query(rng)
+        return corpus.tenant(rng.randrange(tenants)), text, sector, symbol
+
+    async def conversations_tenant(i):
+        tenant, text, _, _ = query(i)
+        return await services.unified.semantic_search("user_conversations", text, tenant_id=tenant, n_results=5)
+
+    async def conversations_thread(i):
+        _, text, _, _ = query(i)
+        return await services.memory.retrieve_relevant_context(text, session_id=corpus.thread(i), max_results=5)
+
+    async def creations_hybrid(i):
+        tenant, text, _, _ = query(i)
+        return await services.recorder.search_creations(tenant, text, n_results=10)
+
+    async def creations_symbol(i):
+        tenant, text, _, symbol = query(i)
+        return await services.recorder.search_creations(tenant, text, n_results=10, symbols=[symbol])
+
+    async def companies_tenant(i):
+        tenant, text, _, _ = query(i)
+        return await services.unified.semantic_search("company_profiles", text, tenant_id=tenant, n_results=10)
+
+    async def companies_sector(i):
+        tenant, text, sector, _ = query(i)
+        return await services.unified.semantic_search(
+            "company_profiles", text, filters={"sector": sector}, tenant_id=tenant, n_results=10
+        )
+
+    async def companies_tickers(i):
+        tenant, text, sector, symbol = query(i)
+        return await services.unified.semantic_search(
+            "company_profiles", text, filters={"ticker": {"$in": [symbol]}, "sector": sector}, tenant_id=tenant, n_results=10
+        )
+
+    return {
+        "conversations": [
+            ("tenant", 1 / tenants, conversations_tenant),
+            ("thread", 1 / (tenants * corpus.threads_per_tenant), conversations_thread),
+        ],
+        "creations": [
+            ("hybrid", 1 / tenants, creations_hybrid),
+            ("hybrid+symbol", 1 / (tenants * len(SECTORS) * per_sector), creations_symbol),
+        ],
+        "companies": [
+            ("tenant", 1 / tenants, companies_tenant),
+            ("tenant+sector", 1 / (tenants * len(SECTORS)), companies_sector),
+            ("tenant+ticker", 1 / (tenants * len(SECTORS) * per_sector), companies_tickers),
+        ],
+    }
+
+
+async def run_benchmark(
+    services: Services,
+    sizes: List[int],
+    workloads: List[str],
+    concurrency: int = 8,
+    queries: int = 200,
+    corpus: Optional[SyntheticCorpus] = None,
+    seed: int = 0,
+    startup: bool = True,
+    workdir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Grow each workload to every size in turn and measure it there"""
+    corpus = corpus or SyntheticCorpus(seed=seed)
+    ingest = _ingest_ops(services, corpus)
+    query_sets = _query_ops(services, corpus, seed)
+    from app.services.chroma_retention import directory_size
+
+    checkpoints = []
+    ingested = 0
+    for size in sorted(sizes):
+        checkpoint: Dict[str, Any] = {"size": size, "ingest": [], "queries": []}
+        for workload in workloads:
+            result = await run_ops(workload, range(ingested, size), ingest[workload], concurrency)
+            # Queued writes only count once they are in Chroma
+            flush_started = time.perf_counter()
+            await services.unified.ingestion.flush()
+            result.wall_seconds += time.perf_counter() - flush_started
+            checkpoint["ingest"].append(result.summary(workload=workload, documents=size - ingested))
+
+        for workload in workloads:
+            for name, fraction, op in query_sets[workload]:
+                # Warm-up (lazy index loads, first-query compilation) is not measured
+                await run_ops(name, range(concurrency), op, concurrency)
+                result = await run_ops(name, range(queries), op, concurrency)
+                checkpoint["queries"].append(result.summary(workload=workload, selectivity=round(fraction, 6)))
+
+        checkpoint["resources"] = {
+            "rss_mb": round(rss_mb(), 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "disk_mb": round(directory_size(services.runtime.path) / 2**20, 1),
+            "startup": measure_startup(workdir) if startup and workdir else None,
+        }
+        checkpoints.append(checkpoint)
+        ingested = size
+    return checkpoints
+
+
+def format_report(checkpoints: List[Dict[str, Any]]) -> str:
+    lines = []
+    for checkpoint in checkpoints:
+        res = checkpoint["resources"]
+        startup = (f"import {res['startup']['import_s']:.2f}s, ready {res['startup']['ready_s']:.2f}s"
+                   if res["startup"] else "n/a")
+        lines.append(
+            f"== {checkpoint['size']:,} docs per workload | rss {res['rss_mb']:.0f} MB (peak {res['peak_rss_mb']:.0f}) "
+            f"| disk {res['disk_mb']:.0f} MB | cold start {startup}"
+        )
+        header = f"{'ingest':<16}{'docs':>9}{'err':>6}{'docs/s':>10}{'p50':>10}{'p95':>10}"
+        lines += [header, "-" * len(header)]
+        for s in checkpoint["ingest"]:
+            lines.append(f"{s['workload']:<16}{s['documents']:>9}{s['errors']:>6}{s['ops_per_s']:>10.1f}"
+                         f"{s['p50_ms']:>8.1f}ms{s['p95_ms']:>8.1f}ms")
+        header = f"{'query':<16}{'filter':<16}{'select':>9}{'qps':>9}{'p50':>10}{'p95':>10}{'p99':>10}"
+        lines += ["", header, "-" * len(header)]
+        for s in checkpoint["queries"]:
+            lines.append(f"{s['workload']:<16}{s['name']:<16}{s['selectivity'] * 100:>8.2f}%{s['ops_per_s']:>9.1f}"
+                         f"{s['p50_ms']:>8.1f}ms{s['p95_ms']:>8.1f}ms{s['p99_ms']:>8.1f}ms")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector memory ingest/query benchmark (offline)")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma list of documents per workload to grow to")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help=f"Comma list of: {', '.join(WORKLOADS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200, help="Measured queries per filter and size")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Scratch HOME for the store, kept afterwards (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp dir afterwards")
+    parser.add_argument("--no-startup", action="store_true", help="Skip cold-start measurement")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="redpill-vector-bench-")
+    prepare_environment(workdir)
+    try:
+        services = load_services(args.dim)
+        checkpoints = asyncio.run(run_benchmark(
+            services,
+            [int(s) for s in args.sizes.split(",")],
+            [w.strip() for w in args.workloads.split(",") if w.strip()],
+            concurrency=args.concurrency,
+            queries=args.queries,
+            corpus=SyntheticCorpus(seed=args.seed, tenants=args.tenants),
+            seed=args.seed,
+            startup=not args.no_startup,
+            workdir=workdir,
+        ))
+        services.runtime.shutdown()
+    finally:
+        if not (args.keep or args.workdir):
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_report(checkpoints))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"config": vars(args), "checkpoints": checkpoints}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
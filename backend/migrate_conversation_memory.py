@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Fold the legacy conversation memory store (~/.redpill/memory) into the unified
+Chroma collections. Safe to run more than once. With --backfill-dates, also adds
+the numeric `_ts` date fields to existing documents that predate them.
+"""
+
+import argparse
+
+from app.services.chroma_migration import LEGACY_MEMORY_PATH, backfill_epoch_fields, migrate_conversation_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate legacy conversation_memory into user_conversations")
+    parser.add_argument("--legacy-path", default=LEGACY_MEMORY_PATH)
+    parser.add_argument("--tenant-id", default="default")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--dry-run", action="store_true", help="Count records without writing")
+    parser.add_argument("--backfill-dates", action="store_true", help="Add missing _ts date fields to every collection")
+    args = parser.parse_args()
+
+    result = migrate_conversation_memory(
+        legacy_path=args.legacy_path,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        tenant_id=args.tenant_id,
+    )
+
+    if result["status"] == "skipped":
+        print(f"⏭️  Nothing to migrate: {result['reason']}")
+    else:
+        print(f"✅ {result['status']}: {result['migrated']} memories {result['source']} → {result['target']}")
+        if result["status"] == "migrated":
+            print(f"   The legacy store at {args.legacy_path} is no longer read and can be removed.")
+
+    if args.backfill_dates:
+        backfill = backfill_epoch_fields(batch_size=args.batch_size, dry_run=args.dry_run)
+        print(f"✅ {backfill['status']}: date fields on {backfill['updated']} documents")
+
+
+if __name__ == "__main__":
+    main()
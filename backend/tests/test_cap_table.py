@@ -0,0 +1,179 @@
+"""
+Tests for the cap table engine and the joined ownership queries.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.api.v1 import ownership as ownership_api
+from app.models.companies import Company
+from app.models.dashboards import WidgetDataCache
+from app.models.ownership import Ownership
+from app.models.persons import Person
+from app.models.users import User
+from app.services.cap_table import CapTableEngine, _frame, compute, pro_forma
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    # Ownership writes also drop cached structured widgets
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Person.__table__, Ownership.__table__, WidgetDataCache.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(Company(id="c1", name="Acme"))
+        session.add(Company(id="c2", name="Other"))
+        for person_id, name in [("p1", "Ada"), ("p2", "Bob"), ("p3", "Fund I"), ("p4", "Eve")]:
+            session.add(Person(id=person_id, name=name))
+        session.add(Ownership(company_id="c1", person_id="p1", ownership_type="FOUNDER", shares=6_000_000, percentage=60))
+        session.add(Ownership(company_id="c1", person_id="p2", ownership_type="FOUNDER", shares=2_000_000, percentage=20))
+        session.add(Ownership(company_id="c1", person_id="p3", ownership_type="INVESTOR", shares=1_000_000, share_class="series_a"))
+        session.add(Ownership(company_id="c1", person_id="p4", ownership_type="EMPLOYEE", shares=1_000_000,
+                              share_class="options", exercise_price=0.1))
+        session.add(Ownership(company_id="c1", person_id="p2", ownership_type="ADVISOR", shares=5, is_active=False))
+        session.add(Ownership(company_id="c2", person_id="p1", ownership_type="INVESTOR", percentage=5))
+        session.commit()
+    return engine
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+class TestCompute:
+    """Test vectorized fully-diluted percentages, rollups and pro-forma rounds."""
+
+    def test_fully_diluted_and_class_rollups(self, engine):
+        with Session(engine) as session:
+            table = CapTableEngine().cap_table(session, "c1")
+
+        assert table["share_basis"] == "shares"
+        assert table["totals"]["fully_diluted_shares"] == 10_000_000
+        assert table["totals"]["outstanding_shares"] == 9_000_000
+        assert table["totals"]["holders"] == 4
+        positions = {row["holder"]: row for row in table["positions"]}
+        assert positions["Ada"]["fully_diluted_pct"] == pytest.approx(60)
+        assert positions["Ada"]["outstanding_pct"] == pytest.approx(600 / 9)
+        assert positions["Eve"]["is_option"] and positions["Eve"]["outstanding_pct"] is None
+        classes = {row["share_class"]: row for row in table["share_classes"]}
+        assert classes["common"]["shares"] == 8_000_000 and classes["common"]["holders"] == 2
+        assert classes["options"]["fully_diluted_pct"] == pytest.approx(10)
+
+    def test_positions_without_shares_use_stated_percentage(self):
+        frame = _frame([
+            ({"id": "o1", "person_id": "p1", "ownership_type": "FOUNDER", "shares": 750, "percentage": None}, {"name": "A"}),
+            ({"id": "o2", "person_id": "p2", "ownership_type": "INVESTOR", "shares": None, "percentage": 25}, {"name": "B"}),
+        ])
+
+        table = compute(frame)
+
+        assert table["totals"]["fully_diluted_shares"] == pytest.approx(1000)
+        assert table["positions"].set_index("holder").loc["B", "shares_implied"]
+
+    def test_pro_forma_round_with_pre_money_pool(self, engine):
+        with Session(engine) as session:
+            result = CapTableEngine().pro_forma(session, "c1", investment=5_000_000, pre_money=20_000_000, option_pool=0.10)
+
+        round_ = result["round"]
+        assert round_["post_money"] == 25_000_000
+        assert round_["investor_pct"] == pytest.approx(20)
+        assert round_["pool_pct"] == pytest.approx(10)
+        assert round_["existing_holders_pct"] == pytest.approx(70)
+        assert round_["price_per_share"] * round_["new_shares"] == pytest.approx(5_000_000)
+        ada = next(row for row in result["positions"] if row["holder"] == "Ada")
+        assert ada["post_money_pct"] == pytest.approx(42)
+        assert ada["dilution_pct"] == pytest.approx(-18)
+        classes = {row["share_class"]: row for row in result["share_classes"]}
+        assert classes["new_round"]["post_money_pct"] == pytest.approx(20)
+
+    def test_pro_forma_rejects_impossible_pool(self):
+        table = compute(_frame([({"id": "o1", "person_id": "p1", "ownership_type": "FOUNDER", "shares": 100}, None)]))
+
+        with pytest.raises(ValueError):
+            pro_forma(table, investment=10, pre_money=10, option_pool=0.5)
+
+
+class TestCaching:
+    """Test the per-company-version cache and its invalidation."""
+
+    def test_one_query_then_cached_until_ownership_commit(self, engine, monkeypatch):
+        cap_tables = CapTableEngine()
+        monkeypatch.setattr("app.services.cap_table.cap_table_engine", cap_tables)
+        statements = _count_statements(engine)
+        with Session(engine) as session:
+            cap_tables.cap_table(session, "c1")
+            cap_tables.details(session, "c1")
+            assert len(statements) == 1
+
+            session.add(Ownership(company_id="c1", person_id="p3", ownership_type="BOARD_MEMBER", shares=0))
+            session.commit()
+            assert cap_tables.version("c1") == 1
+            assert cap_tables.cap_table(session, "c1")["totals"]["positions"] == 5
+
+    def test_person_rename_invalidates_their_companies(self, engine, monkeypatch):
+        cap_tables = CapTableEngine()
+        monkeypatch.setattr("app.services.cap_table.cap_table_engine", cap_tables)
+        with Session(engine) as session:
+            cap_tables.cap_table(session, "c1")
+            person = session.get(Person, "p1")
+            person.name = "Ada Lovelace"
+            session.add(person)
+            session.commit()
+
+            assert "Ada Lovelace" in {row["holder"] for row in cap_tables.cap_table(session, "c1")["positions"]}
+
+    def test_missing_company(self, engine):
+        with Session(engine) as session:
+            assert CapTableEngine().cap_table(session, "nope") is None
+
+
+class TestEndpoints:
+    """Test the ownership endpoints load related records in one query."""
+
+    def test_cap_table_order_and_share_class_filter(self, engine, monkeypatch):
+        monkeypatch.setattr(ownership_api, "cap_table_engine", CapTableEngine())
+        with Session(engine) as session:
+            rows = ownership_api.get_company_cap_table(session=session, current_user=None, company_id="c1", share_class=None)
+            series_a = ownership_api.get_company_cap_table(session=session, current_user=None, company_id="c1", share_class="series_a")
+
+        assert [row.person.name for row in rows] == ["Eve", "Fund I", "Ada", "Bob"]
+        assert rows[0].company is rows[1].company
+        assert [row.person.name for row in series_a] == ["Fund I"]
+
+    def test_company_and_person_ownership_are_single_queries(self, engine):
+        statements = _count_statements(engine)
+        with Session(engine) as session:
+            company_rows = ownership_api.get_company_ownership(session=session, current_user=None, company_id="c1", is_active=True)
+            person_rows = ownership_api.get_person_ownership(session=session, current_user=None, person_id="p1", is_active=None)
+            listed = ownership_api.list_ownerships(session=session, current_user=None, company_id=None, person_id=None,
+                                                   ownership_type=None, is_active=None, skip=0, limit=100)
+
+        assert len(statements) == 3
+        assert len(company_rows) == 4 and {row.company.name for row in person_rows} == {"Acme", "Other"}
+        assert len(listed) == 6 and all(row.person and row.company for row in listed)
+
+    def test_thousands_of_holders(self, engine):
+        with Session(engine) as session:
+            session.add(Company(id="token", name="Token"))
+            for i in range(5000):
+                session.add(Person(id=f"h{i}", name=f"Holder {i}"))
+                session.add(Ownership(company_id="token", person_id=f"h{i}", ownership_type="INVESTOR", shares=(i + 1) * 10))
+            session.commit()
+        statements = _count_statements(engine)
+        cap_tables = CapTableEngine()
+
+        with Session(engine) as session:
+            first = cap_tables.cap_table(session, "token")
+            table = cap_tables.cap_table(session, "token")
+
+        assert len(statements) == 1
+        assert table == first
+        assert cap_tables.stats()["hits"] == 1 and cap_tables.stats()["misses"] == 1
+        assert table["totals"]["positions"] == 5000
+        assert table["positions"][0]["holder"] == "Holder 4999"
+        assert sum(row["fully_diluted_pct"] for row in table["holders"]) == pytest.approx(100)
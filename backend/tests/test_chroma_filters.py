@@ -0,0 +1,121 @@
+"""
+Tests for the Chroma filter compiler.
+"""
+
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.chroma_filters import FilterError, add_epoch_fields, compile_filter, to_epoch
+from app.services.chroma_runtime import ChromaRuntime
+
+
+class TestCompileFilter:
+    """Test translation of filter specs into Chroma clauses."""
+
+    def test_scoping_only(self):
+        compiled = compile_filter(tenant_id="t1", workspace_id="w1")
+
+        assert compiled.where == {"$and": [
+            {"tenant_id": {"$eq": "t1"}},
+            {"workspace_id": {"$eq": "w1"}},
+        ]}
+        assert compiled.where_document is None
+
+    def test_single_clause_is_not_wrapped(self):
+        compiled = compile_filter({"ticker": "BTC"})
+
+        assert compiled.where == {"ticker": {"$eq": "BTC"}}
+
+    def test_multiple_fields_and_in_lists_are_kept(self):
+        compiled = compile_filter(
+            {"action_type": {"$in": ["buy", "hold"]}, "sector": "AI"},
+            tenant_id="t1",
+        )
+
+        assert compiled.where == {"$and": [
+            {"tenant_id": {"$eq": "t1"}},
+            {"action_type": {"$in": ["buy", "hold"]}},
+            {"sector": {"$eq": "AI"}},
+        ]}
+
+    def test_date_range_uses_epoch_field(self):
+        compiled = compile_filter({"date": {"$gte": "2025-01-01", "$lt": datetime(2025, 2, 1)}})
+
+        assert compiled.where == {"$and": [
+            {"date_ts": {"$gte": to_epoch("2025-01-01")}},
+            {"date_ts": {"$lt": to_epoch("2025-02-01")}},
+        ]}
+
+    def test_or_and_document_filters(self):
+        compiled = compile_filter({
+            "$or": [{"ticker": "BTC"}, {"value": {"$gt": 100}}],
+            "$document": {"$contains": "bitcoin"},
+        })
+
+        assert compiled.where == {"$or": [{"ticker": {"$eq": "BTC"}}, {"value": {"$gt": 100}}]}
+        assert compiled.where_document == {"$contains": "bitcoin"}
+
+    def test_empty_in_matches_nothing(self):
+        assert compile_filter({"ticker": {"$in": []}}).matches_nothing is True
+        assert compile_filter({"$or": [{"ticker": {"$in": []}}, {"ticker": "ETH"}]}).where == {"ticker": {"$eq": "ETH"}}
+
+    @pytest.mark.parametrize("spec", [
+        {"ticker": {"$regex": "B.*"}},
+        {"$not": {"ticker": "BTC"}},
+        {"value": {"$gt": "high"}},
+        {"ticker": {"$in": "BTC"}},
+        {"date": {"$gte": "last week"}},
+        {"$document": {"$like": "x"}},
+    ])
+    def test_unsupported_specs_raise(self, spec):
+        with pytest.raises(FilterError):
+            compile_filter(spec)
+
+    def test_add_epoch_fields(self):
+        metadata = add_epoch_fields({"date": "2025-01-01T00:00:00", "ingestion_date": "bad", "ticker": "BTC"})
+
+        assert metadata["date_ts"] == datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+        assert "ingestion_date_ts" not in metadata
+        assert "ticker_ts" not in metadata
+
+    def test_naive_dates_are_utc_regardless_of_host_timezone(self, monkeypatch):
+        monkeypatch.setenv("TZ", "America/New_York")
+        time.tzset()
+        try:
+            assert to_epoch("2025-01-01T00:00:00") == 1735689600.0
+            assert to_epoch(datetime(2025, 1, 1)) == to_epoch("2025-01-01T00:00:00+00:00")
+        finally:
+            monkeypatch.delenv("TZ")
+            time.tzset()
+
+
+class TestFilterPushdown:
+    """Compiled filters run unchanged against a real Chroma collection."""
+
+    def test_query_returns_only_matching_documents(self, tmp_path):
+        runtime = ChromaRuntime(str(tmp_path / "chroma"))
+        collection = runtime.get_collection("portfolio_memory")
+        rows = [
+            ("a", "BTC buy", {"tenant_id": "t1", "workspace_id": "default", "action_type": "buy", "date": "2025-01-05"}),
+            ("b", "ETH watch", {"tenant_id": "t1", "workspace_id": "default", "action_type": "watch", "date": "2025-01-06"}),
+            ("c", "SOL buy", {"tenant_id": "t1", "workspace_id": "default", "action_type": "buy", "date": "2024-06-01"}),
+            ("d", "BTC buy", {"tenant_id": "t2", "workspace_id": "default", "action_type": "buy", "date": "2025-01-05"}),
+        ]
+        collection.add(
+            ids=[doc_id for doc_id, _, _ in rows],
+            documents=[text for _, text, _ in rows],
+            metadatas=[add_epoch_fields(dict(metadata)) for _, _, metadata in rows],
+            embeddings=[[float(i), 1.0] for i in range(len(rows))],
+        )
+
+        compiled = compile_filter(
+            {"action_type": {"$in": ["buy", "hold"]}, "date": {"$gte": "2025-01-01"}},
+            tenant_id="t1",
+            workspace_id="default",
+        )
+        results = collection.query(query_embeddings=[[0.0, 1.0]], n_results=3, **compiled.query_kwargs())
+
+        assert results["ids"][0] == ["a"]
+        runtime.shutdown()
@@ -0,0 +1,164 @@
+"""
+Unit tests for the write-behind Chroma ingestion queue.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.chroma_ingestion import ChromaIngestionQueue, ingestion_stats
+
+
+class FakeCollection:
+    """Records upsert batches instead of writing to Chroma."""
+
+    def __init__(self, fail=False, fail_times=0):
+        self.batches = []
+        self.fail = fail
+        self.fail_times = fail_times
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        if self.fail:
+            raise RuntimeError("disk full")
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("chroma unavailable")
+        self.batches.append(list(ids))
+        self.embeddings = embeddings
+
+
+@pytest.fixture
+def collections():
+    return {"conversations": FakeCollection(), "portfolio": FakeCollection()}
+
+
+def _queue(collections, **kwargs):
+    return ChromaIngestionQueue(lambda name: collections[name], name="test", **kwargs)
+
+
+class TestChromaIngestionQueue:
+    """Test batching, flushing and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_before_write(self, collections):
+        queue = _queue(collections, flush_interval=10)
+
+        doc_id = await queue.enqueue("conversations", "d1", "hello", {"tenant_id": "t"})
+
+        assert doc_id == "d1"
+        assert collections["conversations"].batches == []
+        assert queue.pending == 1
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_documents_are_batched_per_collection(self, collections):
+        queue = _queue(collections, flush_interval=10)
+        for i in range(5):
+            await queue.enqueue("conversations", f"c{i}", "text", {})
+        await queue.enqueue("portfolio", "p0", "BTC", {})
+
+        assert await queue.flush() == 6
+        assert collections["conversations"].batches == [["c0", "c1", "c2", "c3", "c4"]]
+        assert collections["portfolio"].batches == [["p0"]]
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_size_trigger_flushes_in_background(self, collections):
+        queue = _queue(collections, max_batch_size=3, flush_interval=10)
+        for i in range(3):
+            await queue.enqueue("conversations", f"c{i}", "text", {})
+
+        for _ in range(50):
+            if collections["conversations"].batches:
+                break
+            await asyncio.sleep(0.01)
+
+        assert collections["conversations"].batches == [["c0", "c1", "c2"]]
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_time_window_flushes_in_background(self, collections):
+        queue = _queue(collections, flush_interval=0.02)
+        await queue.enqueue("portfolio", "p0", "ETH", {})
+
+        await asyncio.sleep(0.15)
+
+        assert collections["portfolio"].batches == [["p0"]]
+        assert queue.stats()["max_queue_delay_ms"] >= 20
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_backpressure_flushes_inline(self, collections):
+        queue = _queue(collections, max_batch_size=100, flush_interval=10, max_pending=4)
+        for i in range(4):
+            await queue.enqueue("conversations", f"c{i}", "text", {})
+
+        stats = queue.stats()
+        assert stats["backpressure_flushes"] == 1
+        assert stats["pending"] == 0
+        assert stats["written"] == 4
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_documents(self, collections):
+        queue = _queue(collections, flush_interval=10)
+        await queue.enqueue("conversations", "c0", "text", {})
+
+        await queue.close()
+
+        assert collections["conversations"].batches == [["c0"]]
+        assert queue.stats()["closed"] is True
+        assert "test" in ingestion_stats()
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_counted(self):
+        queue = ChromaIngestionQueue(lambda name: FakeCollection(fail=True), name="failing", flush_interval=10)
+        await queue.enqueue("conversations", "c0", "text", {})
+
+        assert await queue.flush() == 0
+        assert queue.stats()["failed"] == 1
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_in_background(self):
+        collection = FakeCollection(fail_times=1)
+        queue = ChromaIngestionQueue(lambda name: collection, name="flaky", flush_interval=0.01, retry_backoff=0.02)
+        await queue.enqueue("conversations", "c0", "text", {})
+        await queue.enqueue("conversations", "c1", "text", {})
+
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if collection.batches:
+                break
+
+        assert collection.batches == [["c0", "c1"]]
+        assert queue.stats()["retried"] == 2 and queue.stats()["retrying"] == 0
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_dead_lettered_after_max_attempts(self):
+        queue = ChromaIngestionQueue(lambda name: FakeCollection(fail=True), name="dead", flush_interval=10,
+                                     max_attempts=3, retry_backoff=0.001)
+        await queue.enqueue("conversations", "c0", "text", {})
+
+        await queue.close()
+
+        assert queue.stats()["failed"] == 3 and queue.stats()["dead_lettered"] == 1
+        assert [(name, doc.doc_id, doc.attempts) for name, doc in queue.dead_letters] == [("conversations", "c0", 3)]
+
+    @pytest.mark.asyncio
+    async def test_embedder_is_called_once_per_batch(self, collections):
+        calls = []
+
+        async def embedder(texts):
+            calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        queue = _queue(collections, flush_interval=10, embedder=embedder)
+        await queue.enqueue("conversations", "c0", "ab", {})
+        await queue.enqueue("conversations", "c1", "abc", {})
+        await queue.flush()
+
+        assert calls == [["ab", "abc"]]
+        assert collections["conversations"].embeddings == [[2.0], [3.0]]
+        await queue.close()
@@ -0,0 +1,131 @@
+"""
+Tests for time-bucketed memory collections and retention compaction.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import chroma_retention
+from app.services.chroma_retention import (
+    MemoryCompactor,
+    PartitionedCollection,
+    RetentionPolicy,
+    bucket_bounds,
+    bucket_key,
+)
+from app.services.chroma_runtime import ChromaRuntime
+
+
+def _ts(year, month, day):
+    return datetime(year, month, day, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def runtime(tmp_path):
+    runtime = ChromaRuntime(str(tmp_path / "chroma"), max_workers=2)
+    yield runtime
+    runtime.shutdown()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(_ts(2025, 3, 15))
+
+
+@pytest.fixture
+def partition(runtime, clock):
+    return PartitionedCollection("user_conversations", RetentionPolicy(retention_days=30), runtime=runtime, clock=clock)
+
+
+def _write(partition, doc_id, ts, embedding):
+    metadata = {"tenant_id": "t1"}
+    partition.stamp(metadata, ts)
+    partition.collection_for(ts).add(ids=[doc_id], documents=[doc_id], metadatas=[metadata], embeddings=[embedding])
+
+
+class TestBuckets:
+    """Test bucket naming and bounds."""
+
+    def test_bucket_key_and_bounds(self):
+        assert bucket_key(_ts(2024, 12, 31)) == "2024_12"
+        assert bucket_bounds("2024_12") == (_ts(2024, 12, 1), _ts(2025, 1, 1))
+
+    def test_writes_land_in_monthly_buckets(self, partition, runtime):
+        _write(partition, "jan", _ts(2025, 1, 20), [0.0, 1.0])
+        _write(partition, "mar", _ts(2025, 3, 10), [1.0, 1.0])
+
+        assert "user_conversations__2025_01" in runtime.list_collection_names()
+        assert partition.bucket_keys() == ["2025_03"]  # January is past the 30 day window
+        assert partition.count() == 1
+
+
+class TestPartitionedQuery:
+    """Test fan-out queries across buckets."""
+
+    @pytest.mark.asyncio
+    async def test_results_are_merged_by_distance(self, partition, clock):
+        clock.now = _ts(2025, 3, 25)
+        _write(partition, "feb", _ts(2025, 3, 1) - 3600, [0.1, 1.0])
+        _write(partition, "mar_near", _ts(2025, 3, 20), [0.0, 1.0])
+        _write(partition, "mar_far", _ts(2025, 3, 21), [5.0, 1.0])
+        partition.legacy.add(ids=["legacy"], documents=["old"], metadatas=[{"date": "2025-03-02"}], embeddings=[[0.2, 1.0]])
+
+        results = await partition.query(query_embeddings=[[0.0, 1.0]], n_results=3, where={"tenant_id": "t1"})
+
+        assert results["ids"][0] == ["mar_near", "feb", "mar_far"]
+        assert results["distances"][0] == sorted(results["distances"][0])
+
+
+class TestCompaction:
+    """Test bucket drops and row-level pruning."""
+
+    @pytest.mark.asyncio
+    async def test_expired_buckets_are_dropped_whole(self, partition, runtime):
+        _write(partition, "jan", _ts(2025, 1, 5), [0.0, 1.0])
+        _write(partition, "feb_old", _ts(2025, 2, 3), [0.0, 1.0])
+        _write(partition, "feb_new", _ts(2025, 2, 25), [0.0, 1.0])
+        partition.legacy.add(
+            ids=["legacy_old", "legacy_new", "legacy_undated"],
+            documents=["a", "b", "c"],
+            metadatas=[{"timestamp": "2024-11-01T10:00:00"}, {"date": "2025-03-14T10:00:00"}, {"tenant_id": "t1"}],
+            embeddings=[[0.0, 1.0]] * 3,
+        )
+
+        result = await partition.compact()
+
+        assert result == {"buckets_dropped": 1, "documents_deleted": 2}
+        assert "user_conversations__2025_01" not in runtime.list_collection_names()
+        assert partition.collection_for(_ts(2025, 2, 25)).get()["ids"] == ["feb_new"]
+        assert sorted(partition.legacy.get()["ids"]) == ["legacy_new", "legacy_undated"]
+
+    @pytest.mark.asyncio
+    async def test_retention_override(self, partition):
+        _write(partition, "mar", _ts(2025, 3, 10), [0.0, 1.0])
+
+        result = await partition.compact(retention_days=1)
+
+        assert result["documents_deleted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_compactor_reports_reclaimed_space(self, partition, runtime, monkeypatch):
+        monkeypatch.setattr(chroma_retention, "RETENTION_POLICIES", {"user_conversations": partition.policy})
+        monkeypatch.setattr(chroma_retention, "_partitioned", {"user_conversations": partition})
+        for i in range(20):
+            _write(partition, f"old{i}", _ts(2024, 6, 1) + i, [float(i), 1.0])
+
+        compactor = MemoryCompactor(runtime)
+        report = await compactor.run_once()
+
+        assert report["buckets_dropped"] == 1
+        assert report["bytes_reclaimed"] == max(0, report["bytes_before"] - report["bytes_after"])
+        assert compactor.stats()["runs"] == 1
+        assert compactor.stats()["policies"] == {"user_conversations": 30}
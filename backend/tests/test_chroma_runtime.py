@@ -0,0 +1,145 @@
+"""
+Tests for the shared Chroma runtime and the legacy conversation memory migration.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.chroma_filters import compile_filter
+from app.services.chroma_migration import (
+    backfill_epoch_fields, backfill_epoch_fields_once, migrate_conversation_memory, to_unified_metadata
+)
+from app.services.chroma_runtime import ChromaRuntime
+
+
+@pytest.fixture
+def runtime(tmp_path):
+    runtime = ChromaRuntime(str(tmp_path / "unified"), max_workers=2)
+    yield runtime
+    runtime.shutdown()
+
+
+class TestChromaRuntime:
+    """Test client/collection sharing and the bounded executor."""
+
+    def test_collections_are_shared(self, runtime):
+        first = runtime.get_collection("user_conversations")
+        second = runtime.get_collection("user_conversations")
+
+        assert first is second
+        assert runtime.stats()["collections"] == ["user_conversations"]
+
+    @pytest.mark.asyncio
+    async def test_run_uses_bounded_pool(self, runtime):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def blocking_call():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            threading.Event().wait(0.02)
+            with lock:
+                active.pop()
+            return threading.current_thread().name
+
+        names = await asyncio.gather(*(runtime.run(blocking_call) for _ in range(6)))
+
+        assert max(peak) <= 2
+        assert all(name.startswith("chroma") for name in names)
+        assert runtime.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_run_propagates_errors(self, runtime):
+        def failing():
+            raise ValueError("bad where clause")
+
+        with pytest.raises(ValueError):
+            await runtime.run(failing)
+        assert runtime.stats()["failed"] == 1
+
+
+class TestConversationMemoryMigration:
+    """Test folding conversation_memory into user_conversations."""
+
+    @pytest.fixture
+    def legacy_path(self, tmp_path):
+        legacy = ChromaRuntime(str(tmp_path / "memory"))
+        legacy.get_collection("conversation_memory").add(
+            ids=["default_1", "default_2"],
+            documents=["User: price of BTC", "User: show my portfolio"],
+            embeddings=[[0.1, 0.2, 0.3], [0.3, 0.2, 0.1]],
+            metadatas=[
+                {"session_id": "default", "timestamp": "2025-01-01T00:00:00", "user_input": "price of BTC",
+                 "tools_used": "[]", "success": True, "entities_count": 1},
+                {"session_id": "s2", "timestamp": "2025-01-02T00:00:00", "user_input": "show my portfolio",
+                 "tools_used": "[]", "success": True, "entities_count": 0},
+            ],
+        )
+        return legacy.path
+
+    def test_metadata_mapping(self):
+        mapped = to_unified_metadata({"session_id": "abc", "timestamp": "2025-01-01", "user_input": "hi"})
+
+        assert mapped["thread_id"] == "abc"
+        assert mapped["date"] == "2025-01-01"
+        assert mapped["tenant_id"] == "default"
+        assert "success" not in mapped
+
+    def test_migrates_documents_and_embeddings(self, legacy_path, runtime):
+        result = migrate_conversation_memory(legacy_path=legacy_path, runtime=runtime, batch_size=1)
+        target = runtime.get_collection("user_conversations")
+        stored = target.get(ids=["legacy_default_1"], include=["metadatas", "embeddings"])
+
+        assert result["migrated"] == 2
+        assert target.count() == 2
+        assert stored["metadatas"][0]["thread_id"] == "default"
+        assert list(stored["embeddings"][0]) == pytest.approx([0.1, 0.2, 0.3])
+
+    def test_migration_is_idempotent(self, legacy_path, runtime):
+        migrate_conversation_memory(legacy_path=legacy_path, runtime=runtime)
+        migrate_conversation_memory(legacy_path=legacy_path, runtime=runtime)
+
+        assert runtime.get_collection("user_conversations").count() == 2
+
+    def test_dry_run_and_missing_store(self, legacy_path, runtime, tmp_path):
+        assert migrate_conversation_memory(legacy_path=legacy_path, runtime=runtime, dry_run=True)["status"] == "dry_run"
+        assert runtime.get_collection("user_conversations").count() == 0
+        assert migrate_conversation_memory(legacy_path=str(tmp_path / "missing"), runtime=runtime)["status"] == "skipped"
+
+
+class TestEpochFieldBackfill:
+    """Test adding `_ts` date twins to documents written before they existed."""
+
+    @pytest.fixture
+    def old_documents(self, runtime):
+        collection = runtime.get_collection("portfolio_memory")
+        collection.add(
+            ids=["old", "new", "undated"],
+            documents=["bought BTC", "sold ETH", "note"],
+            embeddings=[[0.1, 0.2], [0.2, 0.1], [0.0, 1.0]],
+            metadatas=[
+                {"date": "2025-03-01T12:00:00", "action_type": "buy"},
+                {"date": "2025-03-02T12:00:00", "date_ts": 1740916800.0, "action_type": "sell"},
+                {"action_type": "note"},
+            ],
+        )
+        return collection
+
+    def test_old_documents_match_date_range_filters(self, runtime, old_documents):
+        where = compile_filter({"date": {"$gte": "2025-02-01"}}).where
+        assert old_documents.get(where=where)["ids"] == ["new"]
+
+        result = backfill_epoch_fields(runtime, batch_size=2)
+
+        assert result["collections"]["portfolio_memory"] == 1
+        assert sorted(old_documents.get(where=where)["ids"]) == ["new", "old"]
+        assert old_documents.get(ids=["old"])["metadatas"][0]["action_type"] == "buy"
+        assert backfill_epoch_fields(runtime)["updated"] == 0
+
+    def test_runs_once_per_directory(self, runtime, old_documents):
+        assert backfill_epoch_fields_once(runtime)["updated"] == 1
+        assert backfill_epoch_fields_once(runtime) is None
@@ -0,0 +1,55 @@
+"""
+Tests for the shared commit-time cache invalidation hooks.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.companies import Company
+from app.services.commit_invalidation import invalidate_on_commit
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[Company.__table__])
+    return engine
+
+
+@pytest.fixture
+def invalidated():
+    calls = []
+    listener = invalidate_on_commit({Company: (lambda company: company.name if company.name.startswith("watched") else None, calls.append)})
+    yield calls
+    event.remove(OrmSession, "after_flush", listener)
+
+
+class TestCommitInvalidation:
+    """Test that invalidations follow the transaction outcome."""
+
+    def test_runs_once_per_key_after_commit(self, engine, invalidated):
+        with Session(engine) as session:
+            company = Company(name="watched-a")
+            session.add(company)
+            session.flush()
+            company.sector = "AI/ML"
+            session.add(company)
+            session.flush()
+            session.add(Company(name="other"))
+
+            assert invalidated == []
+            session.commit()
+
+        assert invalidated == ["watched-a"]
+
+    def test_rollback_drops_pending_invalidations(self, engine, invalidated):
+        with Session(engine) as session:
+            session.add(Company(name="watched-b"))
+            session.flush()
+            session.rollback()
+            session.commit()
+
+        assert invalidated == []
@@ -0,0 +1,198 @@
+"""
+Tests for the relational creation index and the recorder's index-backed listing.
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.creations import CreationRecord
+from app.services import creation_recorder as recorder_module
+from app.services.chroma_runtime import ChromaRuntime
+from app.services.creation_index import CreationIndex
+from app.services.creation_recorder import (
+    CREATION_INDEX_MARKER,
+    CreationCategory,
+    CreationMetadata,
+    CreationType,
+    UniversalCreationRecorder,
+)
+
+
+def _record(creation_id, symbols, created_at):
+    return CreationRecord(
+        creation_id=creation_id,
+        user_id="u1",
+        creation_type="chart",
+        category="market_data",
+        title=f"Chart {creation_id}",
+        symbols=symbols,
+        tags=["chart"],
+        created_at=created_at,
+    )
+
+
+class FakeIndex:
+    def __init__(self, records=None, fail=False):
+        self.records = records or []
+        self.fail = fail
+        self.calls = []
+
+    def list(self, user_id, limit=50, offset=0, **filters):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.calls.append({"user_id": user_id, "limit": limit, "offset": offset, **filters})
+        return self.records[offset:offset + limit]
+
+    def upsert(self, *records):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.records.extend(records)
+
+
+class FakeCollection:
+    def __init__(self, documents, metadatas=None):
+        self.documents = documents
+        self.metadatas = metadatas or {}
+
+    def get(self, ids=None, where=None, include=None, limit=None, offset=None):
+        keys = [i for i in (ids or self.documents) if i in self.documents]
+        return {
+            "ids": keys,
+            "documents": [self.documents[k] for k in keys],
+            "metadatas": [self.metadatas.get(k, {}) for k in keys],
+        }
+
+
+class FakeIngestion:
+    def __init__(self, collection, pending):
+        self.collection = collection
+        self.pending = pending
+        self.flushes = 0
+
+    async def flush(self):
+        self.flushes += 1
+        self.collection.documents.update(self.pending)
+        self.pending = {}
+
+
+class FakeChromaService:
+    def __init__(self, collection, pending=None):
+        self.collections = {"research_reports": collection}
+        self.ingestion = FakeIngestion(collection, pending or {})
+
+
+def _payload(value):
+    return json.dumps({"data": {"value": value}, "summary": None, "key_insights": []})
+
+
+@pytest.fixture
+def recorder():
+    return UniversalCreationRecorder()
+
+
+class TestCreationIndexQuery:
+    """Test the SQL generated for listing."""
+
+    def test_filters_compile_to_indexed_postgres_operators(self):
+        query = CreationIndex().build_query("u1", creation_type="chart", symbols=["BTC", "ETH"], tags=["crypto"])
+        sql = str(query.compile(dialect=postgresql.dialect()))
+
+        assert "creation_records.user_id = " in sql
+        assert "creation_records.symbols && " in sql
+        assert "creation_records.tags @> " in sql
+        assert "ORDER BY creation_records.created_at DESC" in sql
+
+
+class TestRecorderListing:
+    """Test that listings come from the index and payloads from Chroma by id."""
+
+    @pytest.mark.asyncio
+    async def test_index_order_filters_and_payloads(self, recorder):
+        records = [_record("c2", ["BTC"], datetime(2025, 2, 1)), _record("c1", ["BTC", "ETH"], datetime(2025, 1, 1))]
+        collection = FakeCollection({"c1": _payload(1)})
+        recorder.index = FakeIndex(records)
+        recorder.chroma_service = FakeChromaService(collection, pending={"c2": _payload(2)})
+
+        creations = await recorder.get_user_creations(
+            "u1", creation_type=CreationType.CHART, symbols=["BTC"], limit=10, offset=0
+        )
+
+        assert [c.metadata.creation_id for c in creations] == ["c2", "c1"]
+        assert [c.data["value"] for c in creations] == [2, 1]
+        assert creations[1].metadata.symbols == ["BTC", "ETH"]
+        assert recorder.index.calls[0]["creation_type"] == "chart"
+        assert recorder.index.calls[0]["symbols"] == ["BTC"]
+        assert recorder.chroma_service.ingestion.flushes == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_chroma_scan(self, recorder):
+        metadata = {
+            "creation_id": "c1", "user_id": "u1", "creation_type": "chart", "category": "market_data",
+            "title": "BTC", "description": "", "openbb_module": "", "openbb_tool": "", "parameters": "{}",
+            "symbols": "BTC,ETH", "sectors": "", "tags": "", "created_at": "2025-01-01T00:00:00",
+            "tenant_id": "u1",
+        }
+        collection = FakeCollection({"c1": _payload(1)}, {"c1": metadata})
+        recorder.index = FakeIndex(fail=True)
+        recorder.chroma_service = FakeChromaService(collection)
+
+        assert [c.metadata.creation_id for c in await recorder.get_user_creations("u1", symbols=["ETH"])] == ["c1"]
+        assert await recorder.get_user_creations("u1", symbols=["SOL"]) == []
+
+    def test_record_round_trip(self, recorder):
+        metadata = CreationMetadata(
+            creation_id="c1", user_id="u1", creation_type=CreationType.TABLE,
+            category=CreationCategory.COMPANY_RESEARCH, title="AAPL income", description="",
+            openbb_module="equity.fundamental", openbb_tool="get_income", parameters={"symbol": "AAPL"},
+            symbols=["AAPL"], sectors=["Technology"], tags=["fundamentals"],
+            created_at="2025-03-01T12:00:00",
+        )
+
+        restored = recorder._from_record(recorder._to_record(metadata))
+
+        assert restored == metadata
+
+
+class TestIndexBackfill:
+    """Test that creations stored only in Chroma reach the index."""
+
+    @pytest.fixture
+    def runtime(self, tmp_path, monkeypatch):
+        runtime = ChromaRuntime(str(tmp_path), max_workers=1)
+        monkeypatch.setattr(recorder_module, "chroma_runtime", runtime)
+        yield runtime
+        runtime.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_existing_creations_are_indexed_once(self, recorder, runtime, tmp_path):
+        metadata = {
+            "creation_id": "c1", "user_id": "u1", "creation_type": "chart", "category": "market_data",
+            "title": "BTC", "description": "", "openbb_module": "", "openbb_tool": "", "parameters": "{}",
+            "symbols": "BTC", "sectors": "", "tags": "", "created_at": "2025-01-01T00:00:00",
+        }
+        recorder.index = FakeIndex()
+        recorder.chroma_service = FakeChromaService(FakeCollection(
+            {"c1": _payload(1), "r1": "plain research report"}, {"c1": metadata, "r1": {"source_type": "research"}}
+        ))
+
+        assert await recorder.rebuild_index_once() == 1
+        assert await recorder.rebuild_index_once() is None
+        assert [record.creation_id for record in recorder.index.records] == ["c1"]
+        assert (tmp_path / CREATION_INDEX_MARKER).exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_index_write_is_retried_and_reopens_backfill(self, recorder, runtime, tmp_path):
+        (tmp_path / CREATION_INDEX_MARKER).write_text("0\n")
+        recorder.index = FakeIndex(fail=True)
+        recorder.chroma_service = FakeChromaService(FakeCollection({}))
+
+        await recorder._index(_record("c1", ["BTC"], datetime(2025, 1, 1)))
+        assert list(recorder._unindexed) == ["c1"]
+        assert not (tmp_path / CREATION_INDEX_MARKER).exists()
+
+        recorder.index.fail = False
+        assert [c.metadata.creation_id for c in await recorder.get_user_creations("u1")] == ["c1"]
+        assert recorder._unindexed == {}
@@ -0,0 +1,165 @@
+"""
+Tests for the GP dashboard widget bundle.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.api import gp_dashboard
+from app.models.companies import Company
+from app.models.deals import Deal, DealStatus, DealStatusHistory, InvestmentStage
+from app.models.fund_ledger import FundDailyTotal, FundLedgerEntry, FundLedgerState
+from app.models.portfolio_kpis import PortfolioKPI
+from app.models.users import User
+from app.services.dashboard_bundle import DashboardBundle, etag_of
+from app.services.fund_ledger import FundLedger
+from app.services.pipeline_analytics import PipelineAnalytics
+
+
+def _bundle(loads):
+    bundle = DashboardBundle()
+    bundle.dataset("rows", lambda ctx: loads.append("rows") or [1, 2, 3])
+    bundle.dataset("total", lambda ctx: loads.append("total") or sum(ctx["rows"]), requires=["rows"])
+    bundle.widget("count", lambda ctx: {"count": len(ctx["rows"]), "updated_at": time.time()}, datasets=["rows"])
+    bundle.widget("total", lambda ctx: ctx["total"], datasets=["total", "rows"])
+    return bundle
+
+
+class TestBundleEngine:
+    """Test the dataset plan, ETags and concurrent evaluation."""
+
+    def test_plan_loads_shared_datasets_once_in_dependency_order(self):
+        assert _bundle([]).plan(["total", "count"]) == ["rows", "total"]
+
+    def test_unknown_widget_and_cycles_are_rejected(self):
+        bundle = _bundle([])
+        bundle.dataset("a", lambda ctx: None, requires=["b"])
+        bundle.dataset("b", lambda ctx: None, requires=["a"])
+        bundle.widget("loop", lambda ctx: None, datasets=["a"])
+
+        with pytest.raises(ValueError, match="Unknown widget"):
+            bundle.plan(["missing"])
+        with pytest.raises(ValueError, match="cycle"):
+            bundle.plan(["loop"])
+
+    @pytest.mark.asyncio
+    async def test_etag_ignores_timestamps_and_skips_unchanged(self):
+        loads = []
+        bundle = _bundle(loads)
+
+        first = await bundle.evaluate(None)
+        etags = {name: result["etag"] for name, result in first["widgets"].items()}
+        second = await bundle.evaluate(None, etags=etags)
+
+        assert loads == ["rows", "total"] * 2
+        assert first["widgets"]["total"]["data"] == 6
+        assert second["widgets"]["count"] == {"status": "not_modified", "etag": etags["count"],
+                                              "elapsed_ms": second["widgets"]["count"]["elapsed_ms"]}
+        assert etag_of({"a": 1, "calculated_at": "x"}) == etag_of({"a": 1, "calculated_at": "y"})
+
+    @pytest.mark.asyncio
+    async def test_widgets_compute_concurrently(self):
+        bundle = DashboardBundle()
+        for name in ("a", "b", "c"):
+            bundle.widget(name, lambda ctx: time.sleep(0.2) or "done")
+
+        started = time.perf_counter()
+        result = await bundle.evaluate(None)
+
+        assert time.perf_counter() - started < 0.45
+        assert all(widget["elapsed_ms"] >= 190 for widget in result["widgets"].values())
+
+    @pytest.mark.asyncio
+    async def test_failed_dataset_only_fails_its_widgets(self):
+        bundle = _bundle([])
+        bundle.dataset("broken", lambda ctx: 1 / 0)
+        bundle.widget("bad", lambda ctx: ctx["broken"], datasets=["broken"])
+
+        result = await bundle.evaluate(None, ["bad", "total"])
+
+        assert result["widgets"]["bad"]["status"] == "error"
+        assert result["widgets"]["total"]["status"] == "ok"
+        assert "division by zero" in result["datasets"]["broken"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_committing_datasets_load_first_and_widgets_get_no_session(self):
+        loads = []
+        bundle = _bundle(loads)
+        bundle.dataset("ledger", lambda ctx: loads.append("ledger"), commits=True)
+        bundle.widget("ledger", lambda ctx: ctx["ledger"], datasets=["ledger"])
+        bundle.widget("session", lambda ctx: ctx.session.exec("SELECT 1"))
+
+        result = await bundle.evaluate(object(), ["total", "ledger", "session"])
+
+        assert loads == ["ledger", "rows", "total"]
+        assert result["widgets"]["session"]["status"] == "error"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Deal.__table__, DealStatusHistory.__table__,
+        FundLedgerEntry.__table__, FundDailyTotal.__table__, FundLedgerState.__table__, PortfolioKPI.__table__,
+    ])
+    with Session(engine) as session:
+        for i, (sector, status) in enumerate([("AI/ML", DealStatus.TRACK), ("FinTech", DealStatus.DEAL), ("AI/ML", DealStatus.PLANNED)]):
+            company = Company(name=f"Company {i}", sector=sector)
+            session.add(company)
+            session.flush()
+            session.add(Deal(company_id=company.id, created_by="u1", status=status, stage=InvestmentStage.SEED,
+                             our_target=1_000_000, created_at=datetime(2022, 1, 1), updated_at=datetime(2022, 6, 1)))
+        session.add(Company(name="No deal", sector="HealthTech"))
+        session.commit()
+    monkeypatch.setattr(gp_dashboard, "fund_ledger", FundLedger())
+    monkeypatch.setattr(gp_dashboard, "pipeline_analytics", PipelineAnalytics())
+    return engine
+
+
+class TestGPDashboardBundle:
+    """Test the registered GP dashboard widgets against a database."""
+
+    @pytest.mark.asyncio
+    async def test_all_widgets_share_one_company_deal_join(self, engine):
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+        with Session(engine) as session:
+            result = await gp_dashboard.dashboard_bundle.evaluate(session)
+
+        widgets = result["widgets"]
+        assert {name: widget["status"] for name, widget in widgets.items() if widget["status"] != "ok"} == {}
+        assert set(widgets) == set(gp_dashboard.dashboard_bundle.widget_names)
+        assert sum("LEFT OUTER JOIN deals" in statement for statement in statements) == 1
+        assert len(widgets["risk.positions"]["data"]) == 4
+        assert widgets["operations.compliance"]["data"]["total_companies"] == 4
+        assert widgets["fund.valuations"]["data"]["paid_in_capital"] == widgets["fund.metrics"]["data"]["paid_in_capital"] == 3_000_000
+
+    @pytest.mark.asyncio
+    async def test_ledger_rebuild_does_not_expire_rows_read_by_widgets(self, engine):
+        statements = []
+        with Session(engine) as session:
+            event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+            result = await gp_dashboard.dashboard_bundle.evaluate(session, ["operations.compliance", "risk.metrics", "fund.cashflows"])
+
+        assert {widget["status"] for widget in result["widgets"].values()} == {"ok"}
+        assert list(result["datasets"])[0] == "fund_entries"
+        assert not any("WHERE companies.id = ?" in statement or "WHERE deals.id = ?" in statement for statement in statements)
+
+    @pytest.mark.asyncio
+    async def test_widgets_match_standalone_helpers(self, engine):
+        with Session(engine) as session:
+            result = await gp_dashboard.dashboard_bundle.evaluate(session, ["risk.metrics", "market.sector_allocation"])
+            positions = gp_dashboard.risk_positions(gp_dashboard._load_company_deals(session))
+
+        assert result["widgets"]["risk.metrics"]["data"] == gp_dashboard.risk_metrics(positions)
+        allocation = result["widgets"]["market.sector_allocation"]["data"]["portfolio_allocation"]
+        assert {sector: row["portfolio"] for sector, row in allocation.items() if row["portfolio"]} == {
+            "AI/ML": 2, "FinTech": 1, "HealthTech": 1,
+        }
+        assert set(result["datasets"]) == {"company_deals", "risk_positions", "sector_counts"}
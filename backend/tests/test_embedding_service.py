@@ -0,0 +1,100 @@
+"""
+Unit tests for EmbeddingService - micro-batching, in-flight dedupe and caching.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.embedding_service import EmbeddingService
+
+
+class CountingModel:
+    """Deterministic fake model recording each batch it receives."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)) % 97)] for t in texts]
+
+
+@pytest.fixture
+def model():
+    return CountingModel()
+
+
+def _service(model, cache_dir=None, **kwargs):
+    return EmbeddingService(model_factory=lambda: model, model_name="fake", cache_dir=cache_dir, **kwargs)
+
+
+class TestEmbeddingService:
+    """Test batching and cache behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_model_once(self, model):
+        service = _service(model)
+
+        assert await service.warm_up() is True
+        assert service.ready
+        await service.warm_up()
+        assert model.calls == [["warm up"]]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self, model):
+        service = _service(model)
+        await service.warm_up()
+
+        results = await asyncio.gather(
+            service.embed_one("price of BTC"),
+            service.embed_one("portfolio overview"),
+            service.embed_one("price of BTC"),
+        )
+
+        assert model.calls[1:] == [["price of BTC", "portfolio overview"]]
+        assert results[0] == results[2]
+        assert service.stats()["coalesced"] == 1
+
+    @pytest.mark.asyncio
+    async def test_repeated_text_is_a_memory_hit(self, model):
+        service = _service(model)
+        first = await service.embed(["market overview"])
+        second = await service.embed(["market overview"])
+
+        assert first == second
+        assert service.stats()["memory_hits"] == 1
+        assert service.stats()["computed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disk_cache_survives_restart(self, model, tmp_path):
+        await _service(model, cache_dir=str(tmp_path)).embed(["NVDA fundamentals"])
+        fresh_model = CountingModel()
+        restarted = _service(fresh_model, cache_dir=str(tmp_path))
+
+        vector = await restarted.embed_one("NVDA fundamentals")
+
+        assert vector == [17.0, pytest.approx(vector[1])]
+        assert fresh_model.calls == []
+        assert restarted.stats()["disk_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_large_requests_are_split_into_batches(self, model):
+        service = _service(model, max_batch_size=2)
+        await service.warm_up()
+
+        await service.embed(["a", "b", "c", "d", "e"])
+
+        assert [len(call) for call in model.calls[1:]] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_model_errors_propagate(self):
+        def broken():
+            raise RuntimeError("model unavailable")
+
+        service = EmbeddingService(model_factory=broken, cache_dir=None)
+
+        assert await service.warm_up() is False
+        with pytest.raises(RuntimeError):
+            await service.embed_one("anything")
+        assert service.stats()["errors"] == 1
@@ -0,0 +1,202 @@
+"""
+Tests for the incrementally maintained fund ledger.
+"""
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models.companies import Company
+from app.models.deals import Deal, DealStatus, InvestmentStage
+from app.models.fund_ledger import FundDailyTotal, FundLedgerEntry, FundLedgerState
+from app.models.users import User
+from app.services.fund_ledger import FundLedger, deal_entries
+from app.services.xirr_engine import xirr
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Deal.__table__,
+        FundLedgerEntry.__table__, FundDailyTotal.__table__, FundLedgerState.__table__,
+    ])
+    with Session(engine) as session:
+        yield session
+
+
+def _deal(session, name, status, target, created, updated=None):
+    company = Company(name=name, sector="AI/ML")
+    session.add(company)
+    session.flush()
+    deal = Deal(
+        company_id=company.id, created_by="u1", status=status, stage=InvestmentStage.SEED,
+        our_target=target, created_at=created, updated_at=updated or created,
+    )
+    session.add(deal)
+    session.commit()
+    return deal
+
+
+def _totals(session):
+    return {row.day: (row.paid_in, row.distributions, row.nav_change, row.entries)
+            for row in session.exec(select(FundDailyTotal)).all()}
+
+
+class TestDealProjection:
+    """Test the entries a deal projects into the ledger."""
+
+    def test_track_deal_has_call_mark_and_distribution(self):
+        deal = Deal(id="d1", company_id="c1", created_by="u1", status=DealStatus.TRACK, stage=InvestmentStage.SEED,
+                    our_target=100, created_at=datetime(2023, 1, 1), updated_at=datetime(2023, 6, 1))
+
+        entries = {entry.entry_type: entry for entry in deal_entries(deal, "Acme")}
+
+        assert entries["call"].amount == -100 and entries["call"].nav_change == 100
+        assert entries["valuation"].entry_date == date(2023, 6, 1)
+        assert entries["valuation"].nav_change == pytest.approx(110)
+        assert entries["distribution"].entry_date == date(2024, 1, 1)
+        assert entries["distribution"].amount == 150
+
+    def test_passed_deal_is_written_off_and_unfunded_deal_is_empty(self):
+        passed = Deal(id="d1", company_id="c1", created_by="u1", status=DealStatus.PASSED, stage=InvestmentStage.SEED,
+                      our_target=100, created_at=datetime(2023, 1, 1))
+        unfunded = Deal(id="d2", company_id="c1", created_by="u1", status=DealStatus.DEAL, stage=InvestmentStage.SEED,
+                        created_at=datetime(2023, 1, 1))
+
+        assert sum(entry.nav_change for entry in deal_entries(passed)) == 0
+        assert deal_entries(unfunded) == []
+
+
+class TestIncrementalTotals:
+    """Test that deal writes keep the daily totals in step."""
+
+    def test_sync_replaces_previous_projection(self, session):
+        ledger = FundLedger()
+        ledger.rebuild(session)
+        deal = _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+        ledger.sync_deal(session, deal)
+        session.commit()
+
+        deal.status = DealStatus.TRACK
+        ledger.sync_deal(session, deal)
+        session.commit()
+
+        assert _totals(session) == {
+            date(2023, 1, 1): (1_000, 0, pytest.approx(2_100), 2),
+            date(2024, 1, 1): (0, 1_500, 0, 1),
+        }
+        assert len(session.exec(select(FundLedgerEntry)).all()) == 3
+
+    def test_remove_deal_drops_emptied_days(self, session):
+        ledger = FundLedger()
+        ledger.rebuild(session)
+        deal = _deal(session, "Acme", DealStatus.TRACK, 1_000, datetime(2023, 1, 1))
+        ledger.sync_deal(session, deal)
+        session.commit()
+
+        ledger.remove_deal(session, deal.id)
+        session.commit()
+
+        assert _totals(session) == {}
+
+    def test_first_read_backfills_from_deals(self, session):
+        _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+        ledger = FundLedger()
+
+        metrics = ledger.metrics(session)
+
+        assert metrics["paid_in_capital"] == 1_000
+        assert metrics["residual_value"] == pytest.approx(1_200)
+
+    def test_failed_sync_rebuilds_on_next_read(self, session, monkeypatch):
+        ledger = FundLedger()
+        ledger.rebuild(session)
+        deal = _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+
+        def broken(*args):
+            raise RuntimeError("ledger table missing")
+
+        monkeypatch.setattr(ledger, "_replace", broken)
+        ledger.sync_deal(session, deal)
+        session.commit()
+        monkeypatch.undo()
+
+        assert _totals(session) == {}
+        assert ledger.metrics(session)["paid_in_capital"] == 1_000
+
+    def test_concurrent_writes_on_the_same_day_both_count(self, session):
+        FundLedger().rebuild(session)
+        first = _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+        second = _deal(session, "Beta", DealStatus.DEAL, 500, datetime(2023, 1, 1))
+        with Session(session.get_bind()) as other:
+            FundLedger().sync_deal(other, other.get(Deal, second.id))
+            other.commit()
+            # The other worker has already loaded the day row when this one commits
+            loaded = other.exec(select(FundDailyTotal)).all()
+            FundLedger().sync_deal(session, first)
+            session.commit()
+            tracked = other.get(Deal, second.id)
+            tracked.status = DealStatus.TRACK
+            FundLedger().sync_deal(other, tracked)
+            other.commit()
+
+        assert loaded and _totals(session)[date(2023, 1, 1)] == (1_500, 0, pytest.approx(2_250), 4)
+
+    def test_stale_flag_is_shared_between_workers(self, session, monkeypatch):
+        writer, reader = FundLedger(), FundLedger()
+        reader.metrics(session)
+        deal = _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+
+        monkeypatch.setattr(writer, "_replace", lambda *args: 1 / 0)
+        writer.sync_deal(session, deal)
+        session.commit()
+
+        assert session.get(FundLedgerState, 1).stale is True
+        assert reader.metrics(session)["paid_in_capital"] == 1_000
+        assert session.get(FundLedgerState, 1).stale is False
+
+
+class TestMetrics:
+    """Test metrics computed from the daily aggregate."""
+
+    def test_since_inception_metrics_match_cashflow_irr(self, session):
+        ledger = FundLedger()
+        _deal(session, "Acme", DealStatus.TRACK, 1_000, datetime(2022, 1, 1))
+        _deal(session, "Beta", DealStatus.DEAL, 2_000, datetime(2023, 1, 1))
+
+        metrics = ledger.metrics(session, end=date(2024, 1, 1))
+
+        assert metrics["paid_in_capital"] == 3_000
+        assert metrics["total_distributions"] == 1_500
+        assert metrics["residual_value"] == pytest.approx(2_100 + 2_400)
+        assert metrics["tvpi"] == round((1_500 + 4_500) / 3_000, 2)
+        expected = xirr(
+            [date(2022, 1, 1), date(2023, 1, 1), date(2023, 1, 1), date(2024, 1, 1)],
+            [-1_000, -2_000, 1_500, 4_500],
+        )
+        assert metrics["irr"] == round(expected * 100, 2)
+
+    def test_range_treats_opening_nav_as_invested(self, session):
+        ledger = FundLedger()
+        _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2022, 1, 1))
+        _deal(session, "Beta", DealStatus.DEAL, 1_000, datetime(2023, 1, 1))
+
+        metrics = ledger.metrics(session, start=date(2022, 6, 1), end=date(2024, 1, 1))
+
+        assert metrics["paid_in_capital"] == 1_000
+        assert metrics["tvpi"] == round(2_400 / 2_200, 2)
+
+    def test_history_series_by_quarter(self, session):
+        ledger = FundLedger()
+        _deal(session, "Acme", DealStatus.DEAL, 1_000, datetime(2023, 1, 15))
+        _deal(session, "Beta", DealStatus.DEAL, 1_000, datetime(2023, 5, 1))
+
+        series = ledger.history(session, end=date(2023, 12, 31))
+
+        assert [point["date"] for point in series] == ["2023-03-31", "2023-06-30", "2023-09-30", "2023-12-31"]
+        assert [point["paid_in_capital"] for point in series] == [1_000, 2_000, 2_000, 2_000]
+        assert series[-1]["tvpi"] == 1.2
+        assert all(point["irr"] > 0 for point in series)
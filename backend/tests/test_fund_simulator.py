@@ -0,0 +1,122 @@
+"""
+Tests for the Monte Carlo fund outcome simulator.
+"""
+
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.deals import DealStatus, InvestmentStage
+from app.services.fund_simulator import FundSimulator, Position, SimulationAssumptions, positions_from_deals
+
+AS_OF = date(2025, 6, 30)
+
+POSITIONS = [
+    Position("d1", "Acme", "seed", 1_000_000, date(2021, 2, 1)),
+    Position("d2", "Beta", "series_a", 2_000_000, date(2022, 5, 1)),
+    Position("d3", "Gamma", "series_b", 3_000_000, date(2023, 8, 1)),
+    Position("d4", "Delta", "growth", 4_000_000, date(2024, 11, 1)),
+]
+
+
+def _certain(**overrides):
+    """Every position exits at exactly 2x, three years after investment, with no fees or market noise"""
+    values = dict(
+        scenarios=500, seed=1, management_fee=0.0, carry=0.0, market_volatility=0.0,
+        outcomes={stage: [(1.0, 2.0, 2.0)] for stage in ("seed", "series_a", "series_b", "growth")},
+        exit_years={stage: (3.0, 3.0) for stage in ("seed", "series_a", "series_b", "growth")},
+    )
+    values.update(overrides)
+    return SimulationAssumptions(**values)
+
+
+class TestOutcomes:
+    """Test fund-level results against hand-computed cases."""
+
+    def test_certain_outcomes_collapse_the_bands(self):
+        result = FundSimulator().run(POSITIONS, _certain(), AS_OF)
+
+        tvpi = result["fund"]["net_tvpi"]
+        assert tvpi["p5"] == pytest.approx(2) and tvpi["p95"] == pytest.approx(2)
+        assert result["fund"]["gross_moic"]["mean"] == pytest.approx(2)
+        assert result["fund"]["net_irr"]["p5"] == pytest.approx(result["fund"]["net_irr"]["p95"])
+        assert 0.2 < result["fund"]["net_irr"]["p50"] < 0.3
+        # Positions made before mid-2022 would have exited already, so they exit next quarter
+        assert [(row["year"], row["exit_count"]["p50"]) for row in result["exits"]] == [(2025, 2), (2026, 1), (2027, 1)]
+        assert result["distributions"][-1]["cumulative_dpi"]["p50"] == pytest.approx(2)
+
+    def test_carry_and_fees(self):
+        result = FundSimulator().run(POSITIONS, _certain(carry=0.2, management_fee=0.02, fee_years=10), AS_OF)
+
+        assert result["paid_in"] == pytest.approx(10_000_000 * 1.2)
+        # LPs get paid-in back plus 80% of the remaining profit
+        expected = (12_000_000 + 0.8 * (20_000_000 - 12_000_000)) / 12_000_000
+        assert result["fund"]["net_tvpi"]["p50"] == pytest.approx(expected)
+        assert result["calls"][0] == {
+            "quarter_end": "2021-03-31", "investments": 1_000_000, "fees": 50_000, "amount": 1_050_000, "projected": False,
+        }
+
+    def test_default_distributions_give_spread_and_position_odds(self):
+        result = FundSimulator().run(POSITIONS, SimulationAssumptions(scenarios=5000, seed=3), AS_OF)
+
+        tvpi = result["fund"]["net_tvpi"]
+        assert tvpi["p5"] < tvpi["p50"] < tvpi["p95"]
+        assert 0 < result["fund"]["probability_of_loss"] < 1
+        seed, growth = result["positions"][0], result["positions"][3]
+        assert seed["probability_of_loss"] > growth["probability_of_loss"]
+
+
+class TestDeterminism:
+    """Test seeding and the process pool."""
+
+    def test_same_seed_same_result(self):
+        simulator = FundSimulator()
+        first = simulator.run(POSITIONS, SimulationAssumptions(scenarios=6000, seed=11), AS_OF)
+        second = simulator.run(POSITIONS, SimulationAssumptions(scenarios=6000, seed=11), AS_OF)
+        other = simulator.run(POSITIONS, SimulationAssumptions(scenarios=6000, seed=12), AS_OF)
+
+        assert first["fund"] == second["fund"]
+        assert first["fund"] != other["fund"]
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_in_process_run(self):
+        assumptions = SimulationAssumptions(scenarios=12_000, seed=5)
+        simulator = FundSimulator(max_workers=2)
+        try:
+            pooled = await simulator.run_async(POSITIONS, assumptions, AS_OF)
+        finally:
+            simulator.shutdown()
+
+        inline = FundSimulator().run(POSITIONS, assumptions, AS_OF)
+        assert pooled["fund"] == inline["fund"]
+        assert pooled["distributions"] == inline["distributions"]
+
+
+class TestInputs:
+    """Test position extraction and assumption validation."""
+
+    def test_positions_from_portfolio_deals_only(self):
+        def deal(deal_id, status, target=1_000_000):
+            return SimpleNamespace(id=deal_id, status=status, stage=InvestmentStage.SERIES_A, our_target=target,
+                                   created_at=datetime(2023, 1, 5))
+
+        company = SimpleNamespace(name="Acme")
+        rows = [(deal("a", DealStatus.TRACK), company), (deal("b", DealStatus.DEAL), company),
+                (deal("c", DealStatus.PASSED), company), (deal("d", DealStatus.TRACK, None), company)]
+
+        positions = positions_from_deals(rows)
+
+        assert [position.deal_id for position in positions] == ["a", "b"]
+        assert positions[0].stage == "series_a" and positions[0].invested_on == date(2023, 1, 5)
+
+    def test_invalid_assumptions(self):
+        with pytest.raises(ValueError):
+            SimulationAssumptions(outcomes={"seed": [(0.5, 0, 1)]})
+        with pytest.raises(ValueError):
+            SimulationAssumptions(scenarios=0)
+        with pytest.raises(ValueError):
+            SimulationAssumptions(exit_years={"seed": (5, 2)})
+
+    def test_empty_portfolio(self):
+        assert FundSimulator().run([], as_of=AS_OF)["scenarios"] == 0
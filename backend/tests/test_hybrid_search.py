@@ -0,0 +1,192 @@
+"""
+Tests for BM25 + vector hybrid search.
+"""
+
+import json
+
+import pytest
+
+from app.services.chroma_runtime import ChromaRuntime
+from app.services.creation_recorder import UniversalCreationRecorder
+from app.services.hybrid_search import (
+    INDEX_REFRESH_SECONDS,
+    BM25Index,
+    HybridSearchEngine,
+    document_text,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+def _creation(title, symbols, creation_type="chart", tenant_id="u1", tags=""):
+    return {
+        "tenant_id": tenant_id,
+        "creation_type": creation_type,
+        "category": "market_data",
+        "title": title,
+        "description": "",
+        "symbols": ",".join(symbols),
+        "tags": tags,
+        "openbb_module": "equity.price.historical",
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBM25Index:
+    """Test keyword ranking and incremental maintenance."""
+
+    def test_tokenize_drops_stopwords(self):
+        assert tokenize("Show me the BTC price-history for equity.price") == ["btc", "price", "history", "equity.price"]
+
+    def test_more_relevant_document_ranks_first(self):
+        index = BM25Index()
+        index.add("a", "bitcoin price chart")
+        index.add("b", "bitcoin bitcoin halving bitcoin analysis")
+        index.add("c", "tesla earnings")
+
+        ranked = index.search("bitcoin", limit=10)
+
+        assert [doc_id for doc_id, _ in ranked] == ["b", "a"]
+
+    def test_readd_and_remove_update_postings(self):
+        index = BM25Index()
+        index.add("a", "tesla earnings")
+        index.add("a", "nvidia earnings")
+        index.add("b", "tesla deliveries")
+        index.remove("b")
+
+        assert index.search("tesla", limit=10) == []
+        assert [doc_id for doc_id, _ in index.search("nvidia", limit=10)] == ["a"]
+        assert len(index) == 1
+
+    def test_allowed_ids_are_applied_before_ranking(self):
+        index = BM25Index()
+        index.add("a", "bitcoin")
+        index.add("b", "bitcoin")
+
+        assert [doc_id for doc_id, _ in index.search("bitcoin", limit=10, allowed={"b"})] == ["b"]
+
+    def test_search_at_scale_ranks_only_matching_documents(self):
+        index = BM25Index()
+        for i in range(20_000):
+            index.add(f"d{i}", f"chart {['btc', 'eth', 'sol', 'aapl'][i % 4]} price history report {i}")
+
+        ranked = index.search("eth price", limit=20)
+
+        assert len(ranked) == 20
+        assert all(int(doc_id[1:]) % 4 == 1 for doc_id, _ in ranked)
+        assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+        assert index.search("eth price", limit=20, allowed={doc_id for doc_id, _ in ranked[:5]}) == ranked[:5]
+
+
+class TestFusion:
+    """Test reciprocal rank fusion and document text."""
+
+    def test_documents_ranked_by_both_sides_win(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+
+        assert fused[0][0] == "b"
+        assert {doc_id for doc_id, _ in fused} == {"a", "b", "c", "d"}
+
+    def test_creation_text_includes_metadata_and_summary(self):
+        text = document_text(json.dumps({"summary": "Strong momentum", "key_insights": ["breakout"]}), _creation("BTC chart", ["BTC"]))
+
+        assert "BTC chart" in text and "momentum" in text and "breakout" in text and "historical" in text
+
+
+class TestHybridSearchEngine:
+    """Test the engine against a real Chroma collection."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def engine_and_collection(self, tmp_path, clock):
+        runtime = ChromaRuntime(str(tmp_path / "chroma"))
+        collection = runtime.get_collection("research_reports")
+        vectors = {"btc": [1.0, 0.0], "eth": [0.0, 1.0]}
+
+        async def embed(text):
+            return vectors["btc"] if "btc" in text.lower() or "bitcoin" in text.lower() else vectors["eth"]
+
+        rows = [
+            ("c1", _creation("BTC price chart", ["BTC"]), vectors["btc"]),
+            ("c2", _creation("ETH price chart", ["ETH"]), vectors["eth"]),
+            ("c3", _creation("Bitcoin fundamentals table", ["BTC"], creation_type="table"), vectors["btc"]),
+            ("c4", _creation("BTC price chart", ["BTC"], tenant_id="u2"), vectors["btc"]),
+            ("r1", {"tenant_id": "u1", "source_type": "research", "symbols": "BTC"}, vectors["btc"]),
+        ]
+        collection.add(
+            ids=[doc_id for doc_id, _, _ in rows],
+            documents=["Bitcoin miners report on halving economics" if doc_id == "r1" else json.dumps({"data": {}})
+                       for doc_id, _, _ in rows],
+            metadatas=[metadata for _, metadata, _ in rows],
+            embeddings=[vector for _, _, vector in rows],
+        )
+        engine = HybridSearchEngine(lambda: collection, embedder=embed, runner=runtime.run, clock=clock)
+        yield engine, collection
+        runtime.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_loads_tenant_and_fuses_rankings(self, engine_and_collection):
+        engine, _ = engine_and_collection
+
+        ranked = await engine.search("u1", "btc price", n_results=3)
+
+        assert ranked[0][0] == "c1"
+        assert "c4" not in {doc_id for doc_id, _ in ranked}
+        assert engine.stats()["documents"] == 4
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_to_both_sides(self, engine_and_collection):
+        engine, _ = engine_and_collection
+
+        ranked = await engine.search("u1", "bitcoin", filters={"creation_type": "chart", "symbols": ["BTC", "SOL"]})
+
+        assert [doc_id for doc_id, _ in ranked] == ["c1"]
+
+    @pytest.mark.asyncio
+    async def test_incremental_add_is_searchable_before_chroma_write(self, engine_and_collection):
+        engine, _ = engine_and_collection
+        await engine.search("u1", "warm up")
+
+        engine.add("u1", "c5", json.dumps({"summary": "solana staking yields"}), _creation("SOL staking", ["SOL"]))
+        ranked = await engine.search("u1", "solana staking", n_results=2)
+
+        assert "c5" in {doc_id for doc_id, _ in ranked}
+
+    @pytest.mark.asyncio
+    async def test_documents_stored_by_other_workers_appear_after_refresh(self, engine_and_collection, clock):
+        engine, collection = engine_and_collection
+        await engine.search("u1", "warm up")
+
+        collection.add(ids=["c6"], documents=[json.dumps({"summary": "cardano governance vote"})],
+                       metadatas=[_creation("ADA governance", ["ADA"])], embeddings=[[0.0, 1.0]])
+        assert await engine.search("u1", "cardano governance", filters={"symbols": ["ADA"]}) == []
+
+        clock.now += INDEX_REFRESH_SECONDS
+        ranked = await engine.search("u1", "cardano governance", filters={"symbols": ["ADA"]})
+
+        assert [doc_id for doc_id, _ in ranked] == ["c6"]
+        assert engine.stats()["refreshes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_report_search_includes_non_creation_documents(self, engine_and_collection, monkeypatch):
+        engine, collection = engine_and_collection
+        recorder = UniversalCreationRecorder()
+        recorder.search_engine = engine
+        monkeypatch.setattr(recorder, "chroma_service", type("Service", (), {"collections": {"research_reports": collection}})())
+
+        reports = await recorder.search_reports("u1", "bitcoin halving", n_results=5)
+        creations = await recorder.search_creations("u1", "bitcoin halving", n_results=5)
+
+        assert reports[0]["doc_id"] == "r1" and reports[0]["is_creation"] is False
+        assert "r1" not in {creation.metadata.creation_id for creation in creations}
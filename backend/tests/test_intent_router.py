@@ -0,0 +1,94 @@
+"""
+Unit tests for the fast-path intent router (phrase matcher, gazetteer and classification).
+"""
+
+import pytest
+
+from app.services.intent_router import (
+    FAST_PATH_THRESHOLD,
+    IntentRouter,
+    PhraseMatcher,
+    build_gazetteer,
+)
+
+
+@pytest.fixture
+def router():
+    """Router with the default symbol maps plus two companies from the database."""
+    return IntentRouter(build_gazetteer(companies=[("Acme Robotics", None), ("Uniswap Labs", "UNI")]))
+
+
+class TestPhraseMatcher:
+    """Test Aho-Corasick matching."""
+
+    def test_finds_overlapping_phrases(self):
+        matcher = PhraseMatcher({"he": ["he"], "she": ["she"], "hers": ["hers"]})
+
+        assert [m[2] for m in matcher.find("she hers")] == ["she", "hers"]
+
+    def test_requires_whole_words(self):
+        matcher = PhraseMatcher({"eth": ["ETH"]})
+
+        assert matcher.find("ethereum method") == []
+        assert matcher.find("buy eth now") == [(4, 7, "ETH")]
+
+
+class TestIntentRouter:
+    """Test deterministic intent and entity resolution."""
+
+    @pytest.mark.parametrize("command,intent", [
+        ("help", "system_control"),
+        ("show market overview", "monitor_dashboard"),
+        ("price of BTC", "chart_token_compare"),
+        ("BTC and ETH quotes", "chart_token_compare"),
+        ("quote for AAPL", "chart_company"),
+        ("NVDA fundamentals", "chart_company"),
+        ("Tesla news", "news_analysis"),
+        ("top sectors in SPY", "etf_analysis"),
+        ("technology sector performance", "sector_analysis"),
+        ("rolling 30-day correlation BTC vs QQQ", "correlation_analysis"),
+        ("import portfolio from /tmp/data.csv", "import_portfolio"),
+        ("what api keys should i fill in", "system_control"),
+        ("show my portfolio", "portfolio_overview"),
+    ])
+    def test_common_commands_hit_fast_path(self, router, command, intent):
+        result = router.route(command)
+
+        assert result is not None
+        assert result.intent["intent"] == intent
+        assert result.confidence >= FAST_PATH_THRESHOLD
+
+    def test_entities_match_llm_schema(self, router):
+        correlation = router.classify("rolling 30-day correlation BTC vs QQQ").intent["entities"]
+        news = router.classify("Tesla news").intent["entities"]
+
+        assert correlation == {"asset1": "BTC", "asset2": "QQQ", "period": "30d", "tickers": ["BTC", "QQQ"]}
+        assert news["tickers"] == ["TSLA"] and news["companies"] == ["Tesla"]
+
+    def test_company_table_names_are_recognized(self, router):
+        result = router.classify("what is the price of uniswap labs")
+
+        assert result.intent["entities"]["tickers"] == ["UNI"]
+
+    def test_ambiguous_symbols_need_uppercase(self, router):
+        assert router.classify("link price") is None
+        assert router.classify("LINK price").intent["entities"]["tickers"] == ["LINK"]
+
+    @pytest.mark.parametrize("command", [
+        "i invested polkadot 100k in 2022",
+        "add coinbase into my tracking company",
+        "research AI chip startups",
+        "add BTC to my portfolio",
+    ])
+    def test_writes_and_open_questions_go_to_llm(self, router, command):
+        assert router.route(command) is None
+
+    def test_hit_rate_stats(self, router):
+        router.route("price of BTC")
+        router.route("research AI chip startups")
+
+        stats = router.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["by_intent"] == {"chart_token_compare": 1}
+        assert stats["recent_misses"] == ["research AI chip startups"]
@@ -0,0 +1,142 @@
+"""
+Tests for the portfolio KPI time-series store.
+"""
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.api.gp_dashboard import company_metrics
+from app.models.companies import Company
+from app.models.deals import Deal, InvestmentStage
+from app.models.portfolio_kpis import PortfolioKPI
+from app.models.users import User
+from app.services.kpi_store import KPIStore
+from app.utils.frames import records
+
+CSV = """company,period,mrr,burn,cash_balance,ltv,cac
+Acme,2024-03-31,100,10,120,50,10
+Acme,2024-06-30,150,10,100,,
+Beta,2024-06-30,80,0,500,20,10
+Zed,2024-06-30,1,1,1,1,1
+"""
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Deal.__table__, PortfolioKPI.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(Company(id="c1", name="Acme", sector="AI/ML", founded_year=2020))
+        session.add(Company(id="c2", name="Beta", sector="FinTech", founded_year=2020))
+        session.add(Company(id="c3", name="Gamma", sector="AI/ML"))
+        session.add(Deal(company_id="c1", created_by="u1", stage=InvestmentStage.SEED, created_at=datetime(2022, 5, 1)))
+        session.add(Deal(company_id="c2", created_by="u1", stage=InvestmentStage.SEED, created_at=datetime(2023, 5, 1)))
+        session.commit()
+        yield session
+
+
+class TestIngest:
+    """Test bulk ingest of long and wide layouts."""
+
+    def test_wide_csv_resolves_names_and_skips_unknown(self, session):
+        result = KPIStore().ingest_csv(session, CSV)
+
+        assert result["rows"] == 13
+        assert result["companies"] == 2
+        assert result["unknown_companies"] == ["Zed"]
+        assert session.exec(select(PortfolioKPI).where(PortfolioKPI.company_id == "c2")).all()
+
+    def test_reingest_replaces_values(self, session):
+        store = KPIStore()
+        store.ingest_csv(session, CSV)
+
+        store.ingest(session, [
+            {"company_id": "c1", "metric": "mrr", "period": "2024-06-30", "value": 160},
+            {"company_id": "c1", "metric": "mrr", "period": "2024-06-30", "value": 170},
+        ])
+
+        values = session.exec(select(PortfolioKPI.value, PortfolioKPI.source).where(
+            PortfolioKPI.company_id == "c1", PortfolioKPI.metric == "mrr", PortfolioKPI.period == date(2024, 6, 30)
+        )).all()
+        assert values == [(170, "json")]
+
+    def test_ingest_is_chunked_upserts(self, session, monkeypatch):
+        from app.services import kpi_store as kpi_module
+        monkeypatch.setattr(kpi_module, "UPSERT_CHUNK", 5)
+        statements = []
+        event.listen(session.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        KPIStore().ingest_csv(session, CSV)
+
+        assert sum(statement.startswith("INSERT INTO portfolio_kpis") for statement in statements) <= 3
+
+
+class TestDerivedMetrics:
+    """Test vectorized derivations across companies."""
+
+    def test_series_growth_ratios_and_runway(self, session):
+        store = KPIStore()
+        store.ingest_csv(session, CSV)
+
+        rows = {(row["company_id"], row["period"]): row for row in records(store.series(session))}
+
+        assert rows[("c1", "2024-03-31")]["mrr_growth"] is None
+        assert rows[("c1", "2024-06-30")]["mrr_growth"] == pytest.approx(0.5)
+        assert rows[("c1", "2024-06-30")]["runway_months"] == 10
+        assert rows[("c1", "2024-06-30")]["ltv_cac_ratio"] is None
+        assert rows[("c2", "2024-06-30")]["runway_months"] == 999
+        assert rows[("c2", "2024-06-30")]["ltv_cac_ratio"] == 2
+
+    def test_period_range_is_one_query(self, session):
+        store = KPIStore()
+        store.ingest_csv(session, CSV)
+        statements = []
+        event.listen(session.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        series = store.series(session, metrics=["mrr"], start=date(2024, 4, 1))
+
+        assert len(statements) == 1
+        assert list(series["mrr"]) == [150, 80]
+
+    def test_cohort_rollups(self, session):
+        store = KPIStore()
+        store.ingest_csv(session, CSV)
+
+        by_vintage = {(row["cohort"], row["period"]): row for row in store.cohorts(session, "vintage")}
+        by_founded = store.cohorts(session, "founded", start=date(2024, 6, 1))
+
+        assert by_vintage[("2022", "2024-06-30")]["total_mrr"] == 150
+        assert by_vintage[("2023", "2024-06-30")]["companies"] == 1
+        assert by_founded == [pytest.approx({
+            "cohort": "2020", "period": "2024-06-30", "companies": 2, "total_mrr": 230, "total_burn": 10,
+            "total_cash_balance": 600, "median_mrr_growth": 0.5, "median_ltv_cac_ratio": 2, "median_runway_months": 504.5,
+        })]
+        with pytest.raises(ValueError):
+            store.cohorts(session, "stage")
+
+
+class TestCompanyMetrics:
+    """Test the GP dashboard company metrics built on the store."""
+
+    def test_reported_kpis_replace_mock_figures(self, session):
+        store = KPIStore()
+        store.ingest_csv(session, CSV)
+        companies = session.exec(select(Company).order_by(Company.id)).all()
+
+        metrics = {row["company_id"]: row for row in company_metrics(companies, store.latest(session))}
+
+        assert metrics["c1"]["reported"] is True
+        assert metrics["c1"]["mrr"] == 150 and metrics["c1"]["prev_mrr"] == 100
+        assert metrics["c1"]["period"] == "2024-06-30"
+        assert metrics["c3"]["reported"] is False
+        assert metrics["c3"]["mrr"] == 125000
+        assert metrics["c3"]["mrr_growth"] == pytest.approx((125000 - 98000) / 98000)
+        assert metrics["c3"]["ltv_cac_ratio"] == 20
@@ -0,0 +1,138 @@
+"""
+Tests for lazy, off-loop initialization of the Chroma-backed memory services.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services import chroma_memory_service as memory_module
+from app.services import unified_chroma_service as unified_module
+from app.services.chroma_retention import RETENTION_POLICIES, PartitionedCollection
+from app.services.chroma_runtime import ChromaRuntime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def runtime(tmp_path, monkeypatch):
+    runtime = ChromaRuntime(str(tmp_path / "unified"), max_workers=2)
+    monkeypatch.setattr(unified_module, "chroma_runtime", runtime)
+    monkeypatch.setattr(memory_module, "chroma_runtime", runtime)
+    yield runtime
+    runtime.shutdown()
+
+
+class TestImportCost:
+    """Test that importing the services opens nothing."""
+
+    def test_import_does_not_open_chroma(self, tmp_path):
+        script = (
+            "import json, sys\n"
+            "import app.services.creation_recorder, app.services.chroma_memory_service\n"
+            "from app.services.chroma_runtime import chroma_runtime\n"
+            "print(json.dumps({'client_open': chroma_runtime.stats()['client_open'], 'chromadb': 'chromadb' in sys.modules}))\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True,
+            env={**os.environ, "HOME": str(tmp_path)}, timeout=120
+        )
+
+        assert json.loads(completed.stdout.strip().splitlines()[-1]) == {"client_open": False, "chromadb": False}
+        assert not (tmp_path / ".redpill" / "unified_memory").exists()
+
+
+class TestUnifiedInitialization:
+    """Test the unified service's lazy collections and readiness."""
+
+    @pytest.mark.asyncio
+    async def test_initialize_opens_collections_once(self, runtime):
+        service = unified_module.UnifiedChromaService()
+        assert not service.ready
+        assert runtime.stats()["client_open"] is False
+
+        assert await service.initialize() is True
+        assert await service.initialize() is True
+
+        assert service.ready
+        assert "portfolio_memory" in service.collections
+        assert set(service.partitions) == {"user_conversations", "market_intelligence"}
+        assert service.readiness()["init_ms"] is not None
+
+    def test_first_use_initializes_synchronously(self, runtime):
+        service = unified_module.UnifiedChromaService()
+
+        assert "research_reports" in service.collections
+        assert service.ready
+
+    @pytest.mark.asyncio
+    async def test_failed_open_is_reported_and_retried(self, tmp_path, monkeypatch):
+        attempts = []
+
+        def flaky_client(path):
+            attempts.append(path)
+            if len(attempts) == 1:
+                raise RuntimeError("disk not mounted")
+            return ChromaRuntime._persistent_client(path)
+
+        runtime = ChromaRuntime(str(tmp_path / "unified"), client_factory=flaky_client)
+        monkeypatch.setattr(unified_module, "chroma_runtime", runtime)
+        service = unified_module.UnifiedChromaService()
+
+        assert await service.initialize() is False
+        assert service.readiness() == {"ready": False, "init_ms": None, "error": "disk not mounted"}
+        assert await service.initialize() is True
+        assert service.readiness()["error"] is None
+        runtime.shutdown()
+
+
+class TestConversationMemoryInitialization:
+    """Test the legacy conversation service's lazy partitions."""
+
+    @pytest.mark.asyncio
+    async def test_initialize_counts_off_loop(self, runtime, monkeypatch):
+        partition = PartitionedCollection("user_conversations", RETENTION_POLICIES["user_conversations"], runtime)
+        monkeypatch.setattr(memory_module, "get_partitioned_collection", lambda name: partition)
+        service = memory_module.ChromaMemoryService()
+        assert not service.ready
+        assert runtime.stats()["client_open"] is False
+
+        assert await service.initialize() is True
+        assert service.ready
+        assert runtime.stats()["submitted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_store_conversation_keeps_caller_tenant(self, runtime, monkeypatch):
+        partition = PartitionedCollection("user_conversations", RETENTION_POLICIES["user_conversations"], runtime)
+        monkeypatch.setattr(memory_module, "get_partitioned_collection", lambda name: partition)
+        monkeypatch.setattr(memory_module.ChromaMemoryService, "_generate_embedding", lambda self, text: _fixed_embedding())
+        service = memory_module.ChromaMemoryService()
+
+        memory_id = await service.store_conversation("hi", "hello", {}, {}, session_id="s1", tenant_id="acme")
+
+        stored = await runtime.run(partition.collection_for().get, ids=[memory_id])
+        assert stored["metadatas"][0]["tenant_id"] == "acme"
+        assert stored["metadatas"][0]["thread_id"] == "s1"
+
+    @pytest.mark.asyncio
+    async def test_reads_only_see_the_callers_tenant(self, runtime, monkeypatch):
+        partition = PartitionedCollection("user_conversations", RETENTION_POLICIES["user_conversations"], runtime)
+        monkeypatch.setattr(memory_module, "get_partitioned_collection", lambda name: partition)
+        monkeypatch.setattr(memory_module.ChromaMemoryService, "_generate_embedding", lambda self, text: _fixed_embedding())
+        service = memory_module.ChromaMemoryService()
+        for tenant_id, question in (("acme", "price of AAPL"), ("globex", "price of TSLA")):
+            await service.store_conversation(question, "quote", {"symbols": [question[-4:]]}, {},
+                                             session_id="default", tenant_id=tenant_id)
+
+        memories = await service.retrieve_relevant_context("price", tenant_id="acme")
+        entities = await service.get_recent_entities(tenant_id="globex")
+
+        assert [memory.user_input for memory in memories] == ["price of AAPL"]
+        assert entities["symbols"] == ["TSLA"]
+
+
+async def _fixed_embedding():
+    return [0.1, 0.2, 0.3]
@@ -0,0 +1,111 @@
+"""
+Unit tests for LLM call instrumentation - histograms, cost and intent attribution.
+"""
+
+import pytest
+
+from app.services.llm_metrics import (
+    Histogram,
+    call_with_retries,
+    estimate_cost,
+    llm_call_context,
+    llm_metrics,
+    set_current_intent,
+    track_llm_call,
+    track_tool_call,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    """Reset the global collector and disable ApiUsageLog writes."""
+    llm_metrics.persist = False
+    llm_metrics.reset()
+    yield
+    llm_metrics.reset()
+    llm_metrics.persist = True
+
+
+class TestHistogram:
+    """Test bucket counting and percentile estimation."""
+
+    def test_percentiles_fall_in_expected_buckets(self):
+        histogram = Histogram()
+        for value in [10] * 90 + [3000] * 10:
+            histogram.observe(value)
+
+        assert histogram.count == 100
+        assert histogram.percentile(0.5) <= 50
+        assert 2500 <= histogram.percentile(0.99) <= 5000
+
+
+class TestCallTracking:
+    """Test model/tool call records and aggregation."""
+
+    def test_estimate_cost_uses_model_pricing(self):
+        assert estimate_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+        assert estimate_cost("unknown-model", 0, 1_000_000) == pytest.approx(3.00)
+
+    @pytest.mark.asyncio
+    async def test_llm_call_records_usage_and_cost(self):
+        async with track_llm_call("ai_service.chat", "gpt-4o") as call:
+            call.set_usage({"prompt_tokens": 1000, "completion_tokens": 500, "prompt_tokens_details": {"cached_tokens": 200}})
+
+        snapshot = llm_metrics.snapshot()
+        caller = snapshot["by_caller"]["ai_service.chat"]
+        assert caller["calls"] == 1
+        assert caller["prompt_tokens"] == 1000
+        assert caller["cached_prompt_tokens"] == 200
+        assert snapshot["totals"]["cost_estimate_usd"] == pytest.approx(estimate_cost("gpt-4o", 1000, 500))
+        assert caller["time_to_first_token_ms"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_are_counted_on_the_call(self):
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("reset by peer")
+            return "ok"
+
+        async with track_llm_call("ai_service.chat", "gpt-4o") as call:
+            assert await call_with_retries(call, flaky, lambda e: isinstance(e, ConnectionError), backoff=0) == "ok"
+
+        assert call.retries == 2
+        assert llm_metrics.snapshot()["by_caller"]["ai_service.chat"]["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_errors_and_exhausted_retries_raise(self):
+        async def failing():
+            raise ValueError("bad request")
+
+        async with track_llm_call("ai_service.chat", "gpt-4o") as call:
+            with pytest.raises(ValueError):
+                await call_with_retries(call, failing, lambda e: False, backoff=0)
+            assert call.retries == 0
+            with pytest.raises(ValueError):
+                await call_with_retries(call, failing, lambda e: True, max_retries=2, backoff=0)
+            assert call.retries == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_counted_as_error(self):
+        with pytest.raises(RuntimeError):
+            async with track_llm_call("ai_service.chat", "gpt-4o"):
+                raise RuntimeError("boom")
+
+        assert llm_metrics.snapshot()["by_model"]["gpt-4o"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_intent_set_later_attributes_earlier_calls(self):
+        with llm_call_context(intent="agent.conversation", user_id="u1"):
+            async with track_llm_call("ai_service.chat", "gpt-4o"):
+                pass
+            set_current_intent("agent.get_crypto_price")
+            async with track_tool_call("get_crypto_price", "financial_agent") as tool:
+                tool.success = False
+
+        snapshot = llm_metrics.snapshot()
+        assert list(snapshot["by_intent"]) == ["agent.get_crypto_price"]
+        assert snapshot["tools_by_intent"]["agent.get_crypto_price"]["count"] == 1
+        assert snapshot["tools"]["get_crypto_price"]["errors"] == 1
@@ -0,0 +1,89 @@
+"""
+Tests for the offline mock LLM server and benchmark helpers.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.mock_llm_server import MockConfig, ScriptRule, create_app
+from benchmarks.terminal_benchmark import percentile
+
+
+@pytest.fixture
+def client():
+    """Mock server with no artificial delay."""
+    config = MockConfig(latency_ms=0, jitter_ms=0, tokens_per_second=0)
+    config.script = [ScriptRule(r"price", tool_calls=[{"name": "get_crypto_price", "arguments": {"symbol": "BTC"}}])] + config.script
+    return TestClient(create_app(config))
+
+
+def _tool(name):
+    return {"type": "function", "function": {"name": name, "parameters": {"type": "object", "properties": {}}}}
+
+
+class TestMockLLMServer:
+    """Test the OpenAI-compatible endpoints."""
+
+    def test_scripted_tool_call_when_tool_is_offered(self, client):
+        response = client.post("/v1/chat/completions", json={
+            "model": "gpt-4o",
+            "messages": [{"role": "user", "content": "price of BTC"}],
+            "tools": [_tool("get_crypto_price")],
+        }).json()
+
+        call = response["choices"][0]["message"]["tool_calls"][0]
+        assert call["function"]["name"] == "get_crypto_price"
+        assert json.loads(call["function"]["arguments"]) == {"symbol": "BTC"}
+        assert response["usage"]["prompt_tokens"] > 0
+
+    @pytest.mark.parametrize("command, intent, tickers", [
+        ("price of BTC and ETH", "chart_token_compare", ["BTC", "ETH"]),
+        ("show my portfolio", "portfolio_overview", None),
+        ("show market overview", "monitor_dashboard", None),
+        ("compare NVDA vs AMD chart", "chart_company", ["NVDA", "AMD"]),
+        ("quote for MSFT", "chart_company", ["MSFT"]),
+        ("news for TSLA today", "news_analysis", ["TSLA"]),
+        ("top crypto companies", "company_analysis", None),
+        ("what can you do?", "system_control", None),
+    ])
+    def test_intent_follows_the_quoted_command(self, client, command, intent, tickers):
+        prompt = f'Parse the following user command\n\nUser command: "{command}"\n\nReturn JSON with this exact structure:\n' \
+                 '- "portfolio" → {"intent": "portfolio_overview"}'
+        response = client.post("/v1/chat/completions", json={"messages": [{"role": "user", "content": prompt}]}).json()
+
+        parsed = json.loads(response["choices"][0]["message"]["content"])
+        assert parsed["intent"] == intent
+        assert parsed["entities"].get("tickers") == tickers
+
+    def test_plain_content_without_tools(self, client):
+        response = client.post("/v1/chat/completions", json={
+            "messages": [{"role": "user", "content": "price of BTC"}],
+        }).json()
+
+        assert response["choices"][0]["finish_reason"] == "stop"
+        assert response["choices"][0]["message"]["content"]
+
+    def test_streaming_emits_chunks_and_done(self, client):
+        with client.stream("POST", "/v1/chat/completions", json={
+            "stream": True, "messages": [{"role": "user", "content": "hello there"}],
+        }) as response:
+            lines = [line for line in response.iter_lines() if line]
+
+        assert lines[-1] == "data: [DONE]"
+        assert json.loads(lines[0][6:])["object"] == "chat.completion.chunk"
+
+    def test_embeddings_are_deterministic(self, client):
+        first = client.post("/v1/embeddings", json={"input": ["same text", "other"]}).json()
+        second = client.post("/v1/embeddings", json={"input": "same text"}).json()
+
+        assert first["data"][0]["embedding"] == second["data"][0]["embedding"]
+        assert first["data"][0]["embedding"] != first["data"][1]["embedding"]
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,152 @@
+"""
+Tests for the aggregated pipeline analytics.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.companies import Company
+from app.models.deals import Deal, DealStatus, DealStatusHistory, InvestmentStage
+from app.models.users import User
+from app.services import pipeline_analytics as analytics_module
+from app.services.pipeline_analytics import PipelineAnalytics
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, Deal.__table__, DealStatusHistory.__table__,
+    ])
+    return engine
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def _deal(session, sector, path, start=datetime(2024, 1, 1), step=timedelta(days=10)):
+    """Deal that moved through `path` statuses, one every `step`"""
+    company = Company(name=f"{sector}-{len(path)}", sector=sector)
+    session.add(company)
+    session.flush()
+    deal = Deal(company_id=company.id, created_by="u1", status=path[-1], stage=InvestmentStage.SEED,
+                created_at=start, updated_at=start + step * (len(path) - 1))
+    session.add(deal)
+    session.flush()
+    for i, status in enumerate(path):
+        session.add(DealStatusHistory(
+            deal_id=deal.id, previous_status=path[i - 1] if i else None, new_status=status,
+            changed_by="u1", changed_at=start + step * i,
+        ))
+    session.commit()
+    return deal
+
+
+@pytest.fixture
+def seeded(engine):
+    with Session(engine) as session:
+        _deal(session, "ai", [DealStatus.PLANNED])
+        _deal(session, "ai", [DealStatus.PLANNED, DealStatus.MEETING, DealStatus.PASSED])
+        _deal(session, "defi", [DealStatus.PLANNED, DealStatus.MEETING, DealStatus.RESEARCH, DealStatus.DEAL])
+        _deal(session, "defi", [DealStatus.PLANNED, DealStatus.MEETING, DealStatus.RESEARCH, DealStatus.DEAL, DealStatus.TRACK],
+              step=timedelta(days=20))
+    return engine
+
+
+class TestAggregates:
+    """Test that each widget is one query with the expected numbers."""
+
+    def test_stage_counts_single_query(self, seeded, statements):
+        with Session(seeded) as session:
+            stages = {row["status"]: row for row in PipelineAnalytics().stage_counts(session)}
+
+        assert len(statements) == 1
+        assert stages["planned"]["count"] == 1
+        assert stages["track"] == {"stage": "closed", "count": 1, "status": "track"}
+        assert stages["closed"]["count"] == 0
+
+    def test_funnel_conversion(self, seeded, statements):
+        with Session(seeded) as session:
+            funnel = {row["status"]: row for row in PipelineAnalytics().funnel(session)}
+
+        assert len(statements) == 1
+        assert [funnel[s]["reached"] for s in ("planned", "meeting", "research", "deal", "track")] == [4, 3, 2, 2, 1]
+        assert funnel["planned"]["conversion_rate"] is None
+        assert funnel["meeting"]["conversion_rate"] == 0.75
+        assert funnel["track"]["conversion_rate"] == 0.5
+
+    def test_time_in_stage_uses_completed_spans(self, seeded, statements):
+        with Session(seeded) as session:
+            stages = {row["status"]: row for row in PipelineAnalytics().time_in_stage(session)}
+
+        assert len(statements) == 1
+        assert stages["planned"]["transitions"] == 3
+        assert stages["planned"]["avg_days"] == pytest.approx((10 + 10 + 20) / 3, abs=0.1)
+        assert stages["deal"]["max_days"] == 20
+        assert stages["track"]["avg_days"] is None
+
+    def test_sector_counts_and_history(self, seeded, statements):
+        with Session(seeded) as session:
+            analytics = PipelineAnalytics()
+            sectors = analytics.sector_counts(session)
+            history = analytics.deal_history(session, since=datetime(2023, 12, 1))
+
+        assert len(statements) == 2
+        assert sectors == {"ai": 2, "defi": 2}
+        outcomes = sorted(row["outcome"] for row in history)
+        assert outcomes == ["passed", "pending", "pending", "won"]
+
+
+class TestCache:
+    """Test per-key caching and invalidation on writes."""
+
+    def test_repeat_reads_are_cached_until_deals_change(self, seeded, statements, monkeypatch):
+        analytics = PipelineAnalytics()
+        monkeypatch.setattr(analytics_module, "pipeline_analytics", analytics)
+
+        with Session(seeded) as session:
+            analytics.stage_counts(session)
+            analytics.stage_counts(session)
+            assert len(statements) == 1
+
+            _deal(session, "ai", [DealStatus.PLANNED, DealStatus.MEETING])
+            statements.clear()
+            stages = {row["status"]: row["count"] for row in analytics.stage_counts(session)}
+
+        assert len(statements) == 1
+        assert stages["meeting"] == 1
+        assert analytics.stats()["invalidations"] == 1
+
+    def test_ttl_expiry_and_filter_keys(self, seeded, statements):
+        now = [0.0]
+        analytics = PipelineAnalytics(ttl_seconds=10, clock=lambda: now[0])
+
+        with Session(seeded) as session:
+            analytics.deal_history(session, since=datetime(2024, 1, 1))
+            analytics.deal_history(session, since=datetime(2025, 1, 1))
+            analytics.deal_history(session, since=datetime(2024, 1, 1))
+            assert len(statements) == 2
+
+            now[0] = 11
+            analytics.deal_history(session, since=datetime(2024, 1, 1))
+
+        assert len(statements) == 3
+
+    def test_rolled_back_writes_do_not_invalidate(self, seeded, monkeypatch):
+        analytics = PipelineAnalytics()
+        monkeypatch.setattr(analytics_module, "pipeline_analytics", analytics)
+
+        with Session(seeded) as session:
+            session.add(Company(name="Temp", sector="ai"))
+            session.flush()
+            session.rollback()
+
+        assert analytics.stats()["invalidations"] == 0
@@ -0,0 +1,288 @@
+"""
+Tests for the materialized portfolio context store.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services import portfolio_service as portfolio_module
+from app.services.portfolio_context_store import (
+    MEMORY_TTL_SECONDS,
+    REDIS_GENERATION_PREFIX,
+    REDIS_KEY_PREFIX,
+    PortfolioContextStore,
+    holding_event,
+    mention_event,
+)
+from app.services.portfolio_service import PortfolioService
+
+
+class FakeRedis:
+    def __init__(self, data=None, fail=False):
+        self.data = data or {}
+        self.fail = fail
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _store(redis=None, clock=None):
+    return PortfolioContextStore(redis_factory=(lambda: redis) if redis is not None else None,
+                                 clock=clock or FakeClock())
+
+
+class TestIncrementalState:
+    """Test that write events maintain the context without rebuilding."""
+
+    @pytest.mark.asyncio
+    async def test_events_after_load_update_context(self):
+        store = _store()
+        await store.get("t1")
+
+        store.record("t1", mention_event("NVDA", "watch", "2025-01-01T00:00:00", sector="Technology"))
+        store.record("t1", mention_event("BTC", "buy", "2025-01-02T00:00:00"))
+        store.record("t1", mention_event("NVDA", "buy", "2025-01-03T00:00:00"))
+        context = await store.get("t1")
+
+        assert context["symbols"] == ["NVDA", "BTC"]
+        assert context["watchlist"] == []
+        assert context["holdings"][0]["sector"] == "Technology"
+        assert context["sectors"] == ["Technology"]
+        assert context["last_updated"] == "2025-01-03T00:00:00"
+        assert store.stats()["rebuilds"] == 1
+
+    @pytest.mark.asyncio
+    async def test_watch_does_not_demote_holding_and_closed_position_is_removed(self):
+        store = _store()
+        await store.get("t1")
+
+        store.record("t1", holding_event("AAPL", 10, "2025-01-01T00:00:00"))
+        store.record("t1", mention_event("AAPL", "track", "2025-01-02T00:00:00"))
+        assert [h["symbol"] for h in (await store.get("t1"))["holdings"]] == ["AAPL"]
+
+        store.record("t1", holding_event("AAPL", 0))
+        assert (await store.get("t1"))["symbols"] == []
+
+    @pytest.mark.asyncio
+    async def test_tenants_are_isolated(self):
+        store = _store()
+        await store.get("t1")
+        store.record("t1", mention_event("ETH", "buy"))
+
+        assert (await store.get("t2"))["symbols"] == []
+        assert (await store.get("t1"))["symbols"] == ["ETH"]
+
+    def test_writes_for_cold_tenants_are_not_buffered(self):
+        store = _store()
+        for i in range(100):
+            store.record(f"t{i}", mention_event("ETH", "buy"))
+
+        assert store._pending == {}
+
+
+class TestRebuild:
+    """Test cold-start loading from loaders and Redis."""
+
+    @pytest.mark.asyncio
+    async def test_loaders_replayed_in_date_order_with_writes_during_rebuild(self):
+        store = _store()
+
+        async def chroma_loader(tenant_id):
+            # A write lands after this loader has read its source
+            store.record("t1", mention_event("SOL", "watch", "2025-01-06T00:00:00"))
+            return [
+                mention_event("TSLA", "buy", "2025-01-05T00:00:00"),
+                mention_event("TSLA", "watch", "2025-01-01T00:00:00"),
+            ]
+
+        store.add_loader(chroma_loader)
+        store.add_loader(lambda tenant_id: [holding_event("MSFT", 3, "2025-01-02T00:00:00")])
+
+        context = await store.get("t1")
+
+        assert [h["symbol"] for h in context["holdings"]] == ["TSLA", "MSFT"]
+        assert context["watchlist"] == [{"symbol": "SOL", "sector": None}]
+
+    @pytest.mark.asyncio
+    async def test_failing_loader_does_not_block_others(self):
+        store = _store()
+
+        def broken(tenant_id):
+            raise RuntimeError("chroma unavailable")
+
+        store.add_loader(broken)
+        store.add_loader(lambda tenant_id: [holding_event("AAPL", 1)])
+
+        assert (await store.get("t1"))["symbols"] == ["AAPL"]
+
+    @pytest.mark.asyncio
+    async def test_redis_copy_skips_rebuild_and_is_written_through(self):
+        redis = FakeRedis()
+        first = _store(redis)
+        first.add_loader(lambda tenant_id: [mention_event("BTC", "buy", "2025-01-01T00:00:00")])
+        await first.get("t1")
+        await first.record_async("t1", mention_event("ETH", "watch", "2025-01-02T00:00:00"))
+
+        second = _store(redis)
+        second.add_loader(lambda tenant_id: pytest.fail("rebuild should not run"))
+        context = await second.get("t1")
+
+        assert context["symbols"] == ["BTC", "ETH"]
+        assert second.stats()["redis_hits"] == 1
+        assert json.loads(redis.data[REDIS_KEY_PREFIX + "t1"])["watchlist"]["ETH"]["symbol"] == "ETH"
+
+    @pytest.mark.asyncio
+    async def test_write_while_cold_discards_stale_redis_copy(self):
+        redis = FakeRedis({REDIS_KEY_PREFIX + "t1": json.dumps({"holdings": {}, "watchlist": {}, "last_updated": None})})
+        store = _store(redis)
+        store.add_loader(lambda tenant_id: [holding_event("AAPL", 1)])
+
+        store.record("t1", holding_event("AAPL", 1))
+        await asyncio.sleep(0)
+
+        assert (await store.get("t1"))["symbols"] == ["AAPL"]
+        assert store.stats()["rebuilds"] == 1
+
+    @pytest.mark.asyncio
+    async def test_immediate_read_after_cold_write_skips_stale_redis_copy(self):
+        redis = FakeRedis({REDIS_KEY_PREFIX + "t1": json.dumps({"holdings": {}, "watchlist": {}, "last_updated": None})})
+        store = _store(redis)
+        store.add_loader(lambda tenant_id: [holding_event("AAPL", 1)])
+
+        store.record("t1", holding_event("AAPL", 1))
+
+        assert (await store.get("t1"))["symbols"] == ["AAPL"]
+        assert store.stats()["redis_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cold_record_async_retires_redis_copy_before_returning(self):
+        redis = FakeRedis({
+            REDIS_KEY_PREFIX + "t1": json.dumps({"holdings": {}, "watchlist": {}, "last_updated": None, "generation": 0}),
+        })
+        writer, reader = _store(redis), _store(redis)
+        reader.add_loader(lambda tenant_id: [holding_event("AAPL", 1)])
+
+        await writer.record_async("t1", holding_event("AAPL", 1))
+
+        assert redis.data[REDIS_GENERATION_PREFIX + "t1"] == "1"
+        assert (await reader.get("t1"))["symbols"] == ["AAPL"]
+        assert reader.stats()["redis_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writers_do_not_overwrite_each_other(self):
+        redis, clock = FakeRedis(), FakeClock()
+        sources = [holding_event("AAPL", 1, "2025-01-01T00:00:00")]
+        worker_a, worker_b = _store(redis, clock), _store(redis, clock)
+        for store in (worker_a, worker_b):
+            store.add_loader(lambda tenant_id: list(sources))
+        await worker_a.get("t1")
+        await worker_b.get("t1")
+
+        # Each worker stores its write in the source, then records it
+        for store, event in ((worker_a, holding_event("MSFT", 2, "2025-01-02T00:00:00")),
+                             (worker_b, holding_event("NVDA", 3, "2025-01-03T00:00:00"))):
+            sources.append(event)
+            await store.record_async("t1", event)
+        clock.now += MEMORY_TTL_SECONDS
+
+        for store in (worker_a, worker_b):
+            assert sorted((await store.get("t1"))["symbols"]) == ["AAPL", "MSFT", "NVDA"]
+        assert json.loads(redis.data[REDIS_KEY_PREFIX + "t1"])["generation"] == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_copy_picks_up_other_workers_writes(self):
+        redis, clock = FakeRedis(), FakeClock()
+        first, second = _store(redis, clock), _store(redis, clock)
+        for store in (first, second):
+            store.add_loader(lambda tenant_id: [holding_event("AAPL", 1, "2025-01-01T00:00:00")])
+        await first.get("t1")
+        await second.get("t1")
+
+        await second.record_async("t1", holding_event("MSFT", 2, "2025-01-02T00:00:00"))
+        assert (await first.get("t1"))["symbols"] == ["AAPL"]
+
+        clock.now += MEMORY_TTL_SECONDS
+        assert (await first.get("t1"))["symbols"] == ["MSFT", "AAPL"]
+        assert first.stats()["refreshes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_refresh_keeps_own_scheduled_writes(self):
+        redis, clock = FakeRedis(), FakeClock()
+        store = _store(redis, clock)
+        await store.get("t1")
+
+        store.record("t1", holding_event("AAPL", 1))
+        clock.now += MEMORY_TTL_SECONDS
+
+        assert (await store.get("t1"))["symbols"] == ["AAPL"]
+
+    @pytest.mark.asyncio
+    async def test_write_from_worker_thread_reaches_redis_before_returning(self):
+        redis = FakeRedis()
+        store = _store(redis)
+        await store.get("t1")
+
+        await asyncio.to_thread(store.record, "t1", holding_event("AAPL", 1))
+
+        assert json.loads(redis.data[REDIS_KEY_PREFIX + "t1"])["holdings"]["AAPL"]["amount"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_memory(self):
+        redis = FakeRedis(fail=True)
+        store = _store(redis)
+        store.add_loader(lambda tenant_id: [holding_event("AAPL", 1)])
+
+        assert (await store.get("t1"))["symbols"] == ["AAPL"]
+        assert (await store.get("t2"))["symbols"] == ["AAPL"]
+        assert redis.calls == 1
+        assert store.stats()["redis_available"] is False
+
+
+class TestPortfolioServiceEvents:
+    """Test that PortfolioService writes flow into the store."""
+
+    @pytest.mark.asyncio
+    async def test_add_and_remove_holding_update_context(self, tmp_path, monkeypatch):
+        store = _store()
+        monkeypatch.setattr(portfolio_module, "portfolio_context_store", store)
+        service = PortfolioService()
+        service.data_dir = str(tmp_path)
+        store.add_loader(service.context_events)
+
+        service.add_holding("u1", "aapl", 5, price=180.0)
+        context = await store.get("u1")
+        assert context["holdings"][0]["symbol"] == "AAPL"
+        assert context["holdings"][0]["amount"] == 5
+
+        service.remove_holding("u1", "AAPL", 2)
+        assert (await store.get("u1"))["holdings"][0]["amount"] == 3
+
+        service.remove_holding("u1", "AAPL")
+        assert (await store.get("u1"))["holdings"] == []
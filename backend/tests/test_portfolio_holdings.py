@@ -0,0 +1,154 @@
+"""
+Tests for the cached, write-ahead-logged portfolio holdings store.
+"""
+
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from app.services import portfolio_service as portfolio_module
+from app.services.portfolio_context_store import PortfolioContextStore
+from app.services.portfolio_service import PortfolioService, Trade, resolve_import_path
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(portfolio_module, "portfolio_context_store", PortfolioContextStore(redis_factory=None))
+    service = PortfolioService()
+    service.data_dir = str(tmp_path)
+    return service
+
+
+def _fresh(service):
+    other = PortfolioService()
+    other.data_dir = service.data_dir
+    return other
+
+
+class TestTrades:
+    """Test batch trade semantics."""
+
+    def test_add_remove_set_in_one_batch(self, service):
+        service.add_holding("u1", "aapl", 5, price=180.0)
+
+        result = service.apply_trades("u1", [
+            {"symbol": "AAPL", "action": "remove", "amount": 2},
+            {"symbol": "msft", "action": "set", "amount": 10, "price": 400.0},
+            {"symbol": "BTC", "action": "remove"},
+        ])
+
+        assert result["changed"] == {"AAPL": 3, "MSFT": 10}
+        assert result["results"][2]["success"] is False
+        holdings = _fresh(service).get_portfolio("u1")
+        assert holdings["AAPL"].amount == 3 and holdings["AAPL"].average_price == 180.0
+        assert holdings["MSFT"].average_price == 400.0
+
+    def test_legacy_messages_are_kept(self, service):
+        assert service.add_holding("u1", "eth", 2)["new_total"] == 2
+        assert service.remove_holding("u1", "ETH", 0.5)["message"] == "🗑️ Removed 0.5 ETH, 1.5 remaining"
+        assert service.remove_holding("u1", "ETH")["message"] == "🗑️ Removed all 1.5 ETH from portfolio"
+        assert service.remove_holding("u1", "ETH") == {"success": False, "message": "❌ No ETH found in portfolio"}
+
+    def test_invalid_trade_rejected_before_any_write(self, service):
+        with pytest.raises(ValueError):
+            service.apply_trades("u1", [Trade(symbol="AAPL", amount=1), {"symbol": "X", "action": "short", "amount": 1}])
+
+        assert service.get_portfolio("u1") == {}
+
+
+class TestDurability:
+    """Test the write-ahead log, compaction and reloads."""
+
+    def test_import_is_one_wal_append(self, service):
+        rows = [{"symbol": f"S{i}", "amount": i + 1, "price": ""} for i in range(5000)]
+
+        service.import_holdings("u1", rows)
+
+        with open(service._wal_path("u1")) as f:
+            assert len(f.readlines()) == 1
+        assert len(_fresh(service).get_portfolio("u1")) == 5000
+
+    def test_import_replace_all_closes_missing_positions(self, service):
+        service.add_holding("u1", "OLD", 1)
+
+        service.import_holdings("u1", [{"symbol": "NEW", "amount": 2}], replace_all=True)
+
+        assert set(service.get_portfolio("u1")) == {"NEW"}
+
+    def test_compaction_writes_snapshot_and_truncates_wal(self, service, monkeypatch):
+        monkeypatch.setattr(portfolio_module, "WAL_COMPACT_ENTRIES", 3)
+        for _ in range(3):
+            service.add_holding("u1", "AAPL", 1)
+
+        assert not os.path.exists(service._wal_path("u1"))
+        with open(service._get_portfolio_path("u1")) as f:
+            assert json.load(f)["AAPL"]["amount"] == 3
+
+    def test_torn_wal_line_is_skipped(self, service):
+        service.add_holding("u1", "AAPL", 1)
+        with open(service._wal_path("u1"), "a") as f:
+            f.write('{"MSFT": {"symbol": "MS')
+
+        assert set(_fresh(service).get_portfolio("u1")) == {"AAPL"}
+
+    def test_other_writers_are_picked_up(self, service):
+        assert service.get_portfolio("u1") == {}
+        _fresh(service).add_holding("u1", "AAPL", 4)
+
+        assert service.get_portfolio("u1")["AAPL"].amount == 4
+
+
+class TestConcurrency:
+    """Test that concurrent writers do not lose updates."""
+
+    def test_threads_across_instances(self, service):
+        services = [service, _fresh(service)]
+
+        def buy(index):
+            for _ in range(25):
+                services[index % 2].add_holding("u1", "AAPL", 1)
+
+        threads = [threading.Thread(target=buy, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert _fresh(service).get_portfolio("u1")["AAPL"].amount == 200
+
+    @pytest.mark.asyncio
+    async def test_async_batches(self, service):
+        await asyncio.gather(*[
+            service.apply_trades_async("u1", [{"symbol": "BTC", "amount": 0.5}, {"symbol": "ETH", "amount": 1}])
+            for _ in range(20)
+        ])
+
+        holdings = _fresh(service).get_portfolio("u1")
+        assert holdings["BTC"].amount == 10 and holdings["ETH"].amount == 20
+
+    @pytest.mark.asyncio
+    async def test_async_helpers_keep_legacy_results(self, service):
+        added = await asyncio.gather(*[service.add_holding_async("u1", "sol", 2) for _ in range(10)])
+        removed = await service.remove_holding_async("u1", "SOL", 5)
+        imported = await service.import_holdings_async("u1", [{"symbol": "ADA", "amount": 100}])
+
+        assert all(result["success"] for result in added)
+        assert removed["success"] and imported["changed"] == {"ADA": 100}
+        assert _fresh(service).get_portfolio("u1")["SOL"].amount == 15
+
+
+class TestImportPaths:
+    """Test that import files must come from the upload directory."""
+
+    def test_paths_outside_upload_directory_are_rejected(self, tmp_path):
+        uploads = tmp_path / "uploads"
+        uploads.mkdir()
+
+        assert resolve_import_path("holdings.csv", str(uploads)) == str(uploads / "holdings.csv")
+        assert resolve_import_path(str(uploads / "a.json"), str(uploads)) == str(uploads / "a.json")
+        for path in ("/etc/passwd", "../secrets.csv", str(tmp_path / "uploads-other" / "x.csv")):
+            with pytest.raises(ValueError):
+                resolve_import_path(path, str(uploads))
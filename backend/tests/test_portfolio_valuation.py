@@ -0,0 +1,163 @@
+"""
+Tests for batched, cached portfolio valuation.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.companies import Company
+from app.models.dashboards import CompanyDataSource
+from app.models.users import User
+from app.services import portfolio_service as portfolio_module
+from app.services.portfolio_context_store import PortfolioContextStore
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_valuation import PortfolioValuator, QuoteProvider, is_crypto, symbol_sectors
+
+
+class FakeQuotes(QuoteProvider):
+    """Prices symbols from a table and records every batch request."""
+
+    def __init__(self, name, prices, batch_size=50, crypto=False, delay=0.0):
+        self.name = name
+        self.prices = prices
+        self.batch_size = batch_size
+        self.crypto = crypto
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def supports(self, symbol):
+        return is_crypto(symbol) == self.crypto
+
+    async def fetch(self, symbols):
+        self.batches.append(list(symbols))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return {symbol: {"price": self.prices[symbol], "change_percent": 1.0} for symbol in symbols if symbol in self.prices}
+
+
+@pytest.fixture
+def providers():
+    equities = FakeQuotes("equities", {f"S{i}": float(i + 1) for i in range(500)} | {"AAPL": 200.0, "MSFT": 400.0})
+    crypto = FakeQuotes("crypto", {"BTC": 60000.0, "ETH": 3000.0}, crypto=True)
+    return equities, crypto
+
+
+class TestQuotes:
+    """Test batched fetching and the price cache."""
+
+    @pytest.mark.asyncio
+    async def test_500_positions_are_one_round_of_batches(self, providers):
+        equities, crypto = providers
+        equities.delay = 0.01
+        valuator = PortfolioValuator([crypto, equities])
+        holdings = [{"symbol": f"S{i}", "amount": 1} for i in range(500)] + [{"symbol": "btc", "amount": 1}]
+
+        valuation = await valuator.value_portfolio(holdings)
+
+        assert [len(batch) for batch in equities.batches] == [50] * 10
+        assert crypto.batches == [["BTC"]]
+        assert equities.max_in_flight > 1
+        assert valuation["totals"]["priced"] == 501
+
+    @pytest.mark.asyncio
+    async def test_cached_prices_skip_requests_until_expiry(self, providers):
+        equities, crypto = providers
+        now = [datetime(2025, 1, 1)]
+        valuator = PortfolioValuator([crypto, equities], ttl=timedelta(seconds=30), clock=lambda: now[0])
+
+        await valuator.quotes(["AAPL", "BTC"])
+        await valuator.quotes(["AAPL", "MSFT", "BTC"])
+        now[0] += timedelta(seconds=31)
+        await valuator.quotes(["AAPL"])
+
+        assert equities.batches == [["AAPL"], ["MSFT"], ["AAPL"]]
+        assert valuator.stats()["cache_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_leaves_symbols_unpriced(self, providers):
+        equities, crypto = providers
+
+        async def broken(symbols):
+            raise RuntimeError("provider down")
+
+        crypto.fetch = broken
+        valuator = PortfolioValuator([crypto, equities])
+
+        valuation = await valuator.value_portfolio([{"symbol": "BTC", "amount": 1}, {"symbol": "AAPL", "amount": 2}])
+
+        assert valuation["totals"]["unpriced"] == ["BTC"]
+        assert valuation["totals"]["market_value"] == 400
+        assert valuator.stats()["failed_batches"] == 1
+
+
+class TestValuation:
+    """Test vectorized market value, P&L, weights and exposure."""
+
+    def test_positions_totals_and_exposure(self):
+        valuator = PortfolioValuator([])
+        quotes = {"AAPL": {"price": 200.0}, "MSFT": {"price": 400.0}, "BTC": {"price": 50000.0}}
+        holdings = [
+            {"symbol": "AAPL", "amount": 10, "average_price": 150.0},
+            {"symbol": "MSFT", "amount": 5, "average_price": None},
+            {"symbol": "BTC", "amount": 0.1, "average_price": 60000.0},
+            {"symbol": "ZZZ", "amount": 3, "average_price": 1.0},
+        ]
+
+        valuation = valuator.value(holdings, quotes, sectors={"AAPL": "Technology"})
+        positions = {row["symbol"]: row for row in valuation["positions"]}
+
+        assert positions["AAPL"]["unrealized_pnl"] == 500
+        assert positions["AAPL"]["unrealized_pnl_pct"] == pytest.approx(500 / 1500)
+        assert positions["MSFT"]["unrealized_pnl"] is None
+        assert positions["BTC"]["unrealized_pnl"] == -1000
+        assert positions["ZZZ"]["market_value"] is None and positions["ZZZ"]["weight"] is None
+        assert [row["symbol"] for row in valuation["positions"]] == ["BTC", "AAPL", "MSFT", "ZZZ"]
+        assert valuation["totals"] == {
+            "market_value": 9000, "cost_basis": 7500, "unrealized_pnl": -500,
+            "unrealized_pnl_pct": pytest.approx(-500 / 7500), "positions": 4, "priced": 3, "unpriced": ["ZZZ"],
+        }
+        assert valuation["sector_exposure"] == pytest.approx({"Crypto": 5000 / 9000, "Unknown": 2000 / 9000, "Technology": 2000 / 9000})
+        assert valuation["asset_class_exposure"] == pytest.approx({"crypto": 5000 / 9000, "equity": 4000 / 9000})
+
+    def test_empty_portfolio(self):
+        valuation = PortfolioValuator([]).value([], {})
+
+        assert valuation["positions"] == []
+        assert valuation["totals"]["market_value"] == 0
+
+    def test_sectors_from_tracked_companies(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine, tables=[User.__table__, Company.__table__, CompanyDataSource.__table__])
+        with Session(engine) as session:
+            session.add(Company(id="c1", name="Apple", sector="Technology"))
+            session.add(Company(id="c2", name="Uniswap Labs", sector="DeFi", token_symbol="UNI"))
+            session.add(CompanyDataSource(company_id="c1", ticker_symbol="AAPL"))
+            session.commit()
+
+            assert symbol_sectors(session, ["aapl", "UNI", "MSFT"]) == {"AAPL": "Technology", "UNI": "DeFi"}
+
+
+class TestValuedSummary:
+    """Test the PortfolioService summary with live valuation."""
+
+    @pytest.mark.asyncio
+    async def test_summary_includes_valuation(self, tmp_path, monkeypatch, providers):
+        monkeypatch.setattr(portfolio_module, "portfolio_context_store", PortfolioContextStore(redis_factory=None))
+        service = PortfolioService()
+        service.data_dir = str(tmp_path)
+        service.import_holdings("u1", [{"symbol": "AAPL", "amount": 2, "price": 100}, {"symbol": "ETH", "amount": 1}])
+
+        summary = await service.get_valued_summary("u1", valuator=PortfolioValuator(list(providers)))
+
+        assert summary["holdings"]["AAPL"]["amount"] == 2
+        assert summary["totals"]["market_value"] == 3400
+        assert summary["totals"]["unrealized_pnl"] == 200
+        assert "$3,400.00" in summary["message"]
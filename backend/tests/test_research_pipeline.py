@@ -0,0 +1,130 @@
+"""
+Unit tests for ResearchPipeline - concurrent, budgeted deep research.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.research_pipeline import (
+    MAX_FINDINGS,
+    ResearchBudget,
+    ResearchPipeline,
+    deduplicate_sources,
+    estimate_jaccard,
+    minhash_signature,
+)
+
+
+class FakeSearchService:
+    """Search service with a fixed per-call latency."""
+
+    def __init__(self, delay=0.2, slow_query=None, slow_delay=5.0):
+        self.delay = delay
+        self.slow_query = slow_query
+        self.slow_delay = slow_delay
+        self.fetched_urls = []
+
+    async def search(self, query, num_results=10, include_contents=True):
+        await asyncio.sleep(self.slow_delay if query == self.slow_query else self.delay)
+        return [
+            {"title": f"{query} result {i}", "url": f"https://{query.replace(' ', '-')}.com/{i}", "text": f"snippet about {query} number {i}"}
+            for i in range(num_results)
+        ]
+
+    async def fetch_contents(self, urls, max_characters=4000):
+        self.fetched_urls.extend(urls)
+        return {url: ("x" * 10_000)[:max_characters] for url in urls}
+
+
+class FakeAIService:
+    """AI service returning one bullet per call after a fixed delay."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.prompts = []
+
+    async def generate_response(self, prompt, max_tokens=500, temperature=0.7):
+        self.calls += 1
+        self.prompts.append(prompt)
+        number = self.calls
+        await asyncio.sleep(self.delay)
+        return f"• Finding number {number} with enough detail to keep"
+
+
+class TestNearDuplicateRemoval:
+    """Test MinHash-based source deduplication."""
+
+    def test_identical_text_has_full_similarity(self):
+        text = "Nvidia reports record data center revenue in the second quarter"
+        assert estimate_jaccard(minhash_signature(text), minhash_signature(text)) == 1.0
+
+    def test_near_duplicates_are_dropped(self):
+        sources = [
+            {"url": "https://a.com/1", "title": "Nvidia reports record data center revenue", "text": "Revenue grew 150% year over year driven by AI demand from hyperscalers"},
+            {"url": "https://b.com/2", "title": "Nvidia reports record data center revenue", "text": "Revenue grew 150% year over year driven by AI demand from hyperscalers!"},
+            {"url": "https://a.com/1", "title": "Exact URL duplicate", "text": "anything"},
+            {"url": "https://c.com/3", "title": "Bitcoin ETF inflows slow", "text": "Spot ETF flows turned negative this week as prices consolidated"},
+        ]
+
+        unique = deduplicate_sources(sources)
+
+        assert [s["url"] for s in unique] == ["https://a.com/1", "https://c.com/3"]
+
+
+class TestResearchPipeline:
+    """Test concurrency, byte budget and deadline handling."""
+
+    @pytest.mark.asyncio
+    async def test_searches_and_extractions_run_concurrently(self):
+        search, ai = FakeSearchService(delay=0.2), FakeAIService(delay=0.2)
+        pipeline = ResearchPipeline(search, ai, ResearchBudget(chunk_chars=100))
+
+        started = time.monotonic()
+        result = await pipeline.run("ai chips", ["ai chips news", "ai chips revenue", "ai chips outlook"], max_sources=6)
+        elapsed = time.monotonic() - started
+
+        # search (0.2) + map (0.2) + reduce (0.2), not 3 searches + N extractions in series
+        assert elapsed < 0.9
+        assert ai.calls > 2
+        assert len(result.sources) == 6
+        assert result.synthesis
+        assert not result.partial
+
+    @pytest.mark.asyncio
+    async def test_content_is_capped_by_byte_budget(self):
+        pipeline = ResearchPipeline(
+            FakeSearchService(delay=0), FakeAIService(delay=0),
+            ResearchBudget(max_content_bytes=5_000, max_bytes_per_source=2_000),
+        )
+
+        result = await pipeline.run("budget", ["budget a", "budget b"], max_sources=6)
+
+        assert result.content_bytes == 5_000
+        assert max(len(s["text"]) for s in result.sources) == 2_000
+
+    @pytest.mark.asyncio
+    async def test_deadline_returns_partial_results(self):
+        search = FakeSearchService(delay=0.05, slow_query="slow query", slow_delay=5.0)
+        pipeline = ResearchPipeline(search, FakeAIService(delay=5.0), ResearchBudget(deadline_seconds=0.3))
+
+        started = time.monotonic()
+        result = await pipeline.run("topic", ["fast query", "slow query"], max_sources=4)
+
+        assert time.monotonic() - started < 1.0
+        assert result.partial
+        assert result.sources
+        assert any("timed out" in step for step in result.search_progress)
+
+    @pytest.mark.asyncio
+    async def test_findings_are_capped_before_synthesis(self):
+        ai = FakeAIService(delay=0)
+        pipeline = ResearchPipeline(FakeSearchService(delay=0), ai, ResearchBudget(chunk_chars=50))
+
+        result = await pipeline.run("caps", ["caps a", "caps b"], max_sources=8)
+
+        assert ai.calls - 1 > MAX_FINDINGS
+        assert result.findings == [f"Finding number {i} with enough detail to keep" for i in range(1, MAX_FINDINGS + 1)]
+        assert ai.prompts[-1].count("• Finding number") == MAX_FINDINGS
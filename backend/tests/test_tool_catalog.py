@@ -0,0 +1,73 @@
+"""
+Unit tests for ToolCatalog - precompiled tool schemas and relevance-based subsetting.
+"""
+
+import pytest
+
+from app.services.tool_catalog import ToolCatalog, tokenize
+
+
+def _schema(name, description, **properties):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": {k: {"type": "string", "description": v} for k, v in properties.items()},
+                "required": [],
+            },
+        },
+    }
+
+
+@pytest.fixture
+def catalog():
+    """Small catalog covering distinct tool domains."""
+    return ToolCatalog(
+        [
+            _schema("get_crypto_price_history", "Historical cryptocurrency prices", symbol="Crypto symbol like BTC"),
+            _schema("get_company_news", "Latest news articles for a company", symbol="Stock ticker"),
+            _schema("execute_portfolio_action", "Add or remove holdings in the user's portfolio", action="add/remove"),
+            _schema("format_financial_table", "Format financial data into CLI tables"),
+            _schema("get_options_chain", "Options chain with strikes and expirations", symbol="Stock ticker"),
+        ],
+        extra_text={"get_company_news": "News headlines"},
+    )
+
+
+class TestToolCatalog:
+    """Test catalog construction, immutability and ranking."""
+
+    def test_tokenize_splits_snake_case_and_drops_stopwords(self):
+        assert tokenize("get_company_news for the Holdings") == ["company", "new", "holding"]
+
+    def test_all_schemas_returns_fresh_copies(self, catalog):
+        schemas = catalog.all_schemas()
+        schemas[0]["function"]["name"] = "mutated"
+
+        assert len(catalog) == 5
+        assert catalog.all_schemas()[0]["function"]["name"] == "get_crypto_price_history"
+
+    def test_duplicate_names_are_skipped(self):
+        catalog = ToolCatalog([_schema("a_tool", "first"), _schema("a_tool", "second")])
+
+        assert catalog.names == ["a_tool"]
+
+    @pytest.mark.parametrize("query,expected", [
+        ("price of BTC crypto", "get_crypto_price_history"),
+        ("latest news on tesla", "get_company_news"),
+        ("add 5 NVDA to my portfolio", "execute_portfolio_action"),
+        ("options chain for AAPL", "get_options_chain"),
+    ])
+    def test_rank_puts_relevant_tool_first(self, catalog, query, expected):
+        assert catalog.rank(query)[0][0] == expected
+
+    def test_select_includes_pinned_tools_plus_top_k(self, catalog):
+        selected = catalog.select("options chain", top_k=2, pinned=["format_financial_table", "unknown"])
+        names = [s["function"]["name"] for s in selected]
+
+        assert names[0] == "format_financial_table"
+        assert names[1] == "get_options_chain"
+        assert len(names) == 3
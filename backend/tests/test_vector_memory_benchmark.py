@@ -0,0 +1,82 @@
+"""
+Tests for the offline vector memory benchmark.
+"""
+
+import json
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.vector_memory_benchmark import BACKEND_DIR, HashingEmbedding, SyntheticCorpus, run_ops
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class TestHashingEmbedding:
+    """Test the deterministic offline embedding."""
+
+    def test_deterministic_unit_vectors(self):
+        model = HashingEmbedding(dim=64)
+        first, again = model(["BTC price momentum"])[0], HashingEmbedding(dim=64).embed("BTC price momentum")
+
+        assert first == again
+        assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0)
+
+    def test_shared_words_are_closer(self):
+        model = HashingEmbedding()
+        query = model.embed("NVDA earnings guidance")
+
+        assert _cosine(query, model.embed("NVDA earnings beat, guidance raised")) > _cosine(query, model.embed("SOL tokenomics"))
+
+
+class TestSyntheticCorpus:
+    """Test reproducibility and tenant spread of generated documents."""
+
+    def test_items_are_reproducible_and_spread_over_tenants(self):
+        corpus = SyntheticCorpus(seed=7, tenants=4)
+
+        assert corpus.conversation(11) == SyntheticCorpus(seed=7, tenants=4).conversation(11)
+        assert corpus.creation(3) != SyntheticCorpus(seed=8, tenants=4).creation(3)
+        assert {corpus.company(i)["tenant_id"] for i in range(8)} == {f"bench-{t}" for t in range(4)}
+
+
+class TestRunOps:
+    """Test the bounded-concurrency driver."""
+
+    @pytest.mark.asyncio
+    async def test_counts_errors_and_latencies(self):
+        async def op(i):
+            if i % 5 == 0:
+                raise RuntimeError("boom")
+            return i % 7 != 0
+
+        summary = (await run_ops("op", range(20), op, concurrency=3)).summary()
+
+        assert summary["ops"] == 20
+        assert summary["errors"] == 6  # 0, 5, 10, 15 raise; 7, 14 return False
+
+
+class TestEndToEnd:
+    """Run the CLI against a scratch store."""
+
+    def test_small_run_reports_every_workload(self, tmp_path):
+        out = tmp_path / "results.json"
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.vector_memory_benchmark", "--sizes", "30", "--queries", "3",
+             "--concurrency", "2", "--tenants", "3", "--dim", "32", "--no-startup",
+             "--workdir", str(tmp_path / "home"), "--json", str(out)],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300, env={**os.environ}
+        )
+        assert completed.returncode == 0, completed.stderr[-2000:]
+
+        checkpoint = json.loads(out.read_text())["checkpoints"][0]
+        assert {s["workload"] for s in checkpoint["ingest"]} == {"conversations", "creations", "companies"}
+        assert all(s["errors"] == 0 and s["documents"] == 30 for s in checkpoint["ingest"])
+        assert len(checkpoint["queries"]) == 7
+        assert checkpoint["resources"]["disk_mb"] >= 0
+        assert (tmp_path / "home" / ".redpill" / "unified_memory").is_dir()
@@ -0,0 +1,219 @@
+"""
+Tests for the two-tier widget data cache.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.api import dashboards as dashboards_api
+from app.models.cache import CompanyDataCache
+from app.models.companies import Company
+from app.models.dashboards import CompanyDataSource, DashboardLayout, WidgetConfiguration, WidgetDataCache, WidgetType
+from app.models.persons import Person
+from app.models.tags import CompanyTag, Tag
+from app.models.users import User, UserRole
+from app.services import widget_cache as widget_cache_module
+from app.services.widget_cache import STRUCTURED_WIDGET_TYPE, WidgetCache, ttl_for
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine, tables=[
+        User.__table__, Company.__table__, DashboardLayout.__table__, WidgetConfiguration.__table__,
+        CompanyDataSource.__table__, WidgetDataCache.__table__, CompanyDataCache.__table__,
+        Person.__table__, Tag.__table__, CompanyTag.__table__,
+    ])
+    with Session(engine) as session:
+        session.add(User(id="u1", email="gp@fund.com", full_name="GP", hashed_password="x"))
+        session.add(Company(id="c1", name="Acme Labs", sector="AI/ML"))
+        session.add(CompanyDataSource(company_id="c1", ticker_symbol="ACME"))
+        session.add(DashboardLayout(id="l1", company_id="c1", user_id="u1"))
+        session.add(WidgetConfiguration(id="w1", dashboard_layout_id="l1", widget_type=WidgetType.PRICE_CHART,
+                                        position_x=0, position_y=0, width=6, height=4, config='{"timeframe": "3M"}'))
+        session.add(WidgetConfiguration(id="w2", dashboard_layout_id="l1", widget_type=WidgetType.FUNDAMENTALS,
+                                        position_x=6, position_y=0, width=6, height=3))
+        session.commit()
+    return engine
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = WidgetCache()
+    monkeypatch.setattr(widget_cache_module, "widget_cache", cache)
+    return cache
+
+
+class TestKeys:
+    """Test deterministic keys and per-type TTLs."""
+
+    def test_key_ignores_config_order_and_tracks_versions(self, cache):
+        a = cache.cache_key("c1", WidgetType.PRICE_CHART, '{"a": 1, "b": 2}', "v1")
+
+        assert a == cache.cache_key("c1", "price_chart", {"b": 2, "a": 1}, "v1")
+        assert a.startswith("widget:c1:price_chart:")
+        assert a != cache.cache_key("c1", WidgetType.PRICE_CHART, {"a": 1, "b": 2}, "v2")
+
+    def test_ttls_per_widget_type(self):
+        assert ttl_for(WidgetType.PRICE_CHART) < ttl_for("fundamentals")
+        assert ttl_for("unknown") == timedelta(hours=1)
+
+
+class TestReadsAndWrites:
+    """Test the memory and database tiers."""
+
+    def test_layout_read_is_one_cache_query(self, engine, statements, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.PRICE_CHART, '{"timeframe": "3M"}', {"prices": [1, 2]})
+            cache.set(session, "c1", WidgetType.FUNDAMENTALS, "{}", {"pe": 20})
+            session.commit()
+
+        cold = WidgetCache()
+        with Session(engine) as session:
+            statements.clear()
+            widgets = cold.get_layout(session, "l1")
+
+        assert widgets["w1"]["data"] == {"prices": [1, 2]}
+        assert widgets["w2"]["data"] == {"pe": 20}
+        assert sum("FROM widget_data_cache" in statement for statement in statements) == 1
+        assert cold.stats()["db_hits"] == 2
+
+    def test_warm_reads_stay_in_memory(self, engine, statements, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.NEWS_FEED, {}, ["headline"])
+            session.commit()
+            statements.clear()
+
+            assert cache.get(session, "c1", WidgetType.NEWS_FEED, {}) == ["headline"]
+
+        assert statements == []
+        assert cache.stats()["memory_hits"] == 1
+
+    def test_expired_rows_miss_and_are_purged(self, engine):
+        now = [datetime(2025, 1, 1)]
+        cache = WidgetCache(clock=lambda: now[0])
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.PRICE_CHART, {}, {"prices": []})
+            session.commit()
+
+            now[0] += timedelta(minutes=6)
+            assert cache.get(session, "c1", WidgetType.PRICE_CHART, {}) is None
+            assert cache.purge_expired(session) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_or_compute_only_computes_on_miss(self, engine, cache):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return {"value": 42}
+
+        with Session(engine) as session:
+            first = await cache.get_or_compute(session, "c1", "profile", {}, compute)
+            second = await cache.get_or_compute(session, "c1", "profile", {}, compute)
+
+        assert first == second == {"value": 42}
+        assert len(calls) == 1
+
+
+class TestInvalidation:
+    """Test dependency-based invalidation."""
+
+    def test_data_source_change_misses_dependent_widgets(self, engine, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.PRICE_CHART, {}, {"ticker": "ACME"})
+            session.commit()
+
+            source = session.exec(select(CompanyDataSource)).one()
+            source.ticker_symbol = "ACM2"
+            session.add(source)
+            session.commit()
+
+            assert cache.get(session, "c1", WidgetType.PRICE_CHART, {}) is None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_company_data_refresh_misses_dependent_widgets(self, engine, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.FUNDAMENTALS, {}, {"pe": 20})
+            session.commit()
+
+            session.add(CompanyDataCache(
+                company_identifier="acmelabs", data_type="profile", cached_data={"name": "Acme Labs"},
+                source="tavily", created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
+                expires_at=datetime.utcnow() + timedelta(days=1), last_fetched=datetime.utcnow(),
+            ))
+            session.commit()
+
+            assert cache.get(session, "c1", WidgetType.FUNDAMENTALS, {}) is None
+
+    def test_people_changes_drop_stored_structured_widgets(self, engine, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", STRUCTURED_WIDGET_TYPE, {}, {"team": []})
+            cache.set(session, "c1", WidgetType.PRICE_CHART, {}, {"prices": []})
+            session.commit()
+
+            session.add(Person(name="Ada", company_id="c1"))
+            session.commit()
+            stored = session.exec(select(WidgetDataCache.cache_key)).all()
+
+            assert cache.get(session, "c1", STRUCTURED_WIDGET_TYPE, {}) is None
+            assert cache.get(session, "c1", WidgetType.PRICE_CHART, {}) == {"prices": []}
+        assert [key.split(":")[2] for key in stored] == [WidgetType.PRICE_CHART.value]
+
+    def test_renamed_tag_drops_structured_widgets_of_tagged_companies(self, engine, cache):
+        with Session(engine) as session:
+            session.add(Tag(id="t1", name="AI"))
+            session.add(CompanyTag(company_id="c1", tag_id="t1"))
+            session.commit()
+            cache.set(session, "c1", STRUCTURED_WIDGET_TYPE, {}, {"tags": ["AI"]})
+            session.commit()
+
+            tag = session.get(Tag, "t1")
+            tag.name = "Machine Learning"
+            session.add(tag)
+            session.commit()
+
+            assert cache.get(session, "c1", STRUCTURED_WIDGET_TYPE, {}) is None
+
+    def test_invalidate_company_deletes_rows(self, engine, cache):
+        with Session(engine) as session:
+            cache.set(session, "c1", WidgetType.PRICE_CHART, {}, {"prices": []})
+            cache.set(session, "c2", WidgetType.PRICE_CHART, {}, {"prices": []})
+            session.commit()
+
+            assert cache.invalidate_company(session, "c1") == 1
+            session.commit()
+            remaining = session.exec(select(WidgetDataCache.cache_key)).all()
+
+        assert [key.split(":")[1] for key in remaining] == ["c2"]
+
+    @pytest.mark.asyncio
+    async def test_clear_endpoint_requires_access_to_the_company(self, engine, cache, monkeypatch):
+        monkeypatch.setattr(dashboards_api, "widget_cache", cache)
+        with Session(engine) as session:
+            session.add(User(id="u2", email="lp@fund.com", full_name="LP", hashed_password="x"))
+            session.add(User(id="admin", email="ops@fund.com", full_name="Ops", hashed_password="x", role=UserRole.ADMIN))
+            cache.set(session, "c1", WidgetType.PRICE_CHART, {}, {"prices": []})
+            session.commit()
+            users = {user_id: session.get(User, user_id) for user_id in ("u1", "u2", "admin")}
+
+            for user_id, company_id, status in [("u2", "c1", 403), ("u1", "missing", 404)]:
+                with pytest.raises(HTTPException) as raised:
+                    await dashboards_api.invalidate_company_widget_cache(company_id, current_user=users[user_id], db=session)
+                assert raised.value.status_code == status
+            assert cache.get(session, "c1", WidgetType.PRICE_CHART, {}) == {"prices": []}
+
+            assert (await dashboards_api.invalidate_company_widget_cache("c1", current_user=users["u1"], db=session))["deleted"] == 1
+            assert (await dashboards_api.invalidate_company_widget_cache("c1", current_user=users["admin"], db=session))["deleted"] == 0
@@ -0,0 +1,180 @@
+"""
+Tests for the vectorized XIRR engine and the GP dashboard IRR breakdown.
+"""
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.api.gp_dashboard import CashFlow, irr_breakdown, xirr as dashboard_xirr
+from app.models.deals import DealStatus
+from app.services.xirr_engine import quarter_ends, rolling_xirr, xirr, xirr_by, xirr_many, xirr_matrix
+
+
+def _npv(rate, dates, amounts):
+    start = min(dates)
+    return sum(amount / (1 + rate) ** ((day - start).days / 365) for day, amount in zip(dates, amounts))
+
+
+class TestXirr:
+    """Test single-series IRR against known values and edge cases."""
+
+    def test_matches_spreadsheet_xirr(self):
+        dates = [date(2008, 1, 1), date(2008, 3, 1), date(2008, 10, 30), date(2009, 2, 15), date(2009, 4, 1)]
+        amounts = [-10000, 2750, 4250, 3250, 2750]
+
+        assert abs(xirr(dates, amounts) - 0.373362535) < 1e-8
+
+    def test_unordered_dates_and_mixed_date_types(self):
+        rate = xirr(["2021-01-01", datetime(2020, 1, 1, 15, 30)], [110, -100])
+
+        assert abs(rate - 0.0997) < 1e-3
+
+    def test_no_sign_change_has_no_irr(self):
+        assert xirr([date(2020, 1, 1), date(2021, 1, 1)], [-100, -50]) is None
+        assert xirr([date(2020, 1, 1)], [-100]) is None
+
+    def test_extreme_rates_are_bracketed(self):
+        dates = [date(2021, 1, 1), date(2022, 1, 1)]
+
+        assert abs(xirr(dates, [-100, 1]) - -0.99) < 1e-6
+        assert abs(xirr(dates, [-100, 500_000]) - 4999.0) < 1e-3
+
+    def test_nearby_roots_between_coarse_rungs(self):
+        dates = [date(2020, 1, 1), date(2021, 1, 1), date(2022, 1, 1)]
+        amounts = [-100, 230, -132]
+
+        rate = xirr(dates, amounts)
+
+        assert rate is not None and 0.1 < rate < 0.15
+        years = np.array([0, 366, 731]) / 365.0
+        assert abs(np.sum(np.array(amounts) / (1 + rate) ** years)) < 1e-8
+        assert dashboard_xirr([CashFlow(d, a, "flow") for d, a in zip(dates, amounts)]) == rate
+
+    def test_dashboard_wrapper_keeps_zero_for_missing_irr(self):
+        flows = [CashFlow(date(2021, 1, 1), -100, "call"), CashFlow(date(2022, 1, 1), 121, "valuation")]
+
+        assert abs(dashboard_xirr(flows) - 0.21) < 1e-9
+        assert dashboard_xirr(flows[:1]) == 0.0
+        assert dashboard_xirr([flows[0], flows[0]]) == 0.0
+
+
+class TestBatchXirr:
+    """Test solving many groups in one pass."""
+
+    def test_groups_match_individual_solves(self):
+        rng = np.random.default_rng(7)
+        groups, dates, amounts = [], [], []
+        for g in range(50):
+            start = date(2015, 1, 1) + timedelta(days=int(rng.integers(0, 2000)))
+            days = np.sort(rng.integers(0, 3000, 5))
+            flows = [-float(rng.uniform(1e5, 1e6))] + list(rng.uniform(0, 5e5, 4))
+            for offset, amount in zip(days, flows):
+                groups.append(g)
+                dates.append(start + timedelta(days=int(offset) - int(days[0])))
+                amounts.append(amount)
+
+        rates = xirr_many(groups, dates, amounts)
+
+        for g in (0, 17, 49):
+            mask = [i for i, group in enumerate(groups) if group == g]
+            single = xirr([dates[i] for i in mask], [amounts[i] for i in mask])
+            assert abs(rates[g] - single) < 1e-9
+            assert abs(_npv(rates[g], [dates[i] for i in mask], [amounts[i] for i in mask])) < 1e-3
+
+    def test_xirr_by_keeps_original_keys(self):
+        dates = [date(2021, 1, 1), date(2022, 1, 1)] * 2 + [date(2021, 1, 1)]
+        amounts = [-100, 110, -100, 150, -5]
+
+        rates = xirr_by([2020, 2020, 2021, 2021, 2022], dates, amounts)
+
+        assert set(rates) == {2020, 2021, 2022}
+        assert abs(rates[2020] - 0.10) < 1e-9
+        assert abs(rates[2021] - 0.50) < 1e-9
+        assert rates[2022] is None
+
+    def test_matrix_rows_match_grouped_solve(self):
+        rng = np.random.default_rng(3)
+        amounts = rng.uniform(0, 4e5, (200, 12))
+        amounts[:, 0] = -2e6
+        amounts[5] = -1  # No inflow, no IRR
+        days = np.arange(12) * 91 + 18000
+
+        rates = xirr_matrix(amounts, days)
+        group, column = np.nonzero(amounts)
+        expected = xirr_many(group, days[column], amounts[group, column], n_groups=200)
+
+        assert np.isnan(rates[5]) and np.isnan(expected[5])
+        assert np.allclose(rates, expected, atol=1e-9, equal_nan=True)
+
+    def test_thousands_of_deals_solve_in_one_pass(self):
+        rng = np.random.default_rng(0)
+        n_groups, per_group = 5000, 8
+        group = np.repeat(np.arange(n_groups), per_group)
+        days = np.tile(np.arange(per_group) * 120, n_groups) + rng.integers(0, 30, n_groups * per_group)
+        amounts = rng.uniform(0, 2e6, n_groups * per_group)
+        amounts[::per_group] = -5e6
+
+        rates = xirr_many(group, days, amounts, n_groups=n_groups)
+
+        assert not np.isnan(rates).any()
+        # Each batched rate zeroes its own deal's NPV
+        flows, years = amounts.reshape(n_groups, per_group), days.reshape(n_groups, per_group) / 365.0
+        npv = (flows / (1 + rates[:, None]) ** (years - years[:, :1])).sum(axis=1)
+        assert np.all(np.abs(npv) < 1e-6 * np.abs(flows).sum(axis=1))
+
+
+class TestRollingXirr:
+    """Test quarter-end grids and since-inception IRR by date."""
+
+    def test_quarter_ends_include_partial_quarter(self):
+        assert quarter_ends(date(2023, 11, 5), date(2024, 5, 5)) == [
+            date(2023, 12, 31), date(2024, 3, 31), date(2024, 5, 5)
+        ]
+        assert quarter_ends(date(2024, 1, 1), date(2024, 3, 31)) == [date(2024, 3, 31)]
+
+    def test_rolling_irr_uses_flows_to_date_and_terminal_values(self):
+        dates = [date(2020, 1, 1), date(2020, 6, 1)]
+        amounts = [-100, 20]
+        as_of = [date(2020, 3, 31), date(2021, 1, 1)]
+
+        rates = rolling_xirr(dates, amounts, as_of, terminal_values=[0, 100])
+
+        assert rates[0] is None
+        assert abs(rates[1] - xirr(dates + [date(2021, 1, 1)], amounts + [100])) < 1e-12
+
+
+class TestIrrBreakdown:
+    """Test the GP dashboard breakdown over deal/company rows."""
+
+    @staticmethod
+    def _row(deal_id, sector, created, status, target=1_000_000):
+        return (
+            SimpleNamespace(id=deal_id, created_at=created, our_target=target, status=status),
+            SimpleNamespace(sector=sector),
+        )
+
+    def test_breakdown_by_deal_sector_vintage_and_quarter(self):
+        as_of = date(2024, 1, 1)
+        rows = [
+            self._row("d1", "AI/ML", datetime(2022, 1, 1), DealStatus.TRACK),
+            self._row("d2", "AI/ML", datetime(2023, 1, 1), DealStatus.DEAL),
+            self._row("d3", None, datetime(2023, 6, 1), DealStatus.PASSED),
+            self._row("d4", "FinTech", None, DealStatus.DEAL),
+        ]
+
+        breakdown = irr_breakdown(rows, as_of)
+
+        expected_d2 = xirr([date(2023, 1, 1), as_of], [-1_000_000, 1_200_000])
+        assert breakdown["by_deal"]["d2"] == round(expected_d2 * 100, 2)
+        assert breakdown["by_deal"]["d3"] is None
+        assert "d4" not in breakdown["by_deal"]
+        assert set(breakdown["by_sector"]) == {"AI/ML", "Unknown"}
+        assert set(breakdown["by_vintage"]) == {2022, 2023}
+        quarters = breakdown["rolling_quarterly"]
+        assert quarters[0]["quarter_end"] == "2022-03-31"
+        assert quarters[-1]["quarter_end"] == "2024-01-01"
+
+    def test_empty_portfolio(self):
+        assert irr_breakdown([], date(2024, 1, 1))["by_deal"] == {}
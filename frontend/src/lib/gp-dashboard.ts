@@ -148,6 +148,74 @@ export interface RiskMetrics {
   correlation_matrix: any
 }
 
+export interface DashboardWidgetResult<T = any> {
+  status: 'ok' | 'not_modified' | 'error'
+  etag?: string
+  elapsed_ms: number
+  data?: T
+  error?: string
+}
+
+export interface DashboardBundle {
+  widgets: { [widget: string]: DashboardWidgetResult }
+  datasets: { [dataset: string]: { elapsed_ms: number | null; error: string | null } }
+  elapsed_ms: number
+}
+
+export interface PercentileBands {
+  p5: number | null
+  p25: number | null
+  p50: number | null
+  p75: number | null
+  p95: number | null
+  mean: number | null
+}
+
+export interface FundSimulationAssumptions {
+  scenarios?: number
+  seed?: number
+  as_of?: string
+  fund_size?: number
+  management_fee?: number
+  fee_years?: number
+  carry?: number
+  fund_life_years?: number
+  distribution_lag_quarters?: number
+  market_volatility?: number
+  outcomes?: { [stage: string]: Array<[number, number, number]> }
+  exit_years?: { [stage: string]: [number, number] }
+}
+
+export interface FundSimulation {
+  scenarios: number
+  seed: number | null
+  as_of: string
+  positions_count: number
+  invested: number
+  committed: number
+  paid_in: number
+  fund: {
+    net_tvpi: PercentileBands
+    gross_moic: PercentileBands
+    net_irr: PercentileBands
+    probability_of_loss: number
+    probability_3x: number
+  }
+  exits: Array<{ year: number; exit_count: PercentileBands; exit_value: PercentileBands }>
+  distributions: Array<{ quarter_end: string; amount: PercentileBands; cumulative_dpi: PercentileBands }>
+  calls: Array<{ quarter_end: string; investments: number; fees: number; amount: number; projected: boolean }>
+  positions: Array<{
+    deal_id: string
+    company: string
+    stage: string
+    invested: number
+    expected_multiple: number
+    probability_of_loss: number
+    probability_3x: number
+  }>
+  elapsed_ms: number
+}
+
 // API Base URL
 const API_BASE = '/api/v1/gp'
 
@@ -264,6 +332,33 @@ export class GPDashboardAPI {
     if (!response.ok) throw new Error('Failed to fetch risk metrics')
     return response.json()
   }
+
+  // Monte Carlo outcomes for the current portfolio under the given assumptions
+  static async simulateFund(assumptions: FundSimulationAssumptions = {}): Promise<FundSimulation> {
+    const response = await fetch(`${API_BASE}/fund/simulate`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(assumptions)
+    })
+    if (!response.ok) throw new Error('Failed to simulate fund outcomes')
+    return response.json()
+  }
+
+  // All widgets in one request; pass the last ETags to skip unchanged widgets
+  static async getDashboardBundle(
+    widgets?: string[],
+    etags: { [widget: string]: string } = {},
+    startDate?: string,
+    endDate?: string
+  ): Promise<DashboardBundle> {
+    const response = await fetch(`${API_BASE}/dashboard`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ widgets, etags, start_date: startDate, end_date: endDate })
+    })
+    if (!response.ok) throw new Error('Failed to fetch dashboard bundle')
+    return response.json()
+  }
 }
 
 // KPI Calculation utilities